@@ -8,13 +8,14 @@
 - users: 用户管理相关API
 - chat: AI对话相关API
 - simulation: 仿真任务相关API
+- simulation-batch: 批量仿真(参数扫描)相关API
 - visualization: 数据可视化相关API
 - models: 模型管理相关API
 """
 
 from fastapi import APIRouter
 
-from app.api.endpoints import auth, users, chat, simulation, visualization, models
+from app.api.endpoints import auth, users, chat, simulation, simulation_batch, visualization, models
 
 api_router = APIRouter()
 
@@ -39,6 +40,13 @@ api_router.include_router(
     tags=["chat"]
 )
 
+# 批量仿真路由(需在仿真任务路由之前注册)
+api_router.include_router(
+    simulation_batch.router,
+    prefix="/simulation/batch",
+    tags=["simulation-batch"]
+)
+
 # 仿真任务路由
 api_router.include_router(
     simulation.router,
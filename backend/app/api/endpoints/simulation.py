@@ -5,17 +5,36 @@
 - 查询任务状态和结果
 - 控制任务执行
 - 获取仿真数据
+- 实时推送运行中任务的数据
+- 分页读取任务的输出日志
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Path
+import json
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Any, Dict
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.core.security import get_current_user
 from app.db.models.user import User
-from app.schemas.simulation import SimulationTask, SimulationTaskCreate, SimulationTaskUpdate, SimulationDataResponse
+from app.schemas.simulation import (
+    SimulationTask,
+    SimulationTaskCreate,
+    SimulationTaskUpdate,
+    SimulationDataResponse,
+    SimulationLogPage,
+    SimulationEstimate,
+    SimulationEstimateRequest
+)
 from app.services.simulation import SimulationService
+from app.simulation.live import live_hub
+from app.simulation.logs import LogStream
+from app.simulation.estimator import AdmissionError
+from app.simulation.federation import get_federation
+from app.simulation.task_queue import TaskQueueBackend
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -40,14 +59,48 @@ async def create_simulation_task(
         SimulationTask: 创建的任务详情
         
     Raises:
-        HTTPException (400): 当任务参数无效时
+        HTTPException (400): 当任务参数无效、预热任务不存在或预计代价超过上限时，
+            超限时detail包含message和estimate(代价估计与抽取输出的建议)
         HTTPException (401): 当用户未认证时
     """
     simulation_service = SimulationService(db)
-    task = await simulation_service.create_task(current_user.id, task_in)
+    try:
+        task = await simulation_service.create_task(current_user.id, task_in)
+    except AdmissionError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "estimate": e.estimate})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return task
 
 
+@router.post("/estimate", response_model=SimulationEstimate)
+async def estimate_simulation_task(
+    estimate_in: SimulationEstimateRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """估计仿真任务的代价
+    
+    不创建任务、不启动进程，返回预计的步数、输出字节数和运行时间(按同一模型最近完成的运行估计)，
+    以及创建和运行任务时的准入决定：accept、low_priority(放入低优先级队列)或reject，
+    输出量超限时suggestion给出抽取输出的建议(设置output_stride或output_interval)。
+    
+    Raises:
+        HTTPException (400): 仿真时长或步长不是正数，或采样设置无效时
+    """
+    simulation_service = SimulationService(db)
+    try:
+        return simulation_service.estimate_task(
+            estimate_in.model_path,
+            estimate_in.duration,
+            estimate_in.step_size,
+            estimate_in.output_variables,
+            simulation_service.output_sampling(estimate_in)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/", response_model=List[SimulationTask])
 async def get_user_simulation_tasks(
     skip: int = Query(0, description="分页起始位置"),
@@ -73,6 +126,82 @@ async def get_user_simulation_tasks(
     return tasks
 
 
+@router.get("/cache/stats", response_model=Dict[str, Any])
+async def get_result_cache_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """获取仿真结果缓存的统计信息
+
+    包括命中/未命中/淘汰次数、命中率、缓存条目数和占用的磁盘空间。
+
+    Raises:
+        HTTPException (403): 当前用户不是管理员时
+        HTTPException (404): 结果缓存未启用时
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    simulation_service = SimulationService(db)
+    if simulation_service.result_cache is None:
+        raise HTTPException(status_code=404, detail="Result cache is disabled")
+    return simulation_service.result_cache.stats()
+
+
+@router.get("/agents", response_model=Dict[str, Any])
+async def get_skyeye_agents(
+    current_user: User = Depends(get_current_user)
+):
+    """获取远程模式下各SkyEye代理的状态
+
+    立即查询全部代理，返回是否在线、空闲核数、可用内存、运行数和故障转移次数。
+
+    Raises:
+        HTTPException (403): 当前用户不是管理员时
+        HTTPException (404): 未启用远程模式时
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if settings.SKYEYE_MODE != "remote":
+        raise HTTPException(status_code=404, detail="Remote mode is disabled")
+
+    federation = get_federation()
+    await federation.refresh()
+    return federation.stats()
+
+
+@router.get("/model", response_model=List[Dict[str, Any]])
+@router.get("/models", response_model=List[Dict[str, Any]])
+async def get_available_models(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """获取可用的仿真模型列表
+
+    读取内存中的模型目录，不访问SkyEye。
+    """
+    simulation_service = SimulationService(db)
+    models = await simulation_service.get_available_models()
+    return models
+
+
+@router.get("/model/{model_path:path}/parameters", response_model=Dict[str, Any])
+async def get_model_parameters(
+    model_path: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """获取模型参数信息
+
+    模型路径可以包含子目录；解析结果按模型文件的修改时间和大小缓存。
+    """
+    simulation_service = SimulationService(db)
+    parameters = await simulation_service.get_model_parameters(model_path)
+    if not parameters:
+        raise HTTPException(status_code=404, detail="Model not found")
+    return parameters
+
+
 @router.get("/{task_id}", response_model=SimulationTask)
 async def get_simulation_task(
     task_id: str = Path(..., description="任务ID"),
@@ -168,11 +297,27 @@ async def delete_simulation_task(
 @router.post("/{task_id}/run")
 async def run_simulation_task(
     task_id: str,
-    background_tasks: BackgroundTasks,
+    priority: int = Query(0, ge=0, le=settings.SIMULATION_MAX_PRIORITY, description="优先级，数值越大越先运行"),
+    restart: bool = Query(False, description="清除检查点从头运行"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """运行仿真任务"""
+    """运行仿真任务
+    
+    任务提交到调度器排队，同时运行的仿真数受MAX_WORKERS限制，
+    同优先级下各用户的任务轮流运行。
+    被停止或异常退出的任务再次运行时从最近的检查点继续，restart为true时从头运行。
+    启动前估计任务代价，预计运行时间较长的任务放入低优先级队列，排在所有用户任务之后。
+    
+    Returns:
+        dict: status为queued或running，queue_position为排队位置(从1开始)，
+            priority为实际使用的优先级，estimate为代价估计
+        
+    Raises:
+        HTTPException (404): 任务不存在时
+        HTTPException (403): 无权访问该任务时
+        HTTPException (400): 任务已在排队或运行中、采样设置无效，或预计代价超过上限时
+    """
     simulation_service = SimulationService(db)
     task = await simulation_service.get_task(task_id)
     
@@ -184,13 +329,117 @@ async def run_simulation_task(
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
     # 检查任务状态
-    if task.status == "running":
+    if task.status in ["queued", "running"]:
         raise HTTPException(status_code=400, detail="Task is already running")
     
-    # 在后台运行任务
-    background_tasks.add_task(simulation_service.run_task, task_id)
+    # 提交到调度器
+    try:
+        return await simulation_service.submit_task(task_id, current_user.id, priority, restart)
+    except AdmissionError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "estimate": e.estimate})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{task_id}/status", response_model=Dict[str, Any])
+async def get_simulation_status(
+    task_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """获取仿真任务的运行状态
+    
+    运行中的任务除状态外还返回：
+    - progress: 进度百分比(已输出的仿真时间 / 仿真时长)
+    - simulated_time / duration: 当前仿真时间和总时长
+    - wall_time / cpu_time: 已用的墙钟时间和CPU时间(秒)
+    - rss_bytes: 仿真进程的常驻内存
+    
+    redis执行方式下仿真运行在独立的worker进程中，只返回数据库中记录的状态。
+    
+    Raises:
+        HTTPException (404): 任务不存在时
+        HTTPException (403): 无权访问该任务时
+    """
+    simulation_service = SimulationService(db)
+    task = await simulation_service.get_task(task_id)
+    
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
     
-    return {"status": "started"}
+    # 检查权限
+    if task.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    return await simulation_service.get_task_status(task_id)
+
+
+@router.post("/{task_id}/stop")
+async def stop_simulation_task(
+    task_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """停止排队或运行中的仿真任务
+    
+    排队中的任务移出队列；运行中的任务终止SkyEye进程，已输出的部分结果会被保存。
+    已出队但进程尚未启动的任务在进程启动时立即停止。任务状态变为stopped。
+    
+    Raises:
+        HTTPException (404): 任务不存在时
+        HTTPException (403): 无权访问该任务时
+        HTTPException (400): 任务未在排队或运行时
+    """
+    simulation_service = SimulationService(db)
+    task = await simulation_service.get_task(task_id)
+    
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    # 检查权限
+    if task.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    if not await simulation_service.stop_task(task_id):
+        raise HTTPException(status_code=400, detail="Task is not running")
+    
+    return {"status": "stopped"}
+
+
+@router.get("/{task_id}/logs", response_model=SimulationLogPage)
+async def get_simulation_logs(
+    task_id: str,
+    stream: LogStream = Query(LogStream.STDOUT, description="stdout 或 stderr"),
+    offset: Optional[int] = Query(None, description="起始偏移量(字节)，为空时读取日志末尾"),
+    limit: int = Query(65536, ge=1, le=1 << 20, description="最多读取的字节数"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """分页读取仿真任务的输出日志
+    
+    日志按大小轮转，偏移量为输出的绝对字节位置，轮转后不变。
+    不指定offset时返回日志末尾；以返回的next_offset再次请求可以跟踪运行中任务的新输出，
+    first_offset之前的内容已被轮转删除。
+    
+    Raises:
+        HTTPException (404): 任务不存在时
+        HTTPException (403): 无权访问该任务时
+        HTTPException (400): 仿真引擎不产生输出日志时
+    """
+    simulation_service = SimulationService(db)
+    task = await simulation_service.get_task(task_id)
+    
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    # 检查权限
+    if task.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    try:
+        return await simulation_service.get_task_logs(task_id, stream, offset, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{task_id}/result", response_model=SimulationDataResponse)
@@ -217,29 +466,108 @@ async def get_simulation_result(
     return result
 
 
-@router.get("/model", response_model=List[Dict[str, Any]])
-async def get_available_models(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """获取可用的仿真模型列表"""
-    simulation_service = SimulationService(db)
-    models = await simulation_service.get_available_models()
-    return models
-
-
-@router.get("/model/{model_path}/parameters", response_model=Dict[str, Any])
-async def get_model_parameters(
-    model_path: str,
+@router.get("/{task_id}/stream")
+async def stream_simulation_result(
+    request: Request,
+    task_id: str,
+    since: int = Query(0, ge=0, description="起始样本序号，断线重连时传入上次收到的next_seq"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """获取模型参数信息"""
+    """实时推送运行中任务的仿真数据(Server-Sent Events)
+    
+    任务运行期间，SkyEye每追加一批结果行就推送一个delta事件：
+    
+        event: delta
+        data: {"seq": 起始序号, "next_seq": 下一个序号, "time_points": [...], "data": {变量: [...]}}
+    
+    任务结束后推送end事件并关闭连接。客户端落后过多时会跳过已被环形缓冲区覆盖的样本，
+    此时seq大于请求的since。
+    
+    任务仍在排队或正在启动(查询缓存、启动SkyEye)时还没有结果流，连接保持打开并等待结果流出现，
+    超过LIVE_STREAM_WAIT_SECONDS仍未出现时推送end事件，status为任务当前的状态。
+    
+    redis执行方式下仿真运行在独立的worker进程中，API进程没有实时数据，
+    排队或运行中的任务返回409。
+    
+    Args:
+        request: 请求对象，用于检测客户端断开
+        task_id: 任务ID
+        since: 起始样本序号
+        db: 数据库会话
+        current_user: 当前认证用户
+        
+    Returns:
+        StreamingResponse: text/event-stream响应
+        
+    Raises:
+        HTTPException (404): 任务不存在时
+        HTTPException (403): 无权访问该任务时
+        HTTPException (409): redis执行方式下任务尚未结束时
+    """
     simulation_service = SimulationService(db)
-    parameters = await simulation_service.get_model_parameters(model_path)
-    if not parameters:
-        raise HTTPException(status_code=404, detail="Model not found")
-    return parameters
+    task = await simulation_service.get_task(task_id)
+    
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    # 检查权限
+    if task.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    if settings.TASK_QUEUE_BACKEND == TaskQueueBackend.REDIS and task.status in ("queued", "running"):
+        raise HTTPException(status_code=409, detail="Live stream is not available when tasks run on queue workers")
+    
+    def format_event(event: str, payload: Dict[str, Any]) -> str:
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    async def events():
+        seq = since
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.LIVE_STREAM_WAIT_SECONDS
+        keepalive_at = loop.time() + 15
+        while not await request.is_disconnected():
+            stream = live_hub.get(task_id)
+            if stream is None:
+                # 读取任务的最新状态
+                db.expire_all()
+                current = await simulation_service.get_task(task_id)
+                status = current.status if current is not None else task.status
+                if status not in ("queued", "running") or loop.time() >= deadline:
+                    yield format_event("end", {"status": status, "next_seq": seq})
+                    return
+                # 任务尚未开始输出结果，等待结果流出现
+                if loop.time() >= keepalive_at:
+                    keepalive_at = loop.time() + 15
+                    yield ": keepalive\n\n"
+                await asyncio.sleep(settings.LIVE_TAIL_INTERVAL)
+                continue
+            
+            start, time_points, data = stream.buffer.since(seq, settings.LIVE_EVENT_MAX_SAMPLES)
+            if len(time_points):
+                seq = start + len(time_points)
+                yield format_event("delta", {
+                    "seq": start,
+                    "next_seq": seq,
+                    "time_points": time_points.tolist(),
+                    "data": {var: values.tolist() for var, values in data.items()}
+                })
+            elif stream.finished:
+                yield format_event("end", {
+                    "status": stream.status,
+                    "error_message": stream.error_message,
+                    "next_seq": seq
+                })
+                return
+            elif not await stream.wait(seq, timeout=15):
+                # 保持连接
+                yield ": keepalive\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/results/{task_id}", response_model=SimulationDataResponse)
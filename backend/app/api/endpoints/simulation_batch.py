@@ -0,0 +1,122 @@
+"""批量仿真相关的API端点
+
+提供以下功能：
+- 按基础配置和参数扫描(网格、随机、拉丁超立方)创建批量仿真
+- 查询批次状态和各子任务的状态统计
+- 获取用于比较各次运行的结果索引
+- 停止批次中未完成的任务
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.core.security import get_current_user
+from app.db.models.user import User
+from app.schemas.simulation import SimulationBatch, SimulationBatchCreate, SimulationBatchIndex
+from app.services.simulation_batch import SimulationBatchService
+from app.simulation.estimator import AdmissionError
+
+router = APIRouter()
+
+
+async def get_authorized_batch(
+    batch_id: str,
+    db: Session,
+    current_user: User
+) -> SimulationBatch:
+    """获取批量仿真并检查访问权限"""
+    batch_service = SimulationBatchService(db)
+    batch = await batch_service.get_batch(batch_id)
+
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    # 检查权限
+    if batch.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    return batch
+
+
+@router.post("", response_model=SimulationBatch)
+async def create_simulation_batch(
+    batch_in: SimulationBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """创建批量仿真
+
+    将基础配置与参数扫描展开为多个子任务并立即提交运行。
+    子任务与单个任务一样由调度器排队，同时运行的数量受MAX_WORKERS限制。
+
+    Args:
+        batch_in: 基础配置和参数扫描定义
+        db: 数据库会话
+        current_user: 当前认证用户
+
+    Returns:
+        SimulationBatch: 批量仿真信息，用于后续查询状态和结果索引
+
+    Raises:
+        HTTPException (400): 扫描定义无效、运行数超过上限或单次运行的预计代价超过上限时
+    """
+    batch_service = SimulationBatchService(db)
+    try:
+        return await batch_service.create_batch(current_user.id, batch_in)
+    except AdmissionError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "estimate": e.estimate})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("", response_model=List[SimulationBatch])
+async def get_user_simulation_batches(
+    skip: int = Query(0, description="分页起始位置"),
+    limit: int = Query(100, description="每页数量限制", le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """获取用户的批量仿真列表"""
+    batch_service = SimulationBatchService(db)
+    return await batch_service.get_batches(current_user.id, skip, limit)
+
+
+@router.get("/{batch_id}", response_model=SimulationBatch)
+async def get_simulation_batch(
+    batch_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """获取批量仿真详情，包括各状态的子任务数"""
+    return await get_authorized_batch(batch_id, db, current_user)
+
+
+@router.get("/{batch_id}/index", response_model=SimulationBatchIndex)
+async def get_simulation_batch_index(
+    batch_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """获取批量仿真的结果索引
+
+    每个子任务一行，包含扫描参数取值、状态和各输出变量的摘要(min/max/mean/last)，
+    可直接用于比较各次运行，无需逐个读取结果文件。
+    """
+    await get_authorized_batch(batch_id, db, current_user)
+    batch_service = SimulationBatchService(db)
+    return await batch_service.get_batch_index(batch_id)
+
+
+@router.post("/{batch_id}/stop")
+async def stop_simulation_batch(
+    batch_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """停止批次中排队和运行中的任务"""
+    await get_authorized_batch(batch_id, db, current_user)
+    batch_service = SimulationBatchService(db)
+    stopped = await batch_service.stop_batch(batch_id)
+    return {"status": "stopped", "stopped_tasks": stopped}
@@ -5,17 +5,33 @@
 - 提供可视化模板和配置
 - 支持多种图表类型
 - 数据预处理和分析
+- 放电事件的栅格图、PSTH和放电率查询
+- 服务端统计分析(描述统计、功率谱、互相关、事件率)
+- 多任务结果在公共时间网格上的对齐和比较
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Tuple
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.core.security import get_current_user
 from app.db.models.user import User
-from app.schemas.simulation import SimulationDataResponse
+from app.schemas.simulation import (
+    SimulationDataResponse,
+    SimulationAnalysisResponse,
+    SimulationCompareRequest,
+    SimulationCompareResponse,
+    SimulationTask,
+    SpikeTrainSummary,
+    SpikeRasterResponse,
+    SpikeHistogramResponse,
+    FiringRateResponse
+)
 from app.services.simulation import SimulationService
+from app.simulation.downsample import DownsampleMode
+from app.simulation.analysis import AnalysisOperation, DEFAULT_PERCENTILES, DEFAULT_SEGMENT
+from app.core.config import settings
 from app.core.logging import logger
 
 router = APIRouter()
@@ -26,6 +42,8 @@ async def get_visualization_data(
     task_id: str,
     variables: Optional[List[str]] = Query(None, description="要获取的变量列表"),
     time_range: Optional[List[float]] = Query(None, description="时间范围，格式: [开始时间, 结束时间]"),
+    max_points: Optional[int] = Query(None, ge=0, description="每个变量返回的最大点数，0表示不降采样，默认使用系统配置"),
+    downsample: DownsampleMode = Query(DownsampleMode.LTTB, description="降采样模式: lttb 或 minmax"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> SimulationDataResponse:
@@ -37,10 +55,15 @@ async def get_visualization_data(
     - 数据降采样
     - 基本统计分析
     
+    降采样在时间范围切片之后对每个变量分别进行，lttb模式保留曲线形状，
+    minmax模式保留每个桶的极值，适合包含尖峰的神经元膜电位曲线。
+    
     Args:
         task_id: 仿真任务ID
         variables: 要获取的变量列表，为空时获取所有变量
         time_range: 时间范围限制
+        max_points: 每个变量返回的最大点数
+        downsample: 降采样模式
         db: 数据库会话
         current_user: 当前认证用户
         
@@ -70,7 +93,26 @@ async def get_visualization_data(
                 detail="没有权限访问此任务数据"
             )
         
-        result = await simulation_service.get_task_result(task_id)
+        if time_range is not None:
+            if len(time_range) != 2 or time_range[0] > time_range[1]:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="时间范围格式应为 [开始时间, 结束时间]，且开始时间不大于结束时间"
+                )
+        
+        try:
+            result = await simulation_service.get_task_result(
+                task_id,
+                variables=variables,
+                time_range=tuple(time_range) if time_range else None,
+                max_points=settings.VISUALIZATION_MAX_POINTS if max_points is None else max_points,
+                downsample_mode=downsample
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         if not result:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -89,6 +131,267 @@ async def get_visualization_data(
         )
 
 
+async def get_authorized_task(
+    task_id: str,
+    simulation_service: SimulationService,
+    current_user: User
+) -> SimulationTask:
+    """获取仿真任务并检查访问权限"""
+    task = await simulation_service.get_task(task_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务未找到"
+        )
+    
+    # 检查权限
+    if task.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="没有权限访问此任务数据"
+        )
+    return task
+
+
+def parse_ranges(
+    time_range: Optional[List[float]],
+    neuron_range: Optional[List[int]]
+) -> Tuple[Optional[Tuple[float, float]], Optional[Tuple[int, int]]]:
+    """检查时间范围和神经元序号范围的格式"""
+    if time_range is not None and (len(time_range) != 2 or time_range[0] > time_range[1]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="时间范围格式应为 [开始时间, 结束时间]，且开始时间不大于结束时间"
+        )
+    if neuron_range is not None and (len(neuron_range) != 2 or neuron_range[0] > neuron_range[1]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="神经元范围格式应为 [起始序号, 结束序号)，且起始序号不大于结束序号"
+        )
+    return (
+        tuple(time_range) if time_range is not None else None,
+        tuple(neuron_range) if neuron_range is not None else None
+    )
+
+
+@router.get("/analysis/{task_id}", response_model=SimulationAnalysisResponse)
+async def get_analysis(
+    task_id: str,
+    op: AnalysisOperation = Query(AnalysisOperation.STATS, description="分析操作: stats、spectrum、xcorr 或 rates"),
+    variables: Optional[List[str]] = Query(None, description="要分析的变量列表，默认为任务的全部输出变量"),
+    time_range: Optional[List[float]] = Query(None, description="时间范围，格式: [开始时间, 结束时间]"),
+    percentiles: Optional[List[float]] = Query(None, description="stats: 百分位数(0~100)，默认5/25/50/75/95"),
+    segment: int = Query(DEFAULT_SEGMENT, ge=4, le=1 << 16, description="spectrum: Welch法每段的样本数"),
+    detrend: bool = Query(True, description="spectrum: 是否逐段去均值"),
+    reference: Optional[str] = Query(None, description="xcorr: 参考变量"),
+    max_lag: Optional[float] = Query(None, ge=0, description="xcorr: 最大滞后(结果的时间单位)"),
+    threshold: Optional[float] = Query(None, description="rates: 事件阈值，上穿计为一次事件；为空时把样本值视为事件数"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> SimulationAnalysisResponse:
+    """在服务端分析仿真结果
+    
+    对时间范围内的样本计算分析量，只返回分析结果，不返回原始时间序列：
+    - stats: 每个变量的最小值、最大值、均值、标准差和百分位数
+    - spectrum: Welch法功率谱密度，频率单位为Hz
+    - xcorr: 每个变量与参考变量的归一化互相关，滞后为正表示变量滞后于参考变量
+    - rates: 单位时间的事件数(Hz)，例如膜电位越过阈值的放电率
+    
+    相同的查询命中进程内缓存，响应中的cache_hits为命中缓存的变量数。
+    
+    Raises:
+        HTTPException (404): 任务不存在
+        HTTPException (403): 无权访问该任务
+        HTTPException (400): 结果不可用、变量不存在或参数无效
+    """
+    simulation_service = SimulationService(db)
+    await get_authorized_task(task_id, simulation_service, current_user)
+    time_range, _ = parse_ranges(time_range, None)
+    
+    if op == AnalysisOperation.STATS:
+        percentiles = DEFAULT_PERCENTILES if percentiles is None else percentiles
+        if any(p < 0 or p > 100 for p in percentiles):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="百分位数应在0到100之间")
+        options = {"percentiles": list(percentiles)}
+    elif op == AnalysisOperation.SPECTRUM:
+        options = {"segment": segment, "detrend": detrend}
+    elif op == AnalysisOperation.XCORR:
+        options = {"reference": reference, "max_lag": max_lag}
+    else:
+        options = {"threshold": threshold}
+    
+    try:
+        return await simulation_service.analyze_task_result(
+            task_id,
+            op,
+            variables=variables,
+            time_range=time_range,
+            options=options
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/compare", response_model=SimulationCompareResponse)
+async def compare_results(
+    compare_in: SimulationCompareRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> SimulationCompareResponse:
+    """比较多个任务的同一变量
+    
+    把各任务的结果线性插值到公共时间网格(各结果时间范围的交集)上，
+    按stacked模式返回各任务的序列，或按diff模式返回与基准任务的差值，
+    替代逐个请求结果并在浏览器中对齐。
+    
+    Raises:
+        HTTPException (404): 任务不存在
+        HTTPException (403): 无权访问任务
+        HTTPException (400): 任务数超过上限、没有可比较的结果或参数无效
+    """
+    if len(compare_in.task_ids) > settings.COMPARE_MAX_TASKS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"一次最多比较{settings.COMPARE_MAX_TASKS}个任务"
+        )
+    simulation_service = SimulationService(db)
+    for task_id in dict.fromkeys(compare_in.task_ids):
+        await get_authorized_task(task_id, simulation_service, current_user)
+    parse_ranges(compare_in.time_range, None)
+    
+    try:
+        return await simulation_service.compare_task_results(compare_in)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/spikes/{task_id}", response_model=SpikeTrainSummary)
+async def get_spike_summary(
+    task_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> SpikeTrainSummary:
+    """获取任务记录的放电事件概要
+    
+    返回步长、仿真时长以及每个记录的群体的神经元数和放电事件数，
+    用于确定栅格图的坐标范围和分页方式。
+    
+    Raises:
+        HTTPException (404): 任务不存在
+        HTTPException (403): 无权访问该任务
+        HTTPException (400): 任务没有记录放电事件
+    """
+    simulation_service = SimulationService(db)
+    await get_authorized_task(task_id, simulation_service, current_user)
+    try:
+        return await simulation_service.get_spike_summary(task_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/spikes/{task_id}/raster", response_model=SpikeRasterResponse)
+async def get_spike_raster(
+    task_id: str,
+    population: Optional[str] = Query(None, description="群体名称，只记录了一个群体时可以省略"),
+    time_range: Optional[List[float]] = Query(None, description="时间范围，格式: [开始时间, 结束时间]"),
+    neuron_range: Optional[List[int]] = Query(None, description="神经元序号范围，格式: [起始序号, 结束序号)"),
+    max_events: Optional[int] = Query(None, ge=0, description="最多返回的事件数，0表示不限制，默认使用系统配置"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> SpikeRasterResponse:
+    """获取栅格图数据
+    
+    返回时间范围和神经元范围内每个放电事件的(时间, 神经元序号)。
+    事件数超过max_events时在时间步的边界截断，truncated为真，
+    以next_time作为下一次请求的开始时间即可继续读取。
+    
+    Raises:
+        HTTPException (404): 任务不存在
+        HTTPException (403): 无权访问该任务
+        HTTPException (400): 任务没有记录放电事件或参数无效
+    """
+    simulation_service = SimulationService(db)
+    await get_authorized_task(task_id, simulation_service, current_user)
+    time_range, neuron_range = parse_ranges(time_range, neuron_range)
+    try:
+        return await simulation_service.get_spike_raster(
+            task_id,
+            population=population,
+            time_range=time_range,
+            neuron_range=neuron_range,
+            max_events=settings.VISUALIZATION_MAX_SPIKES if max_events is None else max_events
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/spikes/{task_id}/psth", response_model=SpikeHistogramResponse)
+async def get_spike_histogram(
+    task_id: str,
+    population: Optional[str] = Query(None, description="群体名称，只记录了一个群体时可以省略"),
+    bin_size: float = Query(1.0, gt=0, description="桶宽(毫秒)"),
+    time_range: Optional[List[float]] = Query(None, description="时间范围，格式: [开始时间, 结束时间]"),
+    neuron_range: Optional[List[int]] = Query(None, description="神经元序号范围，格式: [起始序号, 结束序号)"),
+    smooth: float = Query(0.0, ge=0, description="高斯平滑的标准差(毫秒)，0表示不平滑"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> SpikeHistogramResponse:
+    """获取放电时间直方图(PSTH)
+    
+    在服务端按桶统计放电数，并换算为每个神经元的平均放电率(Hz)，
+    返回的数据量只与桶数有关，与放电事件数无关。
+    
+    Raises:
+        HTTPException (404): 任务不存在
+        HTTPException (403): 无权访问该任务
+        HTTPException (400): 任务没有记录放电事件或参数无效
+    """
+    simulation_service = SimulationService(db)
+    await get_authorized_task(task_id, simulation_service, current_user)
+    time_range, neuron_range = parse_ranges(time_range, neuron_range)
+    try:
+        return await simulation_service.get_spike_histogram(
+            task_id,
+            population=population,
+            bin_size=bin_size,
+            time_range=time_range,
+            neuron_range=neuron_range,
+            smooth=smooth
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/spikes/{task_id}/rates", response_model=FiringRateResponse)
+async def get_firing_rates(
+    task_id: str,
+    population: Optional[str] = Query(None, description="群体名称，只记录了一个群体时可以省略"),
+    time_range: Optional[List[float]] = Query(None, description="时间范围，格式: [开始时间, 结束时间]"),
+    neuron_range: Optional[List[int]] = Query(None, description="神经元序号范围，格式: [起始序号, 结束序号)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> FiringRateResponse:
+    """获取每个神经元在时间范围内的平均放电率(Hz)及其均值、标准差和静息神经元数
+    
+    Raises:
+        HTTPException (404): 任务不存在
+        HTTPException (403): 无权访问该任务
+        HTTPException (400): 任务没有记录放电事件或参数无效
+    """
+    simulation_service = SimulationService(db)
+    await get_authorized_task(task_id, simulation_service, current_user)
+    time_range, neuron_range = parse_ranges(time_range, neuron_range)
+    try:
+        return await simulation_service.get_firing_rates(
+            task_id,
+            population=population,
+            time_range=time_range,
+            neuron_range=neuron_range
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.get("/templates", response_model=List[Dict[str, Any]])
 async def get_visualization_templates(
     category: Optional[str] = Query(None, description="模板类别"),
@@ -46,6 +46,40 @@ class Settings(BaseSettings):
     # SkyEye配置
     SKYEYE_PATH: str = "/usr/local/bin/skyeye"
     SKYEYE_MODELS_DIR: str = "./models"
+    SIMULATION_STOP_GRACE: float = float(os.getenv("SIMULATION_STOP_GRACE", "5"))  # 停止任务时等待进程退出的秒数
+    SIMULATION_CHECKPOINTS: int = int(os.getenv("SIMULATION_CHECKPOINTS", "10"))  # 每次运行写入的检查点数(按仿真时间均分)，0表示不写检查点
+    SIMULATION_CHECKPOINT_KEEP: int = int(os.getenv("SIMULATION_CHECKPOINT_KEEP", "2"))  # 未完成的运行保留的最近检查点数
+    SKYEYE_MODE: str = os.getenv("SKYEYE_MODE", "process")  # process(每次运行启动新进程), daemon(常驻工作进程池), remote(在SKYEYE_AGENTS中的代理上运行)
+    SKYEYE_POOL_SIZE: int = int(os.getenv("SKYEYE_POOL_SIZE", os.getenv("MAX_WORKERS", str(os.cpu_count() or 1))))  # 守护模式的工作进程数
+    SKYEYE_POOL_MAX_RUNS: int = int(os.getenv("SKYEYE_POOL_MAX_RUNS", "0"))  # 工作进程执行多少次请求后回收，0表示不回收
+    SKYEYE_LOG_MAX_BYTES: int = int(os.getenv("SKYEYE_LOG_MAX_BYTES", str(64 * 1024 * 1024)))  # 单个输出日志文件的最大字节数，超过后轮转，0表示不轮转
+    SKYEYE_LOG_BACKUPS: int = int(os.getenv("SKYEYE_LOG_BACKUPS", "3"))  # 每个输出流保留的轮转日志文件数
+    SKYEYE_LOG_TAIL_BYTES: int = int(os.getenv("SKYEYE_LOG_TAIL_BYTES", "65536"))  # 内存中保留的最近输出字节数，用于错误信息
+    SKYEYE_MEMORY_LIMIT: int = int(os.getenv("SKYEYE_MEMORY_LIMIT", "0"))  # 单个SkyEye进程的内存上限(字节)，0表示不限制
+    SKYEYE_CPU_TIME_LIMIT: float = float(os.getenv("SKYEYE_CPU_TIME_LIMIT", "0"))  # 单次运行的累计CPU时间上限(秒)，0表示不限制
+    SKYEYE_CPU_LIMIT: float = float(os.getenv("SKYEYE_CPU_LIMIT", "0"))  # 单次运行可用的CPU核数，需要SKYEYE_CGROUP_ROOT，0表示不限制
+    SKYEYE_NICE: int = int(os.getenv("SKYEYE_NICE", "5"))  # SkyEye进程的nice值增量，CPU紧张时优先响应API
+    SKYEYE_CGROUP_ROOT: str = os.getenv("SKYEYE_CGROUP_ROOT", "")  # 可写的cgroup v2目录，每次运行在其中创建子cgroup，为空时使用rlimit
+    SIMULATION_WATCHDOG_FACTOR: float = float(os.getenv("SIMULATION_WATCHDOG_FACTOR", "3"))  # 运行时间超过预计时间的多少倍时终止任务，0表示不启用看门狗
+    SIMULATION_WATCHDOG_MIN_SECONDS: float = float(os.getenv("SIMULATION_WATCHDOG_MIN_SECONDS", "60"))  # 看门狗的最短墙钟时间上限(秒)
+    SIMULATION_MAX_WALL_TIME: float = float(os.getenv("SIMULATION_MAX_WALL_TIME", "0"))  # 单次运行的墙钟时间上限(秒)，没有预计时间时也生效，0表示不限制
+    SKYEYE_AGENTS: str = os.getenv("SKYEYE_AGENTS", "")  # 远程模式的SkyEye代理地址，逗号分隔的host:port
+    SKYEYE_AGENT_TOKEN: str = os.getenv("SKYEYE_AGENT_TOKEN", "")  # API与代理之间的共享令牌，为空时代理只允许监听本机地址
+    SKYEYE_AGENT_HEARTBEAT: float = float(os.getenv("SKYEYE_AGENT_HEARTBEAT", "5"))  # 查询代理状态的间隔(秒)
+    SKYEYE_AGENT_TIMEOUT: float = float(os.getenv("SKYEYE_AGENT_TIMEOUT", "15"))  # 代理超过该时间(秒)没有响应时视为失联
+    SKYEYE_AGENT_MAX_ATTEMPTS: int = int(os.getenv("SKYEYE_AGENT_MAX_ATTEMPTS", "3"))  # 代理失联时一次运行最多尝试的代理数
+    SKYEYE_AGENT_HOST: str = os.getenv("SKYEYE_AGENT_HOST", "127.0.0.1")  # 代理的监听地址，监听其他地址时必须设置SKYEYE_AGENT_TOKEN
+    SKYEYE_AGENT_PORT: int = int(os.getenv("SKYEYE_AGENT_PORT", "7700"))  # 代理的监听端口
+    SKYEYE_AGENT_WORK_DIR: str = os.getenv("SKYEYE_AGENT_WORK_DIR", "./agent_runs")  # 代理运行SkyEye的工作目录
+    SKYEYE_AGENT_SLOTS: int = int(os.getenv("SKYEYE_AGENT_SLOTS", "0"))  # 代理同时运行数的建议上限，0表示CPU核数
+    SKYEYE_AGENT_TLS_CERT: str = os.getenv("SKYEYE_AGENT_TLS_CERT", "")  # 代理的TLS证书(PEM)，设置后代理只接受TLS连接
+    SKYEYE_AGENT_TLS_KEY: str = os.getenv("SKYEYE_AGENT_TLS_KEY", "")  # 代理的TLS私钥(PEM)，为空时从证书文件中读取
+    SKYEYE_AGENT_TLS_CA: str = os.getenv("SKYEYE_AGENT_TLS_CA", "")  # API校验代理证书的CA(PEM)，设置后API通过TLS连接代理
+    SIMULATION_ENGINE: str = os.getenv("SIMULATION_ENGINE", "skyeye")  # skyeye(外部SkyEye程序), neuron(进程内NumPy神经元网络引擎)
+    NEURON_MODELS_DIR: str = os.getenv("NEURON_MODELS_DIR", "./models")  # 进程内引擎的网络描述(*.json)目录
+    NEURON_CHUNK_STEPS: int = int(os.getenv("NEURON_CHUNK_STEPS", "500"))  # 进程内引擎每次写入结果和检查停止请求之间的步数
+    NEURON_WORKERS: int = int(os.getenv("NEURON_WORKERS", "1"))  # 进程内引擎的并行工作进程数，1为单进程仿真
+    MODEL_CATALOG_POLL_INTERVAL: float = float(os.getenv("MODEL_CATALOG_POLL_INTERVAL", "5"))  # 模型目录轮询间隔(秒)，0表示只在启动时扫描
     
     # 数据库配置
     SQLALCHEMY_DATABASE_URI: str = os.getenv(
@@ -55,12 +89,52 @@ class Settings(BaseSettings):
     
     # 仿真引擎配置
     SIMULATION_RESULTS_DIR: str = os.getenv("SIMULATION_RESULTS_DIR", "./simulation_results")
+    RESULT_STORE_BACKEND: str = os.getenv("RESULT_STORE_BACKEND", "columnar")  # columnar, json
+    RESULT_PYRAMID_ENABLED: bool = os.getenv("RESULT_PYRAMID_ENABLED", "true").lower() == "true"  # 仿真完成后构建多分辨率金字塔
+    CSV_INGEST_CHUNK_ROWS: int = int(os.getenv("CSV_INGEST_CHUNK_ROWS", "262144"))  # 导入CSV结果时每块的行数
+    RESULT_PYRAMID_FACTOR: int = int(os.getenv("RESULT_PYRAMID_FACTOR", "16"))  # 相邻层级的聚合倍数
+    RESULT_CACHE_ENABLED: bool = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"  # 相同模型和配置的仿真直接复用已有结果
+    RESULT_CACHE_DIR: Optional[str] = os.getenv("RESULT_CACHE_DIR")  # 结果缓存目录，默认为结果目录下的cache
+    RESULT_CACHE_MAX_BYTES: int = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(10 * 1024 ** 3)))  # 结果缓存的总大小上限，超出时按LRU淘汰
+    
+    # 任务调度配置
+    SIMULATION_MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", str(os.cpu_count() or 1)))  # 同时运行的仿真进程数上限
+    SIMULATION_MAX_TASKS_PER_USER: int = int(os.getenv("SIMULATION_MAX_TASKS_PER_USER", "0"))  # 每个用户同时运行的任务数上限，0表示不限制
+    SIMULATION_MAX_PRIORITY: int = int(os.getenv("SIMULATION_MAX_PRIORITY", "10"))  # 用户可指定的最高优先级
+    SIMULATION_BATCH_MAX_RUNS: int = int(os.getenv("SIMULATION_BATCH_MAX_RUNS", "1000"))  # 单个批量仿真的最大运行数
+    SIMULATION_MAX_STEPS: int = int(os.getenv("SIMULATION_MAX_STEPS", str(10 ** 9)))  # 单个任务的最大仿真步数，0表示不限制
+    SIMULATION_MAX_OUTPUT_BYTES: int = int(os.getenv("SIMULATION_MAX_OUTPUT_BYTES", str(20 * 1024 ** 3)))  # 单个任务预计输出的最大字节数，0表示只受磁盘剩余空间限制
+    SIMULATION_MAX_RUNTIME: float = float(os.getenv("SIMULATION_MAX_RUNTIME", "0"))  # 预计运行时间(秒)超过该值的任务被拒绝，0表示不限制
+    SIMULATION_LOW_PRIORITY_RUNTIME: float = float(os.getenv("SIMULATION_LOW_PRIORITY_RUNTIME", "3600"))  # 预计运行时间(秒)超过该值的任务放入低优先级队列，0表示不降级
+    SIMULATION_ESTIMATE_HISTORY: int = int(os.getenv("SIMULATION_ESTIMATE_HISTORY", "20"))  # 估计运行时间时参考同一模型最近完成的运行数
+    TASK_QUEUE_BACKEND: str = os.getenv("TASK_QUEUE_BACKEND", "scheduler")  # scheduler(API进程内执行), local(进程内队列), redis(独立worker进程，不提供实时数据流和运行进度)
+    TASK_QUEUE_PREFIX: str = os.getenv("TASK_QUEUE_PREFIX", "simsynai:tasks")  # Redis键前缀
+    TASK_QUEUE_VISIBILITY_TIMEOUT: float = float(os.getenv("TASK_QUEUE_VISIBILITY_TIMEOUT", "60"))  # worker未续期时任务重新投递的秒数
+    TASK_QUEUE_POLL_INTERVAL: float = float(os.getenv("TASK_QUEUE_POLL_INTERVAL", "1"))  # 队列为空时worker的轮询间隔
+    TASK_QUEUE_STOP_POLL_INTERVAL: float = float(os.getenv("TASK_QUEUE_STOP_POLL_INTERVAL", "1"))  # worker检查停止请求的间隔(秒)
+    TASK_QUEUE_MAX_DELIVERIES: int = int(os.getenv("TASK_QUEUE_MAX_DELIVERIES", "3"))  # 任务最多投递次数
+    
+    # 实时结果推送配置
+    LIVE_TAIL_INTERVAL: float = float(os.getenv("LIVE_TAIL_INTERVAL", "0.5"))  # 跟踪结果CSV的轮询间隔(秒)
+    LIVE_TAIL_MAX_BYTES: int = int(os.getenv("LIVE_TAIL_MAX_BYTES", str(4 << 20)))  # 每次读取结果CSV的最大字节数
+    LIVE_BUFFER_SAMPLES: int = int(os.getenv("LIVE_BUFFER_SAMPLES", "100000"))  # 每个任务环形缓冲区的样本数
+    LIVE_EVENT_MAX_SAMPLES: int = int(os.getenv("LIVE_EVENT_MAX_SAMPLES", "5000"))  # 每个推送事件的最大样本数
+    LIVE_STREAM_WAIT_SECONDS: float = float(os.getenv("LIVE_STREAM_WAIT_SECONDS", "300"))  # 排队或启动中的任务等待结果流出现的最长时间
+    LIVE_RETENTION_SECONDS: float = float(os.getenv("LIVE_RETENTION_SECONDS", "60"))  # 任务结束后保留结果流的时间
+    
+    # 可视化配置
+    VISUALIZATION_MAX_POINTS: int = int(os.getenv("VISUALIZATION_MAX_POINTS", "2000"))  # 每个变量返回的最大点数
+    VISUALIZATION_MAX_SPIKES: int = int(os.getenv("VISUALIZATION_MAX_SPIKES", "200000"))  # 栅格图每页返回的最大放电事件数
+    ANALYSIS_CACHE_ENTRIES: int = int(os.getenv("ANALYSIS_CACHE_ENTRIES", "512"))  # 进程内缓存的分析结果条目数，0表示不缓存
+    COMPARE_MAX_TASKS: int = int(os.getenv("COMPARE_MAX_TASKS", "50"))  # 一次比较的最大任务数
+    COMPARE_PARALLEL_READS: int = int(os.getenv("COMPARE_PARALLEL_READS", "4"))  # 比较时并行读取的结果文件数
     
     # 日志配置
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
       # Redis配置
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
+    REDIS_PASSWORD: Optional[str] = os.getenv("REDIS_PASSWORD")
     
     # 默认LLM模型
     DEFAULT_LLM_MODEL: str = "gpt-3.5-turbo"
@@ -5,4 +5,4 @@
 from app.db.base_class import Base
 from app.db.models.user import User
 from app.db.models.chat import ChatMessage, ChatSession
-from app.db.models.simulation import SimulationTask, SimulationResult 
\ No newline at end of file
+from app.db.models.simulation import SimulationTask, SimulationResult, SimulationBatch 
\ No newline at end of file
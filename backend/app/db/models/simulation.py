@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, JSON, Text, ForeignKey, DateTime
+from sqlalchemy import Column, String, Float, Integer, JSON, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -10,17 +10,28 @@ from app.db.base_class import Base
 class SimulationTask(Base):
     """仿真任务模型"""
     __tablename__ = "simulation_tasks"
+    __table_args__ = (
+        # 按批次汇总各状态的任务数和构建结果索引
+        Index("ix_simulation_tasks_batch_status", "batch_id", "status"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    batch_id = Column(String, ForeignKey("simulation_batches.id"), nullable=True)
+    batch_index = Column(Integer, nullable=True)  # 在批量仿真中的序号
+    sweep_values = Column(JSON, nullable=True)  # 批量仿真中本次运行的扫描参数取值
+    warm_start_task_id = Column(String, ForeignKey("simulation_tasks.id"), nullable=True)  # 从该任务的终止状态开始仿真
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    status = Column(String, default="pending")  # pending, running, completed, failed
+    status = Column(String, default="pending")  # pending, queued, running, completed, failed, stopped
     parameters = Column(JSON, nullable=False)
     model_path = Column(String, nullable=False)
     duration = Column(Float, nullable=False)
     step_size = Column(Float, nullable=False)
     output_variables = Column(JSON, nullable=False)
+    output_interval = Column(Float, nullable=True)  # 输出间隔(仿真时间)，为空时逐步输出
+    output_stride = Column(Integer, nullable=True)  # 输出行之间的步数
+    variable_intervals = Column(JSON, nullable=True)  # 各变量的记录间隔(仿真时间)
     result_path = Column(String, nullable=True)
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -31,6 +42,29 @@ class SimulationTask(Base):
     user = relationship("User", back_populates="simulation_tasks")
     result = relationship("SimulationResult", back_populates="task", uselist=False)
     chat_messages = relationship("ChatMessage", back_populates="task")
+    batch = relationship("SimulationBatch", back_populates="tasks")
+
+
+class SimulationBatch(Base):
+    """批量仿真(参数扫描)模型"""
+    __tablename__ = "simulation_batches"
+
+    id = Column(String, primary_key=True, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    name = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    model_path = Column(String, nullable=False)
+    parameters = Column(JSON, nullable=False)  # 基础参数
+    sweep = Column(JSON, nullable=False)  # 扫描定义
+    duration = Column(Float, nullable=False)
+    step_size = Column(Float, nullable=False)
+    output_variables = Column(JSON, nullable=False)
+    priority = Column(Integer, default=0)
+    task_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # 关系
+    tasks = relationship("SimulationTask", back_populates="batch")
 
 
 class SimulationResult(Base):
@@ -25,6 +25,8 @@ def get_db():
 
 # 创建数据库表
 def create_db_and_tables():
-    """创建数据库表"""
+    """创建数据库表，并给已有的表补上新版本增加的列和索引"""
     from app.db.base import Base
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    from app.db.upgrade import upgrade_schema
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
@@ -0,0 +1,73 @@
+"""
+数据库结构升级
+
+create_all只创建不存在的表，不会修改已有的表。新版本给已有表增加的列和索引在这里登记，
+启动时逐项检查，缺少时用ALTER TABLE ... ADD COLUMN / CREATE INDEX补上，重复执行没有影响。
+
+新增的列必须可以为空(或有服务端默认值)，已有的行取空值。
+"""
+
+from typing import List, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+
+from app.core.logging import logger
+
+
+# 给已有表增加的列：(表名, 列名)，列定义取自模型
+ADDED_COLUMNS: List[Tuple[str, str]] = [
+    # 批量仿真(参数扫描)
+    ("simulation_tasks", "batch_id"),
+    ("simulation_tasks", "batch_index"),
+    ("simulation_tasks", "sweep_values"),
+    # 从检查点继续和预热启动
+    ("simulation_tasks", "warm_start_task_id"),
+    # 输出抽取和各变量的记录间隔
+    ("simulation_tasks", "output_interval"),
+    ("simulation_tasks", "output_stride"),
+    ("simulation_tasks", "variable_intervals"),
+]
+
+# 给已有表增加的索引：(表名, 索引名)
+ADDED_INDEXES: List[Tuple[str, str]] = [
+    ("simulation_tasks", "ix_simulation_tasks_batch_status"),
+]
+
+
+def upgrade_schema(bind: Engine) -> List[str]:
+    """
+    给已有的表补上新增的列和索引
+
+    Args:
+        bind: 数据库引擎，表已由create_all创建
+
+    Returns:
+        List[str]: 本次补上的列和索引，形如"表名.列名"
+    """
+    from app.db.base import Base
+
+    inspector = inspect(bind)
+    applied = []
+    with bind.begin() as conn:
+        for table_name, column_name in ADDED_COLUMNS:
+            existing = {column["name"] for column in inspector.get_columns(table_name)}
+            if column_name in existing:
+                continue
+            column = Base.metadata.tables[table_name].c[column_name]
+            ddl = CreateColumn(column).compile(dialect=bind.dialect)
+            conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {ddl}")
+            applied.append(f"{table_name}.{column_name}")
+
+        for table_name, index_name in ADDED_INDEXES:
+            existing = {index["name"] for index in inspector.get_indexes(table_name)}
+            if index_name in existing:
+                continue
+            index = next(index for index in Base.metadata.tables[table_name].indexes if index.name == index_name)
+            index.create(conn)
+            applied.append(f"{table_name}.{index_name}")
+
+    for item in applied:
+        logger.info(f"数据库结构升级：增加 {item}")
+    return applied
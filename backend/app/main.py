@@ -9,6 +9,7 @@ SimSynAI后端主应用模块
 - 生命周期事件处理
 """
 
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
@@ -18,6 +19,8 @@ from app.api.api import api_router
 from app.core.config import settings
 from app.db.session import create_db_and_tables
 from app.core.logging import setup_logging
+from app.simulation.task_queue import TaskQueueBackend
+from app.simulation.worker import SimulationWorker
 
 # 设置日志
 logger = setup_logging()
@@ -25,6 +28,10 @@ logger = setup_logging()
 # 应用启动时间
 start_time = datetime.now()
 
+# 进程内worker(TASK_QUEUE_BACKEND=local时使用)
+local_worker = None
+local_worker_task = None
+
 # 创建FastAPI应用
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -57,7 +64,8 @@ async def on_startup():
     2. 初始化默认用户
     3. 初始化必要的目录
     4. 准备缓存
-    5. 启动后台任务
+    5. 恢复上次运行遗留的任务状态
+    6. 启动后台任务
     """
     logger.info("应用启动")
     create_db_and_tables()
@@ -75,6 +83,29 @@ async def on_startup():
         logger.error(f"初始化默认用户失败: {e}")
     finally:
         db.close()
+    
+    # 调度器和进程内队列只保存在本进程中，上次进程退出时未结束的任务不会再运行；
+    # Redis队列中的任务由worker重新投递，不做处理
+    if settings.TASK_QUEUE_BACKEND in (TaskQueueBackend.SCHEDULER, TaskQueueBackend.LOCAL):
+        from app.simulation.scheduler import mark_tasks_interrupted
+        try:
+            interrupted = mark_tasks_interrupted()
+            if interrupted:
+                logger.warning(f"上次退出时未结束的任务已标记为stopped: {', '.join(interrupted)}")
+        except Exception as e:
+            logger.error(f"恢复未结束的任务状态失败: {e}")
+    
+    # 进程内队列模式下在本进程中运行worker
+    if settings.TASK_QUEUE_BACKEND == TaskQueueBackend.LOCAL:
+        global local_worker, local_worker_task
+        local_worker = SimulationWorker()
+        local_worker_task = asyncio.create_task(local_worker.run())
+        logger.info("进程内仿真worker已启动")
+    
+    # 扫描模型目录，后台预先解析模型信息并轮询变化
+    from app.simulation.skyeye import SkyEyeAdapter
+    adapter = SkyEyeAdapter()
+    await adapter.catalog.start(loader=adapter.load_model_info)
 
 @app.on_event("shutdown")
 async def on_shutdown():
@@ -82,10 +113,26 @@ async def on_shutdown():
     
     执行以下清理操作：
     1. 关闭数据库连接
-    2. 停止后台任务
+    2. 停止后台任务，排队和运行中的任务标记为stopped
     3. 清理临时文件
     """
     logger.info("应用关闭，执行清理操作")
+    
+    from app.simulation.scheduler import simulation_scheduler
+    await simulation_scheduler.shutdown()
+    
+    if local_worker is not None:
+        local_worker.stop()
+        await local_worker_task
+        # 进程内队列随进程退出丢失，其中的任务不会再被投递
+        from app.simulation.scheduler import mark_tasks_interrupted
+        await asyncio.to_thread(mark_tasks_interrupted)
+    
+    from app.simulation.pool import close_skyeye_pools
+    await close_skyeye_pools()
+    
+    from app.simulation.catalog import stop_model_catalogs
+    await stop_model_catalogs()
 
 @app.get("/")
 async def root():
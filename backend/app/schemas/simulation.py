@@ -1,9 +1,22 @@
 from typing import Optional, List, Dict, Any, Union
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
 
+from app.simulation.sweep import SweepMode
+from app.simulation.compare import CompareMode
+from app.simulation.estimator import AdmissionDecision
 
-class SimulationConfigBase(BaseModel):
+
+class SimulationSamplingBase(BaseModel):
+    """输出采样设置，未指定时逐步输出全部变量"""
+    output_interval: Optional[float] = Field(None, description="输出间隔(仿真时间)，须为步长的整数倍")
+    output_stride: Optional[int] = Field(None, ge=1, description="输出行之间的步数，可代替output_interval")
+    variable_intervals: Optional[Dict[str, float]] = Field(
+        None, description="各变量的记录间隔(仿真时间)，须为输出间隔的整数倍，例如慢变量每1 ms记录一次"
+    )
+
+
+class SimulationConfigBase(SimulationSamplingBase):
     """仿真配置基础模式"""
     parameters: Dict[str, Any]
     model_path: Optional[str] = None
@@ -12,7 +25,7 @@ class SimulationConfigBase(BaseModel):
     output_variables: List[str]
 
 
-class SimulationTaskBase(BaseModel):
+class SimulationTaskBase(SimulationSamplingBase):
     """仿真任务基础模式"""
     name: str
     description: Optional[str] = None
@@ -21,6 +34,7 @@ class SimulationTaskBase(BaseModel):
     duration: float
     step_size: float
     output_variables: List[str] = Field(default_factory=list)
+    warm_start_task_id: Optional[str] = Field(None, description="从该任务的终止状态开始仿真，跳过初始瞬态")
     status: Optional[str] = "pending"
     result_path: Optional[str] = None
     error_message: Optional[str] = None
@@ -40,6 +54,9 @@ class SimulationTaskUpdate(BaseModel):
     duration: Optional[float] = None
     step_size: Optional[float] = None
     output_variables: Optional[List[str]] = None
+    output_interval: Optional[float] = None
+    output_stride: Optional[int] = Field(None, ge=1)
+    variable_intervals: Optional[Dict[str, float]] = None
     status: Optional[str] = None
 
 
@@ -47,6 +64,9 @@ class SimulationTask(SimulationTaskBase):
     """仿真任务模式（返回给API）"""
     id: str
     user_id: str
+    batch_id: Optional[str] = None
+    batch_index: Optional[int] = None
+    sweep_values: Optional[Dict[str, Any]] = None
     status: str
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -88,10 +108,211 @@ class SimulationDataPoint(BaseModel):
 
 class SimulationDataResponse(BaseModel):
     """仿真数据响应模式"""
+    task_id: Optional[str] = None
     status: str
     data: Dict[str, List[float]]
     time_points: List[float]
     metadata: Dict[str, Any]
     error_message: Optional[str] = None
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+
+class SimulationAnalysisResponse(BaseModel):
+    """仿真结果分析响应模式"""
+    task_id: str
+    operation: str
+    start_time: float
+    end_time: float
+    samples: int
+    time_unit: str
+    results: Dict[str, Dict[str, Any]] = Field(..., description="每个变量的分析结果")
+    cache_hits: int = 0
+
+
+class SimulationCompareRequest(BaseModel):
+    """多任务结果比较请求"""
+    task_ids: List[str] = Field(..., min_length=1, description="要比较的任务ID列表")
+    variable: str = Field(..., description="要比较的变量")
+    mode: CompareMode = Field(CompareMode.STACKED, description="stacked: 堆叠各任务的序列；diff: 与基准任务的差值")
+    baseline: Optional[str] = Field(None, description="diff模式的基准任务ID，默认为第一个任务")
+    time_range: Optional[List[float]] = Field(None, description="时间范围，格式: [开始时间, 结束时间]")
+    points: Optional[int] = Field(None, ge=2, le=100000, description="公共时间网格的最大点数，默认使用系统配置")
+
+
+class SimulationCompareResponse(BaseModel):
+    """多任务结果比较响应
+
+    stacked模式下statistics为每个网格点上跨任务的均值(mean)和标准差(std)，
+    diff模式下为每个任务差值的均值、均方根(rms)和最大绝对值(max_abs)。
+    """
+    variable: str
+    mode: CompareMode
+    baseline: Optional[str] = None
+    time_points: List[float]
+    series: Dict[str, List[Optional[float]]]
+    statistics: Dict[str, Any]
+    errors: Dict[str, str] = Field(default_factory=dict, description="无法比较的任务及原因")
+
+
+class SimulationLogPage(BaseModel):
+    """任务输出日志的一页，偏移量为输出的绝对字节位置"""
+    task_id: str
+    stream: str
+    offset: int
+    next_offset: int = Field(..., description="下一页的偏移量")
+    first_offset: int = Field(..., description="轮转后仍保留的最早偏移量")
+    size: int = Field(..., description="已输出的总字节数")
+    eof: bool
+    data: str
+
+
+class SimulationEstimateRequest(SimulationSamplingBase):
+    """仿真任务代价估计请求模式"""
+    model_path: str
+    duration: float
+    step_size: float
+    output_variables: List[str] = Field(default_factory=list)
+
+
+class SimulationEstimate(BaseModel):
+    """仿真任务代价估计和准入决定"""
+    steps: int
+    output_points: int
+    output_bytes: int = Field(..., description="预计输出的字节数")
+    seconds_per_step: Optional[float] = Field(None, description="同一模型历史运行的每步耗时中位数")
+    runtime: Optional[float] = Field(None, description="预计运行时间(秒)，没有历史记录时为空")
+    history_runs: int = Field(0, description="参考的历史运行数")
+    decision: AdmissionDecision
+    reasons: List[str] = Field(default_factory=list)
+    suggestion: Optional[Dict[str, Any]] = Field(None, description="输出量超限时抽取输出的建议")
+
+
+class SpikeTrainSummary(BaseModel):
+    """任务记录的放电事件概要"""
+    task_id: str
+    dt: float
+    duration: float
+    populations: Dict[str, Dict[str, int]]
+    spike_trains: Dict[str, str] = Field(default_factory=dict, description="输出变量到群体名称的映射")
+
+
+class SpikeRasterResponse(BaseModel):
+    """栅格图数据，事件按(时间, 神经元序号)排序"""
+    task_id: str
+    population: str
+    times: List[float]
+    neurons: List[int]
+    total_events: int
+    truncated: bool
+    next_time: Optional[float] = Field(None, description="被截断时下一页的开始时间")
+
+
+class SpikeHistogramResponse(BaseModel):
+    """放电时间直方图(PSTH)"""
+    task_id: str
+    population: str
+    bin_size: float
+    neurons: int
+    time_points: List[float]
+    counts: List[int]
+    rate: List[float] = Field(..., description="每个神经元的平均放电率(Hz)")
+
+
+class FiringRateResponse(BaseModel):
+    """每个神经元的平均放电率(Hz)"""
+    task_id: str
+    population: str
+    first_neuron: int
+    rates: List[float]
+    mean: float
+    std: float
+    silent: int
+
+
+class ParameterRange(BaseModel):
+    """扫描参数的取值范围
+    
+    指定离散取值列表values，或连续区间low/high。
+    网格扫描的连续区间需要num指定取值个数。
+    """
+    values: Optional[List[Any]] = None
+    low: Optional[float] = None
+    high: Optional[float] = None
+    num: Optional[int] = Field(None, ge=1)
+    log: bool = False
+    integer: bool = False
+    
+    @model_validator(mode="after")
+    def check_range(self) -> "ParameterRange":
+        if self.values is not None:
+            if not self.values:
+                raise ValueError("values不能为空")
+        elif self.low is None or self.high is None:
+            raise ValueError("需要指定values或low/high")
+        elif self.low > self.high:
+            raise ValueError("low不能大于high")
+        return self
+
+
+class ParameterSweep(BaseModel):
+    """参数扫描定义"""
+    mode: SweepMode = SweepMode.GRID
+    parameters: Dict[str, ParameterRange] = Field(..., min_length=1)
+    samples: Optional[int] = Field(None, ge=1, description="random和lhs方式的采样数")
+    seed: Optional[int] = None
+
+
+class SimulationBatchCreate(SimulationSamplingBase):
+    """批量仿真创建模式"""
+    name: str
+    description: Optional[str] = None
+    model_path: str
+    parameters: Dict[str, Any] = Field(default_factory=dict)
+    duration: float
+    step_size: float
+    output_variables: List[str] = Field(default_factory=list)
+    warm_start_task_id: Optional[str] = Field(None, description="各次运行都从该任务的终止状态开始")
+    sweep: ParameterSweep
+    priority: int = Field(0, ge=0)
+
+
+class SimulationBatch(BaseModel):
+    """批量仿真模式（返回给API）"""
+    id: str
+    user_id: str
+    name: str
+    description: Optional[str] = None
+    model_path: str
+    parameters: Dict[str, Any]
+    sweep: Dict[str, Any]
+    duration: float
+    step_size: float
+    output_variables: List[str]
+    priority: int
+    task_count: int
+    status: str
+    status_counts: Dict[str, int] = Field(default_factory=dict)
+    created_at: datetime
+    
+    model_config = {"from_attributes": True}
+
+
+class BatchRunEntry(BaseModel):
+    """结果索引中的单次运行"""
+    task_id: str
+    batch_index: int
+    status: str
+    sweep_values: Dict[str, Any]
+    result_path: Optional[str] = None
+    summary: Optional[Dict[str, Any]] = None
+    error_message: Optional[str] = None
+
+
+class SimulationBatchIndex(BaseModel):
+    """批量仿真的结果索引"""
+    batch_id: str
+    swept_parameters: List[str]
+    output_variables: List[str]
+    status_counts: Dict[str, int]
+    runs: List[BatchRunEntry]
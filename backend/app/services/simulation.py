@@ -1,7 +1,9 @@
 import os
-import json
+import shutil
+import asyncio
+import time
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
 
@@ -10,10 +12,57 @@ from app.schemas.simulation import (
     SimulationTaskCreate, 
     SimulationTaskUpdate,
     SimulationTask as SimulationTaskSchema,
-    SimulationDataResponse
+    SimulationDataResponse,
+    SimulationAnalysisResponse,
+    SimulationCompareRequest,
+    SimulationCompareResponse,
+    SimulationLogPage,
+    SimulationEstimate,
+    SpikeTrainSummary,
+    SpikeRasterResponse,
+    SpikeHistogramResponse,
+    FiringRateResponse
+)
+from app.simulation.engine import (
+    SimulationEngine,
+    SimulationEngineBackend,
+    SimulationConfig,
+    SimulationResult as EngineResult
 )
-from app.simulation.engine import SimulationConfig
 from app.simulation.skyeye import SkyEyeAdapter
+from app.simulation.neuron import NeuronEngine
+from app.simulation.neuron.simulator import SPIKE_TRAIN
+from app.simulation.downsample import DownsampleMode, downsample
+from app.simulation.analysis import AnalysisOperation, analysis_cache, analyze
+from app.simulation.logs import LogStream, read_log
+from app.simulation.estimator import (
+    LOW_PRIORITY,
+    AdmissionDecision,
+    AdmissionError,
+    admit,
+    estimate_cost,
+    run_cost,
+    watchdog_limit
+)
+from app.simulation.sampling import OutputSampling, resolve_sampling
+from app.simulation.compare import CompareMode, combine, common_grid, resample_result, time_span
+from app.simulation.scheduler import simulation_scheduler
+from app.simulation.registry import process_registry
+from app.simulation.task_queue import TaskQueueBackend, get_task_queue
+from app.simulation.cache import ResultCache
+from app.simulation.storage import (
+    ResultReader,
+    ResultPyramid,
+    get_result_store,
+    open_result,
+    is_columnar_file,
+    migrate_json_result,
+    build_pyramid,
+    summarize_result,
+    SpikeEventReader,
+    spike_events_path
+)
+from app.core.config import settings
 from app.core.logging import logger
 
 
@@ -27,24 +76,29 @@ class SimulationService:
     - 多用户任务调度
     """
     
-    def __init__(self, db: Session, simulation_engine: Optional[SkyEyeAdapter] = None):
+    def __init__(self, db: Session, simulation_engine: Optional[SimulationEngine] = None):
         """初始化仿真服务
         
         Args:
             db: SQLAlchemy数据库会话
-            simulation_engine: 仿真引擎实例，默认创建新的SkyEye实例
+            simulation_engine: 仿真引擎实例，默认按SIMULATION_ENGINE创建
         """
         self.db = db
-        self.simulation_engine = simulation_engine or SkyEyeAdapter()
+        self.simulation_engine = simulation_engine or self._create_engine()
         self.results_dir = os.environ.get("SIMULATION_RESULTS_DIR", "./results")
         
         # 确保结果目录存在
         os.makedirs(self.results_dir, exist_ok=True)
+        self.result_store = get_result_store(root_dir=self.results_dir)
+        self.result_cache = ResultCache(
+            settings.RESULT_CACHE_DIR or os.path.join(self.results_dir, "cache")
+        ) if settings.RESULT_CACHE_ENABLED else None
     
     async def create_task(self, user_id: str, task_in: SimulationTaskCreate) -> SimulationTaskSchema:
         """创建新的仿真任务
         
         创建任务记录并进行初始化配置，包括：
+        - 估计任务代价，超过上限时拒绝
         - 生成唯一任务ID
         - 创建数据库记录
         - 准备结果存储路径
@@ -58,9 +112,20 @@ class SimulationService:
             SimulationTaskSchema: 创建的任务信息
             
         Raises:
-            ValueError: 当任务参数无效时
+            AdmissionError: 当预计的步数、输出量或运行时间超过上限时
+            ValueError: 当任务参数无效或请求了当前引擎不支持的输出(SkyEye的群体名.spike_train)时
             IOError: 当模型文件不可访问时
         """
+        self.check_output_variables(task_in.output_variables)
+        if task_in.warm_start_task_id:
+            self.check_warm_start(user_id, task_in.warm_start_task_id)
+        self.check_admission(
+            task_in.model_path,
+            task_in.duration,
+            task_in.step_size,
+            task_in.output_variables,
+            self.output_sampling(task_in)
+        )
         task_id = str(uuid.uuid4())
         
         # 创建任务记录
@@ -74,6 +139,10 @@ class SimulationService:
             duration=task_in.duration,
             step_size=task_in.step_size,
             output_variables=task_in.output_variables,
+            output_interval=task_in.output_interval,
+            output_stride=task_in.output_stride,
+            variable_intervals=task_in.variable_intervals,
+            warm_start_task_id=task_in.warm_start_task_id,
             status="pending"
         )
         
@@ -83,6 +152,161 @@ class SimulationService:
         
         return SimulationTaskSchema.from_orm(task)
     
+    @staticmethod
+    def _create_engine() -> SimulationEngine:
+        """按SIMULATION_ENGINE创建仿真引擎"""
+        try:
+            backend = SimulationEngineBackend(settings.SIMULATION_ENGINE.lower())
+        except ValueError:
+            raise ValueError(f"不支持的仿真引擎: {settings.SIMULATION_ENGINE}，支持的引擎: {', '.join(b.value for b in SimulationEngineBackend)}")
+        if backend == SimulationEngineBackend.NEURON:
+            return NeuronEngine()
+        return SkyEyeAdapter()
+    
+    @staticmethod
+    def check_output_variables(output_variables: List[str]) -> None:
+        """
+        检查当前仿真引擎能否输出请求的变量
+        
+        稀疏放电事件(群体名.spike_train)只由进程内的神经元网络引擎记录，
+        SkyEye的结果CSV只有稠密的列，不支持这类输出。
+        
+        Raises:
+            ValueError: 请求了当前引擎不支持的输出时
+        """
+        if settings.SIMULATION_ENGINE.lower() == SimulationEngineBackend.NEURON:
+            return
+        spike_trains = [var for var in output_variables if var.endswith(f".{SPIKE_TRAIN}")]
+        if spike_trains:
+            raise ValueError(
+                f"仿真引擎{settings.SIMULATION_ENGINE}不支持放电事件输出: {', '.join(spike_trains)}，"
+                f"{SPIKE_TRAIN}只能在{SimulationEngineBackend.NEURON.value}引擎中使用"
+            )
+    
+    def check_warm_start(self, user_id: str, source_task_id: str) -> None:
+        """
+        检查预热启动的源任务
+        
+        Args:
+            user_id: 创建任务的用户ID
+            source_task_id: 提供初始状态的任务ID
+            
+        Raises:
+            ValueError: 源任务不存在或属于其他用户时
+        """
+        source = self.db.query(SimulationTask).filter(SimulationTask.id == source_task_id).first()
+        if not source or source.user_id != user_id:
+            raise ValueError(f"预热任务不存在: {source_task_id}")
+    
+    def _runtime_history(self, model_path: str) -> List[Dict[str, Any]]:
+        """同一模型最近完成的运行的代价记录，复用缓存结果的运行没有记录"""
+        rows = self.db.query(SimulationResult.result_metadata).join(
+            SimulationTask, SimulationResult.task_id == SimulationTask.id
+        ).filter(
+            SimulationTask.model_path == model_path,
+            SimulationResult.status == "completed"
+        ).order_by(SimulationResult.created_at.desc()).limit(settings.SIMULATION_ESTIMATE_HISTORY).all()
+        return [metadata["runtime"] for metadata, in rows if metadata and metadata.get("runtime")]
+    
+    def estimate_task(
+        self,
+        model_path: str,
+        duration: float,
+        step_size: float,
+        output_variables: List[str],
+        sampling: Optional[OutputSampling] = None
+    ) -> SimulationEstimate:
+        """
+        估计任务的代价并做准入决定，不启动任何进程
+        
+        Args:
+            model_path: 模型路径，按该模型最近完成的运行估计运行时间
+            duration: 仿真时长
+            step_size: 步长
+            output_variables: 输出变量
+            sampling: 输出采样设置，None表示逐步输出全部变量
+            
+        Returns:
+            SimulationEstimate: 步数、输出字节数、预计运行时间和准入决定
+            
+        Raises:
+            ValueError: 时长或步长不是正数时
+        """
+        estimate = estimate_cost(duration, step_size, output_variables, self._runtime_history(model_path), sampling)
+        decision = admit(
+            estimate,
+            len(output_variables),
+            step_size,
+            max_steps=settings.SIMULATION_MAX_STEPS,
+            max_output_bytes=settings.SIMULATION_MAX_OUTPUT_BYTES,
+            max_runtime=settings.SIMULATION_MAX_RUNTIME,
+            low_priority_runtime=settings.SIMULATION_LOW_PRIORITY_RUNTIME,
+            free_bytes=shutil.disk_usage(self.results_dir).free
+        )
+        return SimulationEstimate(**decision)
+    
+    def _time_limit(self, task: SimulationTask) -> Optional[float]:
+        """看门狗的墙钟时间上限：预计运行时间的SIMULATION_WATCHDOG_FACTOR倍，受SIMULATION_MAX_WALL_TIME限制
+
+        与准入控制按同样的输出采样估计运行时间
+        """
+        try:
+            runtime = estimate_cost(
+                task.duration,
+                task.step_size,
+                task.output_variables,
+                self._runtime_history(task.model_path),
+                self.output_sampling(task)
+            )["runtime"]
+        except ValueError:
+            runtime = None
+        return watchdog_limit(
+            runtime,
+            settings.SIMULATION_WATCHDOG_FACTOR,
+            settings.SIMULATION_WATCHDOG_MIN_SECONDS,
+            settings.SIMULATION_MAX_WALL_TIME
+        )
+    
+    @staticmethod
+    def output_sampling(source: Any) -> OutputSampling:
+        """
+        按任务或请求中的采样设置构造输出采样
+        
+        Raises:
+            ValueError: 采样设置无效时
+        """
+        return resolve_sampling(
+            source.step_size,
+            source.output_variables,
+            source.output_interval,
+            source.output_stride,
+            source.variable_intervals
+        )
+    
+    def check_admission(
+        self,
+        model_path: str,
+        duration: float,
+        step_size: float,
+        output_variables: List[str],
+        sampling: Optional[OutputSampling] = None
+    ) -> SimulationEstimate:
+        """
+        估计任务的代价，超过上限时拒绝
+        
+        Returns:
+            SimulationEstimate: 接受或放入低优先级队列时的估计结果
+            
+        Raises:
+            AdmissionError: 预计代价超过上限时，estimate属性为估计结果
+            ValueError: 时长或步长不是正数时
+        """
+        estimate = self.estimate_task(model_path, duration, step_size, output_variables, sampling)
+        if estimate.decision == AdmissionDecision.REJECT:
+            logger.info(f"拒绝仿真任务 {model_path}: {'; '.join(estimate.reasons)}")
+            raise AdmissionError("; ".join(estimate.reasons), estimate.model_dump())
+        return estimate
+    
     async def get_task(self, task_id: str) -> Optional[SimulationTaskSchema]:
         """获取任务详情"""
         task = self.db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
@@ -126,6 +350,15 @@ class SimulationService:
         if not task:
             return None
         
+        # 出队后、开始执行前已被停止
+        if process_registry.pop_deferred_stop(task_id):
+            task.status = "stopped"
+            task.completed_at = datetime.now()
+            self.db.add(task)
+            self.db.commit()
+            self.db.refresh(task)
+            return SimulationTaskSchema.from_orm(task)
+        
         # 更新任务状态为运行中
         task.status = "running"
         self.db.add(task)
@@ -138,23 +371,60 @@ class SimulationService:
                 model_path=task.model_path,
                 duration=task.duration,
                 step_size=task.step_size,
-                output_variables=task.output_variables
+                output_variables=task.output_variables,
+                output_interval=task.output_interval,
+                output_stride=task.output_stride,
+                variable_intervals=task.variable_intervals or {},
+                warm_start_task_id=task.warm_start_task_id,
+                time_limit=self._time_limit(task)
             )
             
-            # 运行仿真
-            result = await self.simulation_engine.run_simulation(config, task_id)
-            
-            # 保存结果数据到文件
-            result_path = os.path.join(self.results_dir, f"{task_id}.json")
-            with open(result_path, "w") as f:
-                json.dump({
-                    "task_id": result.task_id,
-                    "status": result.status,
-                    "data": result.data,
-                    "time_points": result.time_points,
-                    "metadata": result.metadata,
-                    "error_message": result.error_message
-                }, f)
+            # 相同模型和配置已有结果时直接复用，否则运行仿真
+            # 缓存的哈希、索引锁和文件链接都是阻塞操作，放到线程中执行，不阻塞事件循环
+            cache_key = await asyncio.to_thread(self._cache_key, config)
+            cached = await asyncio.to_thread(self.result_cache.lookup, cache_key, config.output_variables) if cache_key else None
+            if cached:
+                result = await asyncio.to_thread(self._result_from_cache, task_id, cached)
+            else:
+                started = time.monotonic()
+                result = await self.simulation_engine.run_simulation(config, task_id)
+                # 记录运行耗时，用于估计同一模型之后任务的运行时间
+                if result.status == "completed":
+                    result.metadata["runtime"] = run_cost(
+                        time.monotonic() - started,
+                        config.duration,
+                        config.step_size,
+                        result.metadata.get("resumed_from")
+                    )
+            
+            # 保存结果数据：引擎已写入结果存储时直接使用，否则由服务写入
+            if result.result_path:
+                result_path = result.result_path
+            else:
+                result_path = str(self.result_store.write(
+                    self.result_store.path_for(task_id),
+                    result.time_points,
+                    result.data,
+                    task_id=result.task_id,
+                    status=result.status,
+                    metadata=result.metadata,
+                    error_message=result.error_message
+                ))
+                if result.status == "completed" and settings.RESULT_PYRAMID_ENABLED:
+                    try:
+                        result.metadata["lod"] = build_pyramid(result_path, factor=settings.RESULT_PYRAMID_FACTOR)
+                    except Exception as e:
+                        logger.warning(f"构建结果金字塔失败 {task_id}: {str(e)}")
+            
+            # 结果摘要，用于在不读取完整结果的情况下比较多次运行
+            if result.status == "completed":
+                try:
+                    result.metadata["summary"] = summarize_result(result_path)
+                except Exception as e:
+                    logger.warning(f"计算结果摘要失败 {task_id}: {str(e)}")
+            
+            if cache_key and not cached and result.status == "completed":
+                await asyncio.to_thread(self._store_in_cache, cache_key, result_path, task_id)
             
             # 更新任务状态
             task.status = result.status
@@ -167,7 +437,9 @@ class SimulationService:
                 id=str(uuid.uuid4()),
                 task_id=task_id,
                 data_path=result_path,
-                metadata=result.metadata
+                result_metadata=result.metadata,
+                status=result.status,
+                error_message=result.error_message
             )
             
             self.db.add(task)
@@ -190,9 +462,228 @@ class SimulationService:
             self.db.refresh(task)
             
             return SimulationTaskSchema.from_orm(task)
+        finally:
+            # 进程未登记就结束的执行(例如命中缓存)留下的停止请求不再生效
+            process_registry.pop_deferred_stop(task_id)
+    
+    def _cache_key(self, config: SimulationConfig) -> Optional[str]:
+        """计算任务的结果缓存键，不可缓存时返回None"""
+        if self.result_cache is None:
+            return None
+        try:
+            return self.result_cache.key_for(config, type(self.simulation_engine).__name__)
+        except OSError as e:
+            logger.warning(f"计算结果缓存键失败: {str(e)}")
+            return None
+    
+    def _result_from_cache(self, task_id: str, cached: Dict[str, Any]) -> EngineResult:
+        """将缓存的结果链接到任务的结果路径，作为已完成的仿真结果
+        
+        缓存中的金字塔随结果文件一起链接；缓存条目没有金字塔(例如缓存时未启用)时重新构建，
+        命中缓存的任务同样按层级读取降采样数据。
+        """
+        result_path = self.result_cache.link(cached, os.path.join(self.results_dir, f"{task_id}.col"))
+        logger.info(f"仿真任务 {task_id} 命中结果缓存，复用任务 {cached['task_id']} 的结果")
+        metadata = {"cache": {"hit": True, "key": cached["key"], "source_task_id": cached["task_id"]}}
+        if settings.RESULT_PYRAMID_ENABLED and not ResultPyramid.exists(result_path):
+            try:
+                metadata["lod"] = build_pyramid(result_path, factor=settings.RESULT_PYRAMID_FACTOR)
+            except Exception as e:
+                logger.warning(f"构建结果金字塔失败 {task_id}: {str(e)}")
+        return EngineResult(
+            task_id=task_id,
+            status="completed",
+            data={},
+            time_points=[],
+            metadata=metadata,
+            result_path=str(result_path)
+        )
+    
+    def _store_in_cache(self, cache_key: str, result_path: str, task_id: str) -> None:
+        """缓存已完成任务的列式结果"""
+        try:
+            if not is_columnar_file(result_path):
+                return
+            with open_result(result_path) as reader:
+                variables = reader.variables
+            self.result_cache.store(cache_key, result_path, variables, task_id=task_id)
+        except Exception as e:
+            logger.warning(f"缓存仿真结果失败 {task_id}: {str(e)}")
+    
+    async def submit_task(
+        self,
+        task_id: str,
+        user_id: str,
+        priority: int = 0,
+        restart: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """提交任务到调度器或任务队列
+        
+        任务状态先置为queued。按TASK_QUEUE_BACKEND配置，由API进程内的调度器
+        或从任务队列取任务的worker使用独立的数据库会话执行，不依赖发起请求的生命周期。
+        被停止或失败的任务默认从最近的检查点继续运行。
+        提交前按最新的运行历史重新估计任务代价：超过上限时拒绝，
+        预计运行时间超过SIMULATION_LOW_PRIORITY_RUNTIME时放入低优先级队列。
+        
+        Args:
+            task_id: 任务ID
+            user_id: 提交任务的用户ID，用于按用户公平调度
+            priority: 优先级，数值越大越先运行
+            restart: 是否清除检查点从头运行
+            
+        Returns:
+            Optional[Dict[str, Any]]: 任务状态、排队位置、实际使用的优先级和代价估计，任务不存在时返回None
+            
+        Raises:
+            AdmissionError: 预计代价超过上限时
+            ValueError: 采样设置无效时
+        """
+        task = self.db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
+        if not task:
+            return None
+        
+        estimate = self.check_admission(
+            task.model_path, task.duration, task.step_size, task.output_variables, self.output_sampling(task)
+        )
+        if estimate.decision == AdmissionDecision.LOW_PRIORITY:
+            priority = LOW_PRIORITY
+        
+        if restart:
+            await self.simulation_engine.clear_checkpoints(task_id)
+        
+        task.status = "queued"
+        task.error_message = None
+        self.db.add(task)
+        self.db.commit()
+        
+        position = await self.enqueue_task(task_id, user_id, priority)
+        return {
+            "status": "queued" if position is not None else "running",
+            "queue_position": position,
+            "priority": priority,
+            "estimate": estimate.model_dump()
+        }
+    
+    async def enqueue_task(self, task_id: str, user_id: str, priority: int = 0) -> Optional[int]:
+        """将状态已为queued的任务交给调度器或任务队列
+        
+        Args:
+            task_id: 任务ID
+            user_id: 提交任务的用户ID
+            priority: 优先级
+            
+        Returns:
+            Optional[int]: 排队位置，任务已直接开始运行时返回None
+        """
+        if settings.TASK_QUEUE_BACKEND == TaskQueueBackend.SCHEDULER:
+            return simulation_scheduler.submit(task_id, user_id, priority)
+        
+        queue = get_task_queue()
+        await queue.enqueue(task_id, user_id, priority)
+        return await queue.position(task_id)
+    
+    async def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务运行状态
+        
+        运行中的任务返回引擎报告的进度和资源使用情况，
+        其余任务只返回数据库中记录的状态。
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            Optional[Dict[str, Any]]: 任务状态，任务不存在时返回None
+        """
+        task = self.db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
+        if not task:
+            return None
+        
+        status = {"task_id": task_id, "status": task.status}
+        if task.status == "queued":
+            if settings.TASK_QUEUE_BACKEND == TaskQueueBackend.SCHEDULER:
+                status["queue_position"] = simulation_scheduler.queue_position(task_id)
+            else:
+                status["queue_position"] = await get_task_queue().position(task_id)
+            return status
+        
+        engine_status = await self.simulation_engine.get_status(task_id)
+        if isinstance(engine_status, dict) and engine_status.get("status") != "unknown":
+            status.update(engine_status)
+            # 数据库状态在结果保存后才更新，以数据库为准
+            if task.status != "running":
+                status["status"] = task.status
+        elif task.status == "completed":
+            status["progress"] = 100.0
+        return status
+    
+    async def stop_task(self, task_id: str) -> bool:
+        """停止排队或运行中的任务
+        
+        排队中的任务直接移出队列；运行中的任务终止仿真进程，
+        已输出的部分结果由execute_task保存。任务最终状态为stopped。
+        任务在worker进程中运行时，停止请求经任务队列转交给该worker。
+        已出队但仿真进程尚未启动的任务记录停止请求，进程登记时立即停止。
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            bool: 是否成功停止
+        """
+        task = self.db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
+        if not task:
+            return False
+        
+        use_queue = settings.TASK_QUEUE_BACKEND != TaskQueueBackend.SCHEDULER
+        if use_queue:
+            cancelled = await get_task_queue().remove(task_id)
+        else:
+            cancelled = simulation_scheduler.cancel(task_id)
+        if cancelled:
+            task.status = "stopped"
+            task.completed_at = datetime.now()
+            self.db.add(task)
+            self.db.commit()
+            return True
+        
+        # 已被worker取出的任务(状态可能仍为queued)由该worker停止
+        if use_queue:
+            return await get_task_queue().request_stop(task_id)
+        if process_registry.running(task_id):
+            return await self.simulation_engine.stop_simulation(task_id)
+        if not simulation_scheduler.is_scheduled(task_id):
+            return False
+        # 调度器已开始执行、仿真进程尚未登记：登记时立即停止
+        process_registry.defer_stop(task_id)
+        return True
     
-    async def get_task_result(self, task_id: str) -> Optional[SimulationDataResponse]:
-        """获取任务结果数据"""
+    async def get_task_result(
+        self,
+        task_id: str,
+        variables: Optional[List[str]] = None,
+        time_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        max_points: int = 0,
+        downsample_mode: DownsampleMode = DownsampleMode.LTTB
+    ) -> Optional[SimulationDataResponse]:
+        """获取任务结果数据
+        
+        在内存映射的结果文件上二分查找时间范围，只读取所选变量在该范围内的数据，
+        然后按需对每个变量降采样。
+        旧版JSON结果会在首次读取时迁移为列式格式，并更新任务的结果路径。
+        
+        Args:
+            task_id: 任务ID
+            variables: 要读取的变量列表，None时读取全部变量
+            time_range: (开始时间, 结束时间)，None时读取全部时间
+            max_points: 每个变量最多返回的点数，0表示不降采样
+            downsample_mode: 降采样模式
+            
+        Returns:
+            Optional[SimulationDataResponse]: 结果数据，任务不存在时返回None
+            
+        Raises:
+            ValueError: 请求的变量在结果中不存在时
+        """
         task = self.db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
         if not task:
             return None
@@ -201,49 +692,403 @@ class SimulationService:
             return SimulationDataResponse(
                 task_id=task_id,
                 status=task.status,
-                data=[],
+                data={},
+                time_points=[],
                 metadata={},
                 error_message="结果数据不可用"
             )
         
         try:
-            # 读取结果数据
-            with open(task.result_path, "r") as f:
-                result_data = json.load(f)
-            
-            # 转换为响应格式
-            data_points = []
-            time_points = result_data.get("time_points", [])
-            data = result_data.get("data", {})
-            
-            for i, t in enumerate(time_points):
-                point_values = {}
-                for var, values in data.items():
-                    if i < len(values):
-                        point_values[var] = values[i]
+            with self.open_task_result(task) as reader:
+                unknown = [var for var in variables or [] if var not in reader]
+                if unknown:
+                    raise ValueError(f"结果中不存在变量: {', '.join(unknown)}")
+                if variables is None and task.output_variables:
+                    # 命中缓存的结果可能包含任务未请求的变量
+                    requested = [var for var in task.output_variables if var in reader]
+                    if requested and len(requested) < len(reader.variables):
+                        variables = requested
                 
-                data_points.append({
-                    "time": t,
-                    "values": point_values
-                })
-            
-            return SimulationDataResponse(
-                task_id=task_id,
-                status=task.status,
-                data=data_points,
-                metadata=result_data.get("metadata", {}),
-                error_message=result_data.get("error_message")
-            )
-            
+                metadata = dict(reader.metadata)
+                lod = self._read_from_pyramid(task.result_path, reader, variables, time_range, max_points, downsample_mode)
+                if lod is not None:
+                    time_points, data, metadata["lod"] = lod
+                else:
+                    time_points, data = reader.read(variables, time_range)
+                
+                if max_points and len(time_points) > max_points:
+                    original_points = len(time_points)
+                    time_points, data = downsample(time_points, data, max_points, downsample_mode)
+                    metadata["downsampling"] = {
+                        "mode": DownsampleMode(downsample_mode).value,
+                        "max_points": max_points,
+                        "original_points": original_points,
+                        "returned_points": len(time_points)
+                    }
+                
+                return SimulationDataResponse(
+                    task_id=task_id,
+                    status=task.status,
+                    data={var: values.tolist() for var, values in data.items()},
+                    time_points=time_points.tolist(),
+                    metadata=metadata,
+                    error_message=reader.error_message
+                )
+        
+        except ValueError:
+            raise
         except Exception as e:
             return SimulationDataResponse(
                 task_id=task_id,
                 status=task.status,
-                data=[],
+                data={},
+                time_points=[],
                 metadata={},
                 error_message=f"读取结果数据失败: {str(e)}"
             )
     
+    def _read_from_pyramid(
+        self,
+        result_path: str,
+        reader: ResultReader,
+        variables: Optional[List[str]],
+        time_range: Optional[Tuple[Optional[float], Optional[float]]],
+        max_points: int,
+        downsample_mode: DownsampleMode
+    ) -> Optional[Tuple[Any, Dict[str, Any], Dict[str, Any]]]:
+        """从多分辨率金字塔读取降采样数据
+        
+        仅当时间窗口内的原始样本数明显多于max_points、金字塔存在且由当前结果文件构建时使用，
+        选择窗口内桶数不超过 max_points * factor / 2 的最精细层级并返回其包络，
+        之后仍按downsample_mode降采样到max_points，读取量与max_points成正比，与仿真时长无关。
+        
+        Returns:
+            Optional[Tuple]: (时间轴, 各变量数据, 层级信息)，不适用时返回None
+        """
+        if not max_points or not ResultPyramid.exists(result_path):
+            return None
+        
+        window = reader.time_window(*time_range) if time_range else slice(0, len(reader))
+        started = time.perf_counter()
+        with ResultPyramid(result_path) as pyramid:
+            if pyramid.source_samples != len(reader):
+                # 结果已被重新运行替换，金字塔是旧结果的
+                logger.warning(f"结果金字塔与结果文件不一致，忽略金字塔: {result_path}")
+                return None
+            if window.stop - window.start <= max_points * pyramid.factor:
+                return None
+            
+            lod = pyramid.read(variables, time_range, max(1, max_points * pyramid.factor // 2))
+            time_points, data = lod.envelope()
+        
+        return time_points, data, {
+            "level": lod.level,
+            "bin_size": lod.bin_size,
+            "bins": int(lod.time_points.shape[0]),
+            "read_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+    
+    async def analyze_task_result(
+        self,
+        task_id: str,
+        operation: AnalysisOperation,
+        variables: Optional[List[str]] = None,
+        time_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Optional[SimulationAnalysisResponse]:
+        """在服务端分析任务结果
+        
+        计算在工作线程中对内存映射的结果列进行，结果按(任务, 结果文件版本, 变量,
+        样本窗口, 操作, 参数)缓存，重复的查询不再读取结果文件。
+        
+        Args:
+            task_id: 任务ID
+            operation: 分析操作(stats/spectrum/xcorr/rates)
+            variables: 要分析的变量列表，None时分析任务的全部输出变量
+            time_range: (开始时间, 结束时间)，None时使用全部时间
+            options: 操作参数，见 app.simulation.analysis.analyze
+            
+        Returns:
+            Optional[SimulationAnalysisResponse]: 分析结果，任务不存在时返回None
+            
+        Raises:
+            ValueError: 结果不可用、变量不存在或参数无效时
+        """
+        task = self.db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
+        if not task:
+            return None
+        if not task.result_path or not os.path.exists(task.result_path):
+            raise ValueError("结果数据不可用")
+        
+        with self.open_task_result(task) as reader:
+            if variables is None and task.output_variables:
+                # 命中缓存的结果可能包含任务未请求的变量
+                variables = [var for var in task.output_variables if var in reader] or None
+            stat = os.stat(task.result_path)
+            analysis = await asyncio.to_thread(
+                analyze,
+                reader,
+                operation,
+                variables,
+                time_range,
+                options,
+                analysis_cache,
+                (task_id, task.result_path, stat.st_mtime_ns, stat.st_size)
+            )
+        return SimulationAnalysisResponse(task_id=task_id, **analysis)
+    
+    async def compare_task_results(self, compare_in: SimulationCompareRequest) -> SimulationCompareResponse:
+        """比较多个任务结果中的同一变量
+        
+        先并行读取各结果的时间范围，计算公共时间网格，再并行把各结果插值到网格上。
+        同时读取的结果文件数不超过COMPARE_PARALLEL_READS，每个结果只读取网格点附近的样本，
+        内存占用约为 任务数 × 网格点数。没有结果或不包含该变量的任务记录在errors中，不参与比较。
+        
+        Args:
+            compare_in: 比较请求
+            
+        Returns:
+            SimulationCompareResponse: 公共时间网格上的堆叠序列或差值
+            
+        Raises:
+            ValueError: 没有可比较的结果、diff模式的基准任务不可用或时间范围没有重叠时
+        """
+        task_ids = list(dict.fromkeys(compare_in.task_ids))
+        tasks = {
+            task.id: task
+            for task in self.db.query(SimulationTask).filter(SimulationTask.id.in_(task_ids)).all()
+        }
+        errors: Dict[str, str] = {}
+        paths: Dict[str, str] = {}
+        for task_id in task_ids:
+            task = tasks.get(task_id)
+            if task is None:
+                errors[task_id] = "任务不存在"
+            elif not task.result_path or not os.path.exists(task.result_path):
+                errors[task_id] = "结果数据不可用"
+            else:
+                paths[task_id] = task.result_path
+        
+        semaphore = asyncio.Semaphore(max(1, settings.COMPARE_PARALLEL_READS))
+        
+        async def read(function, task_id: str, *args) -> Tuple[str, Any]:
+            async with semaphore:
+                try:
+                    return task_id, await asyncio.to_thread(function, paths[task_id], compare_in.variable, *args)
+                except (ValueError, KeyError, OSError) as e:
+                    return task_id, e
+        
+        spans = {}
+        for task_id, span in await asyncio.gather(*(read(time_span, task_id) for task_id in paths)):
+            if isinstance(span, Exception):
+                errors[task_id] = str(span)
+            else:
+                spans[task_id] = span
+        if not spans:
+            raise ValueError("没有可比较的结果: " + "; ".join(f"{task_id}: {e}" for task_id, e in errors.items()))
+        
+        baseline = None
+        if compare_in.mode == CompareMode.DIFF:
+            baseline = compare_in.baseline or task_ids[0]
+            if baseline not in spans:
+                raise ValueError(f"基准任务 {baseline} 没有可比较的结果: {errors.get(baseline, '不在比较的任务中')}")
+        
+        grid = common_grid(
+            list(spans.values()),
+            tuple(compare_in.time_range) if compare_in.time_range else None,
+            compare_in.points or settings.VISUALIZATION_MAX_POINTS
+        )
+        series = dict(await asyncio.gather(*(read(resample_result, task_id, grid) for task_id in spans)))
+        for task_id, values in list(series.items()):
+            if isinstance(values, Exception):
+                errors[task_id] = str(values)
+                del series[task_id]
+        
+        return SimulationCompareResponse(
+            variable=compare_in.variable,
+            mode=compare_in.mode,
+            errors=errors,
+            **combine(grid, series, compare_in.mode, baseline)
+        )
+    
+    async def get_task_logs(
+        self,
+        task_id: str,
+        stream: LogStream = LogStream.STDOUT,
+        offset: Optional[int] = None,
+        limit: int = 65536
+    ) -> Optional[SimulationLogPage]:
+        """按偏移量读取任务的输出日志
+        
+        只读取请求的一页，运行中的任务也可以读取；从返回的next_offset继续读取即可跟踪新输出。
+        
+        Args:
+            task_id: 任务ID
+            stream: stdout或stderr
+            offset: 起始偏移量，None表示读取最后limit字节
+            limit: 最多读取的字节数
+            
+        Returns:
+            Optional[SimulationLogPage]: 日志页，任务不存在时返回None
+            
+        Raises:
+            ValueError: 仿真引擎不产生输出日志时
+        """
+        task = self.db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
+        if not task:
+            return None
+        
+        stream = LogStream(stream)
+        path = self.simulation_engine.log_path(task_id, stream.value)
+        if path is None:
+            raise ValueError("当前仿真引擎不产生输出日志")
+        page = await asyncio.to_thread(read_log, path, offset, limit)
+        return SimulationLogPage(task_id=task_id, stream=stream.value, **page)
+    
+    def open_task_result(self, task: SimulationTask) -> ResultReader:
+        """打开任务的结果文件
+        
+        Args:
+            task: 任务数据库记录
+            
+        Returns:
+            ResultReader: 结果读取器
+        """
+        if not is_columnar_file(task.result_path):
+            try:
+                task.result_path = str(migrate_json_result(task.result_path))
+                self.db.add(task)
+                self.db.commit()
+            except Exception as e:
+                # 迁移失败时仍按旧格式读取
+                logger.warning(f"迁移任务 {task.id} 的结果失败: {str(e)}")
+        
+        return open_result(task.result_path)
+    
+    def open_spike_events(self, task_id: str) -> Optional[SpikeEventReader]:
+        """打开任务记录的放电事件文件
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            Optional[SpikeEventReader]: 放电事件读取器，任务不存在时返回None
+            
+        Raises:
+            ValueError: 任务没有记录放电事件时
+        """
+        task = self.db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
+        if not task:
+            return None
+        
+        path = spike_events_path(task.result_path) if task.result_path else None
+        if path is None or not path.exists():
+            raise ValueError("任务没有记录放电事件，请在输出变量中加入 群体名.spike_train")
+        return SpikeEventReader(path)
+    
+    async def get_spike_summary(self, task_id: str) -> Optional[SpikeTrainSummary]:
+        """获取任务记录的放电事件概要，任务不存在时返回None"""
+        reader = self.open_spike_events(task_id)
+        if reader is None:
+            return None
+        with reader:
+            return SpikeTrainSummary(
+                task_id=task_id,
+                dt=reader.dt,
+                duration=reader.duration,
+                populations=reader.populations,
+                spike_trains=reader.metadata.get("spike_trains", {})
+            )
+    
+    async def get_spike_raster(
+        self,
+        task_id: str,
+        population: Optional[str] = None,
+        time_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        neuron_range: Optional[Tuple[Optional[int], Optional[int]]] = None,
+        max_events: int = 0
+    ) -> Optional[SpikeRasterResponse]:
+        """获取栅格图数据
+        
+        只解码与时间范围相交的事件块，事件超过max_events时在步的边界截断，
+        按返回的next_time继续请求下一页。
+        
+        Args:
+            task_id: 任务ID
+            population: 群体名称，只记录了一个群体时可以省略
+            time_range: (开始时间, 结束时间)
+            neuron_range: [起始神经元序号, 结束神经元序号)
+            max_events: 最多返回的事件数，0表示不限制
+            
+        Returns:
+            Optional[SpikeRasterResponse]: 栅格图数据，任务不存在时返回None
+            
+        Raises:
+            ValueError: 任务没有放电事件或参数无效时
+        """
+        reader = self.open_spike_events(task_id)
+        if reader is None:
+            return None
+        with reader:
+            raster = reader.raster(population, time_range, neuron_range, max_events)
+        raster["times"] = raster["times"].tolist()
+        raster["neurons"] = raster["neurons"].tolist()
+        return SpikeRasterResponse(task_id=task_id, **raster)
+    
+    async def get_spike_histogram(
+        self,
+        task_id: str,
+        population: Optional[str] = None,
+        bin_size: float = 1.0,
+        time_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        neuron_range: Optional[Tuple[Optional[int], Optional[int]]] = None,
+        smooth: float = 0.0
+    ) -> Optional[SpikeHistogramResponse]:
+        """获取放电时间直方图(PSTH)，在服务端分桶，返回的数据量与桶数成正比
+        
+        Args:
+            task_id: 任务ID
+            population: 群体名称
+            bin_size: 桶宽(毫秒)
+            time_range: 时间范围
+            neuron_range: 神经元序号范围
+            smooth: 高斯平滑的标准差(毫秒)，0表示不平滑
+            
+        Returns:
+            Optional[SpikeHistogramResponse]: 直方图，任务不存在时返回None
+            
+        Raises:
+            ValueError: 任务没有放电事件或参数无效时
+        """
+        reader = self.open_spike_events(task_id)
+        if reader is None:
+            return None
+        with reader:
+            psth = reader.psth(population, bin_size, time_range, neuron_range, smooth)
+        for key in ("time_points", "counts", "rate"):
+            psth[key] = psth[key].tolist()
+        return SpikeHistogramResponse(task_id=task_id, **psth)
+    
+    async def get_firing_rates(
+        self,
+        task_id: str,
+        population: Optional[str] = None,
+        time_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        neuron_range: Optional[Tuple[Optional[int], Optional[int]]] = None
+    ) -> Optional[FiringRateResponse]:
+        """获取每个神经元在时间范围内的平均放电率，任务不存在时返回None
+        
+        Raises:
+            ValueError: 任务没有放电事件或参数无效时
+        """
+        reader = self.open_spike_events(task_id)
+        if reader is None:
+            return None
+        with reader:
+            rates = reader.firing_rates(population, time_range, neuron_range)
+        rates["rates"] = rates["rates"].tolist()
+        return FiringRateResponse(task_id=task_id, **rates)
+    
     async def get_available_models(self) -> List[Dict[str, Any]]:
         """获取可用的仿真模型"""
         try:
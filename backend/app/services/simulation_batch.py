@@ -0,0 +1,246 @@
+import uuid
+from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, func, insert
+from sqlalchemy.orm import Session
+
+from app.db.models.simulation import SimulationBatch, SimulationTask, SimulationResult
+from app.schemas.simulation import (
+    SimulationBatchCreate,
+    SimulationBatch as SimulationBatchSchema,
+    SimulationBatchIndex,
+    BatchRunEntry
+)
+from app.services.simulation import SimulationService
+from app.simulation.sweep import expand_sweep, sweep_size, apply_overrides
+from app.simulation.estimator import LOW_PRIORITY, AdmissionDecision
+from app.core.config import settings
+from app.core.logging import logger
+
+
+ACTIVE_STATUSES = ("pending", "queued", "running")
+
+
+class SimulationBatchService:
+    """批量仿真服务类
+
+    把一次参数扫描展开为多个子任务：
+    - 子任务一次性批量插入数据库
+    - 逐个提交到调度器或任务队列，并发数受MAX_WORKERS限制
+    - 汇总各子任务的状态和结果摘要，生成结果索引
+    """
+
+    def __init__(self, db: Session, simulation_service: Optional[SimulationService] = None):
+        """初始化批量仿真服务
+
+        Args:
+            db: SQLAlchemy数据库会话
+            simulation_service: 仿真服务实例，用于提交和停止子任务
+        """
+        self.db = db
+        self.simulation_service = simulation_service or SimulationService(db)
+
+    async def create_batch(self, user_id: str, batch_in: SimulationBatchCreate) -> SimulationBatchSchema:
+        """创建并提交批量仿真
+
+        单次运行的预计运行时间超过SIMULATION_LOW_PRIORITY_RUNTIME时，子任务放入低优先级队列。
+
+        Args:
+            user_id: 创建批量仿真的用户ID
+            batch_in: 基础配置和参数扫描定义
+
+        Returns:
+            SimulationBatchSchema: 批量仿真信息
+
+        Raises:
+            AdmissionError: 单次运行的预计代价超过上限时
+            ValueError: 扫描定义无效、运行数超过SIMULATION_BATCH_MAX_RUNS或输出变量不受当前引擎支持时
+        """
+        self.simulation_service.check_output_variables(batch_in.output_variables)
+        if batch_in.warm_start_task_id:
+            self.simulation_service.check_warm_start(user_id, batch_in.warm_start_task_id)
+        sweep = batch_in.sweep.model_dump(mode="json")
+        ranges = sweep["parameters"]
+        size = sweep_size(batch_in.sweep.mode, ranges, batch_in.sweep.samples)
+        if size > settings.SIMULATION_BATCH_MAX_RUNS:
+            raise ValueError(f"批量仿真的运行数{size}超过上限{settings.SIMULATION_BATCH_MAX_RUNS}")
+        # 各运行的步数和输出量相同，按单次运行做准入检查
+        estimate = self.simulation_service.check_admission(
+            batch_in.model_path,
+            batch_in.duration,
+            batch_in.step_size,
+            batch_in.output_variables,
+            self.simulation_service.output_sampling(batch_in)
+        )
+        priority = LOW_PRIORITY if estimate.decision == AdmissionDecision.LOW_PRIORITY else batch_in.priority
+        overrides = expand_sweep(batch_in.sweep.mode, ranges, batch_in.sweep.samples, batch_in.sweep.seed)
+
+        batch = SimulationBatch(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            name=batch_in.name,
+            description=batch_in.description,
+            model_path=batch_in.model_path,
+            parameters=batch_in.parameters,
+            sweep=sweep,
+            duration=batch_in.duration,
+            step_size=batch_in.step_size,
+            output_variables=batch_in.output_variables,
+            priority=batch_in.priority,
+            task_count=len(overrides)
+        )
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "batch_id": batch.id,
+                "batch_index": index,
+                "name": f"{batch_in.name} #{index + 1}",
+                "description": batch_in.description,
+                "model_path": batch_in.model_path,
+                "parameters": apply_overrides(batch_in.parameters, values),
+                "sweep_values": values,
+                "duration": batch_in.duration,
+                "step_size": batch_in.step_size,
+                "output_variables": batch_in.output_variables,
+                "output_interval": batch_in.output_interval,
+                "output_stride": batch_in.output_stride,
+                "variable_intervals": batch_in.variable_intervals,
+                "warm_start_task_id": batch_in.warm_start_task_id,
+                "status": "queued"
+            }
+            for index, values in enumerate(overrides)
+        ]
+
+        # 批次和全部子任务在一个事务中插入
+        self.db.add(batch)
+        self.db.flush()
+        self.db.execute(insert(SimulationTask), rows)
+        self.db.commit()
+        self.db.refresh(batch)
+        logger.info(f"批量仿真 {batch.id} 已创建，共 {len(rows)} 个运行")
+
+        for row in rows:
+            await self.simulation_service.enqueue_task(row["id"], user_id, priority)
+
+        return self._to_schema(batch, self.get_status_counts(batch.id))
+
+    async def get_batch(self, batch_id: str) -> Optional[SimulationBatchSchema]:
+        """获取批量仿真详情"""
+        batch = self.db.query(SimulationBatch).filter(SimulationBatch.id == batch_id).first()
+        if not batch:
+            return None
+
+        return self._to_schema(batch, self.get_status_counts(batch_id))
+
+    async def get_batches(self, user_id: str, skip: int = 0, limit: int = 100) -> List[SimulationBatchSchema]:
+        """获取用户的批量仿真列表"""
+        batches = self.db.query(SimulationBatch).filter(
+            SimulationBatch.user_id == user_id
+        ).order_by(SimulationBatch.created_at.desc()).offset(skip).limit(limit).all()
+
+        return [self._to_schema(batch, self.get_status_counts(batch.id)) for batch in batches]
+
+    def get_status_counts(self, batch_id: str) -> Dict[str, int]:
+        """统计批次中各状态的任务数"""
+        rows = self.db.query(SimulationTask.status, func.count()).filter(
+            SimulationTask.batch_id == batch_id
+        ).group_by(SimulationTask.status).all()
+        return {status: count for status, count in rows}
+
+    async def get_batch_index(self, batch_id: str) -> Optional[SimulationBatchIndex]:
+        """获取批量仿真的结果索引
+
+        一次查询取出全部子任务及其最新结果的摘要，用于比较各次运行。
+
+        Args:
+            batch_id: 批量仿真ID
+
+        Returns:
+            Optional[SimulationBatchIndex]: 结果索引，批量仿真不存在时返回None
+        """
+        batch = self.db.query(SimulationBatch).filter(SimulationBatch.id == batch_id).first()
+        if not batch:
+            return None
+
+        rows = self.db.query(SimulationTask, SimulationResult.result_metadata).outerjoin(
+            SimulationResult,
+            and_(
+                SimulationResult.task_id == SimulationTask.id,
+                SimulationResult.data_path == SimulationTask.result_path
+            )
+        ).filter(SimulationTask.batch_id == batch_id).order_by(SimulationTask.batch_index).all()
+
+        runs = []
+        counts: Dict[str, int] = {}
+        for task, metadata in rows:
+            counts[task.status] = counts.get(task.status, 0) + 1
+            runs.append(BatchRunEntry(
+                task_id=task.id,
+                batch_index=task.batch_index,
+                status=task.status,
+                sweep_values=task.sweep_values or {},
+                result_path=task.result_path,
+                summary=(metadata or {}).get("summary"),
+                error_message=task.error_message
+            ))
+
+        return SimulationBatchIndex(
+            batch_id=batch_id,
+            swept_parameters=list(batch.sweep.get("parameters", {})),
+            output_variables=batch.output_variables,
+            status_counts=counts,
+            runs=runs
+        )
+
+    async def stop_batch(self, batch_id: str) -> int:
+        """停止批次中排队和运行中的任务
+
+        Args:
+            batch_id: 批量仿真ID
+
+        Returns:
+            int: 停止的任务数
+        """
+        task_ids = [task_id for (task_id,) in self.db.query(SimulationTask.id).filter(
+            SimulationTask.batch_id == batch_id,
+            SimulationTask.status.in_(ACTIVE_STATUSES)
+        ).all()]
+
+        stopped = 0
+        for task_id in task_ids:
+            if await self.simulation_service.stop_task(task_id):
+                stopped += 1
+        return stopped
+
+    @staticmethod
+    def batch_status(counts: Dict[str, int], total: int) -> str:
+        """由子任务状态推导批次状态"""
+        if counts.get("running"):
+            return "running"
+        if any(counts.get(status) for status in ACTIVE_STATUSES):
+            return "queued"
+        completed = counts.get("completed", 0)
+        if completed == total:
+            return "completed"
+        if counts.get("stopped", 0) == total:
+            return "stopped"
+        return "partial" if completed else "failed"
+
+    def _to_schema(self, batch: SimulationBatch, counts: Dict[str, int]) -> SimulationBatchSchema:
+        return SimulationBatchSchema(
+            id=batch.id,
+            user_id=batch.user_id,
+            name=batch.name,
+            description=batch.description,
+            model_path=batch.model_path,
+            parameters=batch.parameters,
+            sweep=batch.sweep,
+            duration=batch.duration,
+            step_size=batch.step_size,
+            output_variables=batch.output_variables,
+            priority=batch.priority,
+            task_count=batch.task_count,
+            status=self.batch_status(counts, batch.task_count),
+            status_counts=counts,
+            created_at=batch.created_at
+        )
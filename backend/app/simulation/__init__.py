@@ -2,12 +2,15 @@
 仿真引擎适配模块
 """
 
-from .engine import SimulationEngine, SimulationConfig, SimulationResult
+from .engine import SimulationEngine, SimulationEngineBackend, SimulationConfig, SimulationResult
 from .skyeye import SkyEyeAdapter
+from .neuron import NeuronEngine
 
 __all__ = [
     'SimulationEngine',
+    'SimulationEngineBackend',
     'SimulationConfig',
     'SimulationResult',
     'SkyEyeAdapter',
+    'NeuronEngine',
 ]
\ No newline at end of file
@@ -0,0 +1,470 @@
+"""SkyEye远程代理
+
+在仿真主机上常驻，接收API进程的运行请求，在本机启动SkyEye并把输出流式传回。
+API进程一侧的放置、心跳和故障转移见federation模块。
+
+协议：TCP连接上的帧，每帧为1字节类型 + 4字节大端长度 + 数据：
+- JSON: 控制消息
+    请求   {"op": "status"} / {"op": "run", ...}，请求中的token须与SKYEYE_AGENT_TOKEN一致
+    运行中 API发送{"op": "stop"}停止运行；代理定期发送{"op": "ping", "usage": SkyEye进程的CPU时间和常驻内存}，
+           API据此判断代理是否存活并更新任务的资源使用
+    结束   {"op": "exit", "returncode": 退出码, "limit_exceeded": 超过的资源上限}
+- RESULTS: 结果CSV新追加的字节，API按顺序追加到本地的结果CSV
+- STDOUT/STDERR: 进程的标准输出和错误输出
+- CHECKPOINT: 检查点文件，数据为"文件名\\0内容"，API写入本地的检查点目录，
+  代理失联时API从最近的检查点在其他代理上继续
+
+每个运行在工作目录下的独立子目录中进行，结束后删除；API断开连接时终止正在运行的SkyEye。
+子目录名由任务ID生成，任务ID只能包含字母、数字、下划线、点和连字符。
+SkyEye进程按本机配置施加资源上限(见limits模块)。
+
+代理可以运行任意模型，默认只监听本机地址；监听其他地址时必须设置SKYEYE_AGENT_TOKEN。
+令牌、参数和结果默认以明文传输，只能在可信网络中使用；跨不可信网络时在代理上设置
+SKYEYE_AGENT_TLS_CERT/SKYEYE_AGENT_TLS_KEY，在API上设置SKYEYE_AGENT_TLS_CA，连接改用TLS并校验代理证书。
+
+独立运行(在backend目录下)：
+
+    SKYEYE_AGENT_TOKEN=... [SKYEYE_AGENT_TLS_CERT=... SKYEYE_AGENT_TLS_KEY=...] python -m app.simulation.agent [--host 0.0.0.0] [--port 7700] [--skyeye PATH] [--work-dir DIR]
+"""
+
+import os
+import re
+import json
+import time
+import hmac
+import base64
+import ipaddress
+import signal
+import socket
+import ssl
+import struct
+import shutil
+import asyncio
+import argparse
+import contextlib
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+from .limits import ResourceLimits
+from .registry import read_proc_stats
+from .checkpoint import CHECKPOINT_DIR
+
+
+_HEADER = struct.Struct(">BI")
+_MAX_FRAME = 64 * 1024 * 1024
+_RESULT_CHUNK = 1024 * 1024
+_TASK_ID = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,127}")
+
+
+class FrameKind(IntEnum):
+    """帧类型"""
+    JSON = 0
+    RESULTS = 1
+    STDOUT = 2
+    STDERR = 3
+    CHECKPOINT = 4
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[FrameKind, bytes]:
+    """
+    读取一帧
+
+    Raises:
+        asyncio.IncompleteReadError: 连接在帧中间或帧之前关闭时
+        ValueError: 帧类型未知或长度超过上限时
+    """
+    kind, length = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if length > _MAX_FRAME:
+        raise ValueError(f"帧长度{length}超过上限")
+    return FrameKind(kind), await reader.readexactly(length)
+
+
+def write_frame(writer: asyncio.StreamWriter, kind: FrameKind, payload: bytes) -> None:
+    """写入一帧(调用方负责drain)"""
+    writer.write(_HEADER.pack(kind, len(payload)) + payload)
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message).encode("utf-8")
+
+
+def decode_message(payload: bytes) -> Dict[str, Any]:
+    return json.loads(payload.decode("utf-8"))
+
+
+def server_ssl_context(cert: Optional[str] = None, key: Optional[str] = None) -> Optional[ssl.SSLContext]:
+    """
+    代理监听使用的TLS上下文
+
+    Args:
+        cert: 证书文件(PEM)，默认为SKYEYE_AGENT_TLS_CERT
+        key: 私钥文件(PEM)，默认为SKYEYE_AGENT_TLS_KEY，为空时从证书文件中读取
+
+    Returns:
+        Optional[ssl.SSLContext]: 没有配置证书时返回None(明文)
+    """
+    cert = settings.SKYEYE_AGENT_TLS_CERT if cert is None else cert
+    key = settings.SKYEYE_AGENT_TLS_KEY if key is None else key
+    if not cert:
+        return None
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key or None)
+    return context
+
+
+def client_ssl_context(ca: Optional[str] = None) -> Optional[ssl.SSLContext]:
+    """
+    API连接代理使用的TLS上下文，校验代理证书和主机名
+
+    Args:
+        ca: 签发代理证书的CA(PEM)，默认为SKYEYE_AGENT_TLS_CA
+
+    Returns:
+        Optional[ssl.SSLContext]: 没有配置CA时返回None(明文)
+    """
+    ca = settings.SKYEYE_AGENT_TLS_CA if ca is None else ca
+    if not ca:
+        return None
+    return ssl.create_default_context(ssl.Purpose.SERVER_AUTH, cafile=ca)
+
+
+def _is_loopback(host: str) -> bool:
+    """监听地址是否只接受本机连接"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _memory_available() -> Optional[int]:
+    """本机可用内存(字节)，读取自/proc/meminfo"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class SkyEyeAgent:
+    """SkyEye远程代理"""
+
+    def __init__(
+        self,
+        skyeye_path: Optional[str] = None,
+        work_dir: Optional[str] = None,
+        slots: Optional[int] = None,
+        token: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        ssl_context: Optional[ssl.SSLContext] = None
+    ):
+        """
+        初始化代理
+
+        Args:
+            skyeye_path: SkyEye可执行文件路径，默认为SKYEYE_PATH
+            work_dir: 运行的工作目录，默认为SKYEYE_AGENT_WORK_DIR
+            slots: 同时运行数的建议上限，用于API放置任务，默认为CPU核数
+            token: 共享令牌，默认为SKYEYE_AGENT_TOKEN，为空时不校验且只能监听本机地址
+            agent_id: 代理标识，默认为主机名
+            ssl_context: 监听使用的TLS上下文，默认按SKYEYE_AGENT_TLS_CERT/KEY创建，没有配置证书时为明文
+        """
+        self.skyeye_path = skyeye_path or settings.SKYEYE_PATH
+        self.work_dir = Path(work_dir or settings.SKYEYE_AGENT_WORK_DIR)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.cores = os.cpu_count() or 1
+        self.slots = slots or settings.SKYEYE_AGENT_SLOTS or self.cores
+        self.token = settings.SKYEYE_AGENT_TOKEN if token is None else token
+        self.agent_id = agent_id or socket.gethostname()
+        self.ssl_context = ssl_context or server_ssl_context()
+        self.running = 0
+        self.started_at = time.time()
+
+    def status(self) -> Dict[str, Any]:
+        """本机的空闲核数、可用内存和运行数"""
+        load = os.getloadavg()[0] if hasattr(os, "getloadavg") else 0.0
+        return {
+            "op": "status",
+            "agent_id": self.agent_id,
+            "cores": self.cores,
+            "free_cores": round(max(0.0, self.cores - max(float(self.running), load)), 2),
+            "memory_available": _memory_available(),
+            "running": self.running,
+            "slots": self.slots,
+            "uptime": round(time.time() - self.started_at, 1)
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理一个连接：第一帧为请求"""
+        try:
+            kind, payload = await read_frame(reader)
+            request = decode_message(payload) if kind == FrameKind.JSON else {}
+            if self.token and not hmac.compare_digest(str(request.get("token", "")), self.token):
+                write_frame(writer, FrameKind.JSON, encode_message({"op": "error", "error": "令牌无效"}))
+            elif request.get("op") == "status":
+                write_frame(writer, FrameKind.JSON, encode_message(self.status()))
+            elif request.get("op") == "run":
+                await self._run(request, reader, writer)
+            else:
+                write_frame(writer, FrameKind.JSON, encode_message({"op": "error", "error": f"未知请求: {request.get('op')}"}))
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.exception(f"处理代理请求失败: {str(e)}")
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def _run(self, request: Dict[str, Any], reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """在本机运行SkyEye，把结果、输出和检查点流式传回"""
+        from .skyeye import skyeye_args
+
+        try:
+            task_id = str(request.get("task_id", ""))
+            run_dir = self._run_dir(task_id)
+        except ValueError as e:
+            write_frame(writer, FrameKind.JSON, encode_message({"op": "error", "error": str(e)}))
+            return
+        checkpoint_dir = run_dir / CHECKPOINT_DIR
+        checkpoint_dir.mkdir(parents=True)
+        results_csv = run_dir / "results.csv"
+        restore = self._write_state(run_dir / "restore.state", request.get("restore"))
+        initial_state = self._write_state(run_dir / "initial.state", request.get("initial_state"))
+        interval = request.get("checkpoint_interval")
+        cmd = skyeye_args(
+            self.skyeye_path,
+            request["model_path"],
+            request["duration"],
+            request["step_size"],
+            results_csv,
+            request.get("parameters") or {},
+            request.get("output_variables") or [],
+            checkpoint_dir=checkpoint_dir if interval else None,
+            checkpoint_interval=interval,
+            restore=restore,
+            initial_state=initial_state,
+            output_interval=request.get("output_interval"),
+            variable_intervals=request.get("variable_intervals")
+        )
+
+        lock = asyncio.Lock()
+
+        async def send(kind: FrameKind, payload: bytes) -> None:
+            # 多个协程共用一个连接，整帧写入后再让出
+            async with lock:
+                write_frame(writer, kind, payload)
+                await writer.drain()
+
+        limits = ResourceLimits()
+        limits.prepare(task_id)
+        self.running += 1
+        process = None
+        tasks = []
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True
+            )
+            limits.apply(process.pid)
+            logger.info(f"代理运行仿真任务 {task_id}，进程 {process.pid}")
+            stderr_tail = bytearray()
+            follower = _RunFollower(results_csv, checkpoint_dir)
+            tasks = [
+                asyncio.ensure_future(self._pump(process.stdout, FrameKind.STDOUT, send)),
+                asyncio.ensure_future(self._pump(process.stderr, FrameKind.STDERR, send, stderr_tail)),
+                asyncio.ensure_future(self._control(reader, process))
+            ]
+            waiter = asyncio.ensure_future(process.wait())
+            while not waiter.done():
+                await asyncio.wait({waiter}, timeout=settings.LIVE_TAIL_INTERVAL)
+                await follower.flush(send)
+                usage = read_proc_stats(process.pid)
+                await send(FrameKind.JSON, encode_message({"op": "ping", "usage": usage}))
+            await asyncio.gather(*tasks[:2])
+            await follower.flush(send)
+            returncode = process.returncode
+            await send(FrameKind.JSON, encode_message({
+                "op": "exit",
+                "returncode": returncode,
+                "limit_exceeded": limits.exceeded(returncode, bytes(stderr_tail))
+            }))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            logger.warning(f"API断开连接，终止仿真任务 {task_id}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            if process is not None and process.returncode is None:
+                _kill(process, signal.SIGKILL)
+                await process.wait()
+            self.running -= 1
+            limits.release()
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    def _run_dir(self, task_id: str) -> Path:
+        """
+        本次运行的工作目录
+
+        Raises:
+            ValueError: 任务ID包含路径分隔符等字符或目录不在工作目录下时
+        """
+        if not _TASK_ID.fullmatch(task_id):
+            raise ValueError(f"无效的任务ID: {task_id!r}")
+        run_dir = self.work_dir / f"{task_id}-{os.urandom(4).hex()}"
+        if run_dir.resolve().parent != self.work_dir.resolve():
+            raise ValueError(f"无效的任务ID: {task_id!r}")
+        return run_dir
+
+    @staticmethod
+    def _write_state(path: Path, encoded: Optional[str]) -> Optional[Path]:
+        if not encoded:
+            return None
+        path.write_bytes(base64.b64decode(encoded))
+        return path
+
+    @staticmethod
+    async def _pump(stream: asyncio.StreamReader, kind: FrameKind, send, tail: Optional[bytearray] = None) -> None:
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                return
+            if tail is not None:
+                tail.extend(chunk)
+                del tail[:-settings.SKYEYE_LOG_TAIL_BYTES]
+            await send(kind, chunk)
+
+    @staticmethod
+    async def _control(reader: asyncio.StreamReader, process: asyncio.subprocess.Process) -> None:
+        """接收API的停止请求；连接关闭时终止进程"""
+        try:
+            while True:
+                kind, payload = await read_frame(reader)
+                if kind == FrameKind.JSON and decode_message(payload).get("op") == "stop":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        if process.returncode is not None:
+            return
+        _kill(process, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), settings.SIMULATION_STOP_GRACE)
+        except asyncio.TimeoutError:
+            _kill(process, signal.SIGKILL)
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        """
+        开始监听，返回asyncio服务器
+
+        Raises:
+            ValueError: 没有设置令牌而监听本机以外的地址时
+        """
+        if not self.token and not _is_loopback(host):
+            raise ValueError(f"代理监听 {host} 时必须设置SKYEYE_AGENT_TOKEN")
+        if self.ssl_context is None and not _is_loopback(host):
+            logger.warning(f"代理监听 {host} 时没有配置TLS，令牌、参数和结果以明文传输，只能在可信网络中使用")
+        server = await asyncio.start_server(self.handle, host, port, ssl=self.ssl_context)
+        transport = "TLS" if self.ssl_context else "明文"
+        logger.info(f"SkyEye代理 {self.agent_id} 监听 {host}:{port}({transport})，工作目录 {self.work_dir}")
+        return server
+
+
+class _RunFollower:
+    """跟踪运行目录中新追加的结果和新写入的检查点"""
+
+    def __init__(self, results_csv: Path, checkpoint_dir: Path):
+        self.results_csv = results_csv
+        self.checkpoint_dir = checkpoint_dir
+        self.offset = 0
+        self.sent: Dict[str, int] = {}
+
+    async def flush(self, send) -> None:
+        # SkyEye写检查点前已刷新结果：先找出检查点再读取结果，
+        # 保证API收到检查点时已收到检查点之前的全部结果，失联后可以从该检查点继续
+        checkpoints = await asyncio.to_thread(self._read_checkpoints)
+        while True:
+            chunk = await asyncio.to_thread(self._read_results)
+            if not chunk:
+                break
+            await send(FrameKind.RESULTS, chunk)
+        for name, data in checkpoints:
+            await send(FrameKind.CHECKPOINT, name.encode("utf-8") + b"\0" + data)
+
+    def _read_results(self) -> bytes:
+        try:
+            with open(self.results_csv, "rb") as f:
+                f.seek(self.offset)
+                chunk = f.read(_RESULT_CHUNK)
+        except FileNotFoundError:
+            return b""
+        self.offset += len(chunk)
+        return chunk
+
+    def _read_checkpoints(self):
+        # SkyEye通过临时文件改名写入检查点，只读取改名后的完整文件
+        found = []
+        try:
+            entries = sorted(os.scandir(self.checkpoint_dir), key=lambda entry: entry.name)
+        except FileNotFoundError:
+            return found
+        for entry in entries:
+            if not entry.name.endswith(".state"):
+                continue
+            mtime = entry.stat().st_mtime_ns
+            if self.sent.get(entry.name) == mtime:
+                continue
+            try:
+                data = Path(entry.path).read_bytes()
+            except FileNotFoundError:
+                continue
+            self.sent[entry.name] = mtime
+            found.append((entry.name, data))
+        return found
+
+
+def _kill(process: asyncio.subprocess.Process, sig: int) -> None:
+    try:
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        pass
+    except OSError:
+        process.send_signal(sig)
+
+
+async def _main(args) -> None:
+    agent = SkyEyeAgent(skyeye_path=args.skyeye, work_dir=args.work_dir, slots=args.slots)
+    server = await agent.serve(args.host, args.port)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop.set)
+    async with server:
+        await stop.wait()
+    logger.info(f"SkyEye代理 {agent.agent_id} 已退出")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SkyEye远程代理")
+    parser.add_argument("--host", default=settings.SKYEYE_AGENT_HOST)
+    parser.add_argument("--port", type=int, default=settings.SKYEYE_AGENT_PORT)
+    parser.add_argument("--skyeye", default=None, help="SkyEye可执行文件路径，默认为SKYEYE_PATH")
+    parser.add_argument("--work-dir", default=None, help="运行的工作目录，默认为SKYEYE_AGENT_WORK_DIR")
+    parser.add_argument("--slots", type=int, default=None, help="同时运行数的建议上限，默认为CPU核数")
+    args = parser.parse_args()
+    if not settings.SKYEYE_AGENT_TOKEN and not _is_loopback(args.host):
+        parser.error(f"监听 {args.host} 时必须设置SKYEYE_AGENT_TOKEN")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
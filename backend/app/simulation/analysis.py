@@ -0,0 +1,414 @@
+"""仿真结果分析模块
+
+在服务端对结果列计算分析量，客户端不需要下载完整的时间序列：
+- stats: 最小值、最大值、均值、标准差和百分位数
+- spectrum: Welch法功率谱(Hann窗，50%重叠)
+- xcorr: 与参考变量的归一化互相关(FFT计算)
+- rates: 单位时间的事件数，按阈值上穿计数(膜电位)或直接累加(每个样本的放电数)
+
+所有计算都是对内存映射的列做向量化NumPy运算，只读取时间窗口内的样本。
+分析结果按(任务, 结果文件版本, 变量, 样本窗口, 操作, 参数)缓存在进程内的LRU缓存中。
+"""
+
+import threading
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Dict, Hashable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.core.config import settings
+from .storage import ResultReader
+
+
+DEFAULT_PERCENTILES = (5.0, 25.0, 50.0, 75.0, 95.0)
+DEFAULT_SEGMENT = 4096
+DEFAULT_MAX_LAGS = 1000
+CHUNK_SAMPLES = 1 << 20
+# 结果元数据中time_unit对应的秒数，频率和放电率统一换算为Hz
+TIME_UNITS = {"s": 1.0, "ms": 1e-3}
+
+
+class AnalysisOperation(str, Enum):
+    """分析操作枚举"""
+    STATS = "stats"
+    SPECTRUM = "spectrum"
+    XCORR = "xcorr"
+    RATES = "rates"
+
+
+class AnalysisCache:
+    """分析结果的LRU缓存
+
+    键包含结果文件的修改时间和大小，结果文件被覆盖后旧的条目不会再命中，随后被淘汰。
+    """
+
+    def __init__(self, max_entries: int):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最多缓存的条目数，0表示不缓存
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计：条目数和命中/未命中次数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+def describe(
+    values: np.ndarray,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    chunk_samples: int = CHUNK_SAMPLES
+) -> Dict[str, Any]:
+    """
+    计算描述统计量，忽略NaN
+
+    均值和方差按块合并(Chan等人的并行算法)，避免一次性展开大数组的平方和误差；
+    百分位数需要部分排序，会复制时间窗口内的数据。
+
+    Args:
+        values: 变量数据
+        percentiles: 百分位数(0~100)
+        chunk_samples: 每块扫描的样本数
+
+    Returns:
+        Dict[str, Any]: count、nan、min、max、mean、std和percentiles，没有有效样本时各项为None
+    """
+    n = values.shape[0]
+    count, mean, m2 = 0, 0.0, 0.0
+    low, high = np.inf, -np.inf
+    for start in range(0, n, chunk_samples):
+        chunk = np.asarray(values[start:start + chunk_samples])
+        valid = chunk[~np.isnan(chunk)]
+        if not valid.size:
+            continue
+        k = valid.size
+        chunk_mean = float(valid.mean())
+        chunk_m2 = float(np.square(valid - chunk_mean).sum())
+        delta = chunk_mean - mean
+        total = count + k
+        mean += delta * k / total
+        m2 += chunk_m2 + delta * delta * count * k / total
+        count = total
+        low = min(low, float(valid.min()))
+        high = max(high, float(valid.max()))
+
+    keys = [f"{p:g}" for p in percentiles]
+    if not count:
+        return {
+            "count": 0, "nan": n, "min": None, "max": None, "mean": None, "std": None,
+            "percentiles": {key: None for key in keys}
+        }
+    quantiles = np.nanpercentile(np.asarray(values), list(percentiles)) if keys else []
+    return {
+        "count": count,
+        "nan": n - count,
+        "min": low,
+        "max": high,
+        "mean": mean,
+        "std": float(np.sqrt(m2 / count)),
+        "percentiles": {key: float(q) for key, q in zip(keys, quantiles)}
+    }
+
+
+def _uniform(time_points: np.ndarray, *columns: np.ndarray) -> Tuple[float, Tuple[np.ndarray, ...]]:
+    """
+    得到等间隔采样的数据
+
+    时间轴不等间隔(例如变步长积分器的输出)时按中位步长线性插值到等间隔网格。
+
+    Returns:
+        Tuple: (采样间隔, 各列数据)
+
+    Raises:
+        ValueError: 样本不足或数据包含NaN时
+    """
+    if time_points.shape[0] < 4:
+        raise ValueError("时间窗口内的样本数不足，至少需要4个样本")
+    columns = tuple(np.asarray(column, dtype=np.float64) for column in columns)
+    if any(np.isnan(column).any() for column in columns):
+        raise ValueError("数据包含NaN，无法计算频谱或相关")
+    steps = np.diff(time_points)
+    dt = float(np.median(steps))
+    if dt <= 0:
+        raise ValueError("时间轴不是严格递增的")
+    if np.ptp(steps) > 1e-6 * dt:
+        grid = time_points[0] + np.arange(int((time_points[-1] - time_points[0]) / dt) + 1) * dt
+        columns = tuple(np.interp(grid, time_points, column) for column in columns)
+    return dt, columns
+
+
+def power_spectrum(
+    time_points: np.ndarray,
+    values: np.ndarray,
+    time_scale: float = 1.0,
+    segment: int = DEFAULT_SEGMENT,
+    detrend: bool = True
+) -> Dict[str, Any]:
+    """
+    Welch法单边功率谱密度
+
+    数据切分为长度segment、重叠一半的段，每段去均值、乘Hann窗后做rfft，各段功率取平均。
+    所有段通过sliding_window_view一次性构造，FFT沿轴批量计算。
+
+    Args:
+        time_points: 时间轴
+        values: 变量数据
+        time_scale: 时间单位对应的秒数
+        segment: 每段的样本数，样本不足时取全部样本
+        detrend: 是否逐段去均值
+
+    Returns:
+        Dict[str, Any]: 频率(Hz)、功率谱密度、段数、段长、频率分辨率和峰值频率(不含直流)
+
+    Raises:
+        ValueError: 样本不足或数据包含NaN时
+    """
+    dt, (x,) = _uniform(time_points, values)
+    nperseg = max(4, min(int(segment), x.shape[0]))
+    frames = sliding_window_view(x, nperseg)[::nperseg // 2]
+    if detrend:
+        frames = frames - frames.mean(axis=1, keepdims=True)
+    window = np.hanning(nperseg)
+    fs = 1.0 / (dt * time_scale)
+    power = np.square(np.abs(np.fft.rfft(frames * window, axis=1))).mean(axis=0)
+    power /= fs * np.square(window).sum()
+    # 单边谱：除直流和奈奎斯特频率外功率加倍
+    power[1:(nperseg + 1) // 2] *= 2
+    frequencies = np.fft.rfftfreq(nperseg, d=dt * time_scale)
+    peak = int(power[1:].argmax()) + 1 if power.shape[0] > 1 else 0
+    return {
+        "frequencies": frequencies.tolist(),
+        "power": power.tolist(),
+        "segments": int(frames.shape[0]),
+        "segment_length": nperseg,
+        "resolution": float(frequencies[1]) if frequencies.shape[0] > 1 else 0.0,
+        "peak_frequency": float(frequencies[peak])
+    }
+
+
+def cross_correlation(
+    time_points: np.ndarray,
+    values: np.ndarray,
+    reference: np.ndarray,
+    max_lag: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    归一化互相关 r(τ) = Σ x(t+τ)·y(t) / sqrt(Σx²·Σy²)，x、y先去均值
+
+    通过补零的FFT计算所有滞后，复杂度为O(n log n)。τ为正表示values滞后于reference。
+
+    Args:
+        time_points: 时间轴
+        values: 变量数据x
+        reference: 参考变量数据y
+        max_lag: 最大滞后(时间单位)，None时取min(样本数-1, DEFAULT_MAX_LAGS)个样本
+
+    Returns:
+        Dict[str, Any]: 滞后(时间单位)、相关系数、峰值滞后和峰值相关系数
+
+    Raises:
+        ValueError: 样本不足、数据包含NaN或max_lag为负时
+    """
+    dt, (x, y) = _uniform(time_points, values, reference)
+    n = x.shape[0]
+    if max_lag is None:
+        lags = min(n - 1, DEFAULT_MAX_LAGS)
+    elif max_lag < 0:
+        raise ValueError("最大滞后不能为负")
+    else:
+        lags = min(n - 1, int(round(max_lag / dt)))
+    x = x - x.mean()
+    y = y - y.mean()
+    norm = float(np.sqrt(np.dot(x, x) * np.dot(y, y)))
+    nfft = 1 << int(2 * n - 1).bit_length()
+    full = np.fft.irfft(np.fft.rfft(x, nfft) * np.conj(np.fft.rfft(y, nfft)), nfft)
+    correlation = np.concatenate([full[nfft - lags:], full[:lags + 1]])
+    correlation = correlation / norm if norm > 0 else np.zeros_like(correlation)
+    offsets = np.arange(-lags, lags + 1)
+    peak = int(np.abs(correlation).argmax())
+    return {
+        "lags": (offsets * dt).tolist(),
+        "correlation": correlation.tolist(),
+        "peak_lag": float(offsets[peak] * dt),
+        "peak_correlation": float(correlation[peak])
+    }
+
+
+def event_rate(
+    time_points: np.ndarray,
+    values: np.ndarray,
+    time_scale: float = 1.0,
+    threshold: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    单位时间的事件数(Hz)
+
+    给出threshold时把上穿阈值记为一次事件(例如膜电位越过0mV)，并计算放电间隔的均值和变异系数；
+    否则把每个样本的值视为自上一个样本以来的事件数(例如神经元引擎的群体名.spikes)。
+
+    Args:
+        time_points: 时间轴
+        values: 变量数据
+        time_scale: 时间单位对应的秒数
+        threshold: 阈值，None表示按事件计数累加
+
+    Returns:
+        Dict[str, Any]: 事件数、时长(秒)、事件率(Hz)，按阈值计数时还有放电间隔的均值(秒)和变异系数
+    """
+    duration = float(time_points[-1] - time_points[0]) * time_scale if time_points.shape[0] > 1 else 0.0
+    values = np.asarray(values)
+    result: Dict[str, Any] = {"duration": duration}
+    if threshold is None:
+        events = float(np.nansum(values[1:]))
+    else:
+        above = values >= threshold
+        crossings = np.flatnonzero(~above[:-1] & above[1:]) + 1
+        events = int(crossings.shape[0])
+        intervals = np.diff(time_points[crossings]) * time_scale
+        mean_interval = float(intervals.mean()) if intervals.size else None
+        result["mean_interval"] = mean_interval
+        result["cv_interval"] = float(intervals.std() / mean_interval) if mean_interval else None
+    result["events"] = events
+    result["rate"] = events / duration if duration > 0 else 0.0
+    return result
+
+
+def _options_key(options: Mapping[str, Any]) -> Tuple:
+    return tuple(sorted((key, tuple(value) if isinstance(value, (list, tuple)) else value) for key, value in options.items()))
+
+
+def analyze(
+    reader: ResultReader,
+    operation: AnalysisOperation,
+    variables: Optional[Sequence[str]] = None,
+    time_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+    options: Optional[Mapping[str, Any]] = None,
+    cache: Optional[AnalysisCache] = None,
+    cache_prefix: Tuple = ()
+) -> Dict[str, Any]:
+    """
+    对结果中的变量执行分析
+
+    时间范围先换算为样本窗口，缓存键使用样本窗口，落在同一组样本上的不同时间范围共享缓存。
+    每个变量按自己的记录间隔分析；互相关的参考变量取该变量各样本时刻的值。
+
+    Args:
+        reader: 结果读取器
+        operation: 分析操作
+        variables: 变量列表，None时分析全部变量
+        time_range: (开始时间, 结束时间)，None时使用全部时间
+        options: 操作参数：stats为percentiles，spectrum为segment和detrend，
+            xcorr为reference和max_lag，rates为threshold
+        cache: 分析结果缓存，None时不缓存
+        cache_prefix: 缓存键前缀，用于区分任务和结果文件版本
+
+    Returns:
+        Dict[str, Any]: 操作、实际时间范围、样本数、时间单位、各变量的结果和缓存命中数
+
+    Raises:
+        ValueError: 变量不存在、时间范围内没有样本或参数无效时
+    """
+    operation = AnalysisOperation(operation)
+    options = dict(options or {})
+    names = list(reader.variables) if variables is None else list(variables)
+    reference = options.get("reference")
+    if operation == AnalysisOperation.XCORR and not reference:
+        raise ValueError("互相关需要指定参考变量")
+    unknown = [name for name in names + ([reference] if reference else []) if name not in reader]
+    if unknown:
+        raise ValueError(f"结果中不存在变量: {', '.join(unknown)}")
+    time_unit = reader.metadata.get("time_unit", "s")
+    if time_unit not in TIME_UNITS:
+        raise ValueError(f"不支持的时间单位: {time_unit}")
+    time_scale = TIME_UNITS[time_unit]
+
+    window = reader.time_window(*time_range) if time_range else slice(0, len(reader))
+    if window.stop <= window.start:
+        raise ValueError("时间范围内没有样本")
+    times = reader.time_points[window]
+
+    results, hits = {}, 0
+    option_key = _options_key(options)
+    for name in names:
+        stride = reader.stride(name)
+        samples = slice(-(-window.start // stride), -(-window.stop // stride))
+        if samples.stop <= samples.start:
+            raise ValueError(f"时间范围内没有变量{name}的样本")
+        key = cache_prefix + (name, samples.start, samples.stop, operation.value, option_key)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results[name] = cached
+            hits += 1
+            continue
+
+        values = reader.column(name)[samples]
+        sample_times = times if stride == 1 else reader.column_time(name)[samples]
+        if operation == AnalysisOperation.STATS:
+            result = describe(values, options.get("percentiles", DEFAULT_PERCENTILES))
+        elif operation == AnalysisOperation.SPECTRUM:
+            result = power_spectrum(
+                sample_times, values, time_scale,
+                segment=options.get("segment", DEFAULT_SEGMENT),
+                detrend=options.get("detrend", True)
+            )
+        elif operation == AnalysisOperation.XCORR:
+            rows = slice(samples.start * stride, samples.stop * stride, stride)
+            result = cross_correlation(sample_times, values, reader.hold(reference, rows), options.get("max_lag"))
+        else:
+            result = event_rate(sample_times, values, time_scale, options.get("threshold"))
+        if cache is not None:
+            cache.put(key, result)
+        results[name] = result
+
+    return {
+        "operation": operation.value,
+        "start_time": float(times[0]),
+        "end_time": float(times[-1]),
+        "samples": int(times.shape[0]),
+        "time_unit": time_unit,
+        "results": results,
+        "cache_hits": hits
+    }
+
+
+analysis_cache = AnalysisCache(settings.ANALYSIS_CACHE_ENTRIES)
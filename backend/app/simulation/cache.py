@@ -0,0 +1,290 @@
+"""仿真结果缓存
+
+相同模型、相同配置的仿真会得到相同的结果，缓存命中时直接链接已有结果，不再运行仿真：
+- 缓存键: 模型文件内容的SHA-256 + 规范化的配置(参数、时长、步长) + 引擎名称
+- 输出变量不参与缓存键，请求的变量是已缓存结果变量的子集时同样命中
+- 结果以硬链接放入缓存目录和任务目录，淘汰缓存条目不会影响已链接的任务结果
+- 按总大小做LRU淘汰，并记录命中/未命中/淘汰次数
+
+索引保存在缓存目录的index.json中，读写时加文件锁，多个worker进程可以共享同一缓存。
+"""
+
+import os
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import contextlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from app.core.config import settings
+from app.core.logging import logger
+from .engine import SimulationConfig
+from .storage import is_columnar_file
+from .storage.pyramid import pyramid_dir
+from .storage.spikes import spike_events_path
+
+
+_HASH_CHUNK = 1 << 20
+
+
+def _normalize(value: Any) -> Any:
+    """规范化参数值：整数值的浮点数与整数视为相同"""
+    if isinstance(value, dict):
+        return {str(key): _normalize(value[key]) for key in sorted(value)}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    """硬链接文件，跨文件系统时复制"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists():
+        target.unlink()
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _link_result(source: Path, target: Path) -> int:
+    """链接结果文件及其金字塔目录和放电事件文件，返回占用的字节数"""
+    _link_or_copy(source, target)
+    size = source.stat().st_size
+    source_spikes = spike_events_path(source)
+    if source_spikes.exists():
+        _link_or_copy(source_spikes, spike_events_path(target))
+        size += source_spikes.stat().st_size
+    source_lod = pyramid_dir(source)
+    if source_lod.is_dir():
+        target_lod = pyramid_dir(target)
+        shutil.rmtree(target_lod, ignore_errors=True)
+        for level in source_lod.iterdir():
+            _link_or_copy(level, target_lod / level.name)
+            size += level.stat().st_size
+    return size
+
+
+class ModelHasher:
+    """模型文件哈希，按(路径, 修改时间, 大小)缓存，文件未变化时不重复读取"""
+
+    def __init__(self):
+        self._hashes: Dict[str, Tuple[float, int, str]] = {}
+
+    def hash(self, path: Union[str, Path]) -> str:
+        path = Path(path)
+        stat = path.stat()
+        key = str(path.resolve())
+        cached = self._hashes.get(key)
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                digest.update(chunk)
+        self._hashes[key] = (stat.st_mtime, stat.st_size, digest.hexdigest())
+        return digest.hexdigest()
+
+
+class ResultCache:
+    """内容寻址的仿真结果缓存"""
+
+    INDEX_FILE = "index.json"
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = None,
+        max_bytes: Optional[int] = None,
+        models_dir: Optional[Union[str, Path]] = None
+    ):
+        """
+        初始化结果缓存
+
+        Args:
+            cache_dir: 缓存目录，默认为结果目录下的cache
+            max_bytes: 缓存总大小上限
+            models_dir: 模型目录，用于解析相对路径的模型文件
+        """
+        self.cache_dir = Path(cache_dir or settings.RESULT_CACHE_DIR or Path(settings.SIMULATION_RESULTS_DIR) / "cache")
+        self.max_bytes = settings.RESULT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.models_dir = Path(models_dir or settings.SKYEYE_MODELS_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._hasher = _model_hasher
+
+    def resolve_model(self, model_path: str) -> Optional[Path]:
+        """查找模型文件，找不到时返回None"""
+        for candidate in (Path(model_path), self.models_dir / model_path):
+            if candidate.is_file():
+                return candidate
+        return None
+
+    def key_for(self, config: SimulationConfig, engine: str = "") -> Optional[str]:
+        """
+        计算缓存键
+
+        Args:
+            config: 仿真配置
+            engine: 引擎名称，不同引擎的结果不共享
+
+        Returns:
+            Optional[str]: 缓存键，模型文件不存在时返回None(不缓存)
+        """
+        model = self.resolve_model(config.model_path) if config.model_path else None
+        if model is None:
+            return None
+        key = {
+            "engine": engine,
+            "model": self._hasher.hash(model),
+            "parameters": _normalize(config.parameters),
+            "duration": _normalize(config.duration),
+            "step_size": _normalize(config.step_size),
+            "warm_start_task_id": config.warm_start_task_id
+        }
+        # 抽取输出的结果只能复用于相同的采样设置；逐步输出的键保持不变
+        sampling = config.sampling()
+        if sampling.decimated:
+            key["sampling"] = {"stride": sampling.stride, "variables": _normalize(sampling.variable_strides)}
+        payload = json.dumps(key, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @contextlib.contextmanager
+    def _index(self) -> Iterator[Dict[str, Any]]:
+        """加锁读取索引，退出时写回"""
+        with open(self.cache_dir / "index.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            path = self.cache_dir / self.INDEX_FILE
+            try:
+                with open(path) as f:
+                    index = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                index = {}
+            index.setdefault("entries", {})
+            index.setdefault("stats", {"hits": 0, "misses": 0, "evictions": 0})
+            yield index
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp, path)
+
+    def lookup(self, key: str, variables: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """
+        查找包含全部请求变量的缓存结果，并计入命中/未命中
+
+        Args:
+            key: 缓存键
+            variables: 请求的输出变量
+
+        Returns:
+            Optional[Dict[str, Any]]: 缓存条目，未命中时返回None
+        """
+        requested = set(variables)
+        with self._index() as index:
+            candidates = [
+                (entry_id, entry) for entry_id, entry in index["entries"].items()
+                if entry["key"] == key and requested <= set(entry["variables"])
+                and (self.cache_dir / entry["file"]).exists()
+            ]
+            if not candidates:
+                index["stats"]["misses"] += 1
+                return None
+            # 变量最少的条目最接近请求
+            entry_id, entry = min(candidates, key=lambda item: len(item[1]["variables"]))
+            entry["last_access"] = time.time()
+            entry["hits"] = entry.get("hits", 0) + 1
+            index["stats"]["hits"] += 1
+            return dict(entry, path=str(self.cache_dir / entry["file"]))
+
+    def link(self, entry: Dict[str, Any], target: Union[str, Path]) -> Path:
+        """将缓存结果链接到任务的结果路径"""
+        target = Path(target)
+        _link_result(Path(entry["path"]), target)
+        return target
+
+    def store(self, key: str, result_path: Union[str, Path], variables: Sequence[str], task_id: Optional[str] = None) -> bool:
+        """
+        缓存已完成任务的结果
+
+        Args:
+            key: 缓存键
+            result_path: 列式结果文件路径
+            variables: 结果包含的输出变量
+            task_id: 产生该结果的任务ID
+
+        Returns:
+            bool: 是否已缓存
+        """
+        result_path = Path(result_path)
+        if not is_columnar_file(result_path):
+            return False
+
+        variables = sorted(set(variables))
+        entry_id = hashlib.sha256(f"{key}:{','.join(variables)}".encode("utf-8")).hexdigest()[:32]
+        file_name = f"{entry_id}.col"
+        size = _link_result(result_path, self.cache_dir / file_name)
+        with self._index() as index:
+            now = time.time()
+            index["entries"][entry_id] = {
+                "key": key,
+                "variables": variables,
+                "file": file_name,
+                "size": size,
+                "task_id": task_id,
+                "created": now,
+                "last_access": now,
+                "hits": 0
+            }
+            self._evict(index)
+        return True
+
+    def _evict(self, index: Dict[str, Any]) -> None:
+        """按最近访问时间淘汰条目，直到总大小不超过上限"""
+        entries = index["entries"]
+        total = sum(entry["size"] for entry in entries.values())
+        for entry_id, entry in sorted(entries.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            self._remove_files(entry["file"])
+            total -= entry["size"]
+            del entries[entry_id]
+            index["stats"]["evictions"] += 1
+            logger.info(f"淘汰缓存结果 {entry_id}")
+
+    def _remove_files(self, file_name: str) -> None:
+        path = self.cache_dir / file_name
+        with contextlib.suppress(FileNotFoundError):
+            path.unlink()
+        with contextlib.suppress(FileNotFoundError):
+            spike_events_path(path).unlink()
+        shutil.rmtree(pyramid_dir(path), ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计：命中/未命中/淘汰次数、命中率、条目数和总大小"""
+        with self._index() as index:
+            stats = dict(index["stats"])
+            entries = list(index["entries"].values())
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "size_bytes": sum(entry["size"] for entry in entries),
+            "max_bytes": self.max_bytes
+        })
+        return stats
+
+    def clear(self) -> int:
+        """清空缓存，返回删除的条目数"""
+        with self._index() as index:
+            entries: List[Dict[str, Any]] = list(index["entries"].values())
+            for entry in entries:
+                self._remove_files(entry["file"])
+            index["entries"] = {}
+        return len(entries)
+
+
+_model_hasher = ModelHasher()
@@ -0,0 +1,242 @@
+"""仿真模型目录
+
+在内存中维护模型目录下的模型文件列表和解析后的模型信息：
+- 启动时扫描一次，之后按修改时间轮询，只处理新增、修改和删除的文件
+- 模型信息(参数、输出变量)按(路径, 修改时间, 大小)缓存，文件未变化时不再调用SkyEye解析
+- 新增或修改的模型在后台预先解析，模型列表和参数查询只读内存
+"""
+
+import os
+import asyncio
+import contextlib
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.core.logging import logger
+
+
+InfoLoader = Callable[[str], Awaitable[Dict[str, Any]]]
+FileKey = Tuple[str, int, int]  # (路径, 修改时间(纳秒), 大小)
+
+
+@dataclass
+class ModelEntry:
+    """模型文件"""
+    name: str
+    path: str
+    size: int
+    mtime_ns: int
+
+    @property
+    def key(self) -> FileKey:
+        return (self.path, self.mtime_ns, self.size)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "size": self.size,
+            "modified": self.mtime_ns / 1e9
+        }
+
+
+class ModelCatalog:
+    """模型目录
+
+    扫描使用os.scandir，每个文件只stat一次。
+    """
+
+    def __init__(self, directory: Union[str, Path], pattern: str = "*.mdl"):
+        """
+        初始化模型目录
+
+        Args:
+            directory: 模型目录
+            pattern: 模型文件名模式
+        """
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.entries: Dict[str, ModelEntry] = {}
+        self.scanned = False
+        self._info: Dict[FileKey, Dict[str, Any]] = {}
+        self._loading: Dict[FileKey, "asyncio.Future[Dict[str, Any]]"] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+    def _scan(self) -> Dict[str, ModelEntry]:
+        entries: Dict[str, ModelEntry] = {}
+        pending = [self.directory]
+        while pending:
+            try:
+                iterator = os.scandir(pending.pop())
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+            with iterator:
+                for item in iterator:
+                    try:
+                        if item.is_dir(follow_symlinks=False):
+                            pending.append(Path(item.path))
+                        elif Path(item.name).match(self.pattern):
+                            stat = item.stat()
+                            entries[item.path] = ModelEntry(
+                                name=Path(item.name).stem,
+                                path=item.path,
+                                size=stat.st_size,
+                                mtime_ns=stat.st_mtime_ns
+                            )
+                    except FileNotFoundError:
+                        continue
+        return entries
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """
+        重新扫描模型目录并更新变化的条目
+
+        Returns:
+            Dict[str, List[str]]: 新增(added)、修改(changed)和删除(removed)的模型路径
+        """
+        current = self._scan()
+        added = [path for path in current if path not in self.entries]
+        changed = [
+            path for path, entry in current.items()
+            if path in self.entries and self.entries[path].key != entry.key
+        ]
+        removed = [path for path in self.entries if path not in current]
+
+        live_keys = {entry.key for entry in current.values()}
+        for path in changed + removed:
+            stale = self.entries[path].key
+            if stale not in live_keys:
+                self._info.pop(stale, None)
+        self.entries = current
+        self.scanned = True
+        if added or changed or removed:
+            logger.info(f"模型目录更新: 新增{len(added)} 修改{len(changed)} 删除{len(removed)}")
+        return {"added": added, "changed": changed, "removed": removed}
+
+    def list(self) -> List[Dict[str, Any]]:
+        """按名称排序的模型列表"""
+        if not self.scanned:
+            self.refresh()
+        return [entry.to_dict() for entry in sorted(self.entries.values(), key=lambda entry: (entry.name, entry.path))]
+
+    def resolve(self, model_path: str) -> Optional[str]:
+        """将模型路径(绝对路径或相对模型目录的路径)解析为目录中的条目路径"""
+        if not self.scanned:
+            self.refresh()
+        for candidate in (model_path, str(self.directory / model_path)):
+            if candidate in self.entries:
+                return candidate
+        return None
+
+    def _file_key(self, model_path: str) -> Optional[FileKey]:
+        path = self.resolve(model_path)
+        if path is not None:
+            return self.entries[path].key
+        # 目录之外的模型文件需要stat确认是否变化
+        for candidate in (Path(model_path), self.directory / model_path):
+            try:
+                stat = candidate.stat()
+            except OSError:
+                continue
+            return (str(candidate), stat.st_mtime_ns, stat.st_size)
+        return None
+
+    def cached_info(self, model_path: str) -> Optional[Dict[str, Any]]:
+        """已缓存的模型信息，未解析过时返回None"""
+        key = self._file_key(model_path)
+        return self._info.get(key) if key else None
+
+    async def info(self, model_path: str, loader: InfoLoader) -> Optional[Dict[str, Any]]:
+        """
+        获取模型信息，文件未变化时直接返回缓存
+
+        同一模型的并发请求只调用一次loader，status为error的结果不缓存。
+
+        Args:
+            model_path: 模型路径
+            loader: 解析模型信息的函数，参数为模型文件路径
+
+        Returns:
+            Optional[Dict[str, Any]]: 模型信息，模型文件不存在时返回None
+        """
+        key = self._file_key(model_path)
+        if key is None:
+            return None
+        if key in self._info:
+            return self._info[key]
+
+        future = self._loading.get(key)
+        if future is None:
+            future = self._loading[key] = asyncio.ensure_future(loader(key[0]))
+            try:
+                info = await future
+            finally:
+                self._loading.pop(key, None)
+            # 解析失败(例如SkyEye不可用)不缓存，下次请求重试
+            if info.get("status") != "error":
+                self._info[key] = info
+            return info
+        return await asyncio.shield(future)
+
+    async def warm(self, loader: InfoLoader) -> int:
+        """解析所有尚未缓存信息的模型，返回解析的数量"""
+        missing = [entry.path for entry in list(self.entries.values()) if entry.key not in self._info]
+        for path in missing:
+            try:
+                await self.info(path, loader)
+            except Exception as e:
+                logger.warning(f"解析模型信息失败 {path}: {str(e)}")
+        return len(missing)
+
+    async def start(self, loader: Optional[InfoLoader] = None, interval: Optional[float] = None) -> None:
+        """
+        扫描模型目录，并在后台按间隔轮询变化
+
+        Args:
+            loader: 提供时在后台预先解析新增和修改的模型
+            interval: 轮询间隔(秒)，默认MODEL_CATALOG_POLL_INTERVAL，0表示不轮询
+        """
+        interval = settings.MODEL_CATALOG_POLL_INTERVAL if interval is None else interval
+        await asyncio.to_thread(self.refresh)
+        if self._poller is None and (interval > 0 or loader is not None):
+            self._poller = asyncio.create_task(self._poll(loader, interval))
+
+    async def _poll(self, loader: Optional[InfoLoader], interval: float) -> None:
+        while True:
+            if loader is not None:
+                await self.warm(loader)
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.warning(f"扫描模型目录失败 {self.directory}: {str(e)}")
+
+    async def stop(self) -> None:
+        """停止后台轮询"""
+        if self._poller is not None:
+            self._poller.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._poller
+            self._poller = None
+
+
+_catalogs: Dict[Tuple[str, str], ModelCatalog] = {}
+
+
+def get_model_catalog(directory: Optional[Union[str, Path]] = None, pattern: str = "*.mdl") -> ModelCatalog:
+    """获取模型目录和文件名模式对应的共享ModelCatalog，默认为SKYEYE_MODELS_DIR下的*.mdl"""
+    key = (str(directory or settings.SKYEYE_MODELS_DIR), pattern)
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        catalog = _catalogs[key] = ModelCatalog(key[0], pattern)
+    return catalog
+
+
+async def stop_model_catalogs() -> None:
+    """停止所有模型目录的后台轮询"""
+    for catalog in list(_catalogs.values()):
+        await catalog.stop()
@@ -0,0 +1,176 @@
+"""SkyEye仿真检查点
+
+SkyEye按仿真时间周期性地把完整的仿真状态写入任务结果目录下的checkpoints目录，
+写入检查点前先刷新结果CSV，因此CSV中总是包含检查点之前的全部样本：
+- checkpoint_<步数>.state: 周期性检查点，步数为零填充的整数
+- final.state: 仿真正常结束时的终止状态，供其他任务预热启动
+- run.json: 本次运行的配置指纹和状态，只有配置相同且未完成的运行才会从检查点继续
+
+被停止或异常退出的任务再次运行时，结果CSV先截断到最近检查点的时间，
+再由SkyEye从检查点恢复状态并继续追加结果。
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+
+from app.core.logging import logger
+
+
+CHECKPOINT_DIR = "checkpoints"
+FINAL_STATE = "final.state"
+MANIFEST = "run.json"
+
+_CHECKPOINT_PREFIX = "checkpoint_"
+_CHECKPOINT_SUFFIX = ".state"
+_SCAN_BLOCK = 1 << 16
+
+
+@dataclass
+class Checkpoint:
+    """单个检查点文件"""
+    path: Path
+    step: int
+    time: float
+
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    """
+    计算决定仿真轨迹的配置指纹
+
+    仿真时长不影响已计算的部分，不参与指纹，延长时长后同样可以从检查点继续。
+
+    Args:
+        config: 模型路径、参数、步长、输出变量和初始状态
+
+    Returns:
+        str: 指纹
+    """
+    payload = json.dumps(config, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def list_checkpoints(checkpoint_dir: Union[str, Path], step_size: float) -> List[Checkpoint]:
+    """按步数升序列出检查点"""
+    checkpoint_dir = Path(checkpoint_dir)
+    if not checkpoint_dir.is_dir():
+        return []
+    checkpoints = []
+    for path in checkpoint_dir.glob(f"{_CHECKPOINT_PREFIX}*{_CHECKPOINT_SUFFIX}"):
+        try:
+            step = int(path.name[len(_CHECKPOINT_PREFIX):-len(_CHECKPOINT_SUFFIX)])
+        except ValueError:
+            continue
+        checkpoints.append(Checkpoint(path=path, step=step, time=step * step_size))
+    return sorted(checkpoints, key=lambda checkpoint: checkpoint.step)
+
+
+def read_manifest(checkpoint_dir: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """读取运行记录，不存在或已损坏时返回None"""
+    try:
+        with open(Path(checkpoint_dir) / MANIFEST) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_manifest(checkpoint_dir: Union[str, Path], fingerprint: str, status: str, **extra: Any) -> None:
+    """写入运行记录"""
+    checkpoint_dir = Path(checkpoint_dir)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    tmp = checkpoint_dir / f"{MANIFEST}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(dict(extra, fingerprint=fingerprint, status=status), f)
+    os.replace(tmp, checkpoint_dir / MANIFEST)
+
+
+def resume_point(checkpoint_dir: Union[str, Path], fingerprint: str, step_size: float) -> Optional[Checkpoint]:
+    """
+    查找可以继续运行的检查点
+
+    上次运行的配置不同或已正常完成时清空检查点目录，从头开始运行。
+
+    Args:
+        checkpoint_dir: 检查点目录
+        fingerprint: 本次运行的配置指纹
+        step_size: 仿真步长，用于由步数计算检查点时间
+
+    Returns:
+        Optional[Checkpoint]: 最近的检查点，没有可用检查点时返回None
+    """
+    checkpoint_dir = Path(checkpoint_dir)
+    manifest = read_manifest(checkpoint_dir)
+    if manifest and manifest.get("fingerprint") == fingerprint and manifest.get("status") != "completed":
+        checkpoints = list_checkpoints(checkpoint_dir, step_size)
+        if checkpoints:
+            return checkpoints[-1]
+    if checkpoint_dir.exists():
+        shutil.rmtree(checkpoint_dir)
+    return None
+
+
+def prune_checkpoints(checkpoint_dir: Union[str, Path], step_size: float, keep: int) -> None:
+    """只保留最近的keep个周期性检查点"""
+    checkpoints = list_checkpoints(checkpoint_dir, step_size)
+    for checkpoint in checkpoints[:max(0, len(checkpoints) - keep)]:
+        checkpoint.path.unlink(missing_ok=True)
+
+
+def truncate_csv(path: Union[str, Path], end_time: float) -> int:
+    """
+    截断结果CSV，只保留时间不超过end_time的完整行
+
+    从文件末尾按块向前扫描，检查点通常靠近文件末尾，无需读取整个文件。
+
+    Args:
+        path: 结果CSV文件路径
+        end_time: 保留的最后时间点(含)
+
+    Returns:
+        int: 截断后的文件大小
+    """
+    path = Path(path)
+    with open(path, "r+b") as f:
+        pos = f.seek(0, os.SEEK_END)
+        buf = b""  # 文件中[pos, pos + len(buf))的内容
+        end = None  # 当前候选行的换行符位置
+        while True:
+            start = max(0, pos - _SCAN_BLOCK)
+            f.seek(start)
+            buf = f.read(pos - start) + buf
+            pos = start
+            while True:
+                i = buf.rfind(b"\n")
+                if end is None:
+                    # 最后一个换行符之后是正在写入的半行
+                    if i < 0:
+                        break
+                    end = pos + i
+                    buf = buf[:i]
+                    continue
+                if i < 0:
+                    if pos > 0:
+                        break  # 行首在更前面的块中
+                    # 第一行是表头，没有满足条件的数据行
+                    f.truncate(end + 1)
+                    return end + 1
+                try:
+                    time = float(buf[i + 1:].split(b",", 1)[0])
+                except ValueError:
+                    time = None
+                if time is not None and time <= end_time:
+                    f.truncate(end + 1)
+                    return end + 1
+                end = pos + i
+                buf = buf[:i]
+            if pos == 0:
+                break
+
+        # 文件中没有完整的行
+        f.truncate(0)
+        logger.debug(f"结果文件 {path} 没有完整的行")
+        return 0
@@ -0,0 +1,186 @@
+"""多任务结果比较模块
+
+把多个任务(例如参数扫描的各次运行)的同一变量重采样到公共时间网格上，
+按堆叠或与基准任务的差值返回：
+- 公共网格取各结果时间范围的交集，再与请求的时间范围相交
+- 重采样对每个网格点二分查找时间轴并在相邻两个样本之间线性插值，
+  只读取内存映射结果中的2×网格点数个样本，内存占用与结果大小无关
+"""
+
+import warnings
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .storage import ResultReader, open_result
+
+
+class CompareMode(str, Enum):
+    """比较模式枚举"""
+    STACKED = "stacked"
+    DIFF = "diff"
+
+
+def time_span(path: Union[str, Path], variable: str) -> Tuple[float, float, int]:
+    """
+    读取结果的时间范围
+
+    Args:
+        path: 结果文件路径
+        variable: 要比较的变量
+
+    Returns:
+        Tuple[float, float, int]: (开始时间, 结束时间, 样本数)
+
+    Raises:
+        ValueError: 结果为空或不包含该变量时
+    """
+    with open_result(path) as reader:
+        if variable not in reader:
+            raise ValueError(f"结果中不存在变量: {variable}")
+        times = reader.column_time(variable)
+        n = len(times)
+        if not n:
+            raise ValueError("结果为空")
+        return float(times[0]), float(times[n - 1]), n
+
+
+def common_grid(
+    spans: Sequence[Tuple[float, float, int]],
+    time_range: Optional[Tuple[Optional[float], Optional[float]]],
+    points: int
+) -> np.ndarray:
+    """
+    计算公共时间网格
+
+    Args:
+        spans: 各结果的(开始时间, 结束时间, 样本数)
+        time_range: 请求的时间范围
+        points: 最多的网格点数，不超过时间范围内样本最多的结果的样本数
+
+    Returns:
+        np.ndarray: 等间隔的时间网格
+
+    Raises:
+        ValueError: 时间范围没有重叠时
+    """
+    start = max(span[0] for span in spans)
+    end = min(span[1] for span in spans)
+    if time_range:
+        if time_range[0] is not None:
+            start = max(start, float(time_range[0]))
+        if time_range[1] is not None:
+            end = min(end, float(time_range[1]))
+    if end < start:
+        raise ValueError("各结果在请求的时间范围内没有重叠")
+    if end == start:
+        return np.array([start])
+    # 按时间范围占比估计样本数，避免把稀疏的结果插值出大量重复的点
+    densest = max(int(np.ceil(n * (end - start) / (last - first))) if last > first else 1 for first, last, n in spans)
+    return np.linspace(start, end, max(2, min(points, densest)))
+
+
+def resample_column(reader: ResultReader, variable: str, grid: np.ndarray) -> np.ndarray:
+    """
+    把变量线性插值到时间网格
+
+    对每个网格点在时间轴上二分查找，只按下标读取相邻的两个样本；
+    网格点落在样本上时返回样本值，超出时间轴的网格点取端点值。
+
+    Args:
+        reader: 结果读取器
+        variable: 变量名称
+        grid: 升序的时间网格
+
+    Returns:
+        np.ndarray: 网格上的变量值
+    """
+    times = reader.column_time(variable)
+    values = reader.column(variable)
+    n = len(values)
+    if n == 1:
+        return np.full(grid.shape[0], float(values[0]))
+    upper = np.clip(np.searchsorted(times, grid, side="left"), 1, n - 1)
+    lower = upper - 1
+    t0, t1 = times[lower], times[upper]
+    v0, v1 = values[lower], values[upper]
+    span = t1 - t0
+    weight = np.clip(np.divide(grid - t0, span, out=np.zeros_like(grid), where=span > 0), 0.0, 1.0)
+    return v0 + weight * (v1 - v0)
+
+
+def resample_result(path: Union[str, Path], variable: str, grid: np.ndarray) -> np.ndarray:
+    """打开结果文件并把变量插值到时间网格"""
+    with open_result(path) as reader:
+        return resample_column(reader, variable, grid)
+
+
+def _finite(values: np.ndarray) -> list:
+    """转换为JSON列表，NaN和无穷大转换为None"""
+    converted = values.astype(object)
+    converted[~np.isfinite(values)] = None
+    return converted.tolist()
+
+
+def _difference_stats(diff: np.ndarray) -> Dict[str, Optional[float]]:
+    valid = diff[np.isfinite(diff)]
+    if not valid.size:
+        return {"mean": None, "rms": None, "max_abs": None}
+    return {
+        "mean": float(valid.mean()),
+        "rms": float(np.sqrt(np.mean(np.square(valid)))),
+        "max_abs": float(np.abs(valid).max())
+    }
+
+
+def combine(
+    grid: np.ndarray,
+    series: Dict[str, np.ndarray],
+    mode: CompareMode,
+    baseline: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    按比较模式组合重采样后的序列
+
+    - stacked: 返回各任务的序列，以及每个网格点上跨任务的均值和标准差
+    - diff: 返回其他任务与基准任务的差值，以及每个任务差值的均值、均方根和最大绝对值
+
+    Args:
+        grid: 时间网格
+        series: 任务ID到网格上的变量值(按请求顺序)
+        mode: 比较模式
+        baseline: 基准任务ID，diff模式下为None时使用第一个任务
+
+    Returns:
+        Dict[str, Any]: time_points、baseline、series和statistics
+
+    Raises:
+        ValueError: 基准任务不在序列中时
+    """
+    mode = CompareMode(mode)
+    if mode == CompareMode.STACKED:
+        stacked = np.vstack(list(series.values()))
+        with warnings.catch_warnings():
+            # 所有任务在某个网格点上都是NaN时结果为NaN，不需要警告
+            warnings.simplefilter("ignore", RuntimeWarning)
+            aggregate = {"mean": np.nanmean(stacked, axis=0), "std": np.nanstd(stacked, axis=0)}
+        return {
+            "time_points": grid.tolist(),
+            "baseline": None,
+            "series": {task_id: _finite(values) for task_id, values in series.items()},
+            "statistics": {name: _finite(values) for name, values in aggregate.items()}
+        }
+
+    baseline = baseline or next(iter(series))
+    if baseline not in series:
+        raise ValueError(f"基准任务 {baseline} 没有可比较的结果")
+    reference = series[baseline]
+    differences = {task_id: values - reference for task_id, values in series.items() if task_id != baseline}
+    return {
+        "time_points": grid.tolist(),
+        "baseline": baseline,
+        "series": {task_id: _finite(diff) for task_id, diff in differences.items()},
+        "statistics": {task_id: _difference_stats(diff) for task_id, diff in differences.items()}
+    }
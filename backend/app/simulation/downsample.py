@@ -0,0 +1,170 @@
+"""仿真数据降采样模块
+
+为可视化接口提供服务端降采样，支持两种模式：
+- lttb: Largest-Triangle-Three-Buckets，保留曲线形状
+- minmax: 每个桶保留最小值和最大值，保证尖峰(如动作电位)不丢失
+
+两种模式都只选取原始样本点，不做插值。
+"""
+
+from enum import Enum
+from typing import Dict, Mapping, Tuple
+
+import numpy as np
+
+
+class DownsampleMode(str, Enum):
+    """降采样模式枚举"""
+    LTTB = "lttb"
+    MINMAX = "minmax"
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets降采样
+
+    首尾两点固定保留，其余样本均分为max_points-2个桶，每个桶选出与
+    上一个选中点和下一个桶均值点构成三角形面积最大的样本。
+    桶均值通过reduceat一次性计算，桶内面积计算是向量化的，
+    Python循环次数只与max_points有关，与样本数无关。
+
+    Args:
+        x: 时间轴
+        y: 变量数据
+        max_points: 最多保留的点数
+
+    Returns:
+        np.ndarray: 选中样本的下标(升序)
+    """
+    n = y.shape[0]
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 3:
+        # 不足以构成桶时只保留首尾(或首个)样本，仍不超过max_points
+        return np.array([0, n - 1][:max(max_points, 1)], dtype=np.int64)
+
+    n_buckets = max_points - 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    counts = np.diff(edges)
+
+    # 各桶均值，最后一个桶的"下一个桶"是末尾样本
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    next_x = np.append(mean_x[1:], x[n - 1])
+    next_y = np.append(mean_y[1:], y[n - 1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_buckets):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """最小/最大值降采样
+
+    样本均分为约max_points/2个桶，每个桶保留最小值和最大值所在的样本，
+    另外保留首尾样本。通过reshape成二维块后按行argmin/argmax实现向量化。
+    返回的点数不超过max_points，全局最小值和最大值总是被保留(max_points为1时只保留更突出的一个)。
+
+    Args:
+        y: 变量数据
+        max_points: 最多保留的点数
+
+    Returns:
+        np.ndarray: 选中样本的下标(升序、去重)
+    """
+    n = y.shape[0]
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 4:
+        # 不足以分桶时优先保留偏离均值较远的全局极值，其次是另一个极值和首尾样本
+        lo, hi = int(y.argmin()), int(y.argmax())
+        mean = y.mean()
+        extremes = [hi, lo] if y[hi] - mean >= mean - y[lo] else [lo, hi]
+        candidates = list(dict.fromkeys(extremes + [0, n - 1]))
+        return np.sort(np.array(candidates[:max(max_points, 1)], dtype=np.int64))
+
+    n_buckets = (max_points - 2) // 2
+    bucket = -(-n // n_buckets)
+    full = n // bucket
+    blocks = y[:full * bucket].reshape(full, bucket)
+    offsets = np.arange(full, dtype=np.int64) * bucket
+
+    parts = [
+        np.array([0, n - 1], dtype=np.int64),
+        offsets + blocks.argmin(axis=1),
+        offsets + blocks.argmax(axis=1)
+    ]
+    if full * bucket < n:
+        tail = y[full * bucket:]
+        parts.append(np.array([full * bucket + tail.argmin(), full * bucket + tail.argmax()], dtype=np.int64))
+    return np.unique(np.concatenate(parts))
+
+
+def downsample_indices(
+    time_points: np.ndarray,
+    values: np.ndarray,
+    max_points: int,
+    mode: DownsampleMode = DownsampleMode.LTTB
+) -> np.ndarray:
+    """
+    计算单个变量的降采样下标
+
+    Args:
+        time_points: 时间轴
+        values: 变量数据
+        max_points: 最多保留的点数
+        mode: 降采样模式
+
+    Returns:
+        np.ndarray: 选中样本的下标(升序)
+    """
+    mode = DownsampleMode(mode)
+    if mode == DownsampleMode.MINMAX:
+        return minmax_indices(values, max_points)
+    return lttb_indices(time_points, values, max_points)
+
+
+def downsample(
+    time_points: np.ndarray,
+    data: Mapping[str, np.ndarray],
+    max_points: int,
+    mode: DownsampleMode = DownsampleMode.LTTB
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    对共享时间轴的多个变量降采样
+
+    点数上限在变量之间平分，每个变量独立选点后取选中下标的并集，
+    保证各变量的特征点都被保留且返回的数据仍然共享同一时间轴。
+    每个变量返回的点数(即共享时间轴的长度)不超过max_points。
+
+    Args:
+        time_points: 时间轴
+        data: 变量名到数据的映射
+        max_points: 每个变量最多保留的点数，不大于0时不降采样
+        mode: 降采样模式
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, np.ndarray]]: 降采样后的时间轴和各变量数据
+    """
+    n = time_points.shape[0]
+    if max_points <= 0 or n <= max_points:
+        return time_points, dict(data)
+
+    x = np.asarray(time_points, dtype=np.float64)
+    budget = max(1, max_points // max(len(data), 1))
+    selections = [downsample_indices(x, np.asarray(values, dtype=np.float64), budget, mode) for values in data.values()]
+    if not selections:
+        selections = [np.linspace(0, n - 1, max_points).astype(np.int64)]
+    indices = selections[0] if len(selections) == 1 else np.unique(np.concatenate(selections))
+    if len(indices) > max_points:
+        # 变量数多于max_points时每个变量至少选一个点，并集仍可能超出上限，均匀抽取
+        indices = indices[np.linspace(0, len(indices) - 1, max_points).astype(np.int64)]
+
+    return time_points[indices], {var: values[indices] for var, values in data.items()}
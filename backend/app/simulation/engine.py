@@ -1,7 +1,17 @@
 from abc import ABC, abstractmethod
+from enum import Enum
+from pathlib import Path
 from typing import Dict, List, Any, Optional
 from pydantic import BaseModel
 
+from .sampling import OutputSampling, resolve_sampling
+
+
+class SimulationEngineBackend(str, Enum):
+    """仿真引擎枚举"""
+    SKYEYE = "skyeye"  # 外部SkyEye程序
+    NEURON = "neuron"  # 进程内NumPy神经元网络引擎
+
 
 class SimulationConfig(BaseModel):
     """仿真配置模型"""
@@ -10,6 +20,26 @@ class SimulationConfig(BaseModel):
     duration: float
     step_size: float
     output_variables: List[str]
+    warm_start_task_id: Optional[str] = None  # 从该任务的终止状态开始仿真
+    time_limit: Optional[float] = None  # 墙钟时间上限(秒)，超过后由看门狗终止，任务按失败处理
+    output_interval: Optional[float] = None  # 输出间隔(仿真时间)，None表示逐步输出
+    output_stride: Optional[int] = None  # 输出行之间的步数，可代替output_interval
+    variable_intervals: Dict[str, float] = {}  # 各变量的记录间隔(仿真时间)，须为输出间隔的整数倍
+
+    def sampling(self) -> OutputSampling:
+        """
+        输出采样设置
+
+        Raises:
+            ValueError: 采样设置无效时
+        """
+        return resolve_sampling(
+            self.step_size,
+            self.output_variables,
+            self.output_interval,
+            self.output_stride,
+            self.variable_intervals
+        )
 
 
 class SimulationResult(BaseModel):
@@ -20,13 +50,14 @@ class SimulationResult(BaseModel):
     time_points: List[float]
     metadata: Dict[str, Any]
     error_message: Optional[str] = None
+    result_path: Optional[str] = None  # 引擎已直接写入结果存储时的文件路径
 
 
 class SimulationEngine(ABC):
     """仿真引擎抽象基类
     
     定义了神经元仿真引擎的标准接口。
-    具体的仿真引擎实现(如SkyEye)需要继承此类并实现所有抽象方法。
+    具体的仿真引擎实现(如SkyEye、进程内神经元网络引擎)需要继承此类并实现所有抽象方法。
     """
     
     @abstractmethod
@@ -132,4 +163,33 @@ class SimulationEngine(ABC):
     @abstractmethod
     async def get_model_parameters(self, model_path: str) -> Dict[str, Any]:
         """获取模型参数"""
-        pass
\ No newline at end of file
+        pass
+    
+    def log_path(self, task_id: str, stream: str) -> Optional[Path]:
+        """任务的输出日志文件路径
+        
+        运行外部进程的引擎把标准输出(stdout)和错误输出(stderr)写入日志文件，
+        不产生日志的引擎无需实现。
+        
+        Args:
+            task_id: 任务ID
+            stream: stdout或stderr
+            
+        Returns:
+            Optional[Path]: 当前日志文件的路径，引擎不产生日志时返回None
+        """
+        return None
+    
+    async def clear_checkpoints(self, task_id: str) -> bool:
+        """清除任务的检查点
+        
+        支持检查点的引擎在任务再次运行时会从最近的检查点继续，
+        清除后下次运行从头开始。不支持检查点的引擎无需实现。
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            bool: 是否清除了检查点
+        """
+        return False
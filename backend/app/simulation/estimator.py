@@ -0,0 +1,253 @@
+"""仿真任务代价估计与准入控制
+
+在启动任何仿真进程之前估计任务的代价：
+- 步数为仿真时长除以步长，输出点数为步数加1(包括0时刻)
+- 输出字节数为输出点数 × (输出变量数 + 时间轴) × 8字节(列式结果存储为float64)，
+  指定了输出间隔或变量的记录间隔时按实际记录的样本数计算
+- 运行时间为步数 × 同一模型最近完成的运行的每步耗时中位数，没有历史记录时无法估计
+
+按估计结果决定接受任务、放入低优先级队列(排在所有用户可指定的优先级之后)，
+或拒绝任务；输出量超过上限时给出抽取输出(每隔若干步输出一次)的建议。
+运行时看门狗的墙钟时间上限也按预计运行时间计算。
+"""
+
+import math
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .sampling import OutputSampling
+from .storage.columnar import DTYPE
+
+
+# 低优先级队列：用户可指定的优先级从0开始，低优先级任务在所有用户任务之后运行
+LOW_PRIORITY = -1
+
+
+class AdmissionDecision(str, Enum):
+    """准入决定枚举"""
+    ACCEPT = "accept"
+    LOW_PRIORITY = "low_priority"
+    REJECT = "reject"
+
+
+class AdmissionError(ValueError):
+    """任务的预计代价超过上限"""
+
+    def __init__(self, message: str, estimate: Dict[str, Any]):
+        super().__init__(message)
+        self.estimate = estimate
+
+
+def step_count(duration: float, step_size: float) -> int:
+    """
+    计算仿真步数
+
+    Args:
+        duration: 仿真时长
+        step_size: 步长
+
+    Returns:
+        int: 步数，时长不是步长的整数倍时向上取整
+
+    Raises:
+        ValueError: 时长或步长不是正数时
+    """
+    if not (duration > 0 and step_size > 0) or not math.isfinite(duration / step_size):
+        raise ValueError("仿真时长和步长必须为正数")
+    # 容忍浮点误差，例如 1.0 / 0.1 = 10.000000000000002
+    return max(1, math.ceil(duration / step_size - 1e-9))
+
+
+def output_bytes(points: int, variables: int) -> int:
+    """列式结果中数据列(含时间轴)的字节数"""
+    return points * (variables + 1) * DTYPE.itemsize
+
+
+def run_cost(wall_time: float, duration: float, step_size: float, resumed_from: Optional[float] = None) -> Dict[str, Any]:
+    """
+    记录一次完成的运行的代价，写入结果元数据供之后的估计使用
+
+    Args:
+        wall_time: 运行耗时(秒)
+        duration: 仿真时长
+        step_size: 步长
+        resumed_from: 从检查点继续时的起始仿真时间，只计算本次实际运行的步数
+
+    Returns:
+        Dict[str, Any]: wall_time和steps
+    """
+    simulated = duration - (resumed_from or 0.0)
+    steps = step_count(simulated, step_size) if simulated > 0 else 0
+    return {"wall_time": round(wall_time, 6), "steps": steps}
+
+
+def seconds_per_step(history: Iterable[Dict[str, Any]]) -> Optional[float]:
+    """
+    按历史运行估计每步耗时
+
+    Args:
+        history: 历史运行的代价记录(run_cost的返回值)
+
+    Returns:
+        Optional[float]: 每步耗时的中位数(秒)，没有可用记录时返回None
+    """
+    rates = [
+        float(run["wall_time"]) / run["steps"]
+        for run in history
+        if run and run.get("steps") and run.get("wall_time") is not None
+    ]
+    if not rates:
+        return None
+    return float(np.median(rates))
+
+
+def estimate_cost(
+    duration: float,
+    step_size: float,
+    output_variables: List[str],
+    history: Iterable[Dict[str, Any]] = (),
+    sampling: Optional[OutputSampling] = None
+) -> Dict[str, Any]:
+    """
+    估计任务的步数、输出字节数和运行时间
+
+    Args:
+        duration: 仿真时长
+        step_size: 步长
+        output_variables: 输出变量
+        history: 同一模型最近完成的运行的代价记录
+        sampling: 输出采样设置，None表示逐步输出全部变量
+
+    Returns:
+        Dict[str, Any]: steps、output_points、output_bytes、seconds_per_step、
+            runtime(秒，没有历史记录时为None)和history_runs
+
+    Raises:
+        ValueError: 时长或步长不是正数时
+    """
+    history = [run for run in history if run]
+    steps = step_count(duration, step_size)
+    per_step = seconds_per_step(history)
+    if sampling is None:
+        sampling = OutputSampling(step_size)
+    points = sampling.rows(steps)
+    samples = points + sum(sampling.samples(var, steps) for var in output_variables)
+    return {
+        "steps": steps,
+        "output_points": points,
+        "output_bytes": samples * DTYPE.itemsize,
+        "seconds_per_step": per_step,
+        "runtime": steps * per_step if per_step is not None else None,
+        "history_runs": len(history)
+    }
+
+
+def suggest_decimation(estimate: Dict[str, Any], variables: int, step_size: float, limit: int) -> Optional[Dict[str, Any]]:
+    """
+    计算使输出量不超过limit的最小抽取倍数
+
+    Args:
+        estimate: estimate_cost的返回值
+        variables: 输出变量数
+        step_size: 步长
+        limit: 输出字节数上限
+
+    Returns:
+        Optional[Dict[str, Any]]: output_stride(每隔多少步输出一次)、output_interval(输出间隔的仿真时间)
+            和抽取后的output_bytes，上限连一个输出点都容纳不下时返回None
+    """
+    max_points = limit // output_bytes(1, variables)
+    if max_points < 2:
+        return None
+    # 抽取stride倍后输出ceil(steps / stride) + 1个点
+    stride = max(1, math.ceil(estimate["steps"] / (max_points - 1)))
+    points = math.ceil(estimate["steps"] / stride) + 1
+    return {
+        "output_stride": stride,
+        "output_interval": step_size * stride,
+        "output_bytes": output_bytes(points, variables)
+    }
+
+
+def admit(
+    estimate: Dict[str, Any],
+    variables: int,
+    step_size: float,
+    max_steps: int = 0,
+    max_output_bytes: int = 0,
+    max_runtime: float = 0.0,
+    low_priority_runtime: float = 0.0,
+    free_bytes: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    按预计代价做准入决定
+
+    - 步数、输出字节数(上限与磁盘剩余空间取较小值)或运行时间超过上限时拒绝，
+      输出字节数超限时在suggestion中给出抽取输出的建议
+    - 预计运行时间超过low_priority_runtime时放入低优先级队列
+    - 其余任务正常接受
+
+    Args:
+        estimate: estimate_cost的返回值
+        variables: 输出变量数
+        step_size: 步长
+        max_steps: 最大步数，0表示不限制
+        max_output_bytes: 最大输出字节数，0表示不限制
+        max_runtime: 最长预计运行时间(秒)，0表示不限制
+        low_priority_runtime: 放入低优先级队列的预计运行时间(秒)，0表示不降级
+        free_bytes: 结果目录所在磁盘的剩余空间，None表示不检查
+
+    Returns:
+        Dict[str, Any]: 估计结果，加上decision、reasons和suggestion
+    """
+    reasons = []
+    suggestion = None
+    if max_steps and estimate["steps"] > max_steps:
+        reasons.append(f"仿真步数{estimate['steps']}超过上限{max_steps}，请增大步长或缩短仿真时长")
+
+    limits = [limit for limit in (max_output_bytes or None, free_bytes) if limit is not None]
+    if limits and estimate["output_bytes"] > min(limits):
+        limit = min(limits)
+        source = "磁盘剩余空间" if free_bytes is not None and limit == free_bytes else "上限"
+        reasons.append(f"预计输出{estimate['output_bytes']}字节，超过{source}{limit}字节")
+        suggestion = suggest_decimation(estimate, variables, step_size, limit)
+
+    runtime = estimate["runtime"]
+    if max_runtime and runtime is not None and runtime > max_runtime:
+        reasons.append(f"预计运行{runtime:.0f}秒，超过上限{max_runtime:.0f}秒")
+
+    if reasons:
+        decision = AdmissionDecision.REJECT
+    elif low_priority_runtime and runtime is not None and runtime > low_priority_runtime:
+        decision = AdmissionDecision.LOW_PRIORITY
+    else:
+        decision = AdmissionDecision.ACCEPT
+    return {**estimate, "decision": decision.value, "reasons": reasons, "suggestion": suggestion}
+
+
+def watchdog_limit(
+    runtime: Optional[float],
+    factor: float,
+    minimum: float = 0.0,
+    maximum: float = 0.0
+) -> Optional[float]:
+    """
+    计算看门狗的墙钟时间上限
+
+    Args:
+        runtime: 预计运行时间(秒)，None表示没有历史记录
+        factor: 上限为预计运行时间的倍数，0表示不按预计时间限制
+        minimum: 按预计时间计算的上限不少于该值，避免预计时间很短的任务被误杀
+        maximum: 绝对上限，没有预计时间时也生效，0表示不限制
+
+    Returns:
+        Optional[float]: 墙钟时间上限(秒)，None表示不限制
+    """
+    limits = []
+    if factor and runtime is not None:
+        limits.append(max(runtime * factor, minimum))
+    if maximum:
+        limits.append(maximum)
+    return min(limits) if limits else None
@@ -0,0 +1,389 @@
+"""SkyEye代理联邦
+
+远程模式(SKYEYE_MODE=remote)下仿真不在API所在主机上运行，而是放置到SKYEYE_AGENTS中的
+SkyEye代理上(代理进程见agent模块)，结果、输出和检查点流式传回本地的任务结果目录，
+之后的入库、实时结果和检查点续跑与本地运行相同。模型路径须在各代理主机上可访问(共享存储)。
+设置SKYEYE_AGENT_TLS_CA时通过TLS连接代理并校验代理证书，否则为明文连接，只能在可信网络中使用。
+
+- 心跳：放置任务前如果距上次查询超过SKYEYE_AGENT_HEARTBEAT秒，并行查询全部代理的状态，
+  超时或连接失败的代理标记为失联，之后的心跳重新探测；运行中代理定期发送ping，
+  超过SKYEYE_AGENT_TIMEOUT秒收不到任何帧时视为失联
+- 放置：在存活的代理中优先选择运行数未达到slots的代理，再按空闲核数(减去本进程刚放置、
+  代理尚未报告的运行数)和可用内存排序；配置了内存上限时跳过可用内存不足的代理
+- 故障转移：代理失联时从已传回的最近检查点在其他代理上继续，截断检查点之后的结果；
+  没有检查点时从头运行，一次运行最多尝试SKYEYE_AGENT_MAX_ATTEMPTS个代理
+"""
+
+import os
+import math
+import time
+import ssl
+import signal
+import base64
+import asyncio
+import contextlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from .agent import FrameKind, client_ssl_context, read_frame, write_frame, encode_message, decode_message
+from .checkpoint import list_checkpoints, truncate_csv
+from .live import CsvTailer
+from .logs import RotatingLogWriter
+from .registry import process_registry
+
+
+_STOP_POLL = 0.1  # 检查停止请求的间隔(秒)
+
+
+class AgentLostError(ConnectionError):
+    """运行中的代理失联"""
+
+
+class AgentInfo:
+    """单个代理的地址和最近一次心跳的状态"""
+
+    def __init__(self, address: str):
+        host, _, port = address.strip().rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"代理地址无效: {address}")
+        self.address = f"{host}:{port}"
+        self.host = host.strip("[]")
+        self.port = int(port)
+        self.alive = False
+        self.last_seen: Optional[float] = None
+        self.status: Dict[str, Any] = {}
+        self.pending = 0  # 上次心跳之后在该代理上放置的运行数
+        self.active = 0  # 本进程在该代理上正在进行的运行数
+        self.error: Optional[str] = None
+
+    @property
+    def free_cores(self) -> float:
+        return float(self.status.get("free_cores", 0.0)) - self.pending
+
+    @property
+    def has_slot(self) -> bool:
+        slots = self.status.get("slots") or self.status.get("cores") or 1
+        return self.status.get("running", 0) + self.pending < slots
+
+    def mark_down(self, error: str) -> None:
+        self.alive = False
+        self.error = error
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "address": self.address,
+            "alive": self.alive,
+            "last_seen": self.last_seen,
+            "active": self.active,
+            "pending": self.pending,
+            "error": self.error,
+            **{key: value for key, value in self.status.items() if key != "op"}
+        }
+
+
+class AgentFederation:
+    """一组SkyEye代理：心跳、放置和故障转移"""
+
+    def __init__(
+        self,
+        agents: Iterable[str],
+        token: Optional[str] = None,
+        heartbeat: Optional[float] = None,
+        timeout: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        ssl_context: Optional[ssl.SSLContext] = None
+    ):
+        """
+        初始化代理联邦
+
+        Args:
+            agents: 代理地址(host:port)
+            token: 共享令牌，默认为SKYEYE_AGENT_TOKEN
+            heartbeat: 心跳间隔(秒)，默认为SKYEYE_AGENT_HEARTBEAT
+            timeout: 代理无响应超过该时间(秒)视为失联，默认为SKYEYE_AGENT_TIMEOUT
+            max_attempts: 一次运行最多尝试的代理数，默认为SKYEYE_AGENT_MAX_ATTEMPTS
+            ssl_context: 连接代理使用的TLS上下文，默认按SKYEYE_AGENT_TLS_CA创建，没有配置CA时为明文
+
+        Raises:
+            ValueError: 没有代理或代理地址无效时
+        """
+        self.agents = [AgentInfo(address) for address in agents if address.strip()]
+        if not self.agents:
+            raise ValueError("远程模式需要在SKYEYE_AGENTS中配置至少一个代理")
+        self.token = settings.SKYEYE_AGENT_TOKEN if token is None else token
+        self.heartbeat_interval = settings.SKYEYE_AGENT_HEARTBEAT if heartbeat is None else heartbeat
+        self.timeout = settings.SKYEYE_AGENT_TIMEOUT if timeout is None else timeout
+        self.max_attempts = max(1, max_attempts or settings.SKYEYE_AGENT_MAX_ATTEMPTS)
+        self.ssl_context = ssl_context or client_ssl_context()
+        self.last_refresh: Optional[float] = None
+        self.failovers = 0
+
+    def _connect(self, agent: AgentInfo):
+        """连接代理，配置了TLS时校验代理证书"""
+        return asyncio.open_connection(agent.host, agent.port, ssl=self.ssl_context)
+
+    async def _query(self, agent: AgentInfo) -> None:
+        """查询单个代理的状态"""
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(self._connect(agent), self.timeout)
+            write_frame(writer, FrameKind.JSON, encode_message({"op": "status", "token": self.token}))
+            await writer.drain()
+            kind, payload = await asyncio.wait_for(read_frame(reader), self.timeout)
+            message = decode_message(payload) if kind == FrameKind.JSON else {}
+            if message.get("op") != "status":
+                raise ConnectionError(message.get("error") or "代理返回了无效的状态")
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            if agent.alive:
+                logger.warning(f"SkyEye代理 {agent.address} 失联: {str(e) or type(e).__name__}")
+            agent.mark_down(str(e) or type(e).__name__)
+            return
+        finally:
+            if writer is not None:
+                writer.close()
+                with contextlib.suppress(Exception):
+                    await writer.wait_closed()
+        if not agent.alive:
+            logger.info(f"SkyEye代理 {agent.address} 在线")
+        agent.alive = True
+        agent.error = None
+        agent.status = message
+        agent.pending = 0
+        agent.last_seen = time.time()
+
+    async def refresh(self) -> None:
+        """并行查询全部代理的状态"""
+        await asyncio.gather(*(self._query(agent) for agent in self.agents))
+        self.last_refresh = time.monotonic()
+
+    async def heartbeat(self) -> None:
+        """距上次查询超过心跳间隔时刷新代理状态"""
+        if self.last_refresh is None or time.monotonic() - self.last_refresh >= self.heartbeat_interval:
+            await self.refresh()
+
+    def place(self, memory_required: Optional[int] = None) -> AgentInfo:
+        """
+        为一次运行选择代理
+
+        Args:
+            memory_required: 运行需要的内存(字节)，None表示不检查
+
+        Returns:
+            AgentInfo: 选中的代理，其pending计数加1
+
+        Raises:
+            RuntimeError: 没有可用的代理时
+        """
+        candidates = [agent for agent in self.agents if agent.alive]
+        if memory_required:
+            candidates = [
+                agent for agent in candidates
+                if agent.status.get("memory_available") is None or agent.status["memory_available"] >= memory_required
+            ]
+        if not candidates:
+            raise RuntimeError("没有可用的SkyEye代理")
+        agent = max(
+            candidates,
+            key=lambda agent: (agent.has_slot, agent.free_cores, agent.status.get("memory_available") or 0)
+        )
+        agent.pending += 1
+        return agent
+
+    async def run(
+        self,
+        task_id: str,
+        request: Dict[str, Any],
+        results_csv: Path,
+        checkpoint_dir: Path,
+        tailer: CsvTailer,
+        stdout_log: RotatingLogWriter,
+        stderr_log: RotatingLogWriter,
+        report: Dict[str, Any]
+    ) -> int:
+        """
+        在代理上运行一次仿真，代理失联时故障转移
+
+        Args:
+            task_id: 任务ID，停止请求读取自进程注册表
+            request: 运行请求(见agent模块)，restore/initial_state为base64编码的状态文件
+            results_csv: 本地结果CSV，结果按顺序追加
+            checkpoint_dir: 本地检查点目录
+            tailer: 结果CSV的增量读取器，故障转移截断结果后同步偏移量
+            stdout_log: 标准输出日志
+            stderr_log: 错误输出日志
+            report: 写入运行所在的代理(agent)、尝试次数(attempts)和超过的资源上限(limit_exceeded)
+
+        Returns:
+            int: SkyEye的退出码
+
+        Raises:
+            RuntimeError: 没有可用的代理或尝试次数用尽时
+        """
+        memory_required = settings.SKYEYE_MEMORY_LIMIT or None
+        attempts = 0
+        while True:
+            await self.heartbeat()
+            agent = self.place(memory_required)
+            attempts += 1
+            report.update(agent=agent.address, attempts=attempts)
+            try:
+                return await self._run_once(
+                    agent, task_id, request, results_csv, checkpoint_dir, stdout_log, stderr_log, report
+                )
+            except AgentLostError as e:
+                agent.mark_down(str(e))
+                logger.warning(f"仿真任务 {task_id} 所在的SkyEye代理 {agent.address} 失联: {str(e)}")
+                handle = process_registry.get(task_id)
+                if handle is not None and handle.stop_requested:
+                    return -signal.SIGTERM
+                if attempts >= self.max_attempts:
+                    raise RuntimeError(f"SkyEye代理失联，已尝试{attempts}次: {str(e)}")
+                self.failovers += 1
+                request = self._resume_request(request, results_csv, checkpoint_dir, tailer)
+                if request.get("restore"):
+                    report["failover_from"] = request["resume_time"]
+
+    @staticmethod
+    def _resume_request(
+        request: Dict[str, Any],
+        results_csv: Path,
+        checkpoint_dir: Path,
+        tailer: CsvTailer
+    ) -> Dict[str, Any]:
+        """从已传回的最近检查点继续，截断检查点之后的结果；没有检查点时从头运行"""
+        step_size = request["step_size"]
+        checkpoints = list_checkpoints(checkpoint_dir, step_size)
+        request = {**request, "restore": None, "resume_time": None}
+        end_time = -math.inf
+        if checkpoints:
+            checkpoint = checkpoints[-1]
+            request["restore"] = base64.b64encode(checkpoint.path.read_bytes()).decode("ascii")
+            request["resume_time"] = checkpoint.time
+            end_time = checkpoint.time + step_size / 2
+        # 没有检查点时保留表头，丢弃代理重新输出的表头
+        size = truncate_csv(results_csv, end_time) if results_csv.exists() and results_csv.stat().st_size else 0
+        if size:
+            tailer.skip_to(size)
+        request["append"] = size > 0
+        return request
+
+    async def _run_once(
+        self,
+        agent: AgentInfo,
+        task_id: str,
+        request: Dict[str, Any],
+        results_csv: Path,
+        checkpoint_dir: Path,
+        stdout_log: RotatingLogWriter,
+        stderr_log: RotatingLogWriter,
+        report: Dict[str, Any]
+    ) -> int:
+        """在一个代理上运行，把传回的帧写入本地文件"""
+        writer = None
+        watcher = None
+        agent.active += 1
+        try:
+            try:
+                reader, writer = await asyncio.wait_for(self._connect(agent), self.timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                raise AgentLostError(str(e) or "连接超时")
+            run_request = {key: value for key, value in request.items() if key not in ("append", "resume_time")}
+            write_frame(writer, FrameKind.JSON, encode_message({**run_request, "op": "run", "token": self.token}))
+            await writer.drain()
+            watcher = asyncio.ensure_future(self._forward_stop(task_id, writer))
+
+            skip_header = bool(request.get("append")) and not request.get("restore")
+            with open(results_csv, "ab" if request.get("append") else "wb") as results:
+                while True:
+                    try:
+                        kind, payload = await asyncio.wait_for(read_frame(reader), self.timeout)
+                    except asyncio.TimeoutError:
+                        raise AgentLostError(f"{self.timeout:g}秒内没有收到心跳")
+                    except (asyncio.IncompleteReadError, ConnectionError) as e:
+                        raise AgentLostError(str(e) or "连接已关闭")
+                    if kind == FrameKind.RESULTS:
+                        if skip_header:
+                            header_end = payload.find(b"\n")
+                            if header_end < 0:
+                                continue
+                            payload, skip_header = payload[header_end + 1:], False
+                        results.write(payload)
+                        results.flush()
+                    elif kind == FrameKind.STDOUT:
+                        stdout_log.write(payload)
+                    elif kind == FrameKind.STDERR:
+                        stderr_log.write(payload)
+                    elif kind == FrameKind.CHECKPOINT:
+                        self._write_checkpoint(checkpoint_dir, payload)
+                    else:
+                        message = decode_message(payload)
+                        if message.get("op") == "exit":
+                            report["limit_exceeded"] = message.get("limit_exceeded")
+                            return int(message["returncode"])
+                        if message.get("op") == "error":
+                            raise RuntimeError(f"SkyEye代理 {agent.address} 拒绝运行: {message.get('error')}")
+                        if message.get("op") == "ping":
+                            # 代理上报的SkyEye进程资源使用
+                            handle = process_registry.get(task_id)
+                            if handle is not None:
+                                handle.report_usage(message.get("usage"))
+        finally:
+            agent.active -= 1
+            if watcher is not None:
+                watcher.cancel()
+            if writer is not None:
+                writer.close()
+                with contextlib.suppress(Exception):
+                    await writer.wait_closed()
+
+    @staticmethod
+    async def _forward_stop(task_id: str, writer: asyncio.StreamWriter) -> None:
+        """任务被停止(包括看门狗超时)时通知代理终止SkyEye"""
+        while True:
+            handle = process_registry.get(task_id)
+            if handle is not None and handle.stop_requested:
+                break
+            await asyncio.sleep(_STOP_POLL)
+        with contextlib.suppress(ConnectionError):
+            write_frame(writer, FrameKind.JSON, encode_message({"op": "stop"}))
+            await writer.drain()
+
+    @staticmethod
+    def _write_checkpoint(checkpoint_dir: Path, payload: bytes) -> None:
+        """写入代理传回的检查点，先写临时文件再改名"""
+        name, _, data = payload.partition(b"\0")
+        name = name.decode("utf-8")
+        if name != Path(name).name or not name.endswith(".state"):
+            logger.warning(f"忽略代理传回的无效检查点文件名: {name!r}")
+            return
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        tmp = checkpoint_dir / f"{name}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, checkpoint_dir / name)
+
+    def stats(self) -> Dict[str, Any]:
+        """代理联邦状态"""
+        return {
+            "agents": [agent.describe() for agent in self.agents],
+            "alive": sum(1 for agent in self.agents if agent.alive),
+            "failovers": self.failovers
+        }
+
+
+_federations: Dict[str, AgentFederation] = {}
+
+
+def parse_agents(agents: str) -> List[str]:
+    """解析逗号分隔的代理地址"""
+    return [address.strip() for address in agents.split(",") if address.strip()]
+
+
+def get_federation(agents: Optional[str] = None) -> AgentFederation:
+    """获取代理地址列表对应的代理联邦(每个进程共享)，默认为SKYEYE_AGENTS"""
+    agents = settings.SKYEYE_AGENTS if agents is None else agents
+    federation = _federations.get(agents)
+    if federation is None:
+        federation = _federations[agents] = AgentFederation(parse_agents(agents))
+    return federation
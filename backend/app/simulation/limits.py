@@ -0,0 +1,222 @@
+"""仿真进程资源隔离
+
+限制单个SkyEye进程的资源，避免失控的仿真耗尽内存、拖慢同一容器内的API：
+- 内存：配置了cgroup v2目录(SKYEYE_CGROUP_ROOT)时，每次运行创建子cgroup并写入memory.max，
+  否则通过RLIMIT_AS限制进程的虚拟地址空间
+- CPU：cgroup的cpu.max限制可用的核数；RLIMIT_CPU限制累计CPU时间，超过软上限后进程收到SIGXCPU，
+  忽略或处理了SIGXCPU的进程在超过硬上限时被内核以SIGKILL终止
+- 调度优先级：进程以SKYEYE_NICE的nice值运行，CPU紧张时优先响应API。
+  SkyEye在独立的会话中启动，启用了autogroup的内核按会话分组调度，进程的nice值只在组内生效，
+  因此同时设置进程所在autogroup的nice值
+
+限制在进程启动后立即通过prlimit和cgroup.procs施加，而不是在子进程中执行preexec_fn：
+API进程中有线程池，fork后在子进程里执行Python代码可能死锁，
+且preexec_fn会使subprocess放弃vfork/posix_spawn，拖慢进程启动。
+进程因超过上限退出时，exceeded()根据退出信号、cgroup事件和错误输出推断原因，写入任务的错误信息。
+"""
+
+import os
+import signal
+import itertools
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+
+try:
+    import resource
+except ImportError:  # 非Unix系统不支持rlimit
+    resource = None
+
+
+_CPU_PERIOD = 100_000  # cpu.max的周期(微秒)
+_CPU_TIME_GRACE = 5  # RLIMIT_CPU的硬上限比软上限多出的秒数，软上限先发送SIGXCPU
+_OUT_OF_MEMORY = (b"MemoryError", b"bad_alloc", b"Cannot allocate memory", b"out of memory")
+_cgroup_ids = itertools.count()
+
+
+class ResourceLimits:
+    """单个仿真进程的资源上限"""
+
+    def __init__(
+        self,
+        memory_bytes: Optional[int] = None,
+        cpu_time: Optional[float] = None,
+        cpu_cores: Optional[float] = None,
+        nice: Optional[int] = None,
+        cgroup_root: Optional[str] = None
+    ):
+        """
+        初始化资源上限，参数为None时使用配置
+
+        Args:
+            memory_bytes: 内存上限(字节)，0表示不限制，默认为SKYEYE_MEMORY_LIMIT
+            cpu_time: 累计CPU时间上限(秒)，0表示不限制，默认为SKYEYE_CPU_TIME_LIMIT
+            cpu_cores: 可用的CPU核数(需要cgroup)，0表示不限制，默认为SKYEYE_CPU_LIMIT
+            nice: 进程的nice值增量，默认为SKYEYE_NICE
+            cgroup_root: 可写的cgroup v2目录，为空时只使用rlimit，默认为SKYEYE_CGROUP_ROOT
+        """
+        self.memory_bytes = settings.SKYEYE_MEMORY_LIMIT if memory_bytes is None else memory_bytes
+        self.cpu_time = settings.SKYEYE_CPU_TIME_LIMIT if cpu_time is None else cpu_time
+        self.cpu_cores = settings.SKYEYE_CPU_LIMIT if cpu_cores is None else cpu_cores
+        self.nice = settings.SKYEYE_NICE if nice is None else nice
+        root = settings.SKYEYE_CGROUP_ROOT if cgroup_root is None else cgroup_root
+        self.cgroup_root = Path(root) if root else None
+        self.cgroup: Optional[Path] = None
+        self._children_cpu: Optional[float] = None
+
+    def prepare(self, name: str) -> None:
+        """
+        创建本次运行的cgroup并写入内存和CPU上限
+
+        cgroup不可用(目录不存在、没有权限或缺少控制器)时记录警告，内存上限退回RLIMIT_AS。
+
+        Args:
+            name: cgroup名称，例如任务ID
+        """
+        if self.cgroup_root is None or not (self.memory_bytes or self.cpu_cores):
+            return
+        path = self.cgroup_root / f"skyeye-{name}-{next(_cgroup_ids)}"
+        try:
+            path.mkdir()
+            if self.memory_bytes:
+                (path / "memory.max").write_text(str(int(self.memory_bytes)))
+                # 不使用交换分区，超过上限时直接由内核终止
+                if (path / "memory.swap.max").exists():
+                    (path / "memory.swap.max").write_text("0")
+            if self.cpu_cores:
+                (path / "cpu.max").write_text(f"{int(self.cpu_cores * _CPU_PERIOD)} {_CPU_PERIOD}")
+        except OSError as e:
+            logger.warning(f"创建cgroup失败 {path}: {str(e)}，改用rlimit限制资源")
+            self._remove(path)
+            return
+        self.cgroup = path
+
+    def apply(self, pid: int) -> None:
+        """
+        对刚启动的进程施加资源上限
+
+        Args:
+            pid: 进程ID，进程已退出时忽略
+        """
+        self._children_cpu = _children_cpu_time()
+        try:
+            if self.cgroup is not None:
+                (self.cgroup / "cgroup.procs").write_text(str(pid))
+            if resource is not None:
+                if self.memory_bytes and self.cgroup is None:
+                    limit = int(self.memory_bytes)
+                    resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+                if self.cpu_time:
+                    soft = max(1, int(self.cpu_time))
+                    resource.prlimit(pid, resource.RLIMIT_CPU, (soft, soft + _CPU_TIME_GRACE))
+            if self.nice:
+                os.setpriority(os.PRIO_PROCESS, pid, os.getpriority(os.PRIO_PROCESS, pid) + self.nice)
+                self._nice_autogroup(pid)
+        except ProcessLookupError:
+            pass
+        except OSError as e:
+            logger.warning(f"设置进程 {pid} 的资源上限失败: {str(e)}")
+
+    def _nice_autogroup(self, pid: int) -> None:
+        """设置进程所在autogroup的nice值，内核未启用autogroup时忽略"""
+        # 只调整进程自己会话的autogroup，不影响与API进程共享的组
+        try:
+            if os.getsid(pid) != pid:
+                return
+            with open(f"/proc/{pid}/autogroup", "w") as f:
+                f.write(str(min(19, self.nice)))
+        except OSError:
+            pass
+
+    def oom_killed(self) -> bool:
+        """cgroup中是否有进程因超过内存上限被内核终止"""
+        if self.cgroup is None:
+            return False
+        try:
+            events = (self.cgroup / "memory.events").read_text()
+        except OSError:
+            return False
+        for line in events.splitlines():
+            key, _, value = line.partition(" ")
+            if key == "oom_kill" and value.strip() not in ("", "0"):
+                return True
+        return False
+
+    def cpu_used(self) -> Optional[float]:
+        """
+        本次运行的进程已使用的CPU时间(秒)
+
+        有cgroup时读取cpu.stat，否则为apply()之后API进程回收的子进程的CPU时间，
+        同时有其他子进程退出时会偏大。
+
+        Returns:
+            Optional[float]: 无法获取时返回None
+        """
+        if self.cgroup is not None:
+            try:
+                stat = (self.cgroup / "cpu.stat").read_text()
+            except OSError:
+                stat = ""
+            for line in stat.splitlines():
+                key, _, value = line.partition(" ")
+                if key == "usage_usec" and value.strip().isdigit():
+                    return int(value) / 1e6
+        current = _children_cpu_time()
+        if current is None or self._children_cpu is None:
+            return None
+        return current - self._children_cpu
+
+    def exceeded(self, returncode: int, stderr: bytes = b"") -> Optional[str]:
+        """
+        推断进程是否因超过资源上限而退出
+
+        Args:
+            returncode: 进程的退出码，负数为终止进程的信号
+            stderr: 错误输出的末尾
+
+        Returns:
+            Optional[str]: 超过的上限说明，不是因资源上限退出时返回None
+        """
+        if returncode == 0:
+            return None
+        if self.memory_bytes and (self.oom_killed() or any(marker in stderr for marker in _OUT_OF_MEMORY)):
+            return f"内存超过上限{int(self.memory_bytes)}字节，进程已被终止"
+        if self.cpu_time and returncode in (-signal.SIGXCPU, -signal.SIGKILL):
+            # SIGKILL也可能来自停止请求或其他进程，只有CPU时间已达到上限时才归因于RLIMIT_CPU的硬上限
+            cpu_used = self.cpu_used() if returncode == -signal.SIGKILL else None
+            if returncode == -signal.SIGXCPU or (cpu_used is not None and cpu_used >= self.cpu_time):
+                return f"CPU时间超过上限{self.cpu_time:g}秒，进程已被终止"
+        return None
+
+    def release(self) -> None:
+        """删除本次运行的cgroup(其中的进程已全部退出)"""
+        if self.cgroup is not None:
+            self._remove(self.cgroup)
+            self.cgroup = None
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        # cgroup目录中的控制文件由内核管理，rmdir即可删除；普通目录(测试)需先删除文件
+        try:
+            path.rmdir()
+            return
+        except FileNotFoundError:
+            return
+        except OSError:
+            pass
+        try:
+            for child in path.iterdir():
+                child.unlink()
+            path.rmdir()
+        except OSError as e:
+            logger.warning(f"删除cgroup失败 {path}: {str(e)}")
+
+
+def _children_cpu_time() -> Optional[float]:
+    """API进程已回收的子进程累计使用的CPU时间(秒)"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
@@ -0,0 +1,325 @@
+"""仿真结果实时推送模块
+
+在仿真进程运行期间跟踪其输出的CSV文件，把新追加的样本发布到每个任务的
+环形缓冲区，供流式接口(SSE)增量推送给前端：
+- RingBuffer: 固定容量的NumPy环形缓冲区，以全局序号标识样本
+- CsvTailer: 从上次读到的位置继续解析CSV中新写入的完整行
+- LiveStream: 单个任务的缓冲区及订阅者通知
+- LiveResultHub: 按任务ID管理LiveStream
+"""
+
+import io
+import asyncio
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logging import logger
+
+
+class RingBuffer:
+    """固定容量的多列环形缓冲区
+
+    每个样本有一个从0开始递增的全局序号，缓冲区只保留最近capacity个样本。
+    """
+
+    def __init__(self, variables: List[str], capacity: int):
+        """
+        初始化环形缓冲区
+
+        Args:
+            variables: 变量名称列表
+            capacity: 最多保留的样本数
+        """
+        self.variables = list(variables)
+        self.capacity = capacity
+        self._time = np.empty(capacity, dtype=np.float64)
+        self._data = {var: np.empty(capacity, dtype=np.float64) for var in self.variables}
+        self.total = 0  # 已写入的样本总数，即下一个样本的序号
+
+    @property
+    def first_seq(self) -> int:
+        """缓冲区中最早样本的序号"""
+        return max(0, self.total - self.capacity)
+
+    @property
+    def last_time(self) -> Optional[float]:
+        """最新样本的时间点，缓冲区为空时返回None"""
+        if self.total == 0:
+            return None
+        return float(self._time[(self.total - 1) % self.capacity])
+
+    def append(self, time_points: np.ndarray, data: Dict[str, np.ndarray]) -> None:
+        """
+        追加样本，超出容量时覆盖最早的样本
+
+        Args:
+            time_points: 时间点
+            data: 各变量数据，缺失的变量以NaN填充
+        """
+        n = time_points.shape[0]
+        if n == 0:
+            return
+        if n > self.capacity:
+            # 只保留最新的capacity个样本
+            skip = n - self.capacity
+            self.total += skip
+            time_points = time_points[skip:]
+            data = {var: values[skip:] for var, values in data.items()}
+            n = self.capacity
+
+        positions = (self.total + np.arange(n)) % self.capacity
+        self._time[positions] = time_points
+        for var in self.variables:
+            values = data.get(var)
+            self._data[var][positions] = np.nan if values is None else values
+        self.total += n
+
+    def since(self, seq: int, limit: Optional[int] = None) -> Tuple[int, np.ndarray, Dict[str, np.ndarray]]:
+        """
+        获取序号不小于seq的样本
+
+        seq早于缓冲区中最早的样本时从最早的样本开始返回。
+
+        Args:
+            seq: 起始序号
+            limit: 最多返回的样本数
+
+        Returns:
+            Tuple[int, np.ndarray, Dict[str, np.ndarray]]: 实际起始序号、时间点和各变量数据(副本)
+        """
+        start = max(seq, self.first_seq)
+        stop = self.total if limit is None else min(self.total, start + limit)
+        if stop <= start:
+            return start, np.empty(0), {var: np.empty(0) for var in self.variables}
+
+        positions = np.arange(start, stop) % self.capacity
+        return start, self._time[positions], {var: values[positions] for var, values in self._data.items()}
+
+
+class CsvTailer:
+    """CSV增量读取器
+
+    记录已读取的字节偏移，每次只解析新追加的完整行，
+    正在写入的半行会留到下次读取。每次最多读取max_bytes字节，
+    积压较多时(pending为True)由调用方继续读取，内存占用与积压量无关。
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        variables: List[str],
+        strides: Optional[Mapping[str, int]] = None,
+        max_bytes: Optional[int] = None
+    ):
+        """
+        初始化增量读取器
+
+        Args:
+            path: CSV文件路径(可以尚未创建)
+            variables: 需要读取的变量列表
+            strides: 记录间隔较大的变量(每隔若干行记录一次)，未记录的行保持上一次记录的值
+            max_bytes: 每次最多读取的字节数，默认为LIVE_TAIL_MAX_BYTES
+        """
+        self.path = Path(path)
+        self.variables = list(variables)
+        self.offset = 0
+        self.max_bytes = max(1, max_bytes or settings.LIVE_TAIL_MAX_BYTES)
+        self.pending = False
+        self._columns: Optional[List[str]] = None
+        self._held = [var for var in (strides or {}) if var in self.variables]
+        self._last: Dict[str, float] = {}
+
+    def poll(self) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+        """
+        读取自上次调用以来新写入的行
+
+        Returns:
+            Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]: 新样本，没有新数据时返回None
+        """
+        self.pending = False
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                chunk = f.read(self.max_bytes)
+                self.pending = len(chunk) == self.max_bytes
+                # 单行超过max_bytes时继续读到该行结束
+                while self.pending and b"\n" not in chunk:
+                    block = f.read(self.max_bytes)
+                    self.pending = len(block) == self.max_bytes
+                    chunk += block
+        except FileNotFoundError:
+            return None
+
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            self.pending = False
+            return None
+        chunk = chunk[:end + 1]
+        self.offset += len(chunk)
+
+        if self._columns is None:
+            header_end = chunk.index(b"\n")
+            self._read_header(chunk[:header_end])
+            chunk = chunk[header_end + 1:]
+        if not chunk.strip():
+            return None
+
+        columns = ["time"] + self.variables
+        df = pd.read_csv(
+            io.BytesIO(chunk),
+            header=None,
+            names=self._columns,
+            usecols=columns,
+            dtype={name: np.float64 for name in columns},
+            skipinitialspace=True
+        )
+        for var in self._held:
+            held = df[var].ffill()
+            if var in self._last:
+                held = held.fillna(self._last[var])
+            if held.notna().iloc[-1]:
+                self._last[var] = float(held.iloc[-1])
+            df[var] = held
+        return df["time"].to_numpy(), {var: df[var].to_numpy() for var in self.variables}
+
+    def skip_to(self, offset: int) -> None:
+        """
+        跳过文件中已有的内容，只读取offset之后追加的行
+
+        Args:
+            offset: 开始读取的字节偏移，应位于行首
+        """
+        with open(self.path, "rb") as f:
+            header = f.readline()
+        if header.endswith(b"\n"):
+            self._read_header(header[:-1])
+            self.offset = max(offset, len(header))
+
+    def _read_header(self, header: bytes) -> None:
+        self._columns = [name.strip() for name in header.decode("utf-8").split(",")]
+        if "time" not in self._columns:
+            raise ValueError(f"结果文件缺少time列: {self.path}")
+        self.variables = [var for var in self.variables if var in self._columns]
+
+
+class LiveStream:
+    """单个任务的实时结果流"""
+
+    def __init__(self, task_id: str, variables: List[str], capacity: int):
+        self.task_id = task_id
+        self.buffer = RingBuffer(variables, capacity)
+        self.status = "running"
+        self.error_message: Optional[str] = None
+        self._condition = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status != "running"
+
+    async def publish(self, time_points: np.ndarray, data: Dict[str, np.ndarray]) -> None:
+        """发布新样本并唤醒等待的订阅者"""
+        async with self._condition:
+            self.buffer.append(time_points, data)
+            self._condition.notify_all()
+
+    async def finish(self, status: str, error_message: Optional[str] = None) -> None:
+        """标记结果流结束"""
+        async with self._condition:
+            self.status = status
+            self.error_message = error_message
+            self._condition.notify_all()
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """
+        等待序号为seq的样本到达或结果流结束
+
+        Args:
+            seq: 等待的样本序号
+            timeout: 超时时间(秒)
+
+        Returns:
+            bool: 有新数据或已结束时返回True，超时返回False
+        """
+        async with self._condition:
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self.buffer.total > seq or self.finished),
+                    timeout
+                )
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+
+class LiveResultHub:
+    """实时结果流注册表
+
+    结果流在仿真开始时创建，结束后保留一段时间供晚到的订阅者读取剩余数据。
+    """
+
+    def __init__(self, capacity: Optional[int] = None, retention: Optional[float] = None):
+        self.capacity = capacity or settings.LIVE_BUFFER_SAMPLES
+        self.retention = settings.LIVE_RETENTION_SECONDS if retention is None else retention
+        self._streams: Dict[str, LiveStream] = {}
+
+    def open(self, task_id: str, variables: List[str]) -> LiveStream:
+        """为任务创建新的结果流，替换已有的同名结果流"""
+        stream = LiveStream(task_id, variables, self.capacity)
+        self._streams[task_id] = stream
+        return stream
+
+    def get(self, task_id: str) -> Optional[LiveStream]:
+        """获取任务的结果流"""
+        return self._streams.get(task_id)
+
+    async def close(self, task_id: str, status: str, error_message: Optional[str] = None) -> None:
+        """结束任务的结果流，并在保留时间后移除"""
+        stream = self._streams.get(task_id)
+        if stream is None:
+            return
+        await stream.finish(status, error_message)
+        asyncio.get_running_loop().call_later(self.retention, self._discard, task_id, stream)
+
+    def _discard(self, task_id: str, stream: LiveStream) -> None:
+        if self._streams.get(task_id) is stream:
+            del self._streams[task_id]
+
+
+async def tail_until_done(
+    stream: LiveStream,
+    tailer: CsvTailer,
+    done: "asyncio.Future",
+    interval: Optional[float] = None
+) -> None:
+    """
+    在done完成前定期读取CSV新增的行并发布
+
+    Args:
+        stream: 目标结果流
+        tailer: CSV增量读取器
+        done: 仿真进程结束时完成的Future
+        interval: 轮询间隔(秒)
+    """
+    interval = interval or settings.LIVE_TAIL_INTERVAL
+    while True:
+        finished = done.done()
+        try:
+            # 积压超过单次读取上限时分多次读取，每次只解析有限的字节数
+            while True:
+                chunk = await asyncio.to_thread(tailer.poll)
+                if chunk is not None:
+                    await stream.publish(*chunk)
+                if not tailer.pending:
+                    break
+        except Exception as e:
+            logger.warning(f"读取实时结果失败 {stream.task_id}: {str(e)}")
+        if finished:
+            return
+        await asyncio.wait({done}, timeout=interval)
+
+
+live_hub = LiveResultHub()
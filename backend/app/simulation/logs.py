@@ -0,0 +1,210 @@
+"""仿真进程输出日志
+
+把SkyEye的标准输出和错误输出边读边写入按大小轮转的日志文件，内存中只保留最近的一段用于错误信息：
+- 当前文件为 name.log，写满max_bytes后依次改名为 name.log.1 ... name.log.N，最旧的被删除
+- 日志中的偏移量为任务输出的绝对字节位置，轮转后不变；
+  各文件的起始偏移量记录在 name.log.offsets 中，读取端据此按偏移分页
+- 运行中的任务也可以读取，读取端只按偏移量读取请求的一页
+"""
+
+import os
+import json
+import asyncio
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app.core.config import settings
+
+
+_READ_CHUNK = 65536
+
+
+class LogStream(str, Enum):
+    """进程输出流"""
+    STDOUT = "stdout"
+    STDERR = "stderr"
+
+
+def _offsets_path(path: Path) -> Path:
+    return path.with_name(path.name + ".offsets")
+
+
+def _backup_path(path: Path, index: int) -> Path:
+    return path.with_name(f"{path.name}.{index}")
+
+
+def _load_offsets(path: Path) -> Dict[str, Any]:
+    """读取各日志文件的起始偏移量，没有记录(未轮转过)时当前文件从0开始"""
+    try:
+        with open(_offsets_path(path)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"current": 0, "backups": []}
+
+
+class RotatingLogWriter:
+    """按大小轮转的日志写入器，保留最近tail_bytes字节的输出"""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_bytes: Optional[int] = None,
+        backups: Optional[int] = None,
+        tail_bytes: Optional[int] = None
+    ):
+        """
+        打开日志文件，已存在时追加(例如从检查点继续的运行)
+
+        Args:
+            path: 日志文件路径
+            max_bytes: 单个文件的最大字节数，0表示不轮转，默认为SKYEYE_LOG_MAX_BYTES
+            backups: 保留的轮转文件数，默认为SKYEYE_LOG_BACKUPS
+            tail_bytes: 内存中保留的最近输出字节数，默认为SKYEYE_LOG_TAIL_BYTES
+        """
+        self.path = Path(path)
+        self.max_bytes = settings.SKYEYE_LOG_MAX_BYTES if max_bytes is None else max_bytes
+        self.backups = settings.SKYEYE_LOG_BACKUPS if backups is None else backups
+        self.tail_bytes = settings.SKYEYE_LOG_TAIL_BYTES if tail_bytes is None else tail_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._offsets = _load_offsets(self.path)
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        self._tail = bytearray()
+        self.written = 0
+
+    @property
+    def offset(self) -> int:
+        """已输出的总字节数(绝对偏移量)"""
+        return self._offsets["current"] + self._size
+
+    @property
+    def tail(self) -> bytes:
+        """本次运行最近输出的内容"""
+        return bytes(self._tail)
+
+    def write(self, data: bytes) -> None:
+        """写入一段输出，当前文件超过max_bytes时轮转"""
+        if not data:
+            return
+        self._file.write(data)
+        self._size += len(data)
+        self.written += len(data)
+        self._tail.extend(data)
+        if len(self._tail) > self.tail_bytes:
+            del self._tail[:len(self._tail) - self.tail_bytes]
+        if self.max_bytes and self._size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        starts = [self._offsets["current"]] + self._offsets["backups"]
+        if self.backups > 0:
+            _backup_path(self.path, self.backups).unlink(missing_ok=True)
+            for index in range(self.backups - 1, 0, -1):
+                source = _backup_path(self.path, index)
+                if source.exists():
+                    os.replace(source, _backup_path(self.path, index + 1))
+            os.replace(self.path, _backup_path(self.path, 1))
+        else:
+            self.path.unlink()
+        self._offsets = {"current": self.offset, "backups": starts[:self.backups]}
+        tmp = _offsets_path(self.path).with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self._offsets, f)
+        os.replace(tmp, _offsets_path(self.path))
+        self._file = open(self.path, "ab")
+        self._size = 0
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "RotatingLogWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+async def pump(reader: asyncio.StreamReader, writer: RotatingLogWriter) -> None:
+    """把管道中的输出持续写入日志，直到管道关闭"""
+    while True:
+        chunk = await reader.read(_READ_CHUNK)
+        if not chunk:
+            writer.flush()
+            return
+        writer.write(chunk)
+
+
+def _segments(path: Path) -> List[Tuple[int, int, Path]]:
+    """现存日志文件的(起始偏移量, 结束偏移量, 路径)，按偏移量升序"""
+    offsets = _load_offsets(path)
+    candidates = [(offsets["current"], path)] + [
+        (start, _backup_path(path, index + 1)) for index, start in enumerate(offsets["backups"])
+    ]
+    segments = []
+    for start, file_path in candidates:
+        try:
+            segments.append((start, start + file_path.stat().st_size, file_path))
+        except FileNotFoundError:
+            continue
+    return sorted(segments, key=lambda segment: segment[0])
+
+
+def read_log(path: Union[str, Path], offset: Optional[int] = None, limit: int = 65536) -> Dict[str, Any]:
+    """
+    按偏移量读取一页日志
+
+    页尾在换行处截断(一行超过limit时除外)，避免截断多字节字符，next_offset为下一页的偏移量。
+
+    Args:
+        path: 日志文件路径(当前文件)
+        offset: 绝对偏移量，None或负数表示读取最后limit字节
+        limit: 最多读取的字节数
+
+    Returns:
+        Dict[str, Any]: offset(本页实际的起始偏移量)、next_offset、first_offset(最早保留的偏移量)、
+            size(已输出的总字节数)、eof(是否已读到当前末尾)和data(按UTF-8解码的文本)
+    """
+    segments = _segments(Path(path))
+    if not segments:
+        return {"offset": 0, "next_offset": 0, "first_offset": 0, "size": 0, "eof": True, "data": ""}
+    first, size = segments[0][0], segments[-1][1]
+    if offset is None or offset < 0:
+        offset = max(first, size - limit)
+    # 已被轮转删除的部分从最早保留的位置开始
+    offset = min(max(offset, first), size)
+
+    data = bytearray()
+    position = offset
+    for start, end, file_path in segments:
+        if position >= end or len(data) >= limit:
+            continue
+        # 轮转文件之间不连续时(中间的文件已被删除)跳到下一个文件的开头
+        position = max(position, start)
+        try:
+            with open(file_path, "rb") as f:
+                f.seek(position - start)
+                chunk = f.read(min(limit - len(data), end - position))
+        except FileNotFoundError:
+            # 读取期间发生轮转，返回已读到的部分，下一页从next_offset继续
+            break
+        data.extend(chunk)
+        position += len(chunk)
+
+    if position < size:
+        newline = data.rfind(b"\n")
+        if newline >= 0:
+            position -= len(data) - newline - 1
+            del data[newline + 1:]
+    return {
+        "offset": offset,
+        "next_offset": position,
+        "first_offset": first,
+        "size": size,
+        "eof": position >= size,
+        "data": data.decode("utf-8", errors="replace")
+    }
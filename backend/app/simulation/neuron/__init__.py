@@ -0,0 +1,35 @@
+"""
+进程内神经元网络仿真模块
+"""
+
+from .models import NeuronModel, LIFModel, IzhikevichModel, HodgkinHuxleyModel, get_neuron_model
+from .integrators import Integrator, EulerIntegrator, RK4Integrator, AdaptiveIntegrator, get_integrator
+from .network import Network, Population, Projection
+from .connectivity import SynapseTable, DelayRingBuffer
+from .simulator import NetworkSimulator, Recorder, build_recorders
+from .parallel import ParallelNetworkSimulator, SharedArrays
+from .engine import NeuronEngine
+
+__all__ = [
+    'NeuronModel',
+    'LIFModel',
+    'IzhikevichModel',
+    'HodgkinHuxleyModel',
+    'get_neuron_model',
+    'Integrator',
+    'EulerIntegrator',
+    'RK4Integrator',
+    'AdaptiveIntegrator',
+    'get_integrator',
+    'Network',
+    'Population',
+    'Projection',
+    'SynapseTable',
+    'DelayRingBuffer',
+    'NetworkSimulator',
+    'Recorder',
+    'build_recorders',
+    'ParallelNetworkSimulator',
+    'SharedArrays',
+    'NeuronEngine',
+]
@@ -0,0 +1,242 @@
+"""稀疏突触连接和事件驱动的放电传递
+
+SynapseTable按突触前神经元以CSR格式保存一个投射的全部突触：
+- indptr: 长度为源群体大小+1，第i个神经元的突触位于[indptr[i], indptr[i+1])
+- targets: 突触后神经元序号(int32)
+- weights: 突触权重(float32)
+- delays: 每个突触的传导延迟(毫秒，float32)，所有突触延迟相同时为None，只保存标量delay
+
+每步只遍历放电神经元的出边，把权重累加到目标群体延迟环形缓冲中对应的到达槽位，
+计算量与放电数 × 出度成正比，与网络规模的平方无关。
+"""
+
+from typing import Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+
+class SynapseTable:
+    """按突触前神经元组织的CSR突触表"""
+
+    def __init__(
+        self,
+        n_pre: int,
+        n_post: int,
+        indptr: np.ndarray,
+        targets: np.ndarray,
+        weights: np.ndarray,
+        delays: Optional[np.ndarray] = None,
+        delay: float = 0.0
+    ):
+        """
+        初始化突触表
+
+        Args:
+            n_pre: 源群体大小
+            n_post: 目标群体大小
+            indptr: CSR行指针
+            targets: 突触后神经元序号
+            weights: 突触权重
+            delays: 每个突触的延迟(毫秒)，None表示所有突触使用delay
+            delay: 统一的延迟(毫秒)
+        """
+        self.n_pre = n_pre
+        self.n_post = n_post
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.delays = None if delays is None else np.asarray(delays, dtype=np.float32)
+        self.delay = float(delay)
+
+    @property
+    def n_synapses(self) -> int:
+        return int(self.targets.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.indptr, self.targets, self.weights, self.delays)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    @property
+    def max_delay(self) -> float:
+        if self.delays is not None and self.delays.size:
+            return float(self.delays.max())
+        return self.delay
+
+    def outgoing(self, sources: np.ndarray) -> np.ndarray:
+        """
+        放电神经元的全部出边在突触表中的位置
+
+        Args:
+            sources: 放电的突触前神经元序号
+
+        Returns:
+            np.ndarray: 突触位置
+        """
+        starts = self.indptr[sources]
+        counts = self.indptr[sources + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64)
+        # 把各段[start, start + count)拼接成一个连续编号：全局序号减去所在段之前的长度再加上段的起点
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return offsets + np.arange(total, dtype=np.int64)
+
+    def delay_steps(self, dt: float) -> Union[int, np.ndarray]:
+        """把延迟换算为步数，最少一步(下一步到达)"""
+        if self.delays is None:
+            return max(1, int(round(self.delay / dt)))
+        steps = np.maximum(1, np.rint(self.delays / dt)).astype(np.int64)
+        if steps.size and steps.max() > np.iinfo(np.uint16).max:
+            raise ValueError("突触延迟相对仿真步长过大")
+        return steps.astype(np.uint16)
+
+    def to_csr(self) -> sparse.csr_matrix:
+        """转换为(目标 × 源)的SciPy稀疏矩阵，重复连接的权重合并"""
+        sources = np.repeat(np.arange(self.n_pre), np.diff(self.indptr))
+        matrix = sparse.csr_matrix(
+            (self.weights.astype(np.float64), (self.targets, sources)),
+            shape=(self.n_post, self.n_pre)
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+
+def pairs_connectivity(pre: np.ndarray, post: np.ndarray, n_pre: int, n_post: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    由(突触前, 突触后)端点对生成CSR结构
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: indptr和targets
+
+    Raises:
+        ValueError: 端点超出群体范围时
+    """
+    pre = np.asarray(pre, dtype=np.int64)
+    post = np.asarray(post, dtype=np.int64)
+    if pre.size and (pre.min() < 0 or pre.max() >= n_pre or post.min() < 0 or post.max() >= n_post):
+        raise ValueError("连接的端点超出群体范围")
+    indptr = np.zeros(n_pre + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pre, minlength=n_pre), out=indptr[1:])
+    return indptr, post[np.argsort(pre, kind="stable")].astype(np.int32)
+
+
+def random_connectivity(
+    n_pre: int,
+    n_post: int,
+    rng: np.random.Generator,
+    probability: Optional[float] = None,
+    out_degree: Optional[int] = None,
+    exclude_self: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    生成随机连接的CSR结构
+
+    每个源神经元的出度服从Binomial(n_post, probability)，或固定为out_degree；
+    目标神经元有放回地均匀抽取(允许少量重复连接)，内存和耗时只与突触数成正比。
+
+    Args:
+        n_pre: 源群体大小
+        n_post: 目标群体大小
+        rng: 随机数生成器
+        probability: 连接概率
+        out_degree: 固定出度，提供时忽略probability
+        exclude_self: 是否排除自连接(源和目标为同一群体时)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: indptr和targets
+    """
+    candidates = n_post - 1 if exclude_self else n_post
+    if out_degree is not None:
+        counts = np.full(n_pre, min(int(out_degree), candidates), dtype=np.int64)
+    else:
+        counts = rng.binomial(candidates, probability, size=n_pre).astype(np.int64)
+    indptr = np.zeros(n_pre + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+
+    total = int(indptr[-1])
+    if candidates <= 0 or total == 0:
+        return indptr, np.zeros(0, dtype=np.int32)
+    targets = rng.integers(0, candidates, size=total, dtype=np.int32)
+    if exclude_self:
+        # 在除自身以外的n_post - 1个神经元中抽取：大于等于自身序号的目标后移一位
+        sources = np.repeat(np.arange(n_pre, dtype=np.int32), counts)
+        targets += targets >= sources
+    return indptr, targets
+
+
+class DelayRingBuffer:
+    """突触输入的延迟环形缓冲
+
+    每行对应一个未来的到达步，cursor指向本步结束时到达的输入。
+    本步放电、延迟为d步的输入写入cursor + d行，在d步之后到达突触电流，
+    即t时刻的放电在t + d·dt时刻到达。
+    """
+
+    def __init__(self, n: int, max_delay_steps: int, buffer: Optional[np.ndarray] = None):
+        """
+        初始化延迟缓冲
+
+        Args:
+            n: 神经元数
+            max_delay_steps: 最大延迟步数
+            buffer: 形状为(max_delay_steps + 1, n)的已有数组(例如共享内存)，None时新建
+        """
+        self.size = max(1, int(max_delay_steps)) + 1
+        if buffer is None:
+            buffer = np.zeros((self.size, n))
+        elif buffer.shape != (self.size, n):
+            raise ValueError("延迟缓冲数组的形状不正确")
+        self.buffer = buffer
+        self.cursor = 0
+
+    def schedule(
+        self,
+        targets: np.ndarray,
+        weights: np.ndarray,
+        delay_steps: Union[int, np.ndarray],
+        offset: int = 0
+    ) -> None:
+        """
+        登记一批突触输入
+
+        Args:
+            targets: 目标神经元序号
+            weights: 输入的权重
+            delay_steps: 延迟步数
+            offset: 放电时刻相对当前步的偏移，放电发生在offset步之前时为负数
+        """
+        if np.isscalar(delay_steps):
+            row = self.buffer[(self.cursor + int(delay_steps) + offset) % self.size]
+            np.add.at(row, targets, weights)
+        else:
+            slots = (self.cursor + offset + delay_steps.astype(np.int64)) % self.size
+            np.add.at(self.buffer, (slots, targets), weights)
+
+    def drain_into(self, out: np.ndarray) -> None:
+        """把本步结束时到达的输入累加到out，并前进到下一步"""
+        row = self.buffer[self.cursor]
+        out += row
+        row.fill(0.0)
+        self.cursor = (self.cursor + 1) % self.size
+
+    def advance(self, steps: int) -> None:
+        """缓冲内容由其他进程排空时，只前进到steps步之后"""
+        self.cursor = (self.cursor + steps) % self.size
+
+    def pending(self) -> np.ndarray:
+        """按到达顺序排列的未到达输入"""
+        return np.roll(self.buffer, -self.cursor, axis=0)
+
+    def load(self, pending: np.ndarray) -> None:
+        """
+        载入未到达的输入
+
+        Raises:
+            ValueError: 形状与缓冲不一致时
+        """
+        if pending.shape != self.buffer.shape:
+            raise ValueError("延迟缓冲与网络结构不一致")
+        self.buffer[:] = pending
+        self.cursor = 0
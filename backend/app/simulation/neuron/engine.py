@@ -0,0 +1,392 @@
+"""进程内神经元网络仿真引擎
+
+不依赖外部可执行文件，在当前进程中用NumPy积分LIF、Izhikevich和Hodgkin-Huxley神经元网络，
+适合中小规模网络以及没有安装SkyEye的开发和CI环境。
+
+网络描述来自模型目录下的JSON文件(model_path)或仿真参数中的network项。
+仿真参数中的其他项：
+- integrator: euler、rk4(默认)或rk45
+- rtol、atol: rk45的误差容限
+- seed: 随机连接和噪声输入的随机种子
+- workers: 并行工作进程数，默认为NEURON_WORKERS，大于1时按神经元划分群体并行仿真
+- 群体名.参数名: 覆盖群体的模型参数或input_mean、input_std、tau_syn
+
+时间单位为毫秒。结果按块直接写入列式结果文件并实时发布，不经过CSV。
+输出变量"群体名.spike_train"的放电事件写入结果文件旁的稀疏放电事件文件(见storage.spikes)。
+"""
+
+import io
+import json
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..engine import SimulationEngine, SimulationConfig, SimulationResult
+from ..storage import ColumnarResultStore, ColumnarResultWriter, SpikeEventWriter, build_pyramid, spike_events_path
+from ..live import live_hub
+from ..registry import process_registry
+from ..catalog import ModelCatalog, get_model_catalog
+from ..checkpoint import CHECKPOINT_DIR, FINAL_STATE
+from .network import Network, POPULATION_OPTIONS
+from .integrators import Integrator, get_integrator
+from .simulator import NetworkSimulator, Recorder, build_recorders, split_spike_trains
+from .parallel import ParallelNetworkSimulator
+from app.core.config import settings
+from app.core.logging import logger
+
+
+# 仿真参数中由引擎使用、不属于网络的项
+ENGINE_PARAMETERS = ("network", "integrator", "rtol", "atol", "seed", "workers")
+
+
+class NeuronEngine(SimulationEngine):
+    """进程内神经元网络仿真引擎"""
+
+    def __init__(self, models_dir: Optional[str] = None, catalog: Optional[ModelCatalog] = None):
+        """
+        初始化引擎
+
+        Args:
+            models_dir: 网络描述文件所在目录，默认为NEURON_MODELS_DIR
+            catalog: 模型目录，默认为models_dir下*.json文件的共享模型目录
+        """
+        self.models_dir = Path(models_dir or settings.NEURON_MODELS_DIR)
+        self.catalog = catalog or get_model_catalog(self.models_dir, pattern="*.json")
+        self.results_dir = Path(settings.SIMULATION_RESULTS_DIR)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+
+    async def initialize(self) -> bool:
+        """初始化引擎"""
+        return True
+
+    def load_spec(self, config: SimulationConfig) -> Dict[str, Any]:
+        """
+        读取网络描述
+
+        Raises:
+            ValueError: 没有网络描述或描述文件无法读取时
+        """
+        if "network" in config.parameters:
+            spec = config.parameters["network"]
+            if isinstance(spec, str):
+                spec = json.loads(spec)
+            return spec
+        if not config.model_path:
+            raise ValueError("需要指定网络描述文件(model_path)或在参数中提供network")
+        path = Path(config.model_path)
+        if not path.is_absolute() and not path.exists():
+            path = self.models_dir / path
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"无法读取网络描述 {config.model_path}: {str(e)}")
+
+    def build(self, config: SimulationConfig) -> Tuple[Network, Integrator, Dict[str, Recorder], Dict[str, int]]:
+        """
+        根据仿真配置构建网络、积分器和输出变量
+
+        Returns:
+            Tuple[Network, Integrator, Dict[str, Recorder], Dict[str, int]]: 网络、积分器、
+                稠密输出变量的取值方式，以及放电序列输出变量到群体序号的映射
+
+        Raises:
+            ValueError: 配置无效时
+        """
+        parameters = config.parameters
+        overrides = {key: value for key, value in parameters.items() if key not in ENGINE_PARAMETERS}
+        network = Network.from_spec(self.load_spec(config), overrides, seed=parameters.get("seed"))
+        options = {key: float(parameters[key]) for key in ("rtol", "atol") if key in parameters}
+        integrator = get_integrator(parameters.get("integrator", "rk4"), **options)
+        dense, spike_trains = split_spike_trains(network, config.output_variables)
+        recorders = build_recorders(network, dense)
+        if config.step_size <= 0:
+            raise ValueError("仿真步长必须为正数")
+        self.workers(config)
+        return network, integrator, recorders, spike_trains
+
+    @staticmethod
+    def workers(config: SimulationConfig) -> int:
+        """
+        仿真使用的工作进程数
+
+        Raises:
+            ValueError: 工作进程数无效时
+        """
+        workers = int(config.parameters.get("workers", settings.NEURON_WORKERS))
+        if workers < 1:
+            raise ValueError("工作进程数必须为正整数")
+        return workers
+
+    def create_simulator(self, config: SimulationConfig, network: Network, integrator: Integrator) -> NetworkSimulator:
+        """
+        创建仿真器，工作进程数大于1时启动并行仿真的工作进程
+
+        Raises:
+            RuntimeError: 工作进程启动失败时
+        """
+        seed = config.parameters.get("seed")
+        workers = self.workers(config)
+        if workers > 1:
+            return ParallelNetworkSimulator(network, integrator, config.step_size, workers, seed=seed)
+        return NetworkSimulator(network, integrator, config.step_size, seed=seed)
+
+    async def validate_config(self, config: SimulationConfig) -> Dict[str, Any]:
+        """验证配置是否有效"""
+        try:
+            self.build(config)
+        except (ValueError, TypeError, KeyError) as e:
+            return {"valid": False, "errors": [str(e)]}
+        return {"valid": True, "errors": []}
+
+    async def get_status(self, task_id: str) -> Dict[str, Any]:
+        """
+        获取任务状态
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            Dict[str, Any]: 任务状态，本引擎未运行过该任务时status为unknown
+        """
+        handle = process_registry.get(task_id)
+        if handle is None:
+            return {"task_id": task_id, "status": "unknown"}
+        return handle.snapshot()
+
+    async def stop_simulation(self, task_id: str) -> bool:
+        """停止仿真，已计算的部分结果会被保存"""
+        return await process_registry.stop(task_id)
+
+    async def get_available_models(self) -> List[Dict[str, Any]]:
+        """获取可用的网络描述文件列表"""
+        return self.catalog.list()
+
+    async def get_model_parameters(self, model_path: str) -> Dict[str, Any]:
+        """
+        获取网络的可调参数和可用的输出变量
+
+        Args:
+            model_path: 网络描述文件路径
+
+        Returns:
+            Dict[str, Any]: 群体、参数默认值和输出变量，网络描述无效时返回空字典
+        """
+        config = SimulationConfig(parameters={}, model_path=model_path, duration=0, step_size=1, output_variables=[])
+        try:
+            network = Network.from_spec(self.load_spec(config))
+        except ValueError:
+            return {}
+
+        parameters = {}
+        outputs = []
+        for population in network.populations:
+            for key, value in population.params.items():
+                parameters[f"{population.name}.{key}"] = {"type": "float", "default": value}
+            for key in POPULATION_OPTIONS:
+                parameters[f"{population.name}.{key}"] = {"type": "float", "default": getattr(population, key)}
+            outputs.extend(f"{population.name}.{name}" for name in population.model.state_variables)
+            outputs.extend(f"{population.name}.{name}" for name in ("i_syn", "spikes", "rate", "spike_train"))
+        return {
+            "populations": [
+                {"name": population.name, "model": population.model.name, "size": population.size}
+                for population in network.populations
+            ],
+            "parameters": parameters,
+            "outputs": outputs
+        }
+
+    def final_state_path(self, task_id: str) -> Optional[Path]:
+        """任务的终止状态文件，任务未正常完成时返回None"""
+        path = self.results_dir / task_id / CHECKPOINT_DIR / FINAL_STATE
+        return path if path.exists() else None
+
+    async def run_simulation(self, config: SimulationConfig, task_id: str) -> SimulationResult:
+        """
+        运行仿真
+
+        积分在线程池中按NEURON_CHUNK_STEPS步分块进行，块之间写入结果、发布实时数据并检查停止请求。
+        完成后保存终止状态，其他任务可以通过warm_start_task_id从该状态开始仿真。
+
+        Args:
+            config: 仿真配置
+            task_id: 任务ID
+
+        Returns:
+            SimulationResult: 仿真结果
+        """
+        metadata = {
+            "engine": "neuron",
+            "model": config.model_path,
+            "time_unit": "ms",
+            "duration": config.duration,
+            "step_size": config.step_size,
+            "parameters": {key: value for key, value in config.parameters.items() if key != "network"}
+        }
+        result_dir = self.results_dir / task_id
+        result_dir.mkdir(parents=True, exist_ok=True)
+
+        try:
+            sampling = config.sampling()
+            network, integrator, recorders, spike_trains = self.build(config)
+        except (ValueError, TypeError, KeyError) as e:
+            return self._failed_result(task_id, str(e), metadata)
+        try:
+            simulator = await asyncio.to_thread(self.create_simulator, config, network, integrator)
+        except RuntimeError as e:
+            return self._failed_result(task_id, str(e), metadata)
+        try:
+            if config.warm_start_task_id:
+                state_path = self.final_state_path(config.warm_start_task_id)
+                if state_path is None:
+                    raise ValueError(f"预热任务 {config.warm_start_task_id} 没有可用的终止状态")
+                with np.load(state_path) as state:
+                    simulator.load_state(dict(state))
+                metadata["warm_start"] = {"task_id": config.warm_start_task_id}
+        except (ValueError, TypeError, KeyError, RuntimeError) as e:
+            simulator.close()
+            return self._failed_result(task_id, str(e), metadata)
+
+        metadata.update({
+            "integrator": integrator.name,
+            "neurons": network.n_neurons,
+            "synapses": network.n_synapses,
+            "workers": self.workers(config)
+        })
+        if sampling.decimated:
+            metadata["sampling"] = sampling.describe()
+        n_steps = int(round(config.duration / config.step_size))
+        variables = list(recorders)
+
+        logger.info(
+            f"运行仿真任务 {task_id}: {network.n_neurons}个神经元, {network.n_synapses}个突触, "
+            f"{n_steps}步, {metadata['workers']}个工作进程"
+        )
+        handle = process_registry.register(task_id, None, config.duration, config.time_limit)
+        stream = live_hub.open(task_id, variables)
+        result_path = result_dir / f"results{ColumnarResultStore.extension}"
+        writer = ColumnarResultWriter(
+            result_path, variables, task_id=task_id, metadata=metadata, strides=sampling.variable_strides
+        )
+        spike_writer = None
+        if spike_trains:
+            populations = {network.populations[i].name: network.populations[i].size for i in spike_trains.values()}
+            simulator.monitor_spikes(spike_trains.values())
+            metadata["spike_trains"] = {variable: network.populations[i].name for variable, i in spike_trains.items()}
+            spike_writer = SpikeEventWriter(
+                spike_events_path(result_path),
+                populations,
+                config.step_size,
+                task_id=task_id,
+                metadata={"spike_trains": metadata["spike_trains"]}
+            )
+        try:
+            initial = simulator.sample(recorders)
+            time_points = np.zeros(1)
+            data = {name: np.array([value]) for name, value in initial.items()}
+            writer.append(time_points, data)
+            await stream.publish(time_points, data)
+
+            done = 0
+            while done < n_steps and not handle.stop_requested:
+                chunk = min(settings.NEURON_CHUNK_STEPS, n_steps - done)
+                time_points, data = await asyncio.to_thread(simulator.run, chunk, recorders)
+                if sampling.stride > 1:
+                    # 放电事件仍逐步记录，只抽取连续变量的输出行
+                    keep = np.arange(done + 1, done + chunk + 1) % sampling.stride == 0
+                    time_points = time_points[keep]
+                    data = {name: values[keep] for name, values in data.items()}
+                done += chunk
+                writer.append(time_points, data)
+                if spike_writer is not None:
+                    self._write_spikes(spike_writer, simulator)
+                await stream.publish(time_points, data)
+                handle.simulated_time = simulator.t
+
+            status = "stopped" if handle.stop_requested else "completed"
+            metadata["spikes"] = {
+                population.name: int(count)
+                for population, count in zip(network.populations, simulator.spike_counts)
+            }
+            metadata["integration"] = simulator.stats()
+            if status == "stopped":
+                metadata["stopped_at"] = simulator.t
+            else:
+                self._save_state(result_dir, simulator, metadata)
+            if spike_writer is not None:
+                spike_writer.close()
+            writer.status = status
+            store_path = writer.close()
+        except Exception as e:
+            logger.exception(f"仿真执行异常: {str(e)}")
+            writer.abort()
+            if spike_writer is not None:
+                spike_writer.abort()
+            process_registry.finish(task_id, "failed")
+            await live_hub.close(task_id, "failed", str(e))
+            return self._failed_result(task_id, str(e), metadata)
+        finally:
+            simulator.close()
+
+        process_registry.finish(task_id, status)
+        await live_hub.close(task_id, handle.status)
+
+        if status == "stopped":
+            logger.info(f"仿真任务 {task_id} 已停止")
+            return SimulationResult(
+                task_id=task_id,
+                status=handle.status,
+                data={},
+                time_points=[],
+                metadata=metadata,
+                error_message=handle.kill_reason or "任务已被停止",
+                result_path=str(store_path)
+            )
+
+        if settings.RESULT_PYRAMID_ENABLED:
+            try:
+                metadata["lod"] = build_pyramid(store_path, factor=settings.RESULT_PYRAMID_FACTOR)
+            except Exception as e:
+                logger.warning(f"构建结果金字塔失败 {task_id}: {str(e)}")
+
+        return SimulationResult(
+            task_id=task_id,
+            status="completed",
+            data={},
+            time_points=[],
+            metadata=metadata,
+            result_path=str(store_path)
+        )
+
+    @staticmethod
+    def _write_spikes(writer: SpikeEventWriter, simulator: NetworkSimulator) -> None:
+        """写入上次写入以来记录的放电事件"""
+        for i, (steps, neurons) in simulator.drain_spikes().items():
+            writer.append(simulator.network.populations[i].name, steps, neurons)
+        writer.n_steps = simulator.steps
+
+    @staticmethod
+    def _save_state(result_dir: Path, simulator: NetworkSimulator, metadata: Dict[str, Any]) -> None:
+        """保存终止状态(npz格式)"""
+        state_dir = result_dir / CHECKPOINT_DIR
+        state_dir.mkdir(parents=True, exist_ok=True)
+        buffer = io.BytesIO()
+        np.savez(buffer, **simulator.state_dict())
+        path = state_dir / FINAL_STATE
+        path.write_bytes(buffer.getvalue())
+        metadata["final_state"] = str(path)
+
+    @staticmethod
+    def _failed_result(task_id: str, error_message: str, metadata: Dict[str, Any]) -> SimulationResult:
+        """构造失败的仿真结果"""
+        logger.error(f"仿真失败 {task_id}: {error_message}")
+        return SimulationResult(
+            task_id=task_id,
+            status="failed",
+            data={},
+            time_points=[],
+            metadata=metadata,
+            error_message=error_message
+        )
@@ -0,0 +1,174 @@
+"""数值积分器
+
+积分器把整个网络的状态视为一个扁平向量，每次调用推进一个记录步长dt：
+- euler: 前向欧拉法，一步一次导数计算
+- rk4: 经典四阶龙格-库塔法
+- rk45: Dormand-Prince 5(4)自适应步长法，在dt内按误差控制划分子步，
+  子步长在相邻调用之间保留，刚性较强的模型(如Hodgkin-Huxley)可以用较大的记录步长
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+
+Derivative = Callable[[float, np.ndarray], np.ndarray]
+
+
+class Integrator(ABC):
+    """积分器基类"""
+
+    name: str = ""
+
+    def __init__(self):
+        self.evaluations = 0
+
+    @abstractmethod
+    def step(self, f: Derivative, t: float, y: np.ndarray, dt: float) -> np.ndarray:
+        """
+        从t积分到t + dt
+
+        Args:
+            f: 导数函数f(t, y)
+            t: 当前时间
+            y: 当前状态
+            dt: 步长
+
+        Returns:
+            np.ndarray: t + dt时的状态
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        """积分统计信息"""
+        return {"integrator": self.name, "evaluations": self.evaluations}
+
+
+class EulerIntegrator(Integrator):
+    """前向欧拉法"""
+
+    name = "euler"
+
+    def step(self, f, t, y, dt):
+        self.evaluations += 1
+        return y + dt * f(t, y)
+
+
+class RK4Integrator(Integrator):
+    """经典四阶龙格-库塔法"""
+
+    name = "rk4"
+
+    def step(self, f, t, y, dt):
+        self.evaluations += 4
+        half = dt / 2
+        k1 = f(t, y)
+        k2 = f(t + half, y + half * k1)
+        k3 = f(t + half, y + half * k2)
+        k4 = f(t + dt, y + dt * k3)
+        return y + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+# Dormand-Prince 5(4)系数
+_C = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0)
+_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+)
+_B = (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84)
+# 五阶与四阶解的系数之差(第7级即新状态处的导数)
+_E = (71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+
+
+class AdaptiveIntegrator(Integrator):
+    """Dormand-Prince 5(4)自适应步长积分器"""
+
+    name = "rk45"
+
+    def __init__(self, rtol: float = 1e-4, atol: float = 1e-6, min_step: float = 1e-9):
+        """
+        初始化积分器
+
+        Args:
+            rtol: 相对误差容限
+            atol: 绝对误差容限
+            min_step: 最小子步长，误差无法满足时以该步长强制前进
+        """
+        super().__init__()
+        self.rtol = rtol
+        self.atol = atol
+        self.min_step = min_step
+        self.h: float = 0.0
+        self.accepted = 0
+        self.rejected = 0
+
+    def _attempt(self, f: Derivative, t: float, y: np.ndarray, h: float):
+        k = [f(t, y)]
+        for i in range(1, 6):
+            k.append(f(t + _C[i] * h, y + h * sum(a * k[j] for j, a in enumerate(_A[i]))))
+        y_new = y + h * sum(b * k[i] for i, b in enumerate(_B) if b)
+        k.append(f(t + h, y_new))
+        self.evaluations += 7
+        error = h * sum(e * k[i] for i, e in enumerate(_E) if e)
+        scale = self.atol + self.rtol * np.maximum(np.abs(y), np.abs(y_new))
+        norm = float(np.sqrt(np.mean((error / scale) ** 2))) if y.size else 0.0
+        return y_new, norm
+
+    def step(self, f, t, y, dt):
+        end = t + dt
+        eps = 1e-9 * dt
+        h = min(self.h or dt, dt)
+        while end - t > eps:
+            # 最后一个子步截断到dt的终点，不影响下一次的子步长
+            trial = min(h, end - t)
+            y_new, norm = self._attempt(f, t, y, trial)
+            if not np.isfinite(norm):
+                norm = np.inf
+            if norm <= 1.0 or trial <= self.min_step:
+                t += trial
+                y = y_new
+                self.accepted += 1
+                if trial < h:
+                    continue
+            else:
+                self.rejected += 1
+            factor = 5.0 if norm == 0.0 else min(5.0, max(0.2, 0.9 * norm ** -0.2))
+            h = max(trial * factor, self.min_step)
+        self.h = min(h, dt)
+        return y
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({"accepted": self.accepted, "rejected": self.rejected, "step": self.h})
+        return stats
+
+
+INTEGRATORS = {
+    EulerIntegrator.name: EulerIntegrator,
+    RK4Integrator.name: RK4Integrator,
+    AdaptiveIntegrator.name: AdaptiveIntegrator,
+}
+
+
+def get_integrator(name: str, **options: Any) -> Integrator:
+    """
+    按名称创建积分器
+
+    Args:
+        name: 积分器名称
+        **options: 自适应积分器的误差容限等选项
+
+    Raises:
+        ValueError: 积分器不受支持时
+    """
+    try:
+        cls = INTEGRATORS[name.lower()]
+    except KeyError:
+        raise ValueError(f"不支持的积分器: {name}，支持的积分器: {', '.join(INTEGRATORS)}")
+    if cls is AdaptiveIntegrator:
+        return cls(**options)
+    return cls()
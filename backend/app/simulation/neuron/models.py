@@ -0,0 +1,233 @@
+"""神经元模型
+
+每个模型以向量化的方式描述一个群体中全部神经元的动力学：
+状态保存为形状(状态变量数, 神经元数)的数组，derivatives返回同形状的导数，
+after_step在每个积分步之后检测放电并执行复位。
+
+时间单位为毫秒，膜电位单位为毫伏。
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple
+
+import numpy as np
+from scipy.special import exprel
+
+
+class NeuronModel(ABC):
+    """神经元模型基类"""
+
+    name: str = ""
+    state_variables: Tuple[str, ...] = ()
+    defaults: Dict[str, float] = {}
+
+    def initial_state(self, n: int, params: Dict[str, float]) -> np.ndarray:
+        """
+        初始状态
+
+        Args:
+            n: 神经元数
+            params: 模型参数
+
+        Returns:
+            np.ndarray: 形状为(状态变量数, n)的初始状态
+        """
+        return np.zeros((len(self.state_variables), n))
+
+    def initial_aux(self, n: int) -> Dict[str, np.ndarray]:
+        """积分之外的离散状态(例如不应期计时)"""
+        return {}
+
+    @abstractmethod
+    def derivatives(
+        self,
+        y: np.ndarray,
+        current: np.ndarray,
+        params: Dict[str, float],
+        aux: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """
+        计算状态导数
+
+        Args:
+            y: 形状为(状态变量数, 神经元数)的状态
+            current: 每个神经元的输入电流
+            params: 模型参数
+            aux: 离散状态
+
+        Returns:
+            np.ndarray: 与y形状相同的导数
+        """
+
+    @abstractmethod
+    def after_step(self, y: np.ndarray, params: Dict[str, float], aux: Dict[str, np.ndarray], dt: float) -> np.ndarray:
+        """
+        积分步之后检测放电并原地复位
+
+        Args:
+            y: 形状为(状态变量数, 神经元数)的状态，原地修改
+            params: 模型参数
+            aux: 离散状态，原地修改
+            dt: 步长
+
+        Returns:
+            np.ndarray: 本步放电的神经元(布尔数组)
+        """
+
+
+class LIFModel(NeuronModel):
+    """带不应期的泄漏积分发放模型
+
+    tau_m * dv/dt = -(v - v_rest) + r_m * I，v达到v_th时放电并复位到v_reset，
+    之后t_ref毫秒内膜电位保持不变。
+    """
+
+    name = "lif"
+    state_variables = ("v",)
+    defaults = {
+        "tau_m": 20.0,
+        "v_rest": -65.0,
+        "v_reset": -65.0,
+        "v_th": -50.0,
+        "r_m": 1.0,
+        "t_ref": 2.0
+    }
+
+    def initial_state(self, n: int, params: Dict[str, float]) -> np.ndarray:
+        return np.full((1, n), params["v_rest"], dtype=np.float64)
+
+    def initial_aux(self, n: int) -> Dict[str, np.ndarray]:
+        return {"refractory": np.zeros(n)}
+
+    def derivatives(self, y, current, params, aux):
+        dv = (params["v_rest"] - y[0] + params["r_m"] * current) / params["tau_m"]
+        dv[aux["refractory"] > 0] = 0.0
+        return dv[np.newaxis]
+
+    def after_step(self, y, params, aux, dt):
+        refractory = aux["refractory"]
+        np.maximum(refractory - dt, 0.0, out=refractory)
+        spiked = y[0] >= params["v_th"]
+        y[0, spiked] = params["v_reset"]
+        refractory[spiked] = params["t_ref"]
+        return spiked
+
+
+class IzhikevichModel(NeuronModel):
+    """Izhikevich模型
+
+    dv/dt = 0.04v² + 5v + 140 - u + I，du/dt = a(bv - u)，
+    v达到v_peak时放电，v复位到c，u增加d。默认参数为规则放电(RS)神经元。
+    """
+
+    name = "izhikevich"
+    state_variables = ("v", "u")
+    defaults = {
+        "a": 0.02,
+        "b": 0.2,
+        "c": -65.0,
+        "d": 8.0,
+        "v_peak": 30.0
+    }
+
+    def initial_state(self, n: int, params: Dict[str, float]) -> np.ndarray:
+        y = np.empty((2, n))
+        y[0] = params["c"]
+        y[1] = params["b"] * params["c"]
+        return y
+
+    def derivatives(self, y, current, params, aux):
+        v, u = y
+        dy = np.empty_like(y)
+        dy[0] = (0.04 * v + 5.0) * v + 140.0 - u + current
+        dy[1] = params["a"] * (params["b"] * v - u)
+        return dy
+
+    def after_step(self, y, params, aux, dt):
+        spiked = y[0] >= params["v_peak"]
+        y[0, spiked] = params["c"]
+        y[1, spiked] += params["d"]
+        return spiked
+
+
+class HodgkinHuxleyModel(NeuronModel):
+    """Hodgkin-Huxley模型(乌贼巨轴突，静息电位约-65mV)
+
+    门控变量m、h、n按标准速率函数演化，膜电位向上越过v_spike时记为一次放电，不做复位。
+    """
+
+    name = "hodgkin_huxley"
+    state_variables = ("v", "m", "h", "n")
+    defaults = {
+        "c_m": 1.0,
+        "g_na": 120.0,
+        "g_k": 36.0,
+        "g_l": 0.3,
+        "e_na": 50.0,
+        "e_k": -77.0,
+        "e_l": -54.387,
+        "v_init": -65.0,
+        "v_spike": 0.0
+    }
+
+    @staticmethod
+    def _rates(v: np.ndarray) -> Tuple[np.ndarray, ...]:
+        # x / (1 - exp(-x)) = 1 / exprel(-x)，在x=0处连续
+        alpha_m = 1.0 / exprel(-(v + 40.0) / 10.0)
+        beta_m = 4.0 * np.exp(-(v + 65.0) / 18.0)
+        alpha_h = 0.07 * np.exp(-(v + 65.0) / 20.0)
+        beta_h = 1.0 / (1.0 + np.exp(-(v + 35.0) / 10.0))
+        alpha_n = 0.1 / exprel(-(v + 55.0) / 10.0)
+        beta_n = 0.125 * np.exp(-(v + 65.0) / 80.0)
+        return alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n
+
+    def initial_state(self, n: int, params: Dict[str, float]) -> np.ndarray:
+        v = np.full(n, params["v_init"], dtype=np.float64)
+        alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n = self._rates(v)
+        return np.stack([
+            v,
+            alpha_m / (alpha_m + beta_m),
+            alpha_h / (alpha_h + beta_h),
+            alpha_n / (alpha_n + beta_n)
+        ])
+
+    def initial_aux(self, n: int) -> Dict[str, np.ndarray]:
+        return {"above": np.zeros(n, dtype=bool)}
+
+    def derivatives(self, y, current, params, aux):
+        v, m, h, n = y
+        alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n = self._rates(v)
+        i_na = params["g_na"] * m ** 3 * h * (v - params["e_na"])
+        i_k = params["g_k"] * n ** 4 * (v - params["e_k"])
+        i_l = params["g_l"] * (v - params["e_l"])
+        dy = np.empty_like(y)
+        dy[0] = (current - i_na - i_k - i_l) / params["c_m"]
+        dy[1] = alpha_m * (1.0 - m) - beta_m * m
+        dy[2] = alpha_h * (1.0 - h) - beta_h * h
+        dy[3] = alpha_n * (1.0 - n) - beta_n * n
+        return dy
+
+    def after_step(self, y, params, aux, dt):
+        above = y[0] >= params["v_spike"]
+        spiked = above & ~aux["above"]
+        aux["above"] = above
+        return spiked
+
+
+NEURON_MODELS: Dict[str, NeuronModel] = {
+    model.name: model for model in (LIFModel(), IzhikevichModel(), HodgkinHuxleyModel())
+}
+NEURON_MODELS["hh"] = NEURON_MODELS["hodgkin_huxley"]
+
+
+def get_neuron_model(name: str) -> NeuronModel:
+    """
+    按名称获取神经元模型
+
+    Raises:
+        ValueError: 模型不受支持时
+    """
+    try:
+        return NEURON_MODELS[name.lower()]
+    except KeyError:
+        raise ValueError(f"不支持的神经元模型: {name}，支持的模型: {', '.join(sorted(NEURON_MODELS))}")
@@ -0,0 +1,191 @@
+"""神经元网络描述
+
+网络由若干神经元群体和群体之间的投射组成，使用JSON描述：
+
+    {
+        "populations": [
+            {"name": "exc", "model": "izhikevich", "size": 800,
+             "params": {"a": 0.02}, "input_mean": 5.0, "input_std": 2.0, "tau_syn": 5.0},
+            {"name": "inh", "model": "lif", "size": 200}
+        ],
+        "projections": [
+            {"source": "exc", "target": "inh", "probability": 0.1, "weight": 0.5, "delay": 1.5},
+            {"source": "exc", "target": "exc", "out_degree": 100, "weight": 0.2, "delay": 1.0, "delay_max": 5.0},
+            {"source": "inh", "target": "exc", "pairs": [[0, 1], [2, 3]], "weight": -1.0}
+        ]
+    }
+
+投射的突触按突触前神经元保存为CSR突触表(见connectivity)，内存与突触数成正比。
+连接方式为probability(每对神经元独立以该概率连接)、out_degree(固定出度)或pairs(显式端点对)；
+weight_std给权重加高斯噪声；delay为传导延迟(毫秒)，同时给出delay_max时每个突触的延迟在
+[delay, delay_max]内均匀分布。延迟不足一个仿真步长时按一步计。
+仿真参数中"群体名.参数名"形式的项覆盖对应群体的参数。
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from .models import NeuronModel, get_neuron_model
+from .connectivity import SynapseTable, pairs_connectivity, random_connectivity
+
+
+# 模型参数之外、可以按群体覆盖的参数
+POPULATION_OPTIONS = ("input_mean", "input_std", "tau_syn")
+
+
+@dataclass
+class Population:
+    """神经元群体"""
+    name: str
+    model: NeuronModel
+    size: int
+    params: Dict[str, float]
+    input_mean: float = 0.0  # 外部输入电流的均值
+    input_std: float = 0.0  # 外部输入电流每步独立的高斯噪声标准差
+    tau_syn: float = 5.0  # 突触电流的衰减时间常数(毫秒)
+
+
+@dataclass
+class Projection:
+    """群体之间的投射"""
+    source: str
+    target: str
+    synapses: SynapseTable
+
+    @property
+    def n_synapses(self) -> int:
+        return self.synapses.n_synapses
+
+    @property
+    def weights(self) -> sparse.csr_matrix:
+        """形状为(目标群体大小, 源群体大小)的权重矩阵，用于检查连接"""
+        return self.synapses.to_csr()
+
+
+@dataclass
+class Network:
+    """神经元网络"""
+    populations: List[Population]
+    projections: List[Projection] = field(default_factory=list)
+
+    def population(self, name: str) -> Population:
+        for population in self.populations:
+            if population.name == name:
+                return population
+        raise ValueError(f"网络中没有名为 {name} 的群体")
+
+    @property
+    def n_neurons(self) -> int:
+        return sum(population.size for population in self.populations)
+
+    @property
+    def n_synapses(self) -> int:
+        return sum(projection.n_synapses for projection in self.projections)
+
+    @classmethod
+    def from_spec(
+        cls,
+        spec: Dict[str, Any],
+        overrides: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None
+    ) -> "Network":
+        """
+        根据网络描述构建网络
+
+        Args:
+            spec: 网络描述
+            overrides: "群体名.参数名"形式的参数覆盖
+            seed: 生成随机连接的随机种子
+
+        Returns:
+            Network: 网络
+
+        Raises:
+            ValueError: 网络描述无效时
+        """
+        overrides = dict(overrides or {})
+        populations = []
+        for item in spec.get("populations") or []:
+            name = item.get("name")
+            if not name or any(population.name == name for population in populations):
+                raise ValueError(f"群体名称缺失或重复: {name!r}")
+            model = get_neuron_model(item.get("model", "lif"))
+            size = int(item.get("size", 0))
+            if size <= 0:
+                raise ValueError(f"群体 {name} 的大小必须为正整数")
+
+            params = dict(model.defaults)
+            options = {key: float(item[key]) for key in POPULATION_OPTIONS if key in item}
+            for key, value in (item.get("params") or {}).items():
+                if key not in model.defaults:
+                    raise ValueError(f"模型 {model.name} 没有参数 {key}")
+                params[key] = float(value)
+            for key in [key for key in overrides if key.startswith(f"{name}.")]:
+                param = key[len(name) + 1:]
+                if param in model.defaults:
+                    params[param] = float(overrides.pop(key))
+                elif param in POPULATION_OPTIONS:
+                    options[param] = float(overrides.pop(key))
+            populations.append(Population(name=name, model=model, size=size, params=params, **options))
+        if not populations:
+            raise ValueError("网络至少需要一个神经元群体")
+        if overrides:
+            raise ValueError(f"未知的参数: {', '.join(sorted(overrides))}")
+
+        network = cls(populations)
+        rng = np.random.default_rng(seed)
+        for item in spec.get("projections") or []:
+            source = network.population(item.get("source"))
+            target = network.population(item.get("target"))
+            network.projections.append(Projection(
+                source=source.name,
+                target=target.name,
+                synapses=_connect(item, source, target, rng)
+            ))
+        return network
+
+
+def _connect(item: Dict[str, Any], source: Population, target: Population, rng: np.random.Generator) -> SynapseTable:
+    """按投射描述生成突触表"""
+    name = f"{source.name}->{target.name}"
+    if "pairs" in item:
+        pairs = np.asarray(item["pairs"], dtype=np.int64).reshape(-1, 2)
+        try:
+            indptr, targets = pairs_connectivity(pairs[:, 0], pairs[:, 1], source.size, target.size)
+        except ValueError:
+            raise ValueError(f"投射 {name} 的连接超出群体范围")
+    else:
+        probability = item.get("probability")
+        out_degree = item.get("out_degree")
+        if out_degree is None and not 0.0 <= float(probability or 0.0) <= 1.0:
+            raise ValueError(f"投射 {name} 的连接概率必须在0到1之间")
+        if out_degree is not None and int(out_degree) < 0:
+            raise ValueError(f"投射 {name} 的出度不能为负数")
+        indptr, targets = random_connectivity(
+            source.size,
+            target.size,
+            rng,
+            probability=float(probability or 0.0),
+            out_degree=out_degree,
+            exclude_self=source is target and not item.get("autapses", False)
+        )
+
+    n = targets.shape[0]
+    weights = np.full(n, float(item.get("weight", 1.0)), dtype=np.float32)
+    weight_std = float(item.get("weight_std", 0.0))
+    if weight_std > 0:
+        weights += (weight_std * rng.standard_normal(n)).astype(np.float32)
+
+    delay = float(item.get("delay", 0.0))
+    delays = None
+    if "delay_max" in item:
+        delay_max = float(item["delay_max"])
+        if delay_max < delay:
+            raise ValueError(f"投射 {name} 的delay_max不能小于delay")
+        delays = rng.uniform(delay, delay_max, size=n).astype(np.float32)
+    if delay < 0:
+        raise ValueError(f"投射 {name} 的延迟不能为负数")
+    return SynapseTable(source.size, target.size, indptr, targets, weights, delays=delays, delay=delay)
@@ -0,0 +1,571 @@
+"""神经元网络的多进程并行仿真
+
+每个群体按神经元序号均匀划分为连续的若干段，第w个工作进程负责每个群体的第w段，
+积分、放电检测和突触输入的接收都只在本分区内进行。突触表按终点所在的分区拆分，
+每个工作进程只保存和遍历终点在本分区的突触。
+
+可变的状态放在共享内存(multiprocessing.shared_memory)中，不在进程之间复制：
+- 突触电流和延迟缓冲：工作进程直接更新其中属于本分区的部分
+- 状态向量和辅助状态：工作进程每次推进结束时写回，主进程据此采样和生成终止状态
+- 放电记录：形状为(2, 同步间隔, 神经元总数)，相邻的同步间隔交替使用
+
+突触延迟至少为D步(全部投射中的最小延迟)，t时刻的放电最早在t + D时刻到达，
+因此工作进程每D步才需要交换一次放电：各自独立推进D步并记录放电，在屏障处等待
+全部分区完成后，读取这D步内所有神经元的放电，写入本分区延迟缓冲中对应的到达槽位。
+输出变量由各分区按步计算部分取值，主进程相加。
+
+外部噪声在各分区使用独立的随机数序列，没有噪声时结果与单进程仿真一致；
+rk45积分器在每个分区内独立选择子步长。
+"""
+
+import weakref
+import traceback
+import contextlib
+import multiprocessing
+from dataclasses import replace
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .network import Network
+from .integrators import Integrator
+from .connectivity import SynapseTable, DelayRingBuffer
+from .simulator import NetworkSimulator, Recorder
+from app.core.logging import logger
+
+
+# 同步间隔的最大步数，限制放电记录占用的共享内存
+MAX_SYNC_STEPS = 100
+# 共享内存中每个数组的起始位置按缓存行对齐
+_ALIGNMENT = 64
+
+
+class SharedArrays:
+    """放在同一块共享内存中的一组NumPy数组
+
+    创建方用from_arrays分配共享内存并复制初始值，负责最终释放；
+    其他进程用attach按描述映射同一块内存，不复制数据。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: Dict[str, Tuple[int, tuple, str]], owner: bool):
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, (offset, shape, dtype) in layout.items()
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "SharedArrays":
+        """分配共享内存并复制数组的初始值"""
+        layout = {}
+        size = 0
+        for name, array in arrays.items():
+            layout[name] = (size, array.shape, array.dtype.str)
+            size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+        shared = cls(shared_memory.SharedMemory(create=True, size=max(size, 1)), layout, owner=True)
+        for name, array in arrays.items():
+            shared.arrays[name][...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor: Tuple[str, Dict[str, Tuple[int, tuple, str]]]) -> "SharedArrays":
+        """按descriptor映射其他进程创建的共享内存"""
+        name, layout = descriptor
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False)
+
+    @property
+    def descriptor(self) -> Tuple[str, Dict[str, Tuple[int, tuple, str]]]:
+        """可以传给其他进程的描述"""
+        return self.shm.name, self.layout
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        return self.arrays.get(name)
+
+    def close(self) -> None:
+        """解除映射，创建方同时释放共享内存。之后不能再访问从这里得到的任何数组或视图"""
+        self.arrays.clear()
+        if self.owner:
+            with contextlib.suppress(FileNotFoundError):
+                self.shm.unlink()
+        with contextlib.suppress(BufferError):
+            self.shm.close()
+
+
+def partition_bounds(size: int, workers: int) -> np.ndarray:
+    """把size个神经元均匀划分为workers段，返回长度为workers + 1的分界点"""
+    return np.arange(workers + 1, dtype=np.int64) * size // workers
+
+
+def split_synapses(synapses: SynapseTable, lo: int, hi: int) -> Dict[str, np.ndarray]:
+    """
+    突触表中终点在[lo, hi)内的部分
+
+    Args:
+        synapses: 突触表
+        lo: 分区在目标群体中的起始序号
+        hi: 分区在目标群体中的结束序号(不含)
+
+    Returns:
+        Dict[str, np.ndarray]: indptr、targets(分区内序号)、weights和delays(没有逐突触延迟时不含)
+    """
+    mask = (synapses.targets >= lo) & (synapses.targets < hi)
+    counts = np.zeros(synapses.n_pre, dtype=np.int64)
+    nonempty = np.diff(synapses.indptr) > 0
+    if nonempty.any():
+        # 只在非空段的起点求和，相邻非空段之间没有其他突触
+        counts[nonempty] = np.add.reduceat(mask, synapses.indptr[:-1][nonempty], dtype=np.int64)
+    indptr = np.zeros(synapses.n_pre + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+
+    arrays = {
+        "indptr": indptr,
+        "targets": (synapses.targets[mask] - lo).astype(np.int32),
+        "weights": synapses.weights[mask]
+    }
+    if synapses.delays is not None:
+        arrays["delays"] = synapses.delays[mask]
+    return arrays
+
+
+class ParallelNetworkSimulator(NetworkSimulator):
+    """多进程并行的神经元网络仿真器
+
+    接口与NetworkSimulator相同。状态向量、突触电流、辅助状态和延迟缓冲是共享内存的视图，
+    只在两次推进之间由主进程读写；用完后需要调用close()停止工作进程并释放共享内存。
+    """
+
+    def __init__(
+        self,
+        network: Network,
+        integrator: Integrator,
+        dt: float,
+        workers: int,
+        seed: Optional[int] = None
+    ):
+        """
+        初始化仿真器并启动工作进程
+
+        Args:
+            network: 神经元网络
+            integrator: 积分器，每个工作进程使用一个副本
+            dt: 记录步长(毫秒)
+            workers: 工作进程数
+            seed: 外部噪声输入的随机种子
+
+        Raises:
+            ValueError: 参数无效时
+            RuntimeError: 工作进程启动失败时
+        """
+        if workers < 1:
+            raise ValueError("工作进程数必须为正整数")
+        super().__init__(network, integrator, dt, seed=seed)
+        self.workers = workers
+        populations = network.populations
+        self._starts = np.concatenate([[0], np.cumsum([population.size for population in populations])])
+        self._bounds = [partition_bounds(population.size, workers) for population in populations]
+
+        delays = [
+            int(np.min(delay_steps)) for _, _, synapses, delay_steps in self._projections
+            if synapses.n_synapses
+        ]
+        # 同步间隔为最小延迟步数，放电在一个间隔内不会到达任何神经元
+        self.interval = min(min(delays, default=MAX_SYNC_STEPS), MAX_SYNC_STEPS)
+
+        arrays = {
+            "y": self.y,
+            "i_syn": np.zeros(network.n_neurons),
+            "spikes": np.zeros((2, self.interval, network.n_neurons), dtype=bool)
+        }
+        for i in range(len(populations)):
+            arrays[f"pending/{i}"] = self.buffers[i].buffer
+            for key, value in self.aux[i].items():
+                arrays[f"aux/{i}/{key}"] = value
+        self._state = SharedArrays.from_arrays(arrays)
+        self._tables: List[SharedArrays] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._connections: List[Any] = []
+        self._broken = False
+        self._finalizer = weakref.finalize(
+            self, _shutdown, self._processes, self._connections, self._tables, self._state
+        )
+        self._attach_views()
+
+        context = multiprocessing.get_context("spawn")
+        self._barrier = context.Barrier(workers)
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        try:
+            for w in range(workers):
+                self._start_worker(context, w, seeds[w])
+            self._collect()
+        except Exception:
+            self.close()
+            raise
+        logger.info(f"并行仿真: {workers}个工作进程, 同步间隔{self.interval}步")
+
+    def _attach_views(self) -> None:
+        """把主进程的状态换成共享内存的视图"""
+        self.y = self._state["y"]
+        for i, population in enumerate(self.network.populations):
+            start = self._starts[i]
+            self.i_syn[i] = self._state["i_syn"][start:start + population.size]
+            self.buffers[i].buffer = self._state[f"pending/{i}"]
+            for key in self.aux[i]:
+                self.aux[i][key] = self._state[f"aux/{i}/{key}"]
+
+    def _start_worker(self, context: Any, w: int, seed: np.random.SeedSequence) -> None:
+        """拆分第w个分区的突触表并启动工作进程"""
+        lo = [int(bounds[w]) for bounds in self._bounds]
+        hi = [int(bounds[w + 1]) for bounds in self._bounds]
+        tables = {}
+        projections = []
+        for j, (source, target, synapses, _) in enumerate(self._projections):
+            for key, value in split_synapses(synapses, lo[target], hi[target]).items():
+                tables[f"{j}/{key}"] = value
+            projections.append((source, target, synapses.n_pre, synapses.delay))
+        shared = SharedArrays.from_arrays(tables)
+        self._tables.append(shared)
+        del tables
+
+        setup = {
+            "worker": w,
+            "state": self._state.descriptor,
+            "tables": shared.descriptor,
+            "populations": [
+                replace(population, size=hi[i] - lo[i])
+                for i, population in enumerate(self.network.populations)
+            ],
+            "sizes": [population.size for population in self.network.populations],
+            "starts": self._starts.tolist(),
+            "y_offsets": [block.start for block in self._slices],
+            "lo": lo,
+            "projections": projections,
+            "integrator": self.integrator,
+            "dt": self.dt,
+            "seed": seed,
+            "interval": self.interval
+        }
+        connection, child = context.Pipe()
+        process = context.Process(
+            target=_worker_main,
+            args=(child, self._barrier, setup),
+            name=f"neuron-worker-{w}",
+            daemon=True
+        )
+        process.start()
+        child.close()
+        self._processes.append(process)
+        self._connections.append(connection)
+
+    def _collect(self) -> List[Any]:
+        """
+        等待全部工作进程的响应
+
+        Raises:
+            RuntimeError: 工作进程出错或意外退出时，此时同步屏障已中止，仿真器不能继续使用
+        """
+        results: List[Any] = [None] * len(self._connections)
+        pending = dict(enumerate(self._connections))
+        errors = []
+        while pending:
+            sentinels = {self._processes[w].sentinel: w for w in pending}
+            for ready in wait(list(pending.values()) + list(sentinels)):
+                w = sentinels[ready] if isinstance(ready, int) else self._connections.index(ready)
+                if w not in pending:
+                    continue
+                connection = pending.pop(w)
+                try:
+                    if isinstance(ready, int) and not connection.poll():
+                        raise EOFError
+                    status, payload = connection.recv()
+                except (EOFError, OSError):
+                    status, payload = "error", f"工作进程 {w} 意外退出"
+                if status == "error":
+                    errors.append(payload)
+                    self._barrier.abort()
+                else:
+                    results[w] = payload
+        if errors:
+            self._broken = True
+            logger.error(f"并行仿真工作进程出错: {errors[0]}")
+            raise RuntimeError(f"并行仿真失败: {errors[0].strip().splitlines()[-1]}")
+        return results
+
+    def _command(self, command: str, *args: Any) -> List[Any]:
+        """向全部工作进程发送命令并等待响应"""
+        if not self._finalizer.alive or self._broken:
+            raise RuntimeError("并行仿真器已关闭")
+        for connection in self._connections:
+            connection.send((command, args))
+        return self._collect()
+
+    def step(self) -> None:
+        """推进一个记录步长"""
+        self.run(1, {})
+
+    def run(self, n_steps: int, recorders: Dict[str, Recorder]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        推进n_steps步并记录每步之后的输出变量
+
+        Returns:
+            Tuple[np.ndarray, Dict[str, np.ndarray]]: 时间点和各输出变量的数据
+        """
+        names = list(recorders)
+        if n_steps <= 0:
+            return np.empty(0), {name: np.empty(0) for name in names}
+        results = self._command("run", n_steps, [recorders[name] for name in names], list(self._monitored))
+        records = np.sum([result["records"] for result in results], axis=0)
+        self.spike_counts = np.sum([result["spike_counts"] for result in results], axis=0)
+        for result in results:
+            for i, events in result["spikes"].items():
+                self._monitored[i].append(events)
+
+        parity, last = results[0]["last"]
+        spikes = self._state["spikes"][parity, last]
+        for i, population in enumerate(self.network.populations):
+            start = self._starts[i]
+            self.spiked[i] = spikes[start:start + population.size].copy()
+        for buffer in self.buffers:
+            buffer.advance(n_steps)
+
+        time_points = (self.steps + np.arange(1, n_steps + 1)) * self.dt
+        self.steps += n_steps
+        self.t = self.steps * self.dt
+        return time_points, {name: records[:, r] for r, name in enumerate(names)}
+
+    def drain_spikes(self) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """取出记录的放电事件，合并各分区的事件并按(步, 神经元序号)排序"""
+        events = {}
+        for i, (steps, neurons) in super().drain_spikes().items():
+            order = np.lexsort((neurons, steps))
+            events[i] = (steps[order], neurons[order])
+        return events
+
+    def stats(self) -> Dict[str, Any]:
+        """各分区积分统计信息的合计，rk45的子步长取各分区中最小的"""
+        merged: Dict[str, Any] = {}
+        for stats in self._command("stats"):
+            for key, value in stats.items():
+                if key not in merged:
+                    merged[key] = value
+                elif key == "step":
+                    merged[key] = min(merged[key], value)
+                elif isinstance(value, (int, float)):
+                    merged[key] += value
+        merged["workers"] = self.workers
+        return merged
+
+    def state_dict(self) -> Dict[str, np.ndarray]:
+        """仿真状态(不含时间)的副本，不引用共享内存"""
+        return {key: np.array(value) for key, value in super().state_dict().items()}
+
+    def load_state(self, state: Dict[str, np.ndarray]) -> None:
+        """
+        载入仿真状态
+
+        Raises:
+            ValueError: 状态与当前网络的结构不一致时
+        """
+        if state["y"].shape != self.y.shape:
+            raise ValueError("终止状态与网络结构不一致")
+        self.y[...] = state["y"]
+        for i, population in enumerate(self.network.populations):
+            self.i_syn[i][...] = state[f"{population.name}/i_syn"]
+            self.buffers[i].load(state[f"{population.name}/pending"])
+            for key in self.aux[i]:
+                self.aux[i][key][...] = state[f"{population.name}/{key}"]
+        self._command("load")
+
+    def close(self) -> None:
+        """停止工作进程并释放共享内存，之后仍可以读取最后的状态"""
+        if not self._finalizer.alive:
+            return
+        self.y = self.y.copy()
+        self.i_syn = [i_syn.copy() for i_syn in self.i_syn]
+        self.aux = [{key: value.copy() for key, value in aux.items()} for aux in self.aux]
+        for buffer in self.buffers:
+            buffer.buffer = buffer.buffer.copy()
+        self._finalizer()
+
+    def __enter__(self) -> "ParallelNetworkSimulator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _shutdown(
+    processes: List[multiprocessing.Process],
+    connections: List[Any],
+    tables: List[SharedArrays],
+    state: SharedArrays
+) -> None:
+    """停止工作进程并释放共享内存"""
+    for connection in connections:
+        with contextlib.suppress(OSError):
+            connection.send(("close", ()))
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+    for connection in connections:
+        connection.close()
+    for shared in tables + [state]:
+        shared.close()
+
+
+class _Partition:
+    """工作进程中的网络分区：每个群体中[lo, lo + 分区大小)范围内的神经元"""
+
+    def __init__(self, setup: Dict[str, Any], barrier: Any):
+        self.barrier = barrier
+        self.state = SharedArrays.attach(setup["state"])
+        self.tables = SharedArrays.attach(setup["tables"])
+        self.interval = setup["interval"]
+        self.sizes = setup["sizes"]
+        self.starts = setup["starts"]
+        self.y_offsets = setup["y_offsets"]
+        self.lo = setup["lo"]
+        self.parity = 0
+
+        populations = setup["populations"]
+        simulator = NetworkSimulator(Network(populations), setup["integrator"], setup["dt"], seed=setup["seed"])
+        # 突触电流和延迟缓冲直接使用共享内存中属于本分区的部分
+        for i, population in enumerate(populations):
+            start = self.starts[i] + self.lo[i]
+            simulator.i_syn[i] = self.state["i_syn"][start:start + population.size]
+            pending = self.state[f"pending/{i}"][:, self.lo[i]:self.lo[i] + population.size]
+            simulator.buffers[i] = DelayRingBuffer(population.size, pending.shape[0] - 1, buffer=pending)
+        self.simulator = simulator
+
+        self.projections = []
+        for j, (source, target, n_pre, delay) in enumerate(setup["projections"]):
+            synapses = SynapseTable(
+                n_pre,
+                populations[target].size,
+                self.tables[f"{j}/indptr"],
+                self.tables[f"{j}/targets"],
+                self.tables[f"{j}/weights"],
+                delays=self.tables.get(f"{j}/delays"),
+                delay=delay
+            )
+            self.projections.append((source, target, synapses, synapses.delay_steps(simulator.dt)))
+        self.load()
+
+    def _global_view(self, i: int) -> np.ndarray:
+        """共享状态向量中第i个群体属于本分区的部分，形状为(状态变量数, 分区大小)"""
+        population = self.simulator.network.populations[i]
+        rows = len(population.model.state_variables)
+        start = self.y_offsets[i]
+        block = self.state["y"][start:start + rows * self.sizes[i]].reshape(rows, self.sizes[i])
+        return block[:, self.lo[i]:self.lo[i] + population.size]
+
+    def load(self) -> None:
+        """从共享内存读取本分区的状态，延迟缓冲回到起点"""
+        for i, population in enumerate(self.simulator.network.populations):
+            self.simulator.view(i)[...] = self._global_view(i)
+            for key, value in self.simulator.aux[i].items():
+                value[...] = self.state[f"aux/{i}/{key}"][self.lo[i]:self.lo[i] + population.size]
+            self.simulator.buffers[i].cursor = 0
+
+    def publish(self) -> None:
+        """把本分区的状态向量和辅助状态写回共享内存"""
+        for i, population in enumerate(self.simulator.network.populations):
+            self._global_view(i)[...] = self.simulator.view(i)
+            for key, value in self.simulator.aux[i].items():
+                self.state[f"aux/{i}/{key}"][self.lo[i]:self.lo[i] + population.size] = value
+
+    def run(self, n_steps: int, recorders: List[Recorder], monitored: List[int]) -> Dict[str, Any]:
+        """
+        推进n_steps步，每个同步间隔结束时交换放电
+
+        Args:
+            n_steps: 步数
+            recorders: 输出变量
+            monitored: 记录放电事件的群体
+
+        Returns:
+            Dict[str, Any]: 每步输出变量的部分取值、本分区的累计放电数、放电事件(完整群体中的神经元序号)
+                和最后一步放电记录的位置
+        """
+        simulator = self.simulator
+        if set(monitored) != set(simulator._monitored):
+            simulator.monitor_spikes(monitored)
+        records = np.zeros((n_steps, len(recorders)))
+        done = 0
+        while done < n_steps:
+            steps = min(self.interval, n_steps - done)
+            history = self.state["spikes"][self.parity]
+            for k in range(steps):
+                simulator.step()
+                for i, spiked in enumerate(simulator.spiked):
+                    start = self.starts[i] + self.lo[i]
+                    history[k, start:start + spiked.shape[0]] = spiked
+                for r, recorder in enumerate(recorders):
+                    records[done + k, r] = recorder.partial(simulator, self.lo[recorder.population])
+            # 全部分区都完成本间隔后放电记录才完整
+            self.barrier.wait()
+            self.deliver(history, steps)
+            last = (self.parity, steps - 1)
+            self.parity ^= 1
+            done += steps
+        self.publish()
+        spikes = {i: (steps, neurons + self.lo[i]) for i, (steps, neurons) in simulator.drain_spikes().items()}
+        return {"records": records, "spike_counts": simulator.spike_counts.copy(), "spikes": spikes, "last": last}
+
+    def deliver(self, history: np.ndarray, steps: int) -> None:
+        """把本间隔内全部神经元的放电写入本分区延迟缓冲的到达槽位"""
+        for k in range(steps):
+            for source, target, synapses, delay_steps in self.projections:
+                start = self.starts[source]
+                sources = np.flatnonzero(history[k, start:start + synapses.n_pre])
+                if sources.size:
+                    positions = synapses.outgoing(sources)
+                    self.simulator.buffers[target].schedule(
+                        synapses.targets[positions],
+                        synapses.weights[positions],
+                        delay_steps if np.isscalar(delay_steps) else delay_steps[positions],
+                        offset=k - steps
+                    )
+
+    def close(self) -> None:
+        self.simulator = None
+        self.projections = []
+        self.state.close()
+        self.tables.close()
+
+
+def _worker_main(connection: Any, barrier: Any, setup: Dict[str, Any]) -> None:
+    """工作进程入口：按主进程的命令推进本分区"""
+    try:
+        partition = _Partition(setup, barrier)
+    except Exception:
+        connection.send(("error", traceback.format_exc()))
+        return
+    connection.send(("ok", None))
+
+    handlers = {
+        "run": partition.run,
+        "load": partition.load,
+        "stats": lambda: partition.simulator.stats()
+    }
+    while True:
+        try:
+            command, args = connection.recv()
+        except (EOFError, OSError):
+            break
+        if command == "close":
+            break
+        try:
+            connection.send(("ok", handlers[command](*args)))
+        except Exception:
+            barrier.abort()
+            connection.send(("error", traceback.format_exc()))
+    partition.close()
@@ -0,0 +1,329 @@
+"""神经元网络仿真器
+
+所有群体的状态拼接成一个扁平向量交给积分器，每个记录步长：
+1. 计算每个神经元的输入电流(外部输入 + 突触电流)，步内保持不变
+2. 积分一步，检测放电并复位
+3. 只遍历放电神经元的出边，把权重写入目标群体延迟环形缓冲的到达槽位(事件驱动)
+4. 突触电流按tau_syn指数衰减，再加上本步结束时到达的输入；最小延迟为一步，
+   即本步的放电在下一步结束时到达
+
+输出变量：
+- 群体名.状态变量: 群体平均值，例如exc.v
+- 群体名.状态变量[i]: 单个神经元，例如exc.v[0]
+- 群体名.i_syn: 平均突触电流
+- 群体名.spikes: 本步放电数
+- 群体名.rate: 群体放电率(Hz)
+- 群体名.spike_train: 每个放电事件(神经元序号, 时间)，不产生稠密的列，单独保存为稀疏事件
+只有一个群体时可以省略群体名。
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .network import Network
+from .integrators import Integrator
+from .connectivity import DelayRingBuffer
+
+
+SPIKE_TRAIN = "spike_train"
+
+_VARIABLE = re.compile(r"^(?:(?P<population>[^.\[\]]+)\.)?(?P<name>[^.\[\]]+)(?:\[(?P<index>\d+)\])?$")
+
+
+class NetworkSimulator:
+    """神经元网络仿真器"""
+
+    def __init__(self, network: Network, integrator: Integrator, dt: float, seed: Optional[int] = None):
+        """
+        初始化仿真器
+
+        Args:
+            network: 神经元网络
+            integrator: 积分器
+            dt: 记录步长(毫秒)
+            seed: 外部噪声输入的随机种子
+        """
+        if dt <= 0:
+            raise ValueError("仿真步长必须为正数")
+        self.network = network
+        self.integrator = integrator
+        self.dt = dt
+        self.rng = np.random.default_rng(seed)
+        self.index = {population.name: i for i, population in enumerate(network.populations)}
+
+        blocks = []
+        self._slices = []
+        offset = 0
+        for population in network.populations:
+            block = population.model.initial_state(population.size, population.params).ravel()
+            blocks.append(block)
+            self._slices.append(slice(offset, offset + block.size))
+            offset += block.size
+        self.y = np.concatenate(blocks)
+
+        self.aux = [population.model.initial_aux(population.size) for population in network.populations]
+        self.i_syn = [np.zeros(population.size) for population in network.populations]
+        self.spiked = [np.zeros(population.size, dtype=bool) for population in network.populations]
+        self.spike_counts = np.zeros(len(network.populations), dtype=np.int64)
+        self._current: List[np.ndarray] = [np.zeros(population.size) for population in network.populations]
+        self._decay = [np.exp(-dt / population.tau_syn) for population in network.populations]
+        # (源群体, 目标群体, 突触表, 延迟步数)，每个目标群体一个延迟缓冲，长度为最大延迟步数
+        self._projections = []
+        max_delays = [1] * len(network.populations)
+        for projection in network.projections:
+            target = self.index[projection.target]
+            delay_steps = projection.synapses.delay_steps(dt)
+            max_delays[target] = max(max_delays[target], int(np.max(delay_steps, initial=1)))
+            self._projections.append((self.index[projection.source], target, projection.synapses, delay_steps))
+        self.buffers = [
+            DelayRingBuffer(population.size, max_delays[i])
+            for i, population in enumerate(network.populations)
+        ]
+        self._monitored: Dict[int, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        self.steps = 0
+        self.t = 0.0
+
+    def view(self, i: int, y: Optional[np.ndarray] = None) -> np.ndarray:
+        """第i个群体的状态，形状为(状态变量数, 神经元数)，是扁平状态向量的视图"""
+        population = self.network.populations[i]
+        rows = len(population.model.state_variables)
+        return (self.y if y is None else y)[self._slices[i]].reshape(rows, population.size)
+
+    def values(self, i: int, quantity: str) -> np.ndarray:
+        """第i个群体每个神经元的某个量：状态变量、i_syn或spikes(本步是否放电)"""
+        if quantity == "spikes":
+            return self.spiked[i]
+        if quantity == "i_syn":
+            return self.i_syn[i]
+        return self.view(i)[self.network.populations[i].model.state_variables.index(quantity)]
+
+    def _derivatives(self, t: float, y: np.ndarray) -> np.ndarray:
+        dy = np.empty_like(y)
+        for i, population in enumerate(self.network.populations):
+            dy[self._slices[i]] = population.model.derivatives(
+                self.view(i, y), self._current[i], population.params, self.aux[i]
+            ).ravel()
+        return dy
+
+    def step(self) -> None:
+        """推进一个记录步长"""
+        for i, population in enumerate(self.network.populations):
+            current = self._current[i]
+            np.add(self.i_syn[i], population.input_mean, out=current)
+            if population.input_std > 0:
+                current += population.input_std * self.rng.standard_normal(population.size)
+
+        self.y = self.integrator.step(self._derivatives, self.t, self.y, self.dt)
+
+        for i, population in enumerate(self.network.populations):
+            spiked = population.model.after_step(self.view(i), population.params, self.aux[i], self.dt)
+            self.spiked[i] = spiked
+            self.spike_counts[i] += np.count_nonzero(spiked)
+            if i in self._monitored:
+                neurons = np.flatnonzero(spiked)
+                if neurons.size:
+                    self._monitored[i].append((np.full(neurons.size, self.steps + 1, dtype=np.int64), neurons))
+
+        for source, target, synapses, delay_steps in self._projections:
+            sources = np.flatnonzero(self.spiked[source])
+            if sources.size:
+                positions = synapses.outgoing(sources)
+                self.buffers[target].schedule(
+                    synapses.targets[positions],
+                    synapses.weights[positions],
+                    delay_steps if np.isscalar(delay_steps) else delay_steps[positions]
+                )
+
+        for i in range(len(self.network.populations)):
+            self.i_syn[i] *= self._decay[i]
+            self.buffers[i].drain_into(self.i_syn[i])
+
+        self.steps += 1
+        self.t = self.steps * self.dt
+
+    def sample(self, recorders: Dict[str, "Recorder"]) -> Dict[str, float]:
+        """当前时刻各输出变量的值"""
+        return {name: recorder(self) for name, recorder in recorders.items()}
+
+    def run(self, n_steps: int, recorders: Dict[str, "Recorder"]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        推进n_steps步并记录每步之后的输出变量
+
+        Returns:
+            Tuple[np.ndarray, Dict[str, np.ndarray]]: 时间点和各输出变量的数据
+        """
+        time_points = np.empty(n_steps)
+        data = {name: np.empty(n_steps) for name in recorders}
+        for k in range(n_steps):
+            self.step()
+            time_points[k] = self.t
+            for name, recorder in recorders.items():
+                data[name][k] = recorder(self)
+        return time_points, data
+
+    def stats(self) -> Dict[str, Any]:
+        """积分统计信息"""
+        return self.integrator.stats()
+
+    def monitor_spikes(self, populations: Iterable[int]) -> None:
+        """记录这些群体的每个放电事件，之前记录而未取出的事件被丢弃"""
+        self._monitored = {i: [] for i in populations}
+
+    def drain_spikes(self) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """
+        取出上次取出以来记录的放电事件
+
+        Returns:
+            Dict[int, Tuple[np.ndarray, np.ndarray]]: 每个记录的群体按步排序的(步序号, 神经元序号)，
+                放电发生在第k步时时间为k × dt
+        """
+        events = {}
+        for i, batches in self._monitored.items():
+            if batches:
+                events[i] = (np.concatenate([steps for steps, _ in batches]), np.concatenate([n for _, n in batches]))
+            else:
+                events[i] = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+            batches.clear()
+        return events
+
+    def close(self) -> None:
+        """释放仿真器占用的资源，单进程仿真器没有需要释放的资源"""
+
+    def state_dict(self) -> Dict[str, np.ndarray]:
+        """仿真状态(不含时间)，用于从终止状态开始新的仿真"""
+        state = {"y": self.y}
+        for i, population in enumerate(self.network.populations):
+            state[f"{population.name}/i_syn"] = self.i_syn[i]
+            state[f"{population.name}/pending"] = self.buffers[i].pending()
+            for key, value in self.aux[i].items():
+                state[f"{population.name}/{key}"] = value
+        return state
+
+    def load_state(self, state: Dict[str, np.ndarray]) -> None:
+        """
+        载入仿真状态
+
+        Raises:
+            ValueError: 状态与当前网络的结构不一致时
+        """
+        if state["y"].shape != self.y.shape:
+            raise ValueError("终止状态与网络结构不一致")
+        self.y = np.array(state["y"], dtype=np.float64)
+        for i, population in enumerate(self.network.populations):
+            self.i_syn[i] = np.array(state[f"{population.name}/i_syn"], dtype=np.float64)
+            self.buffers[i].load(state[f"{population.name}/pending"])
+            for key in self.aux[i]:
+                self.aux[i][key] = np.array(state[f"{population.name}/{key}"])
+
+
+@dataclass(frozen=True)
+class Recorder:
+    """输出变量的取值方式
+
+    取值为群体中某个量在全部神经元上的和乘以scale(群体平均值、放电数和放电率)，
+    或单个神经元的值。按神经元分区并行仿真时，各分区的部分取值相加即为取值。
+    """
+    population: int  # 群体序号
+    quantity: str  # 状态变量名、i_syn或spikes
+    neuron: Optional[int] = None  # 单个神经元的序号，None表示对群体求和
+    scale: float = 1.0
+    per_second: bool = False  # 是否除以步长并换算为每秒
+
+    def __call__(self, simulator: NetworkSimulator) -> float:
+        return self.partial(simulator)
+
+    def partial(self, simulator: NetworkSimulator, offset: int = 0) -> float:
+        """
+        部分取值
+
+        Args:
+            simulator: 仿真器，其中的群体为完整群体中从offset开始的一段神经元
+            offset: 这段神经元在完整群体中的起始序号
+
+        Returns:
+            float: 这段神经元贡献的取值，不包含所记录的单个神经元时为0
+        """
+        values = simulator.values(self.population, self.quantity)
+        if self.neuron is None:
+            value = float(np.count_nonzero(values) if values.dtype == bool else values.sum()) * self.scale
+        elif 0 <= self.neuron - offset < values.shape[0]:
+            value = float(values[self.neuron - offset]) * self.scale
+        else:
+            return 0.0
+        return value / simulator.dt * 1000.0 if self.per_second else value
+
+
+def _resolve(network: Network, variable: str) -> Tuple[int, str, Optional[str]]:
+    """解析输出变量的群体序号、量的名称和神经元序号"""
+    match = _VARIABLE.match(variable)
+    if match is None:
+        raise ValueError(f"无法识别的输出变量: {variable}")
+    population_name = match.group("population")
+    if population_name is None:
+        if len(network.populations) != 1:
+            raise ValueError(f"网络有多个群体，输出变量 {variable} 需要指定群体名")
+        population_name = network.populations[0].name
+    for i, population in enumerate(network.populations):
+        if population.name == population_name:
+            return i, match.group("name"), match.group("index")
+    raise ValueError(f"输出变量 {variable} 的群体 {population_name} 不存在")
+
+
+def split_spike_trains(network: Network, variables: List[str]) -> Tuple[List[str], Dict[str, int]]:
+    """
+    把输出变量分为稠密变量和放电序列
+
+    Returns:
+        Tuple[List[str], Dict[str, int]]: 稠密输出变量，以及放电序列变量到群体序号的映射
+
+    Raises:
+        ValueError: 放电序列变量的群体不存在或带有神经元序号时
+    """
+    dense, spike_trains = [], {}
+    for variable in variables:
+        if variable.rsplit(".", 1)[-1] == SPIKE_TRAIN:
+            i, _, neuron = _resolve(network, variable)
+            if neuron is not None:
+                raise ValueError(f"放电序列 {variable} 不能指定单个神经元")
+            spike_trains[variable] = i
+        else:
+            dense.append(variable)
+    return dense, spike_trains
+
+
+def build_recorders(network: Network, variables: List[str]) -> Dict[str, Recorder]:
+    """
+    解析输出变量
+
+    Args:
+        network: 神经元网络
+        variables: 输出变量名称列表
+
+    Returns:
+        Dict[str, Recorder]: 输出变量名称到取值方式的映射
+
+    Raises:
+        ValueError: 输出变量无法识别时
+    """
+    recorders: Dict[str, Recorder] = {}
+    for variable in variables:
+        i, name, neuron = _resolve(network, variable)
+        population = network.populations[i]
+
+        if neuron is not None and int(neuron) >= population.size:
+            raise ValueError(f"输出变量 {variable} 的神经元序号超出群体大小")
+        if name in population.model.state_variables or name == "i_syn":
+            if neuron is None:
+                recorders[variable] = Recorder(i, name, scale=1.0 / population.size)
+            else:
+                recorders[variable] = Recorder(i, name, neuron=int(neuron))
+        elif name == "spikes" and neuron is None:
+            recorders[variable] = Recorder(i, "spikes")
+        elif name == "rate" and neuron is None:
+            recorders[variable] = Recorder(i, "spikes", scale=1.0 / population.size, per_second=True)
+        else:
+            raise ValueError(f"无法识别的输出变量: {variable}")
+    return recorders
@@ -0,0 +1,285 @@
+"""SkyEye常驻工作进程池
+
+大量短仿真的耗时主要在SkyEye进程启动和模型解析上。守护模式下每个工作进程以
+`skyeye --serve`启动后常驻，已加载的模型保留在进程内，通过stdin/stdout逐行交换JSON：
+- 请求: {"id": 序号, "args": [与命令行模式相同的参数]}
+- 输出: {"id": 序号, "stream": "stdout"或"stderr", "data": 输出片段}，运行期间随时发送，可以有任意多条
+- 响应: {"id": 序号, "returncode": 退出码}，也可以在响应的stdout/stderr中一次给出全部输出
+
+输出片段一到达就交给调用方(写入滚动日志)，运行期间的内存占用与输出总量无关。
+
+分配工作进程时优先选择已加载同一模型的空闲进程。停止任务时终止执行该任务的工作进程，
+进程池在下次分配时补充新的工作进程。
+工作进程启动时施加内存上限和nice值；累计CPU时间上限和按次运行的cgroup只用于进程模式，
+常驻进程的CPU时间跨多次运行累计，由看门狗限制单次运行的时间。
+"""
+
+import os
+import json
+import signal
+import asyncio
+import contextlib
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+from .limits import ResourceLimits
+
+
+_STREAM_LIMIT = 64 * 1024 * 1024  # 单个响应行的最大长度
+_STDERR_TAIL = 64 * 1024  # 保留的工作进程错误输出字节数
+
+
+class SkyEyeWorker:
+    """单个常驻SkyEye工作进程"""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.models: Set[str] = set()  # 已加载的模型
+        self.busy = False
+        self.runs = 0
+        self._next_id = 0
+        # 持续读取进程直接写到stderr的内容，避免管道写满阻塞工作进程
+        self._stderr_tail = bytearray()
+        self._stderr_reader = asyncio.ensure_future(self._drain_stderr())
+
+    async def _drain_stderr(self) -> None:
+        while True:
+            chunk = await self.process.stderr.read(65536)
+            if not chunk:
+                return
+            self._stderr_tail.extend(chunk)
+            del self._stderr_tail[:-_STDERR_TAIL]
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def run(
+        self,
+        args: List[str],
+        model_path: Optional[str] = None,
+        on_output: Optional[Callable[[str, bytes], None]] = None
+    ) -> Tuple[int, bytes, bytes]:
+        """
+        发送一次运行请求并等待响应
+
+        工作进程在运行期间退出(被停止或崩溃)时，返回进程的退出码而不是抛出异常。
+
+        Args:
+            args: SkyEye命令行参数(不含可执行文件路径)
+            model_path: 请求使用的模型，成功后记为已加载
+            on_output: 输出回调，参数为"stdout"或"stderr"和输出片段；指定时输出不在返回值中累积
+
+        Returns:
+            Tuple[int, bytes, bytes]: 退出码、标准输出和错误输出(指定on_output时为空)
+        """
+        self._next_id += 1
+        request_id = self._next_id
+        self.runs += 1
+        collected = {"stdout": bytearray(), "stderr": bytearray()}
+
+        def output(stream: str, data: str) -> None:
+            if not data or stream not in collected:
+                return
+            chunk = data.encode("utf-8")
+            if on_output is not None:
+                on_output(stream, chunk)
+            else:
+                collected[stream].extend(chunk)
+
+        try:
+            self.process.stdin.write((json.dumps({"id": request_id, "args": args}) + "\n").encode("utf-8"))
+            await self.process.stdin.drain()
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                if response.get("id") != request_id:
+                    raise RuntimeError(f"SkyEye工作进程响应序号不匹配: {response.get('id')} != {request_id}")
+                if "stream" not in response:
+                    break
+                output(response["stream"], response.get("data", ""))
+        except (BrokenPipeError, ConnectionResetError):
+            line = b""
+
+        if not line:
+            returncode = await self.process.wait()
+            await self._stderr_reader
+            message = bytes(self._stderr_tail) or f"SkyEye工作进程意外退出(退出码{returncode})".encode("utf-8")
+            if on_output is not None:
+                on_output("stderr", message)
+                message = b""
+            return returncode or 1, bytes(collected["stdout"]), bytes(collected["stderr"]) + message
+
+        if model_path:
+            self.models.add(model_path)
+        output("stdout", response.get("stdout", ""))
+        output("stderr", response.get("stderr", ""))
+        return int(response.get("returncode", 1)), bytes(collected["stdout"]), bytes(collected["stderr"])
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """关闭工作进程：先关闭stdin让其自行退出，超时后终止进程组"""
+        if not self.alive:
+            return
+        with contextlib.suppress(Exception):
+            self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(self.process.pid, signal.SIGKILL)
+            await self.process.wait()
+        await self._stderr_reader
+
+
+class SkyEyePool:
+    """SkyEye工作进程池
+
+    按需启动工作进程，数量不超过size。工作进程执行max_runs次请求后回收，
+    防止长期运行累积的资源泄漏。
+    """
+
+    def __init__(self, skyeye_path: str, size: Optional[int] = None, max_runs: Optional[int] = None):
+        """
+        初始化进程池
+
+        Args:
+            skyeye_path: SkyEye可执行文件路径
+            size: 工作进程数上限，默认为SKYEYE_POOL_SIZE
+            max_runs: 每个工作进程最多执行的请求数，0表示不限制
+        """
+        self.skyeye_path = skyeye_path
+        self.size = size or settings.SKYEYE_POOL_SIZE
+        self.max_runs = settings.SKYEYE_POOL_MAX_RUNS if max_runs is None else max_runs
+        self.workers: List[SkyEyeWorker] = []
+        self._starting = 0
+        self._condition = asyncio.Condition()
+        self._closed = False
+        self.model_hits = 0
+        self.model_misses = 0
+        self.limits = ResourceLimits(cpu_time=0, cgroup_root="")
+
+    async def _spawn(self) -> SkyEyeWorker:
+        process = await asyncio.create_subprocess_exec(
+            str(self.skyeye_path),
+            "--serve",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+            limit=_STREAM_LIMIT
+        )
+        self.limits.apply(process.pid)
+        logger.info(f"启动SkyEye工作进程 {process.pid}")
+        return SkyEyeWorker(process)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _idle_worker(self, model_path: Optional[str]) -> Optional[SkyEyeWorker]:
+        """移除已退出的工作进程，返回空闲的工作进程，优先选择已加载该模型的"""
+        self.workers = [worker for worker in self.workers if worker.alive or worker.busy]
+        idle = [worker for worker in self.workers if not worker.busy and worker.alive]
+        if not idle:
+            return None
+        for worker in idle:
+            if model_path in worker.models:
+                self.model_hits += 1
+                return worker
+        self.model_misses += 1
+        return idle[0]
+
+    async def acquire(self, model_path: Optional[str] = None) -> SkyEyeWorker:
+        """
+        分配一个空闲的工作进程，没有空闲进程且未达到上限时启动新的进程
+
+        Args:
+            model_path: 要运行的模型
+
+        Returns:
+            SkyEyeWorker: 已标记为忙碌的工作进程，使用后需调用release
+        """
+        async with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("SkyEye进程池已关闭")
+                worker = self._idle_worker(model_path)
+                if worker is not None:
+                    worker.busy = True
+                    return worker
+                if len(self.workers) + self._starting < self.size:
+                    break
+                await self._condition.wait()
+            self._starting += 1
+
+        try:
+            worker = await self._spawn()
+        finally:
+            async with self._condition:
+                self._starting -= 1
+        worker.busy = True
+        async with self._condition:
+            self.workers.append(worker)
+        return worker
+
+    async def release(self, worker: SkyEyeWorker) -> None:
+        """归还工作进程，已退出或达到请求数上限的进程被回收"""
+        if worker.alive and self.max_runs and worker.runs >= self.max_runs:
+            await worker.close()
+        async with self._condition:
+            worker.busy = False
+            if not worker.alive and worker in self.workers:
+                self.workers.remove(worker)
+            self._condition.notify()
+
+    async def run(self, args: List[str], model_path: Optional[str] = None) -> Tuple[int, bytes, bytes]:
+        """在空闲的工作进程上执行一次请求"""
+        worker = await self.acquire(model_path)
+        try:
+            return await worker.run(args, model_path)
+        finally:
+            await self.release(worker)
+
+    async def close(self) -> None:
+        """关闭全部工作进程"""
+        async with self._condition:
+            self._closed = True
+            workers, self.workers = self.workers, []
+            self._condition.notify_all()
+        await asyncio.gather(*(worker.close() for worker in workers), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """进程池状态"""
+        return {
+            "size": self.size,
+            "workers": len(self.workers),
+            "busy": sum(1 for worker in self.workers if worker.busy),
+            "model_hits": self.model_hits,
+            "model_misses": self.model_misses
+        }
+
+
+_pools: Dict[str, SkyEyePool] = {}
+
+
+def get_skyeye_pool(skyeye_path: str) -> SkyEyePool:
+    """获取SkyEye可执行文件对应的进程池(每个事件循环进程共享)"""
+    pool = _pools.get(skyeye_path)
+    if pool is None or pool.closed:
+        pool = _pools[skyeye_path] = SkyEyePool(skyeye_path)
+    return pool
+
+
+async def close_skyeye_pools() -> None:
+    """关闭全部进程池"""
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        await pool.close()
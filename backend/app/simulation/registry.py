@@ -0,0 +1,277 @@
+"""仿真进程注册表
+
+按任务ID记录正在运行的仿真子进程，提供：
+- 进度：最后一个仿真时间点 / 仿真时长
+- 资源使用：CPU时间、常驻内存(RSS)、墙钟时间，读取自/proc
+- 停止：向整个进程组发送SIGTERM，超时后SIGKILL
+- 看门狗：登记时指定墙钟时间上限，超时后停止任务并记录原因(kill_reason)，任务按失败处理
+
+进程内运行的引擎和远程代理上的运行(没有本地子进程)也可以登记，停止时只设置stop_requested，
+由引擎在步进之间检查并自行结束。这类任务没有可读取/proc的进程，资源使用由运行方通过
+report_usage()上报，未上报时为空。
+
+/proc的读取结果会缓存一小段时间，频繁轮询状态的开销很低。
+"""
+
+import os
+import time
+import signal
+import asyncio
+from typing import Dict, Any, Optional, Set
+
+from app.core.config import settings
+from app.core.logging import logger
+
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def read_proc_stats(pid: int) -> Optional[Dict[str, float]]:
+    """
+    从/proc读取进程的CPU时间和常驻内存
+
+    Args:
+        pid: 进程ID
+
+    Returns:
+        Optional[Dict[str, float]]: {"cpu_time": 秒, "rss_bytes": 字节}，进程不存在或系统不支持时返回None
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            statm = f.read()
+    except OSError:
+        return None
+
+    # 进程名可能包含空格和括号，从最后一个')'之后开始解析
+    fields = stat[stat.rindex(b")") + 2:].split()
+    utime, stime = int(fields[11]), int(fields[12])
+    return {
+        "cpu_time": (utime + stime) / _CLK_TCK,
+        "rss_bytes": int(statm.split()[1]) * _PAGE_SIZE
+    }
+
+
+class ProcessHandle:
+    """单个仿真进程的运行信息"""
+
+    def __init__(
+        self,
+        task_id: str,
+        process: Optional[asyncio.subprocess.Process],
+        duration: float,
+        time_limit: Optional[float] = None
+    ):
+        self.task_id = task_id
+        self.process = process
+        # 没有本地子进程时不统计API进程自身的资源使用
+        self.pid = process.pid if process is not None else None
+        self.duration = duration
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.status = "running"
+        self.stop_requested = False
+        self.time_limit = time_limit
+        self.kill_reason: Optional[str] = None  # 被看门狗终止的原因
+        self.simulated_time = 0.0
+        self._stats: Dict[str, float] = {}
+        self._stats_at = 0.0
+        self._finished = asyncio.Event()
+        self._watchdog: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def in_process(self) -> bool:
+        return self.process is None
+
+    @property
+    def wall_time(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    def resource_usage(self, max_age: float = 0.5) -> Dict[str, float]:
+        """获取资源使用情况，max_age秒内的重复调用直接返回缓存"""
+        now = time.monotonic()
+        if self.pid is not None and self.finished_at is None and now - self._stats_at >= max_age:
+            stats = read_proc_stats(self.pid)
+            if stats is not None:
+                self._stats = stats
+            self._stats_at = now
+        return self._stats
+
+    def report_usage(self, stats: Optional[Dict[str, float]]) -> None:
+        """记录运行方上报的资源使用(没有本地子进程的任务)"""
+        if stats:
+            self._stats = {key: stats[key] for key in ("cpu_time", "rss_bytes") if stats.get(key) is not None}
+            self._stats_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """生成状态信息"""
+        usage = self.resource_usage()
+        progress = 100.0 if self.status == "completed" else (
+            min(100.0, self.simulated_time / self.duration * 100) if self.duration > 0 else 0.0
+        )
+        return {
+            "task_id": self.task_id,
+            "status": self.status,
+            "progress": round(progress, 2),
+            "simulated_time": self.simulated_time,
+            "duration": self.duration,
+            "wall_time": round(self.wall_time, 3),
+            "time_limit": self.time_limit,
+            "cpu_time": usage.get("cpu_time"),
+            "rss_bytes": usage.get("rss_bytes"),
+            "pid": self.pid
+        }
+
+
+class ProcessRegistry:
+    """仿真进程注册表
+
+    进程结束后其状态保留一段时间，便于查询最终结果。
+    """
+
+    def __init__(self, retention: Optional[float] = None):
+        self.retention = settings.LIVE_RETENTION_SECONDS if retention is None else retention
+        self._handles: Dict[str, ProcessHandle] = {}
+        self._deferred_stops: Set[str] = set()
+
+    def register(
+        self,
+        task_id: str,
+        process: Optional[asyncio.subprocess.Process],
+        duration: float,
+        time_limit: Optional[float] = None
+    ) -> ProcessHandle:
+        """
+        登记新启动的进程
+
+        Args:
+            task_id: 任务ID
+            process: 仿真子进程，None表示任务在当前进程内运行
+            duration: 仿真时长，用于计算进度
+            time_limit: 墙钟时间上限(秒)，超过后由看门狗停止任务，None表示不限制
+
+        Returns:
+            ProcessHandle: 进程信息
+        """
+        handle = ProcessHandle(task_id, process, duration, time_limit)
+        self._handles[task_id] = handle
+        if time_limit:
+            handle._watchdog = asyncio.get_running_loop().call_later(time_limit, self._expire, task_id, handle)
+        if self.pop_deferred_stop(task_id):
+            # 进程登记前已请求停止：在进程内运行的任务在第一步之前结束，子进程立即终止
+            logger.info(f"任务 {task_id} 在进程启动前已请求停止")
+            handle.stop_requested = True
+            if process is not None:
+                asyncio.ensure_future(self.stop(task_id))
+        return handle
+
+    def running(self, task_id: str) -> bool:
+        """任务是否有已登记且未结束的进程"""
+        handle = self._handles.get(task_id)
+        return handle is not None and handle.finished_at is None
+
+    def defer_stop(self, task_id: str) -> None:
+        """
+        记录已开始执行、但进程尚未登记的任务的停止请求，进程登记时立即停止
+
+        请求由register或pop_deferred_stop取出；执行结束时须调用pop_deferred_stop清除，
+        避免之后重新运行的任务被停止。
+        """
+        self._deferred_stops.add(task_id)
+
+    def pop_deferred_stop(self, task_id: str) -> bool:
+        """取出任务的停止请求，返回是否有尚未生效的停止请求"""
+        if task_id not in self._deferred_stops:
+            return False
+        self._deferred_stops.discard(task_id)
+        return True
+
+    def _expire(self, task_id: str, handle: ProcessHandle) -> None:
+        """看门狗超时：记录原因并停止任务"""
+        if handle.finished_at is not None or handle.stop_requested:
+            return
+        handle.kill_reason = f"运行时间超过看门狗上限{handle.time_limit:g}秒，任务已被终止"
+        logger.warning(f"任务 {task_id} {handle.kill_reason}")
+        asyncio.ensure_future(self.stop(task_id))
+
+    def get(self, task_id: str) -> Optional[ProcessHandle]:
+        """获取任务的进程信息"""
+        return self._handles.get(task_id)
+
+    def finish(self, task_id: str, status: str) -> None:
+        """标记进程结束，并在保留时间后移除"""
+        handle = self._handles.get(task_id)
+        if handle is None:
+            return
+        handle.resource_usage(max_age=0)
+        handle.finished_at = time.monotonic()
+        if handle._watchdog is not None:
+            handle._watchdog.cancel()
+        if handle.kill_reason:
+            handle.status = "failed"
+        else:
+            handle.status = "stopped" if handle.stop_requested else status
+        handle._finished.set()
+        try:
+            asyncio.get_running_loop().call_later(self.retention, self._discard, task_id, handle)
+        except RuntimeError:
+            self._discard(task_id, handle)
+
+    def _discard(self, task_id: str, handle: ProcessHandle) -> None:
+        if self._handles.get(task_id) is handle:
+            del self._handles[task_id]
+
+    async def stop(self, task_id: str, grace: Optional[float] = None) -> bool:
+        """
+        终止任务的进程组
+
+        先发送SIGTERM，grace秒内未退出则发送SIGKILL。
+
+        Args:
+            task_id: 任务ID
+            grace: 等待进程自行退出的秒数
+
+        Returns:
+            bool: 进程已退出时返回True，任务没有运行中的进程时返回False
+        """
+        handle = self._handles.get(task_id)
+        if handle is None or handle.finished_at is not None:
+            return False
+        if not handle.in_process and handle.process.returncode is not None:
+            return False
+
+        grace = settings.SIMULATION_STOP_GRACE if grace is None else grace
+        handle.stop_requested = True
+        if handle.in_process:
+            # 引擎在下一次步进之间结束运行
+            try:
+                await asyncio.wait_for(handle._finished.wait(), grace)
+            except asyncio.TimeoutError:
+                logger.warning(f"任务 {task_id} 未在{grace}秒内结束")
+                return False
+            logger.info(f"任务 {task_id} 已停止")
+            return True
+        self._signal(handle, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(handle.process.wait(), grace)
+        except asyncio.TimeoutError:
+            logger.warning(f"任务 {task_id} 未在{grace}秒内退出，强制终止")
+            self._signal(handle, signal.SIGKILL)
+            await handle.process.wait()
+        logger.info(f"任务 {task_id} 已停止")
+        return True
+
+    @staticmethod
+    def _signal(handle: ProcessHandle, sig: int) -> None:
+        try:
+            os.killpg(handle.pid, sig)
+        except ProcessLookupError:
+            pass
+        except OSError:
+            handle.process.send_signal(sig)
+
+
+process_registry = ProcessRegistry()
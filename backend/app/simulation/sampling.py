@@ -0,0 +1,153 @@
+"""仿真输出采样
+
+积分步长决定仿真精度，输出不必逐步记录：
+- 输出间隔(output_interval，或按步数给出的output_stride)：每隔若干步输出一行结果
+- 各变量的记录间隔(variable_intervals)：变化慢的变量只在部分输出行上记录，
+  例如步长0.01 ms时膜电位每0.1 ms记录一次、慢变量每1 ms记录一次
+
+所有间隔都换算为步数，第i步输出当且仅当i是输出步数的整数倍，变量v在第i步记录当且仅当
+i是v的记录步数的整数倍。采样只取决于步序号，从检查点继续的运行与一次运行的输出完全相同。
+仿真时长不是输出间隔的整数倍时，最后一个输出间隔之后的步不输出。
+
+SkyEye通过--output-interval和--output-var-interval接收采样设置，未记录的变量在该行留空；
+列式结果中每个变量按自己的间隔存储(见storage.columnar)。
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional
+
+
+# 间隔与步长的比值允许的相对误差，例如 0.1 / 0.01 = 10.000000000000002
+_TOLERANCE = 1e-6
+
+
+def interval_steps(interval: float, step_size: float, name: str = "输出间隔") -> int:
+    """
+    把仿真时间间隔换算为步数
+
+    Args:
+        interval: 间隔(仿真时间)
+        step_size: 步长
+        name: 错误信息中的名称
+
+    Returns:
+        int: 步数
+
+    Raises:
+        ValueError: 间隔不是步长的正整数倍时
+    """
+    if not interval > 0:
+        raise ValueError(f"{name}必须为正数")
+    ratio = interval / step_size
+    steps = round(ratio)
+    if steps < 1 or abs(ratio - steps) > _TOLERANCE * max(1.0, ratio):
+        raise ValueError(f"{name}{interval:g}必须是步长{step_size:g}的整数倍")
+    return steps
+
+
+@dataclass
+class OutputSampling:
+    """输出采样设置，间隔均以步数表示
+
+    Attributes:
+        step_size: 步长
+        stride: 输出行之间的步数
+        variable_strides: 记录间隔大于输出间隔的变量，值为记录之间的输出行数
+    """
+    step_size: float
+    stride: int = 1
+    variable_strides: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def interval(self) -> float:
+        """输出间隔(仿真时间)"""
+        return self.stride * self.step_size
+
+    @property
+    def decimated(self) -> bool:
+        """是否不是逐步输出全部变量"""
+        return self.stride > 1 or bool(self.variable_strides)
+
+    def row_stride(self, variable: str) -> int:
+        """变量记录之间的输出行数"""
+        return self.variable_strides.get(variable, 1)
+
+    def variable_interval(self, variable: str) -> float:
+        """变量的记录间隔(仿真时间)"""
+        return self.interval * self.row_stride(variable)
+
+    def rows(self, steps: int) -> int:
+        """steps步的仿真输出的行数(包括0时刻)"""
+        return steps // self.stride + 1
+
+    def samples(self, variable: str, steps: int) -> int:
+        """steps步的仿真中变量记录的样本数"""
+        return (self.rows(steps) - 1) // self.row_stride(variable) + 1
+
+    def describe(self) -> Dict[str, Any]:
+        """写入结果元数据的采样设置"""
+        return {
+            "output_stride": self.stride,
+            "output_interval": self.interval,
+            "variable_intervals": {var: self.variable_interval(var) for var in self.variable_strides}
+        }
+
+
+def resolve_sampling(
+    step_size: float,
+    output_variables: List[str],
+    output_interval: Optional[float] = None,
+    output_stride: Optional[int] = None,
+    variable_intervals: Optional[Mapping[str, float]] = None
+) -> OutputSampling:
+    """
+    校验采样设置并换算为步数
+
+    没有指定输出间隔时，输出间隔取全部变量记录间隔的最大公约数
+    (未指定记录间隔的变量逐步记录)，只输出至少有一个变量需要记录的行。
+
+    Args:
+        step_size: 步长
+        output_variables: 输出变量
+        output_interval: 输出间隔(仿真时间)
+        output_stride: 输出行之间的步数，与output_interval同时指定时二者必须一致
+        variable_intervals: 各变量的记录间隔(仿真时间)，须为输出间隔的整数倍
+
+    Returns:
+        OutputSampling: 采样设置
+
+    Raises:
+        ValueError: 间隔不是步长或输出间隔的整数倍、变量不在输出变量中或两种输出间隔不一致时
+    """
+    if not step_size > 0:
+        raise ValueError("步长必须为正数")
+    variable_intervals = dict(variable_intervals or {})
+    unknown = [var for var in variable_intervals if var not in output_variables]
+    if unknown:
+        raise ValueError(f"设置了记录间隔的变量不在输出变量中: {', '.join(unknown)}")
+    steps = {
+        var: interval_steps(interval, step_size, f"变量{var}的记录间隔")
+        for var, interval in variable_intervals.items()
+    }
+
+    stride = None
+    if output_stride is not None:
+        if int(output_stride) != output_stride or output_stride < 1:
+            raise ValueError("输出步数必须为正整数")
+        stride = int(output_stride)
+    if output_interval is not None:
+        from_interval = interval_steps(output_interval, step_size)
+        if stride is not None and stride != from_interval:
+            raise ValueError(f"输出间隔{output_interval:g}与输出步数{stride}不一致")
+        stride = from_interval
+    if stride is None:
+        stride = math.gcd(*steps.values()) if steps and len(steps) == len(output_variables) else 1
+
+    variable_strides = {}
+    for var, var_steps in steps.items():
+        if var_steps % stride:
+            raise ValueError(f"变量{var}的记录间隔必须是输出间隔{stride * step_size:g}的整数倍")
+        if var_steps > stride:
+            variable_strides[var] = var_steps // stride
+    return OutputSampling(step_size, stride, variable_strides)
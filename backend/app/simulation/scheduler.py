@@ -0,0 +1,322 @@
+"""仿真任务调度器
+
+在Web进程内统一调度仿真任务，替代随请求执行的BackgroundTasks：
+- 同时运行的仿真数不超过max_workers(默认取MAX_WORKERS或CPU核数)
+- 优先级高的任务先运行，同优先级时优先调度当前运行任务最少、最久未被调度的用户(公平分配)
+- 同一用户的任务按提交顺序运行
+- 可查询任务的排队位置，取消排队中的任务
+
+任务由调度器持有的asyncio任务执行，并使用独立的数据库会话，
+与发起运行的HTTP请求的生命周期无关。
+
+队列只保存在进程内：关闭时排队和运行中的任务标记为stopped，
+进程异常退出后遗留的queued/running任务在下次启动时同样标记为stopped(见mark_tasks_interrupted)，
+用户可以重新运行，运行中断的任务从最近的检查点继续。
+"""
+
+import time
+import heapq
+import asyncio
+import itertools
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+
+
+TaskRunner = Callable[[str], Awaitable[Any]]
+
+INTERRUPTED_MESSAGE = "服务重启，任务已中断；重新运行时从最近的检查点继续"
+
+
+async def execute_in_session(task_id: str) -> Any:
+    """使用独立的数据库会话执行仿真任务"""
+    from app.db.session import SessionLocal
+    from app.services.simulation import SimulationService
+
+    db = SessionLocal()
+    try:
+        return await SimulationService(db).execute_task(task_id)
+    finally:
+        db.close()
+
+
+def mark_tasks_interrupted(
+    task_ids: Optional[Iterable[str]] = None,
+    session_factory: Optional[Callable[[], Any]] = None
+) -> List[str]:
+    """
+    将仍处于queued或running状态的任务标记为stopped
+
+    Args:
+        task_ids: 要标记的任务ID，None表示全部排队和运行中的任务(进程启动时恢复)
+        session_factory: 数据库会话工厂，默认为SessionLocal
+
+    Returns:
+        List[str]: 被标记的任务ID
+    """
+    from app.db.models.simulation import SimulationTask
+
+    if session_factory is None:
+        from app.db.session import SessionLocal
+        session_factory = SessionLocal
+
+    db = session_factory()
+    try:
+        query = db.query(SimulationTask).filter(SimulationTask.status.in_(("queued", "running")))
+        if task_ids is not None:
+            task_ids = list(task_ids)
+            if not task_ids:
+                return []
+            query = query.filter(SimulationTask.id.in_(task_ids))
+        tasks = query.all()
+        for task in tasks:
+            task.status = "stopped"
+            task.error_message = INTERRUPTED_MESSAGE
+            task.completed_at = datetime.now()
+        db.commit()
+        return [task.id for task in tasks]
+    finally:
+        db.close()
+
+
+class QueuedTask:
+    """排队中的任务"""
+
+    __slots__ = ("task_id", "user_id", "priority", "seq", "submitted_at")
+
+    def __init__(self, task_id: str, user_id: str, priority: int, seq: int):
+        self.task_id = task_id
+        self.user_id = user_id
+        self.priority = priority
+        self.seq = seq
+        self.submitted_at = time.time()
+
+    def sort_key(self) -> Tuple[int, int]:
+        return (-self.priority, self.seq)
+
+
+class SimulationScheduler:
+    """有界并发的仿真任务调度器
+
+    每个用户一个按(优先级, 提交顺序)排序的堆；调度时比较各用户队首任务，
+    依次按优先级、该用户正在运行的任务数、该用户上次被调度的顺序、提交顺序选出下一个任务，
+    同优先级下各用户的任务轮流运行。
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_per_user: Optional[int] = None,
+        runner: Optional[TaskRunner] = None,
+        on_interrupted: Optional[Callable[[List[str]], Any]] = None
+    ):
+        """
+        初始化调度器
+
+        Args:
+            max_workers: 最多同时运行的任务数
+            max_per_user: 每个用户最多同时运行的任务数，0表示不限制
+            runner: 执行任务的协程函数，默认使用独立数据库会话调用SimulationService.execute_task
+            on_interrupted: 关闭时以被取消的任务ID调用(在线程中执行)，默认将任务标记为stopped
+        """
+        self.max_workers = max_workers or settings.SIMULATION_MAX_WORKERS
+        self.max_per_user = settings.SIMULATION_MAX_TASKS_PER_USER if max_per_user is None else max_per_user
+        self.runner = runner or execute_in_session
+        self.on_interrupted = on_interrupted or mark_tasks_interrupted
+        self._queues: Dict[str, List[Tuple[Tuple[int, int], QueuedTask]]] = {}
+        self._queued: Dict[str, QueuedTask] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._running_users: Dict[str, str] = {}
+        self._last_served: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._dispatch_seq = itertools.count()
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+    @property
+    def queued_count(self) -> int:
+        return len(self._queued)
+
+    def is_scheduled(self, task_id: str) -> bool:
+        """任务是否在排队或运行中"""
+        return task_id in self._queued or task_id in self._running
+
+    def submit(self, task_id: str, user_id: str, priority: int = 0) -> Optional[int]:
+        """
+        提交任务
+
+        Args:
+            task_id: 任务ID
+            user_id: 提交任务的用户ID
+            priority: 优先级，数值越大越先运行
+
+        Returns:
+            Optional[int]: 排队位置(从1开始)，任务已直接开始运行时返回None
+
+        Raises:
+            ValueError: 任务已在排队或运行中时
+        """
+        if self.is_scheduled(task_id):
+            raise ValueError(f"任务已在调度中: {task_id}")
+
+        entry = QueuedTask(task_id, user_id, priority, next(self._seq))
+        self._queued[task_id] = entry
+        heapq.heappush(self._queues.setdefault(user_id, []), (entry.sort_key(), entry))
+        logger.info(f"任务 {task_id} 进入调度队列(用户 {user_id}，优先级 {priority})")
+        self._dispatch()
+        return self.queue_position(task_id)
+
+    def cancel(self, task_id: str) -> bool:
+        """
+        取消排队中的任务
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            bool: 任务在队列中并已移除时返回True
+        """
+        entry = self._queued.pop(task_id, None)
+        if entry is None:
+            return False
+        queue = self._queues[entry.user_id]
+        queue[:] = [item for item in queue if item[1] is not entry]
+        heapq.heapify(queue)
+        if not queue:
+            del self._queues[entry.user_id]
+        return True
+
+    def queue_position(self, task_id: str) -> Optional[int]:
+        """
+        获取任务的排队位置
+
+        按当前的运行状态模拟调度顺序(假设运行中的任务数不变)，1表示下一个运行。
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            Optional[int]: 排队位置，任务不在队列中时返回None
+        """
+        if task_id not in self._queued:
+            return None
+        for position, entry in enumerate(self._order(), start=1):
+            if entry.task_id == task_id:
+                return position
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """调度器状态"""
+        return {
+            "max_workers": self.max_workers,
+            "max_per_user": self.max_per_user,
+            "running": list(self._running),
+            "queued": [
+                {
+                    "task_id": entry.task_id,
+                    "user_id": entry.user_id,
+                    "priority": entry.priority,
+                    "position": position,
+                    "submitted_at": entry.submitted_at
+                }
+                for position, entry in enumerate(self._order(), start=1)
+            ]
+        }
+
+    async def shutdown(self) -> None:
+        """清空队列并取消运行中的任务，被取消的任务交给on_interrupted(默认标记为stopped)"""
+        interrupted = list(self._queued) + list(self._running)
+        for task_id in list(self._queued):
+            self.cancel(task_id)
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if interrupted:
+            try:
+                await asyncio.to_thread(self.on_interrupted, interrupted)
+            except Exception as e:
+                logger.error(f"更新被中断任务的状态失败: {str(e)}")
+            logger.warning(f"调度器关闭，中断任务: {', '.join(interrupted)}")
+
+    def _candidates(
+        self,
+        heads: Dict[str, QueuedTask],
+        running: Dict[str, int],
+        last_served: Dict[str, int]
+    ) -> Optional[QueuedTask]:
+        """从各用户的队首任务中选出下一个任务"""
+        best = None
+        best_key = None
+        for user_id, entry in heads.items():
+            count = running.get(user_id, 0)
+            if self.max_per_user and count >= self.max_per_user:
+                continue
+            key = (-entry.priority, count, last_served.get(user_id, -1), entry.seq)
+            if best_key is None or key < best_key:
+                best, best_key = entry, key
+        return best
+
+    def _running_by_user(self) -> Dict[str, int]:
+        running: Dict[str, int] = {}
+        for user_id in self._running_users.values():
+            running[user_id] = running.get(user_id, 0) + 1
+        return running
+
+    def _order(self):
+        """按调度顺序遍历排队中的任务(不修改队列)"""
+        queues = {user_id: sorted(queue) for user_id, queue in self._queues.items()}
+        running = self._running_by_user()
+        last_served = dict(self._last_served)
+        order = itertools.count(max(last_served.values(), default=0) + 1)
+        while queues:
+            heads = {user_id: queue[0][1] for user_id, queue in queues.items()}
+            entry = self._candidates(heads, running, last_served)
+            if entry is None:
+                # 剩余任务的用户都已达到并发上限，按优先级和提交顺序排列
+                rest = sorted((item for queue in queues.values() for item in queue), key=lambda item: item[0])
+                for _, entry in rest:
+                    yield entry
+                return
+            yield entry
+            last_served[entry.user_id] = next(order)
+            queues[entry.user_id].pop(0)
+            if not queues[entry.user_id]:
+                del queues[entry.user_id]
+
+    def _dispatch(self) -> None:
+        """在有空闲名额时启动排队中的任务"""
+        while len(self._running) < self.max_workers and self._queues:
+            heads = {user_id: queue[0][1] for user_id, queue in self._queues.items()}
+            entry = self._candidates(heads, self._running_by_user(), self._last_served)
+            if entry is None:
+                return
+            heapq.heappop(self._queues[entry.user_id])
+            if not self._queues[entry.user_id]:
+                del self._queues[entry.user_id]
+            del self._queued[entry.task_id]
+            self._last_served[entry.user_id] = next(self._dispatch_seq)
+
+            self._running_users[entry.task_id] = entry.user_id
+            self._running[entry.task_id] = asyncio.create_task(self._run(entry))
+            logger.info(f"任务 {entry.task_id} 开始运行，等待 {time.time() - entry.submitted_at:.2f} 秒")
+
+    async def _run(self, entry: QueuedTask) -> None:
+        try:
+            await self.runner(entry.task_id)
+        except asyncio.CancelledError:
+            logger.warning(f"任务 {entry.task_id} 被取消")
+            raise
+        except Exception as e:
+            logger.exception(f"调度任务运行异常 {entry.task_id}: {str(e)}")
+        finally:
+            self._running.pop(entry.task_id, None)
+            self._running_users.pop(entry.task_id, None)
+            self._dispatch()
+
+
+simulation_scheduler = SimulationScheduler()
@@ -1,183 +1,654 @@
 import os
 import json
+import base64
 import asyncio
 import tempfile
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import numpy as np
 from datetime import datetime
 import pandas as pd
 from pathlib import Path
 import uuid
+import shutil
+from enum import Enum
 
 from .engine import SimulationEngine, SimulationConfig, SimulationResult
+from .storage import ColumnarResultStore, build_pyramid, ingest_csv
+from .live import live_hub, CsvTailer, tail_until_done
+from .registry import process_registry
+from .logs import RotatingLogWriter, pump
+from .estimator import admit, estimate_cost
+from .limits import ResourceLimits
+from .pool import SkyEyePool, SkyEyeWorker, get_skyeye_pool
+from .federation import AgentFederation, get_federation
+from .catalog import ModelCatalog, get_model_catalog
+from .checkpoint import (
+    CHECKPOINT_DIR,
+    FINAL_STATE,
+    config_fingerprint,
+    resume_point,
+    write_manifest,
+    list_checkpoints,
+    prune_checkpoints,
+    truncate_csv
+)
 from app.core.config import settings
 from app.core.logging import logger
 
 
+class SkyEyeMode(str, Enum):
+    """SkyEye运行方式"""
+    PROCESS = "process"  # 每次运行启动新的SkyEye进程
+    DAEMON = "daemon"  # 在常驻工作进程池中运行，模型保持加载
+    REMOTE = "remote"  # 在其他主机上的SkyEye代理中运行(见federation模块)
+
+
+def skyeye_args(
+    skyeye_path: str,
+    model_path: str,
+    duration: float,
+    step_size: float,
+    output: Path,
+    parameters: Dict[str, Any],
+    output_variables: List[str],
+    checkpoint_dir: Optional[Path] = None,
+    checkpoint_interval: Optional[float] = None,
+    restore: Optional[Path] = None,
+    initial_state: Optional[Path] = None,
+    output_interval: Optional[float] = None,
+    variable_intervals: Optional[Dict[str, float]] = None
+) -> List[str]:
+    """
+    构造SkyEye命令行
+    
+    Args:
+        skyeye_path: SkyEye可执行文件路径
+        model_path: 模型路径
+        duration: 仿真时长
+        step_size: 步长
+        output: 结果CSV路径
+        parameters: 模型参数
+        output_variables: 输出变量
+        checkpoint_dir: 检查点目录，None表示不写检查点
+        checkpoint_interval: 检查点之间的仿真时间
+        restore: 从该检查点继续，结果追加到output之后
+        initial_state: 从该状态文件开始仿真(预热启动)，restore不为None时忽略
+        output_interval: 输出间隔(仿真时间)，None表示逐步输出
+        variable_intervals: 记录间隔大于输出间隔的变量的记录间隔(仿真时间)
+        
+    Returns:
+        List[str]: 命令行参数(含可执行文件路径)
+    """
+    cmd = [
+        str(skyeye_path),
+        "--model", model_path,
+        "--duration", str(duration),
+        "--step", str(step_size),
+        "--output", str(output)
+    ]
+    if checkpoint_dir is not None and checkpoint_interval:
+        cmd.extend(["--checkpoint-dir", str(checkpoint_dir), "--checkpoint-interval", str(checkpoint_interval)])
+    if restore is not None:
+        cmd.extend(["--restore", str(restore), "--append"])
+    elif initial_state is not None:
+        cmd.extend(["--initial-state", str(initial_state)])
+    for key, value in parameters.items():
+        cmd.extend(["--param", f"{key}={value}"])
+    for var in output_variables:
+        cmd.extend(["--output-var", var])
+    if output_interval is not None:
+        cmd.extend(["--output-interval", repr(output_interval)])
+    for var, interval in (variable_intervals or {}).items():
+        cmd.extend(["--output-var-interval", f"{var}={interval!r}"])
+    return cmd
+
+
 class SkyEyeAdapter(SimulationEngine):
     """SkyEye仿真引擎适配器"""
     
-    def __init__(self, skyeye_path: Optional[str] = None):
+    def __init__(
+        self,
+        skyeye_path: Optional[str] = None,
+        mode: Optional[str] = None,
+        pool: Optional[SkyEyePool] = None,
+        catalog: Optional[ModelCatalog] = None,
+        federation: Optional[AgentFederation] = None
+    ):
         """
         初始化SkyEye仿真引擎适配器
         
         Args:
             skyeye_path: SkyEye可执行文件路径，如果为None则使用配置中的路径
+            mode: 运行方式，默认为SKYEYE_MODE
+            pool: 守护模式使用的工作进程池，默认为该可执行文件共享的进程池
+            catalog: 模型目录，默认为SKYEYE_MODELS_DIR共享的模型目录
+            federation: 远程模式使用的代理联邦，默认为SKYEYE_AGENTS共享的代理联邦
         """
         self.skyeye_path = skyeye_path or settings.SKYEYE_PATH
+        self.mode = SkyEyeMode(mode or settings.SKYEYE_MODE)
+        self._pool = pool
+        self._federation = federation
+        self.catalog = catalog or get_model_catalog()
         self.results_dir = Path(settings.SIMULATION_RESULTS_DIR)
         self.results_dir.mkdir(parents=True, exist_ok=True)
+    
+    @property
+    def pool(self) -> Optional[SkyEyePool]:
+        """守护模式的工作进程池，命令行模式下为None"""
+        if self.mode != SkyEyeMode.DAEMON:
+            return None
+        if self._pool is None:
+            self._pool = get_skyeye_pool(str(self.skyeye_path))
+        return self._pool
+    
+    @property
+    def federation(self) -> Optional[AgentFederation]:
+        """远程模式的代理联邦，其他模式下为None"""
+        if self.mode != SkyEyeMode.REMOTE:
+            return None
+        if self._federation is None:
+            self._federation = get_federation()
+        return self._federation
         
     async def initialize(self) -> bool:
         """初始化引擎"""
         return True
 
-    async def validate_config(self, config: SimulationConfig) -> bool:
-        """验证配置是否有效"""
-        return True
+    async def validate_config(self, config: SimulationConfig) -> Dict[str, Any]:
+        """验证配置是否有效：时长和步长为正数，采样设置有效，预计的步数和输出量不超过上限"""
+        try:
+            estimate = estimate_cost(config.duration, config.step_size, config.output_variables, sampling=config.sampling())
+        except ValueError as e:
+            return {"valid": False, "errors": [str(e)]}
+        decision = admit(
+            estimate,
+            len(config.output_variables),
+            config.step_size,
+            max_steps=settings.SIMULATION_MAX_STEPS,
+            max_output_bytes=settings.SIMULATION_MAX_OUTPUT_BYTES
+        )
+        return {"valid": not decision["reasons"], "errors": decision["reasons"], "estimate": decision}
 
     async def get_model_parameters(self, model_path: str) -> Dict[str, Any]:
-        """获取模型参数"""
-        return {}
+        """获取模型参数，模型不存在或解析失败时返回空字典"""
+        info = await self.get_model_info(model_path)
+        if info.get("status") != "success":
+            return {}
+        return info["info"]
 
     async def get_available_models(self) -> List[Dict[str, Any]]:
-        """获取可用模型列表"""
-        return []
+        """获取可用模型列表(读取内存中的模型目录)"""
+        return self.catalog.list()
 
-    async def get_status(self, task_id: str) -> str:
-        """获取任务状态"""
-        return "pending"
+    async def get_status(self, task_id: str) -> Dict[str, Any]:
+        """
+        获取任务状态
+        
+        进度为最后一个已输出的仿真时间点占仿真时长的百分比，
+        CPU时间和内存读取自/proc并短暂缓存，轮询开销很低。
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            Dict[str, Any]: 任务状态，本引擎未运行过该任务时status为unknown
+        """
+        handle = process_registry.get(task_id)
+        if handle is None:
+            return {"task_id": task_id, "status": "unknown"}
+        
+        stream = live_hub.get(task_id)
+        if stream is not None and stream.buffer.last_time is not None:
+            handle.simulated_time = stream.buffer.last_time
+        return handle.snapshot()
 
     async def stop_simulation(self, task_id: str) -> bool:
-        """停止仿真"""
+        """
+        停止仿真
+        
+        终止SkyEye进程组，已输出的部分结果会被保存，
+        检查点保留在任务结果目录中，再次运行时从最近的检查点继续。
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            bool: 是否成功停止任务
+        """
+        return await process_registry.stop(task_id)
+    
+    async def clear_checkpoints(self, task_id: str) -> bool:
+        """清除任务的检查点，下次运行从头开始"""
+        checkpoint_dir = self.results_dir / task_id / CHECKPOINT_DIR
+        if not checkpoint_dir.exists():
+            return False
+        shutil.rmtree(checkpoint_dir)
         return True
+    
+    def final_state_path(self, task_id: str) -> Optional[Path]:
+        """
+        获取任务的终止状态文件
         
-    async def run_simulation(
-        self,
-        model_path: str,
-        parameters: Dict[str, Any],
-        duration: float,
-        step_size: float,
-        output_variables: List[str],
-        task_id: str
-    ) -> Dict[str, Any]:
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            Optional[Path]: 终止状态文件路径，任务未正常完成或未写检查点时返回None
+        """
+        path = self.results_dir / task_id / CHECKPOINT_DIR / FINAL_STATE
+        return path if path.exists() else None
+        
+    def log_path(self, task_id: str, stream: str) -> Path:
+        """任务的输出日志文件路径，轮转的文件在同一目录下(见logs模块)"""
+        return self.results_dir / task_id / f"{stream}.log"
+    
+    async def run_simulation(self, config: SimulationConfig, task_id: str) -> SimulationResult:
         """
         运行仿真
         
+        仿真完成后将SkyEye输出的CSV一次性写入列式结果文件，
+        结果数据不再经过Python列表，返回的SimulationResult只携带结果文件路径。
+        SkyEye的标准输出和错误输出在运行期间写入按大小轮转的stdout.log/stderr.log，
+        失败时的错误信息取错误输出的末尾。
+        
+        指定了输出间隔或变量的记录间隔时由SkyEye抽取输出(见sampling模块)，
+        结果CSV和列式结果文件只包含记录的样本。
+        
+        SkyEye按仿真时间周期性地写检查点。同一任务以相同配置再次运行时
+        (被停止、异常退出或worker崩溃后重新投递)，从最近的检查点继续而不是从头开始；
+        指定warm_start_task_id时从该任务的终止状态开始仿真。
+        
+        远程模式下在代理上运行(见federation模块)，结果、输出和检查点传回本地后处理方式相同，
+        代理失联时从传回的检查点在其他代理上继续。
+        
         Args:
-            model_path: 模型文件路径
-            parameters: 仿真参数
-            duration: 仿真时长
-            step_size: 仿真步长
-            output_variables: 输出变量列表
+            config: 仿真配置
             task_id: 任务ID
             
         Returns:
-            Dict[str, Any]: 仿真结果
+            SimulationResult: 仿真结果
         """
+        model_path = config.model_path
+        parameters = config.parameters
+        duration = config.duration
+        step_size = config.step_size
+        output_variables = config.output_variables
+        metadata = {
+            "model": model_path,
+            "duration": duration,
+            "step_size": step_size,
+            "parameters": parameters
+        }
+        
+        try:
+            sampling = config.sampling()
+        except ValueError as e:
+            return self._failed_result(task_id, str(e), metadata)
+        if sampling.decimated:
+            metadata["sampling"] = sampling.describe()
+        output_interval = sampling.interval if sampling.stride > 1 else None
+        variable_intervals = {var: sampling.variable_interval(var) for var in sampling.variable_strides}
+        
         # 创建结果目录
         result_dir = self.results_dir / task_id
         result_dir.mkdir(parents=True, exist_ok=True)
         
-        # 创建配置文件
-        config_path = result_dir / "config.json"
-        config = {
+        # 配置相同且未完成的上次运行可以从检查点继续
+        checkpoint_dir = result_dir / CHECKPOINT_DIR
+        results_csv = result_dir / "results.csv"
+        fingerprint = config_fingerprint({
             "model_path": model_path,
             "parameters": parameters,
-            "duration": duration,
             "step_size": step_size,
-            "output_variables": output_variables
-        }
+            "output_variables": output_variables,
+            "warm_start_task_id": config.warm_start_task_id,
+            **({"sampling": [sampling.stride, sampling.variable_strides]} if sampling.decimated else {})
+        })
+        resume_from = resume_point(checkpoint_dir, fingerprint, step_size)
+        if resume_from is not None and not results_csv.exists():
+            shutil.rmtree(checkpoint_dir)
+            resume_from = None
         
+        initial_state = None
+        if resume_from is None and config.warm_start_task_id:
+            initial_state = self.final_state_path(config.warm_start_task_id)
+            if initial_state is None:
+                return self._failed_result(task_id, f"预热任务 {config.warm_start_task_id} 没有可用的终止状态", metadata)
+            metadata["warm_start"] = {"task_id": config.warm_start_task_id}
+        
+        # 创建配置文件
+        config_path = result_dir / "config.json"
         with open(config_path, "w") as f:
-            json.dump(config, f, indent=2)
+            json.dump({
+                "model_path": model_path,
+                "parameters": parameters,
+                "duration": duration,
+                "step_size": step_size,
+                "output_variables": output_variables
+            }, f, indent=2)
         
-        # 准备命令行参数
-        cmd = [
-            str(self.skyeye_path),
-            "--model", model_path,
-            "--duration", str(duration),
-            "--step", str(step_size),
-            "--output", str(result_dir / "results.csv")
-        ]
+        # 检查点按仿真时间均匀分布
+        checkpoint_interval = duration / settings.SIMULATION_CHECKPOINTS if settings.SIMULATION_CHECKPOINTS > 0 else None
         
-        # 添加参数
-        for key, value in parameters.items():
-            cmd.extend(["--param", f"{key}={value}"])
+        # 从检查点继续时先丢弃检查点之后输出的结果，SkyEye恢复状态后继续追加
+        tailer = CsvTailer(results_csv, output_variables, sampling.variable_strides)
+        if resume_from is not None:
+            offset = truncate_csv(results_csv, resume_from.time + step_size / 2)
+            tailer.skip_to(offset)
+            metadata["resumed_from"] = resume_from.time
+            logger.info(f"仿真任务 {task_id} 从检查点 t={resume_from.time} 继续")
         
-        # 添加输出变量
-        for var in output_variables:
-            cmd.extend(["--output-var", var])
+        # 准备命令行参数
+        cmd = skyeye_args(
+            self.skyeye_path,
+            model_path,
+            duration,
+            step_size,
+            results_csv,
+            parameters,
+            output_variables,
+            checkpoint_dir=checkpoint_dir,
+            checkpoint_interval=checkpoint_interval,
+            restore=resume_from.path if resume_from is not None else None,
+            initial_state=initial_state,
+            output_interval=output_interval,
+            variable_intervals=variable_intervals
+        )
         
+        # 输出边运行边写入轮转日志，内存中只保留错误输出的末尾用于错误信息
+        stdout_log = RotatingLogWriter(self.log_path(task_id, "stdout"))
+        stderr_log = RotatingLogWriter(self.log_path(task_id, "stderr"))
+        limits = self.pool.limits if self.pool is not None else ResourceLimits()
         try:
             # 运行仿真
             logger.info(f"运行仿真任务 {task_id}")
             logger.debug(f"命令: {' '.join(cmd)}")
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            write_manifest(checkpoint_dir, fingerprint, "running")
             
-            stdout, stderr = await process.communicate()
+            # 守护模式在已加载模型的工作进程上运行，远程模式在代理上运行，否则启动新的SkyEye进程
+            worker = None
+            remote_report = None
+            if self.federation is not None:
+                process = None
+                remote_report = {}
+                request = {
+                    "task_id": task_id,
+                    "model_path": model_path,
+                    "duration": duration,
+                    "step_size": step_size,
+                    "parameters": parameters,
+                    "output_variables": output_variables,
+                    "checkpoint_interval": checkpoint_interval,
+                    "restore": self._encode_state(resume_from.path if resume_from is not None else None),
+                    "initial_state": self._encode_state(initial_state),
+                    "output_interval": output_interval,
+                    "variable_intervals": variable_intervals,
+                    "append": resume_from is not None
+                }
+                execution = asyncio.ensure_future(self.federation.run(
+                    task_id, request, results_csv, checkpoint_dir, tailer, stdout_log, stderr_log, remote_report
+                ))
+            elif self.pool is not None:
+                worker = await self.pool.acquire(model_path)
+                process = worker.process
+                execution = asyncio.ensure_future(self._run_on_worker(worker, cmd[1:], model_path, stdout_log, stderr_log))
+            else:
+                # 在独立的会话中启动，停止时可以终止SkyEye及其子进程；启动后立即施加资源上限
+                limits.prepare(task_id)
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True
+                )
+                limits.apply(process.pid)
+                execution = asyncio.ensure_future(self._stream_output(process, stdout_log, stderr_log))
+            handle = process_registry.register(task_id, process, duration, config.time_limit)
             
-            # 记录输出
-            with open(result_dir / "stdout.log", "wb") as f:
-                f.write(stdout)
+            # 进程运行期间跟踪结果CSV，实时发布新样本
+            stream = live_hub.open(task_id, output_variables)
+            try:
+                await tail_until_done(stream, tailer, execution)
+            except asyncio.CancelledError:
+                # 任务被取消(调度器或worker关闭)：先终止SkyEye并等待其退出，再归还工作进程和释放资源上限
+                await self._abort(task_id, execution)
+                self._finish_checkpoints(checkpoint_dir, fingerprint, "stopped", step_size, metadata)
+                raise
+            finally:
+                if worker is not None:
+                    await self.pool.release(worker)
+            returncode = execution.result()
+            if remote_report is not None:
+                metadata["agent"] = remote_report
+            process_registry.finish(task_id, "completed" if returncode == 0 else "failed")
+            await live_hub.close(task_id, handle.status)
+            self._finish_checkpoints(
+                checkpoint_dir,
+                fingerprint,
+                "stopped" if handle.stop_requested else handle.status,
+                step_size,
+                metadata
+            )
             
-            with open(result_dir / "stderr.log", "wb") as f:
-                f.write(stderr)
+            # 被停止或被看门狗终止的任务保存已输出的部分结果，检查点保留用于继续运行
+            if handle.stop_requested:
+                logger.info(f"仿真任务 {task_id} 已停止")
+                results_path = results_csv
+                metadata["stopped_at"] = handle.simulated_time
+                store_path = None
+                if results_path.exists():
+                    store_path = self.store_csv_results(
+                        results_path, result_dir, output_variables, task_id, metadata, sampling.variable_strides
+                    )
+                return SimulationResult(
+                    task_id=task_id,
+                    status=handle.status,
+                    data={},
+                    time_points=[],
+                    metadata=metadata,
+                    error_message=handle.kill_reason or "任务已被停止",
+                    result_path=str(store_path) if store_path else None
+                )
             
-            # 检查是否成功
-            if process.returncode != 0:
-                error_msg = stderr.decode('utf-8')
+            # 检查是否成功，因超过资源上限退出时在错误信息前注明原因
+            if returncode != 0:
+                error_msg = stderr_log.tail.decode('utf-8', errors='replace')
+                if remote_report is not None:
+                    reason = remote_report.get("limit_exceeded")
+                else:
+                    reason = limits.exceeded(returncode, stderr_log.tail)
+                if reason:
+                    metadata["limit_exceeded"] = reason
+                    error_msg = f"{reason}\n{error_msg}" if error_msg else reason
                 logger.error(f"仿真失败: {error_msg}")
-                return {
-                    "status": "failed",
-                    "error_message": error_msg
-                }
+                return self._failed_result(task_id, error_msg, metadata)
             
             # 读取结果
-            results_path = result_dir / "results.csv"
+            results_path = results_csv
             if not results_path.exists():
-                return {
-                    "status": "failed",
-                    "error_message": "仿真完成但未生成结果文件"
-                }
+                return self._failed_result(task_id, "仿真完成但未生成结果文件", metadata)
             
-            # 解析结果
-            df = pd.read_csv(results_path)
-            time_points = df["time"].tolist()
+            # 转换为列式结果文件
+            store_path = self.store_csv_results(
+                results_path, result_dir, output_variables, task_id, metadata, sampling.variable_strides
+            )
             
-            data = {}
-            for var in output_variables:
-                if var in df.columns:
-                    data[var] = df[var].tolist()
+            # 可选的后处理：构建多分辨率金字塔
+            if settings.RESULT_PYRAMID_ENABLED:
+                try:
+                    metadata["lod"] = build_pyramid(store_path, factor=settings.RESULT_PYRAMID_FACTOR)
+                except Exception as e:
+                    logger.warning(f"构建结果金字塔失败 {task_id}: {str(e)}")
             
-            return {
-                "status": "completed",
-                "data": data,
-                "time_points": time_points,
-                "metadata": {
-                    "model": model_path,
-                    "duration": duration,
-                    "step_size": step_size,
-                    "parameters": parameters
-                }
-            }
+            return SimulationResult(
+                task_id=task_id,
+                status="completed",
+                data={},
+                time_points=[],
+                metadata=metadata,
+                result_path=str(store_path)
+            )
             
         except Exception as e:
             logger.exception(f"仿真执行异常: {str(e)}")
-            return {
-                "status": "failed",
-                "error_message": str(e)
-            }
+            process_registry.finish(task_id, "failed")
+            await live_hub.close(task_id, "failed", str(e))
+            return self._failed_result(task_id, str(e), metadata)
+        finally:
+            stdout_log.close()
+            stderr_log.close()
+            if self.pool is None:
+                limits.release()
+    
+    @staticmethod
+    async def _abort(task_id: str, execution: "asyncio.Future") -> None:
+        """
+        终止被取消任务的仿真并等待其结束
+
+        本地进程(包括守护模式的工作进程)按停止流程终止整个进程组并等待退出；
+        远程运行设置停止标志，由代理终止SkyEye，超过停止宽限时间后断开连接。
+        """
+        handle = process_registry.get(task_id)
+        if handle is not None and not handle.in_process:
+            await process_registry.stop(task_id)
+        elif handle is not None:
+            handle.stop_requested = True
+        try:
+            await asyncio.wait_for(asyncio.shield(execution), settings.SIMULATION_STOP_GRACE)
+        except Exception:
+            execution.cancel()
+            await asyncio.gather(execution, return_exceptions=True)
+        process_registry.finish(task_id, "stopped")
+        await live_hub.close(task_id, "stopped", "任务已被取消")
+        logger.info(f"仿真任务 {task_id} 已取消")
+    
+    @staticmethod
+    def _encode_state(path: Optional[Path]) -> Optional[str]:
+        """读取状态文件并编码为base64，随运行请求发送给代理"""
+        if path is None:
+            return None
+        return base64.b64encode(path.read_bytes()).decode("ascii")
+    
+    @staticmethod
+    async def _stream_output(
+        process: asyncio.subprocess.Process,
+        stdout_log: RotatingLogWriter,
+        stderr_log: RotatingLogWriter
+    ) -> int:
+        """边运行边把标准输出和错误输出写入日志文件，返回进程的退出码"""
+        await asyncio.gather(pump(process.stdout, stdout_log), pump(process.stderr, stderr_log))
+        return await process.wait()
+    
+    @staticmethod
+    async def _run_on_worker(
+        worker: SkyEyeWorker,
+        args: List[str],
+        model_path: str,
+        stdout_log: RotatingLogWriter,
+        stderr_log: RotatingLogWriter
+    ) -> int:
+        """在守护进程上运行，输出片段到达时写入日志文件，返回退出码"""
+        logs = {"stdout": stdout_log, "stderr": stderr_log}
+        returncode, _, _ = await worker.run(args, model_path, lambda stream, chunk: logs[stream].write(chunk))
+        return returncode
+    
+    @staticmethod
+    async def _communicate(process: asyncio.subprocess.Process) -> Tuple[int, bytes, bytes]:
+        """等待进程结束，返回退出码、标准输出和错误输出"""
+        stdout, stderr = await process.communicate()
+        return process.returncode, stdout, stderr
+    
+    @staticmethod
+    def _finish_checkpoints(
+        checkpoint_dir: Path,
+        fingerprint: str,
+        status: str,
+        step_size: float,
+        metadata: Dict[str, Any]
+    ) -> None:
+        """记录运行结果，完成时只保留终止状态，未完成时记录可继续的位置"""
+        write_manifest(checkpoint_dir, fingerprint, status)
+        if status == "completed":
+            prune_checkpoints(checkpoint_dir, step_size, 0)
+            if (checkpoint_dir / FINAL_STATE).exists():
+                metadata["final_state"] = str(checkpoint_dir / FINAL_STATE)
+        else:
+            prune_checkpoints(checkpoint_dir, step_size, settings.SIMULATION_CHECKPOINT_KEEP)
+            checkpoints = list_checkpoints(checkpoint_dir, step_size)
+            if checkpoints:
+                metadata["checkpoint_time"] = checkpoints[-1].time
+    
+    def store_csv_results(
+        self,
+        csv_path: Path,
+        result_dir: Path,
+        output_variables: List[str],
+        task_id: str,
+        metadata: Dict[str, Any],
+        strides: Optional[Dict[str, int]] = None
+    ) -> Path:
+        """
+        将SkyEye输出的CSV写入列式结果文件
+        
+        按块流式读取，只解析time列和请求的输出变量列并固定为float64类型，
+        内存占用由CSV_INGEST_CHUNK_ROWS决定。
+        
+        Args:
+            csv_path: SkyEye输出的CSV文件路径
+            result_dir: 任务结果目录
+            output_variables: 输出变量列表
+            task_id: 任务ID
+            metadata: 结果元数据
+            strides: 变量每隔多少行记录一次，只存储记录的样本
+            
+        Returns:
+            Path: 列式结果文件路径
+        """
+        return ingest_csv(
+            csv_path,
+            result_dir / f"results{ColumnarResultStore.extension}",
+            output_variables,
+            task_id=task_id,
+            metadata=metadata,
+            chunk_rows=settings.CSV_INGEST_CHUNK_ROWS,
+            strides=strides
+        )
+    
+    @staticmethod
+    def _failed_result(task_id: str, error_message: str, metadata: Dict[str, Any]) -> SimulationResult:
+        """构造失败的仿真结果"""
+        return SimulationResult(
+            task_id=task_id,
+            status="failed",
+            data={},
+            time_points=[],
+            metadata=metadata,
+            error_message=error_message
+        )
     
     async def get_model_info(self, model_path: str) -> Dict[str, Any]:
         """
         获取模型信息
         
+        按(路径, 修改时间, 大小)缓存，模型文件未变化时不再调用SkyEye解析。
+        
+        Args:
+            model_path: 模型文件路径
+            
+        Returns:
+            Dict[str, Any]: 模型信息
+        """
+        info = await self.catalog.info(model_path, self.load_model_info)
+        if info is None:
+            # 不是文件的模型(例如SkyEye内置模型)直接交给SkyEye解析
+            return await self.load_model_info(model_path)
+        return info
+    
+    async def load_model_info(self, model_path: str) -> Dict[str, Any]:
+        """
+        调用SkyEye解析模型信息(不使用缓存)
+        
         Args:
             model_path: 模型文件路径
             
@@ -191,15 +662,17 @@ class SkyEyeAdapter(SimulationEngine):
                 model_path
             ]
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
+            if self.pool is not None:
+                returncode, stdout, stderr = await self.pool.run(cmd[1:], model_path)
+            else:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                returncode, stdout, stderr = await self._communicate(process)
             
-            if process.returncode != 0:
+            if returncode != 0:
                 return {
                     "status": "error",
                     "message": stderr.decode('utf-8')
@@ -244,21 +717,8 @@ class SkyEyeAdapter(SimulationEngine):
             List[Dict[str, Any]]: 模型列表
         """
         try:
-            model_dir = Path(directory) if directory else Path(self.skyeye_path).parent / "models"
-            
-            if not model_dir.exists():
-                return []
-            
-            models = []
-            for file in model_dir.glob("*.mdl"):
-                models.append({
-                    "name": file.stem,
-                    "path": str(file),
-                    "size": file.stat().st_size,
-                    "modified": file.stat().st_mtime
-                })
-            
-            return models
+            catalog = self.catalog if directory is None else ModelCatalog(directory)
+            return catalog.list()
         except Exception as e:
             logger.exception(f"列出模型异常: {str(e)}")
             return [] 
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""
+仿真结果存储模块
+"""
+
+from .base import ResultReader, ResultStore
+from .columnar import ColumnarResultStore, ColumnarResultReader, ColumnarResultWriter, is_columnar_file
+from .json_store import JsonResultStore, JsonResultReader
+from .factory import ResultStoreBackend, get_result_store, open_result
+from .migrate import migrate_json_result, migrate_directory
+from .pyramid import ResultPyramid, LodSlice, build_pyramid
+from .ingest import ingest_csv, read_csv_header
+from .summary import summarize_reader, summarize_result
+from .spikes import SpikeEventWriter, SpikeEventReader, spike_events_path
+
+__all__ = [
+    'ResultReader',
+    'ResultStore',
+    'ColumnarResultStore',
+    'ColumnarResultReader',
+    'ColumnarResultWriter',
+    'is_columnar_file',
+    'JsonResultStore',
+    'JsonResultReader',
+    'ResultStoreBackend',
+    'get_result_store',
+    'open_result',
+    'migrate_json_result',
+    'migrate_directory',
+    'ResultPyramid',
+    'LodSlice',
+    'build_pyramid',
+    'ingest_csv',
+    'read_csv_header',
+    'summarize_reader',
+    'summarize_result',
+    'SpikeEventWriter',
+    'SpikeEventReader',
+    'spike_events_path',
+]
@@ -0,0 +1,231 @@
+"""仿真结果存储基础模块
+
+定义结果存储的抽象接口：
+- ResultReader: 只读访问单个任务的结果文件
+- ResultStore: 负责结果文件的写入、打开和路径管理
+
+具体的存储格式(列式二进制、旧版JSON等)需要继承这些抽象类。
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Mapping, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class ResultReader(ABC):
+    """仿真结果读取器基类
+
+    以NumPy数组的形式提供时间轴和各输出变量的数据。
+    实现类应尽量避免复制数据(例如使用内存映射)。
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        task_id: Optional[str] = None,
+        status: str = "completed",
+        metadata: Optional[Dict[str, Any]] = None,
+        error_message: Optional[str] = None
+    ):
+        self.path = Path(path)
+        self.task_id = task_id
+        self.status = status
+        self.metadata = metadata or {}
+        self.error_message = error_message
+
+    @property
+    @abstractmethod
+    def variables(self) -> List[str]:
+        """结果中包含的输出变量名称(按写入顺序)"""
+        pass
+
+    @property
+    @abstractmethod
+    def time_points(self) -> np.ndarray:
+        """时间轴数组(float64)"""
+        pass
+
+    @abstractmethod
+    def column(self, name: str) -> np.ndarray:
+        """
+        获取单个变量按其记录间隔存储的数据
+
+        Args:
+            name: 变量名称
+
+        Returns:
+            np.ndarray: 变量数据(float64)，对应的时间轴见column_time
+
+        Raises:
+            KeyError: 变量不存在时
+        """
+        pass
+
+    def stride(self, name: str) -> int:
+        """变量每隔多少个时间轴样本记录一次，逐个样本记录时为1"""
+        return 1
+
+    def column_time(self, name: str) -> np.ndarray:
+        """变量各样本的时间点(时间轴的跨步视图，不复制数据)"""
+        stride = self.stride(name)
+        return self.time_points if stride == 1 else self.time_points[::stride]
+
+    def hold(self, name: str, rows: slice) -> np.ndarray:
+        """
+        变量在时间轴样本rows上的值
+
+        记录间隔较大的变量在两次记录之间保持上一次记录的值(零阶保持)。
+
+        Args:
+            name: 变量名称
+            rows: 时间轴下标范围，start和stop不能为None
+
+        Returns:
+            np.ndarray: 与time_points[rows]等长的数据，逐个样本记录时为零复制视图
+        """
+        stride = self.stride(name)
+        step = rows.step or 1
+        column = self.column(name)
+        if stride == 1:
+            return column[rows]
+        if step % stride == 0 and rows.start % stride == 0:
+            return column[rows.start // stride:-(-rows.stop // stride):step // stride]
+        return column[np.arange(rows.start, rows.stop, step) // stride]
+
+    def time_window(self, start: Optional[float] = None, end: Optional[float] = None) -> slice:
+        """
+        二分查找时间轴，得到[start, end]对应的样本下标范围
+
+        时间轴按升序存储，查找只访问O(log n)个样本，
+        对内存映射的结果文件不会触发整列读取。
+
+        Args:
+            start: 开始时间，None表示从头开始
+            end: 结束时间(包含)，None表示到末尾
+
+        Returns:
+            slice: 样本下标范围
+        """
+        times = self.time_points
+        lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, side="right"))
+        return slice(lo, max(lo, hi))
+
+    def read(
+        self,
+        variables: Optional[Sequence[str]] = None,
+        time_range: Optional[Tuple[Optional[float], Optional[float]]] = None
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        读取指定变量在时间范围内的数据
+
+        变量的记录间隔不同时，时间轴取请求的变量中最小的记录间隔，
+        记录间隔较大的变量在两次记录之间保持上一次记录的值。
+
+        Args:
+            variables: 变量列表，None时读取全部变量
+            time_range: (开始时间, 结束时间)，None时读取全部时间
+
+        Returns:
+            Tuple[np.ndarray, Dict[str, np.ndarray]]: 时间轴切片和各变量数据切片
+
+        Raises:
+            KeyError: 变量不存在时
+        """
+        window = self.time_window(*time_range) if time_range else slice(0, len(self))
+        names = self.variables if variables is None else list(variables)
+        step = min((self.stride(name) for name in names), default=1)
+        lo = -(-window.start // step) * step
+        rows = slice(lo, max(lo, window.stop), step)
+        return self.time_points[rows], {name: self.hold(name, rows) for name in names}
+
+    def __len__(self) -> int:
+        return int(self.time_points.shape[0])
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.variables
+
+    def close(self) -> None:
+        """释放读取器持有的资源"""
+        pass
+
+    def __enter__(self) -> "ResultReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class ResultStore(ABC):
+    """仿真结果存储基类
+
+    每种存储格式对应一个实现类，通过文件扩展名区分。
+    """
+
+    #: 该存储格式使用的文件扩展名
+    extension: str = ""
+
+    def __init__(self, root_dir: Union[str, Path]):
+        """
+        初始化结果存储
+
+        Args:
+            root_dir: 结果文件根目录
+        """
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, task_id: str) -> Path:
+        """
+        获取任务结果文件的默认路径
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            Path: 结果文件路径
+        """
+        return self.root_dir / f"{task_id}{self.extension}"
+
+    @abstractmethod
+    def write(
+        self,
+        path: Union[str, Path],
+        time_points: Any,
+        data: Mapping[str, Any],
+        task_id: Optional[str] = None,
+        status: str = "completed",
+        metadata: Optional[Dict[str, Any]] = None,
+        error_message: Optional[str] = None
+    ) -> Path:
+        """
+        一次性写入完整的结果
+
+        Args:
+            path: 目标文件路径
+            time_points: 时间轴(序列或数组)
+            data: 变量名到数据(序列或数组)的映射
+            task_id: 任务ID
+            status: 任务状态
+            metadata: 元数据
+            error_message: 错误信息
+
+        Returns:
+            Path: 写入的文件路径
+        """
+        pass
+
+    @abstractmethod
+    def open(self, path: Union[str, Path]) -> ResultReader:
+        """
+        打开结果文件
+
+        Args:
+            path: 结果文件路径
+
+        Returns:
+            ResultReader: 结果读取器
+        """
+        pass
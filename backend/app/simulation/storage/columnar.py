@@ -0,0 +1,397 @@
+"""列式二进制结果存储
+
+文件布局(所有整数均为小端)：
+
+    [0, 8)        魔数 b"SSCOL001"
+    [8, 16)       uint64 头部偏移
+    [16, 24)      uint64 头部长度
+    [24, 4096)    保留
+    [4096, ...)   各列数据，每列为连续的float64数组，起始位置按4096字节对齐
+    [头部偏移, ...) UTF-8编码的JSON头部
+
+头部放在文件末尾，因此写入时无需预先知道数据长度。每列按页对齐，
+读取时通过内存映射直接得到NumPy视图，只访问所需列的页面，不产生复制。
+
+记录间隔较大的变量只存储记录的样本：头部中该列的stride为记录之间的时间轴样本数，
+第j个样本对应时间轴的第j × stride个样本(见sampling模块)。
+"""
+
+import os
+import json
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Mapping, Union, BinaryIO
+
+import numpy as np
+
+from .base import ResultReader, ResultStore
+
+
+MAGIC = b"SSCOL001"
+ALIGNMENT = 4096
+DTYPE = np.dtype("<f8")
+FORMAT_VERSION = 2  # 版本2增加了列的stride，版本1的文件所有列都逐个样本存储
+
+_PREAMBLE = struct.Struct("<8sQQ")
+
+
+def _pad(f: BinaryIO) -> int:
+    """将文件位置补齐到下一个对齐边界，返回补齐后的位置"""
+    pos = f.tell()
+    remainder = pos % ALIGNMENT
+    if remainder:
+        f.write(b"\0" * (ALIGNMENT - remainder))
+        pos += ALIGNMENT - remainder
+    return pos
+
+
+def _as_column(values: Any) -> np.ndarray:
+    """转换为连续的小端float64数组"""
+    return np.ascontiguousarray(values, dtype=DTYPE).reshape(-1)
+
+
+class ColumnarResultWriter:
+    """列式结果写入器
+
+    支持分块追加写入：每列先写入同目录下的临时文件，
+    在close()时依次拼接到最终文件并写入头部，内存占用只与单个块的大小有关。
+    最终文件通过原子重命名生成，读取方不会看到写了一半的结果。
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        variables: List[str],
+        task_id: Optional[str] = None,
+        status: str = "completed",
+        metadata: Optional[Dict[str, Any]] = None,
+        error_message: Optional[str] = None,
+        strides: Optional[Mapping[str, int]] = None
+    ):
+        """
+        初始化写入器
+
+        Args:
+            path: 目标文件路径
+            variables: 输出变量名称列表
+            task_id: 任务ID
+            status: 任务状态
+            metadata: 元数据
+            error_message: 错误信息
+            strides: 变量每隔多少个时间轴样本记录一次，未列出的变量逐个样本记录
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.variables = list(variables)
+        self.task_id = task_id
+        self.status = status
+        self.metadata = metadata or {}
+        self.error_message = error_message
+        self.strides = [max(1, int((strides or {}).get(var, 1))) for var in self.variables]
+        self.n_samples = 0
+        self._closed = False
+        # 时间轴和各变量分别缓冲到临时文件
+        self._spools = [
+            tempfile.TemporaryFile(dir=self.path.parent, prefix=".spool-")
+            for _ in range(len(self.variables) + 1)
+        ]
+
+    def append(self, time_points: Any, data: Mapping[str, Any]) -> None:
+        """
+        追加一个数据块
+
+        Args:
+            time_points: 本块的时间点
+            data: 本块中各变量的数据，长度必须与time_points一致；缺失的变量以NaN填充。
+                记录间隔较大的变量也可以只给出本块中记录的样本
+
+        Raises:
+            ValueError: 数据长度不一致或写入器已关闭时
+        """
+        if self._closed:
+            raise ValueError("写入器已关闭")
+
+        times = _as_column(time_points)
+        n = times.shape[0]
+        columns = [times]
+        for var, stride in zip(self.variables, self.strides):
+            # 本块中需要记录的第一个样本和样本数
+            first = -self.n_samples % stride
+            count = len(range(first, n, stride))
+            values = data.get(var)
+            if values is None:
+                column = np.full(count, np.nan, dtype=DTYPE)
+            else:
+                column = _as_column(values)
+                if column.shape[0] == n and stride > 1:
+                    column = np.ascontiguousarray(column[first::stride])
+                elif column.shape[0] != count:
+                    raise ValueError(f"变量 {var} 的长度({column.shape[0]})与时间轴长度({n})不一致")
+            columns.append(column)
+
+        for spool, column in zip(self._spools, columns):
+            spool.write(memoryview(column).cast("B"))
+        self.n_samples += n
+
+    def close(self) -> Path:
+        """
+        完成写入并生成最终文件
+
+        Returns:
+            Path: 结果文件路径
+        """
+        if self._closed:
+            return self.path
+
+        for spool in self._spools:
+            spool.seek(0)
+        try:
+            _write_file(
+                self.path,
+                self.variables,
+                self._spools,
+                self.n_samples,
+                self.task_id,
+                self.status,
+                self.metadata,
+                self.error_message,
+                self.strides
+            )
+        finally:
+            for spool in self._spools:
+                spool.close()
+            self._closed = True
+        return self.path
+
+    def abort(self) -> None:
+        """放弃写入并清理临时文件"""
+        for spool in self._spools:
+            spool.close()
+        self._closed = True
+
+    def __enter__(self) -> "ColumnarResultWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _write_file(
+    path: Path,
+    variables: List[str],
+    sources: List[Union[np.ndarray, BinaryIO]],
+    n_samples: int,
+    task_id: Optional[str],
+    status: str,
+    metadata: Dict[str, Any],
+    error_message: Optional[str],
+    strides: Optional[List[int]] = None
+) -> None:
+    """将时间轴和各列数据写入列式文件
+
+    sources的第一个元素是时间轴，其余按variables顺序排列，
+    每个元素可以是数组或已定位到开头的文件对象。strides为各变量的记录间隔(时间轴样本数)。
+    """
+    strides = [1] + list(strides or [1] * len(variables))
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    columns = []
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * ALIGNMENT)
+        for name, source, stride in zip(["time"] + variables, sources, strides):
+            offset = _pad(f)
+            if isinstance(source, np.ndarray):
+                f.write(memoryview(source).cast("B"))
+            else:
+                shutil.copyfileobj(source, f, 1 << 20)
+            column = {"name": name, "offset": offset, "length": -(-n_samples // stride)}
+            if stride > 1:
+                column["stride"] = stride
+            columns.append(column)
+
+        header = {
+            "format": "simsynai-columnar",
+            "version": FORMAT_VERSION,
+            "dtype": DTYPE.str,
+            "n_samples": n_samples,
+            "task_id": task_id,
+            "status": status,
+            "error_message": error_message,
+            "metadata": metadata,
+            "time": columns[0],
+            "columns": columns[1:]
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False, default=str).encode("utf-8")
+        header_offset = f.tell()
+        f.write(header_bytes)
+        f.seek(0)
+        f.write(_PREAMBLE.pack(MAGIC, header_offset, len(header_bytes)))
+        f.flush()
+        os.fsync(f.fileno())
+    # 结果被替换后原有的金字塔不再对应，先删除，需要时重新构建
+    from .pyramid import pyramid_dir
+    shutil.rmtree(pyramid_dir(path), ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def is_columnar_file(path: Union[str, Path]) -> bool:
+    """
+    判断文件是否为列式结果文件
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        bool: 文件以列式格式魔数开头时返回True
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class ColumnarResultReader(ResultReader):
+    """列式结果读取器
+
+    整个文件以只读方式内存映射，各列以零复制的NumPy视图返回。
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        打开列式结果文件
+
+        Args:
+            path: 结果文件路径
+
+        Raises:
+            ValueError: 文件不是有效的列式结果文件时
+        """
+        path = Path(path)
+        with open(path, "rb") as f:
+            preamble = f.read(_PREAMBLE.size)
+            if len(preamble) < _PREAMBLE.size:
+                raise ValueError(f"无效的列式结果文件: {path}")
+            magic, header_offset, header_length = _PREAMBLE.unpack(preamble)
+            if magic != MAGIC:
+                raise ValueError(f"无效的列式结果文件: {path}")
+            f.seek(header_offset)
+            header = json.loads(f.read(header_length).decode("utf-8"))
+
+        super().__init__(
+            path,
+            task_id=header.get("task_id"),
+            status=header.get("status", "completed"),
+            metadata=header.get("metadata") or {},
+            error_message=header.get("error_message")
+        )
+        self.header = header
+        self._dtype = np.dtype(header.get("dtype", DTYPE.str))
+        self._time = header["time"]
+        self._columns = {c["name"]: c for c in header["columns"]}
+        self._variables = [c["name"] for c in header["columns"]]
+        self._mmap: Optional[np.memmap] = np.memmap(path, dtype=np.uint8, mode="r")
+
+    @property
+    def variables(self) -> List[str]:
+        return list(self._variables)
+
+    @property
+    def time_points(self) -> np.ndarray:
+        return self._view(self._time)
+
+    def stride(self, name: str) -> int:
+        try:
+            return int(self._columns[name].get("stride", 1))
+        except KeyError:
+            raise KeyError(f"结果中不存在变量: {name}")
+
+    def column(self, name: str) -> np.ndarray:
+        try:
+            entry = self._columns[name]
+        except KeyError:
+            raise KeyError(f"结果中不存在变量: {name}")
+        return self._view(entry)
+
+    def _view(self, entry: Dict[str, Any]) -> np.ndarray:
+        if self._mmap is None:
+            raise ValueError("读取器已关闭")
+        start = entry["offset"]
+        stop = start + entry["length"] * self._dtype.itemsize
+        return self._mmap[start:stop].view(self._dtype)
+
+    def __len__(self) -> int:
+        return int(self.header.get("n_samples", 0))
+
+    def close(self) -> None:
+        # 已返回的视图仍持有映射的引用，映射在最后一个视图释放后自动解除
+        self._mmap = None
+
+
+class ColumnarResultStore(ResultStore):
+    """列式二进制结果存储"""
+
+    extension = ".col"
+
+    def writer(
+        self,
+        path: Union[str, Path],
+        variables: List[str],
+        task_id: Optional[str] = None,
+        status: str = "completed",
+        metadata: Optional[Dict[str, Any]] = None,
+        error_message: Optional[str] = None,
+        strides: Optional[Mapping[str, int]] = None
+    ) -> ColumnarResultWriter:
+        """
+        创建分块写入器
+
+        Args:
+            path: 目标文件路径
+            variables: 输出变量名称列表
+            task_id: 任务ID
+            status: 任务状态
+            metadata: 元数据
+            error_message: 错误信息
+            strides: 变量每隔多少个时间轴样本记录一次
+
+        Returns:
+            ColumnarResultWriter: 写入器实例
+        """
+        return ColumnarResultWriter(path, variables, task_id, status, metadata, error_message, strides)
+
+    def write(
+        self,
+        path: Union[str, Path],
+        time_points: Any,
+        data: Mapping[str, Any],
+        task_id: Optional[str] = None,
+        status: str = "completed",
+        metadata: Optional[Dict[str, Any]] = None,
+        error_message: Optional[str] = None
+    ) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        times = _as_column(time_points)
+        n = times.shape[0]
+        variables = list(data.keys())
+        sources = [times]
+        for var in variables:
+            column = _as_column(data[var])
+            if column.shape[0] != n:
+                # 旧结果中变量长度可能与时间轴不一致，截断或以NaN补齐
+                fixed = np.full(n, np.nan, dtype=DTYPE)
+                m = min(n, column.shape[0])
+                fixed[:m] = column[:m]
+                column = fixed
+            sources.append(column)
+
+        _write_file(path, variables, sources, n, task_id, status, metadata or {}, error_message)
+        return path
+
+    def open(self, path: Union[str, Path]) -> ColumnarResultReader:
+        return ColumnarResultReader(path)
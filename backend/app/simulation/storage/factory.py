@@ -0,0 +1,67 @@
+"""结果存储工厂模块
+
+根据配置创建结果存储实例，并根据文件内容自动选择读取器。
+支持的存储格式：
+- columnar: 列式二进制格式(默认)
+- json: 旧版JSON格式
+"""
+
+from enum import Enum
+from pathlib import Path
+from typing import Optional, Union
+
+from app.core.config import settings
+from .base import ResultReader, ResultStore
+from .columnar import ColumnarResultStore, ColumnarResultReader, is_columnar_file
+from .json_store import JsonResultStore, JsonResultReader
+
+
+class ResultStoreBackend(str, Enum):
+    """结果存储格式枚举"""
+    COLUMNAR = "columnar"
+    JSON = "json"
+
+
+def get_result_store(
+    backend: Optional[str] = None,
+    root_dir: Optional[Union[str, Path]] = None
+) -> ResultStore:
+    """获取结果存储实例
+
+    Args:
+        backend: 存储格式名称，None时使用配置中的RESULT_STORE_BACKEND
+        root_dir: 结果根目录，None时使用配置中的SIMULATION_RESULTS_DIR
+
+    Returns:
+        ResultStore: 结果存储实例
+
+    Raises:
+        ValueError: 存储格式不受支持时
+    """
+    backend = backend or settings.RESULT_STORE_BACKEND
+    root_dir = root_dir or settings.SIMULATION_RESULTS_DIR
+
+    try:
+        backend = ResultStoreBackend(backend.lower())
+    except ValueError:
+        raise ValueError(f"不支持的结果存储格式: {backend}，支持的格式: {', '.join(b.value for b in ResultStoreBackend)}")
+
+    if backend == ResultStoreBackend.COLUMNAR:
+        return ColumnarResultStore(root_dir)
+    return JsonResultStore(root_dir)
+
+
+def open_result(path: Union[str, Path]) -> ResultReader:
+    """打开结果文件
+
+    通过文件头的魔数区分列式格式和旧版JSON格式。
+
+    Args:
+        path: 结果文件路径
+
+    Returns:
+        ResultReader: 对应格式的读取器
+    """
+    if is_columnar_file(path):
+        return ColumnarResultReader(path)
+    return JsonResultReader(path)
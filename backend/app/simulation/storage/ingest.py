@@ -0,0 +1,92 @@
+"""CSV结果流式导入
+
+将仿真引擎输出的CSV按块读取并直接追加到列式结果文件：
+- 只解析time列和请求的输出变量列
+- 各列固定为float64，不做类型推断
+- 内存占用只与块大小有关，与仿真时长无关
+- 记录间隔较大的变量在未记录的行上留空，只存储记录的样本
+"""
+
+import csv
+from pathlib import Path
+from typing import Dict, List, Any, Mapping, Optional, Union
+
+import pandas as pd
+import numpy as np
+
+from .columnar import ColumnarResultWriter
+
+
+TIME_COLUMN = "time"
+DEFAULT_CHUNK_ROWS = 262144
+
+
+def read_csv_header(csv_path: Union[str, Path]) -> List[str]:
+    """
+    读取CSV表头
+
+    Args:
+        csv_path: CSV文件路径
+
+    Returns:
+        List[str]: 列名列表，文件为空时返回空列表
+    """
+    with open(csv_path, "r", newline="") as f:
+        return [name.strip() for name in next(csv.reader(f), [])]
+
+
+def ingest_csv(
+    csv_path: Union[str, Path],
+    target_path: Union[str, Path],
+    output_variables: List[str],
+    task_id: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    strides: Optional[Mapping[str, int]] = None
+) -> Path:
+    """
+    将CSV结果流式写入列式结果文件
+
+    CSV中不存在的输出变量会被跳过并记录在元数据的missing_variables中。
+
+    Args:
+        csv_path: CSV文件路径
+        target_path: 列式结果文件路径
+        output_variables: 请求的输出变量列表
+        task_id: 任务ID
+        metadata: 结果元数据
+        chunk_rows: 每块读取的行数
+        strides: 变量每隔多少行记录一次，未列出的变量每行记录
+
+    Returns:
+        Path: 列式结果文件路径
+
+    Raises:
+        ValueError: CSV缺少time列时
+    """
+    header = read_csv_header(csv_path)
+    if TIME_COLUMN not in header:
+        raise ValueError(f"结果文件缺少{TIME_COLUMN}列: {csv_path}")
+
+    variables = [var for var in output_variables if var in header and var != TIME_COLUMN]
+    missing = [var for var in output_variables if var not in header]
+    metadata = dict(metadata or {})
+    if missing:
+        metadata["missing_variables"] = missing
+
+    columns = [TIME_COLUMN] + variables
+    with ColumnarResultWriter(target_path, variables, task_id=task_id, metadata=metadata, strides=strides) as writer:
+        reader = pd.read_csv(
+            csv_path,
+            usecols=columns,
+            dtype={name: np.float64 for name in columns},
+            chunksize=chunk_rows,
+            skipinitialspace=True
+        )
+        with reader:
+            for chunk in reader:
+                writer.append(
+                    chunk[TIME_COLUMN].to_numpy(),
+                    {var: chunk[var].to_numpy() for var in variables}
+                )
+    return Path(target_path)
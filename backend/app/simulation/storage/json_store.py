@@ -0,0 +1,85 @@
+"""旧版JSON结果存储
+
+早期版本将每个任务的结果保存为 {task_id}.json，格式为：
+
+    {"task_id": ..., "status": ..., "data": {变量: [数值, ...]},
+     "time_points": [...], "metadata": {...}, "error_message": ...}
+
+此模块保留对该格式的读写支持，主要用于读取和迁移历史结果。
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Mapping, Union
+
+import numpy as np
+
+from .base import ResultReader, ResultStore
+
+
+class JsonResultReader(ResultReader):
+    """JSON结果读取器，打开时将整个文件加载到内存"""
+
+    def __init__(self, path: Union[str, Path]):
+        path = Path(path)
+        with open(path, "r") as f:
+            content = json.load(f)
+
+        super().__init__(
+            path,
+            task_id=content.get("task_id"),
+            status=content.get("status") or "completed",
+            metadata=content.get("metadata") or {},
+            error_message=content.get("error_message")
+        )
+        self._time = np.asarray(content.get("time_points") or [], dtype=np.float64)
+        self._data = {
+            var: np.asarray(values, dtype=np.float64)
+            for var, values in (content.get("data") or {}).items()
+        }
+
+    @property
+    def variables(self) -> List[str]:
+        return list(self._data.keys())
+
+    @property
+    def time_points(self) -> np.ndarray:
+        return self._time
+
+    def column(self, name: str) -> np.ndarray:
+        try:
+            return self._data[name]
+        except KeyError:
+            raise KeyError(f"结果中不存在变量: {name}")
+
+
+class JsonResultStore(ResultStore):
+    """旧版JSON结果存储"""
+
+    extension = ".json"
+
+    def write(
+        self,
+        path: Union[str, Path],
+        time_points: Any,
+        data: Mapping[str, Any],
+        task_id: Optional[str] = None,
+        status: str = "completed",
+        metadata: Optional[Dict[str, Any]] = None,
+        error_message: Optional[str] = None
+    ) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "task_id": task_id,
+                "status": status,
+                "data": {var: np.asarray(values, dtype=np.float64).tolist() for var, values in data.items()},
+                "time_points": np.asarray(time_points, dtype=np.float64).tolist(),
+                "metadata": metadata or {},
+                "error_message": error_message
+            }, f)
+        return path
+
+    def open(self, path: Union[str, Path]) -> JsonResultReader:
+        return JsonResultReader(path)
@@ -0,0 +1,93 @@
+"""旧版JSON结果迁移工具
+
+将 {task_id}.json 格式的历史结果转换为列式二进制格式。
+既可以在读取时按需迁移单个文件，也可以批量迁移整个目录：
+
+    python -m app.simulation.storage.migrate [结果目录] [--remove-source]
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from typing import List, Optional, Union
+
+from app.core.logging import logger
+from .columnar import ColumnarResultStore, is_columnar_file
+from .json_store import JsonResultReader
+
+
+def migrate_json_result(
+    json_path: Union[str, Path],
+    target_path: Optional[Union[str, Path]] = None,
+    remove_source: bool = False
+) -> Path:
+    """将单个JSON结果迁移为列式格式
+
+    Args:
+        json_path: JSON结果文件路径
+        target_path: 目标文件路径，默认与源文件同名但扩展名为.col
+        remove_source: 迁移成功后是否删除源文件
+
+    Returns:
+        Path: 列式结果文件路径
+    """
+    json_path = Path(json_path)
+    store = ColumnarResultStore(json_path.parent)
+    target = Path(target_path) if target_path else json_path.with_suffix(store.extension)
+
+    with JsonResultReader(json_path) as reader:
+        store.write(
+            target,
+            reader.time_points,
+            {var: reader.column(var) for var in reader.variables},
+            task_id=reader.task_id,
+            status=reader.status,
+            metadata=reader.metadata,
+            error_message=reader.error_message
+        )
+
+    if remove_source:
+        json_path.unlink()
+    logger.info(f"结果已迁移: {json_path} -> {target}")
+    return target
+
+
+def migrate_directory(directory: Union[str, Path], remove_source: bool = False) -> List[Path]:
+    """迁移目录下的所有JSON结果
+
+    已是列式格式或已存在对应.col文件的结果会被跳过。
+
+    Args:
+        directory: 结果目录
+        remove_source: 迁移成功后是否删除源文件
+
+    Returns:
+        List[Path]: 新生成的列式结果文件列表
+    """
+    migrated = []
+    for json_path in sorted(Path(directory).glob("*.json")):
+        target = json_path.with_suffix(ColumnarResultStore.extension)
+        if is_columnar_file(json_path) or target.exists():
+            continue
+        try:
+            migrated.append(migrate_json_result(json_path, target, remove_source))
+        except Exception as e:
+            logger.error(f"迁移结果失败 {json_path}: {str(e)}")
+    return migrated
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="将JSON仿真结果迁移为列式格式")
+    parser.add_argument("directory", nargs="?", default=settings.SIMULATION_RESULTS_DIR, help="结果目录")
+    parser.add_argument("--remove-source", action="store_true", help="迁移后删除JSON文件")
+    args = parser.parse_args(argv)
+
+    migrated = migrate_directory(args.directory, args.remove_source)
+    print(f"已迁移 {len(migrated)} 个结果文件")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""多分辨率结果金字塔
+
+仿真完成后为每个输出变量预计算逐级聚合的min/max/mean，类似地图瓦片：
+第k层的每个桶覆盖 factor**k 个原始样本。每一层保存为一个普通的列式结果文件：
+
+    {结果文件}.lod/L1.col, L2.col, ...
+
+层文件的时间轴为各桶起始时间，列为 count 以及每个变量的
+"{变量}:min"、"{变量}:max"、"{变量}:mean"。
+
+可视化请求按时间窗口内的桶数选择合适的层，读取代价只与屏幕宽度有关，
+不需要扫描原始样本。
+"""
+
+import time
+import shutil
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.logging import logger
+from .columnar import ColumnarResultReader, ColumnarResultWriter
+
+
+STATS = ("min", "max", "mean")
+
+
+def pyramid_dir(result_path: Union[str, Path]) -> Path:
+    """获取结果文件对应的金字塔目录"""
+    result_path = Path(result_path)
+    return result_path.with_name(result_path.name + ".lod")
+
+
+def _column_name(var: str, stat: str) -> str:
+    return f"{var}:{stat}"
+
+
+def _reduce_chunk(
+    counts: np.ndarray,
+    columns: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]],
+    factor: int
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+    """将一段数据每factor个桶合并为一个桶
+
+    Returns:
+        Tuple: (组起始下标, 合并后的计数, 各变量合并后的(min, max, mean))
+    """
+    starts = np.arange(0, counts.shape[0], factor)
+    merged_counts = np.add.reduceat(counts, starts)
+    reduced = {}
+    for var, (mins, maxs, means) in columns.items():
+        reduced[var] = (
+            np.minimum.reduceat(mins, starts),
+            np.maximum.reduceat(maxs, starts),
+            np.add.reduceat(means * counts, starts) / merged_counts
+        )
+    return starts, merged_counts, reduced
+
+
+def _build_level(
+    source: ColumnarResultReader,
+    variables: List[str],
+    target: Path,
+    factor: int,
+    level: int,
+    chunk_bins: int,
+    metadata: Dict[str, Any]
+) -> Path:
+    """由上一层(或原始结果)构建下一层"""
+    is_raw = level == 1
+    n = len(source)
+    chunk = chunk_bins * factor
+    times = source.time_points
+    columns = [_column_name(var, stat) for var in variables for stat in STATS]
+
+    with ColumnarResultWriter(
+        target,
+        ["count"] + columns,
+        task_id=source.task_id,
+        metadata=dict(metadata, level=level, bin_size=factor ** level)
+    ) as writer:
+        for lo in range(0, n, chunk):
+            hi = min(lo + chunk, n)
+            if is_raw:
+                counts = np.ones(hi - lo, dtype=np.float64)
+                stats = {}
+                for var in variables:
+                    # 记录间隔较大的变量按零阶保持展开到时间轴
+                    values = np.asarray(source.hold(var, slice(lo, hi)))
+                    stats[var] = (values, values, values)
+            else:
+                counts = np.asarray(source.column("count")[lo:hi])
+                stats = {
+                    var: tuple(np.asarray(source.column(_column_name(var, stat))[lo:hi]) for stat in STATS)
+                    for var in variables
+                }
+
+            starts, merged_counts, reduced = _reduce_chunk(counts, stats, factor)
+            data = {"count": merged_counts}
+            for var, values in reduced.items():
+                for stat, array in zip(STATS, values):
+                    data[_column_name(var, stat)] = array
+            writer.append(times[lo:hi][starts], data)
+    return target
+
+
+def build_pyramid(
+    result_path: Union[str, Path],
+    factor: int = 16,
+    min_bins: int = 1024,
+    chunk_bins: int = 65536
+) -> Dict[str, Any]:
+    """为结果文件构建多分辨率金字塔
+
+    每层由上一层分块归约得到，总计算量为O(n)，内存占用只与chunk_bins有关。
+    当某一层的桶数不超过min_bins时停止。
+
+    Args:
+        result_path: 列式结果文件路径
+        factor: 相邻两层之间的聚合倍数
+        min_bins: 最粗一层的桶数上限
+        chunk_bins: 每次处理的输出桶数
+
+    Returns:
+        Dict[str, Any]: 构建统计信息，包括层数、各层桶数和耗时
+    """
+    if factor < 2:
+        raise ValueError("金字塔聚合倍数必须不小于2")
+
+    started = time.perf_counter()
+    directory = pyramid_dir(result_path)
+    if directory.exists():
+        shutil.rmtree(directory)
+    directory.mkdir(parents=True)
+
+    level_bins = []
+    with ColumnarResultReader(result_path) as raw:
+        variables = raw.variables
+        metadata = {"factor": factor, "source_samples": len(raw), "variables": variables}
+        source = raw
+        level = 0
+        n = len(raw)
+        try:
+            while n > min_bins:
+                level += 1
+                target = _build_level(source, variables, directory / f"L{level}.col", factor, level, chunk_bins, metadata)
+                if source is not raw:
+                    source.close()
+                source = ColumnarResultReader(target)
+                n = len(source)
+                level_bins.append(n)
+        finally:
+            if source is not raw:
+                source.close()
+
+    stats = {
+        "levels": len(level_bins),
+        "factor": factor,
+        "bins": level_bins,
+        "build_seconds": round(time.perf_counter() - started, 6)
+    }
+    logger.info(f"结果金字塔构建完成 {result_path}: {stats}")
+    return stats
+
+
+class LodSlice:
+    """金字塔查询结果
+
+    Attributes:
+        level: 所选层级，0表示原始数据
+        bin_size: 每个桶覆盖的原始样本数
+        time_points: 各桶起始时间
+        counts: 各桶实际包含的样本数
+        data: 变量名到{"min", "max", "mean"}数组的映射
+    """
+
+    def __init__(
+        self,
+        level: int,
+        bin_size: int,
+        time_points: np.ndarray,
+        counts: np.ndarray,
+        data: Dict[str, Dict[str, np.ndarray]]
+    ):
+        self.level = level
+        self.bin_size = bin_size
+        self.time_points = time_points
+        self.counts = counts
+        self.data = data
+
+    def envelope(self) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        转换为折线图可直接使用的包络序列
+
+        每个桶输出两个点：桶起点处的最小值和桶中点处的最大值，
+        保证尖峰在任意缩放级别下都可见。
+
+        Returns:
+            Tuple[np.ndarray, Dict[str, np.ndarray]]: 时间轴和各变量数据
+        """
+        n = self.time_points.shape[0]
+        starts = self.time_points
+        if n > 1:
+            widths = np.append(np.diff(starts), starts[-1] - starts[-2])
+        else:
+            widths = np.zeros(n)
+        times = np.empty(2 * n, dtype=np.float64)
+        times[0::2] = starts
+        times[1::2] = starts + widths / 2
+
+        data = {}
+        for var, stats in self.data.items():
+            values = np.empty(2 * n, dtype=np.float64)
+            values[0::2] = stats["min"]
+            values[1::2] = stats["max"]
+            data[var] = values
+        return times, data
+
+
+class ResultPyramid:
+    """多分辨率结果金字塔读取器"""
+
+    def __init__(self, result_path: Union[str, Path]):
+        """
+        打开结果文件对应的金字塔
+
+        Args:
+            result_path: 列式结果文件路径
+
+        Raises:
+            FileNotFoundError: 金字塔不存在时
+        """
+        directory = pyramid_dir(result_path)
+        paths = sorted(directory.glob("L*.col"), key=lambda p: int(p.stem[1:]))
+        if not paths:
+            raise FileNotFoundError(f"结果金字塔不存在: {directory}")
+        self.levels = [ColumnarResultReader(path) for path in paths]
+        self.factor = int(self.levels[0].metadata.get("factor", 16))
+        self.variables = list(self.levels[0].metadata.get("variables", []))
+        self.source_samples = self.levels[0].metadata.get("source_samples")
+
+    @staticmethod
+    def exists(result_path: Union[str, Path]) -> bool:
+        """判断结果文件是否已构建金字塔"""
+        return (pyramid_dir(result_path) / "L1.col").exists()
+
+    def bin_size(self, level: int) -> int:
+        """第level层每个桶覆盖的原始样本数"""
+        return self.factor ** level
+
+    def _window(self, reader: ColumnarResultReader, time_range: Optional[Tuple[Optional[float], Optional[float]]]) -> slice:
+        if not time_range:
+            return slice(0, len(reader))
+        start, end = time_range
+        window = reader.time_window(start, end)
+        # 包含起始时间所在的桶
+        lo = window.start
+        if start is not None and lo > 0 and (lo >= len(reader) or reader.time_points[lo] > start):
+            lo -= 1
+        return slice(lo, max(lo, window.stop))
+
+    def select_level(self, time_range: Optional[Tuple[Optional[float], Optional[float]]], max_bins: int) -> int:
+        """
+        选择窗口内桶数不超过max_bins的最精细层级
+
+        Args:
+            time_range: 时间范围
+            max_bins: 允许的最大桶数
+
+        Returns:
+            int: 层级(从1开始)，所有层都超过max_bins时返回最粗一层
+        """
+        for level, reader in enumerate(self.levels, start=1):
+            window = self._window(reader, time_range)
+            if window.stop - window.start <= max_bins:
+                return level
+        return len(self.levels)
+
+    def read(
+        self,
+        variables: Optional[Sequence[str]],
+        time_range: Optional[Tuple[Optional[float], Optional[float]]],
+        max_bins: int,
+        level: Optional[int] = None
+    ) -> LodSlice:
+        """
+        读取时间窗口内的聚合数据
+
+        Args:
+            variables: 变量列表，None时读取全部变量
+            time_range: 时间范围
+            max_bins: 允许的最大桶数
+            level: 指定层级，None时自动选择
+
+        Returns:
+            LodSlice: 聚合数据
+        """
+        level = level or self.select_level(time_range, max_bins)
+        reader = self.levels[level - 1]
+        window = self._window(reader, time_range)
+        names = self.variables if variables is None else list(variables)
+        data = {
+            var: {stat: reader.column(_column_name(var, stat))[window] for stat in STATS}
+            for var in names
+        }
+        return LodSlice(
+            level,
+            self.bin_size(level),
+            reader.time_points[window],
+            reader.column("count")[window],
+            data
+        )
+
+    def close(self) -> None:
+        for reader in self.levels:
+            reader.close()
+
+    def __enter__(self) -> "ResultPyramid":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
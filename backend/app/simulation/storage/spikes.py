@@ -0,0 +1,487 @@
+"""稀疏放电事件存储
+
+放电网络的放电以(神经元序号, 时间)事件保存，而不是每个记录步长一列几乎全为0的稠密数据。
+事件文件放在结果文件旁边({结果文件}.spikes)，布局(所有整数均为小端)：
+
+    [0, 8)        魔数 b"SSSPK001"
+    [8, 16)       uint64 头部偏移
+    [16, 24)      uint64 头部长度
+    [24, ...)     数据块
+    [头部偏移, ...) UTF-8编码的JSON头部
+
+事件的时间为仿真步序号(时间 = 步 × dt)，按群体分块保存，每块内按(步, 神经元序号)排序后差分编码：
+- 步: 与上一事件的差值，第一个事件相对块的起始步
+- 神经元序号: 同一步内与上一事件的差值，换步时为原值
+两个数组分别以能容纳最大值的最小无符号整数类型保存，再用zlib压缩。头部记录每块的位置、
+事件数和步范围，按时间范围查询时只解压相关的块。
+
+读取器在事件之上按需计算栅格图数据、PSTH(群体放电率直方图)和每个神经元的平均放电率。
+"""
+
+import os
+import json
+import zlib
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+
+MAGIC = b"SSSPK001"
+FORMAT_VERSION = 1
+SPIKES_SUFFIX = ".spikes"
+# 每块的事件数，查询时以块为单位解压
+DEFAULT_BLOCK_EVENTS = 1 << 18
+# 直方图的最大桶数
+MAX_BINS = 1_000_000
+
+_PREAMBLE = struct.Struct("<8sQQ")
+_UNSIGNED = (np.dtype("<u1"), np.dtype("<u2"), np.dtype("<u4"), np.dtype("<u8"))
+
+TimeRange = Optional[Tuple[Optional[float], Optional[float]]]
+NeuronRange = Optional[Tuple[Optional[int], Optional[int]]]
+
+
+def spike_events_path(result_path: Union[str, Path]) -> Path:
+    """获取结果文件对应的放电事件文件"""
+    result_path = Path(result_path)
+    return result_path.with_name(result_path.name + SPIKES_SUFFIX)
+
+
+def _encode(values: np.ndarray) -> Tuple[bytes, str]:
+    """以最小的无符号整数类型保存并压缩"""
+    maximum = int(values.max()) if values.size else 0
+    dtype = next(dtype for dtype in _UNSIGNED if maximum <= np.iinfo(dtype).max)
+    return zlib.compress(values.astype(dtype).tobytes(), 6), dtype.str
+
+
+def _decode(data: bytes, dtype: str) -> np.ndarray:
+    return np.frombuffer(zlib.decompress(data), dtype=np.dtype(dtype)).astype(np.int64)
+
+
+class SpikeEventWriter:
+    """放电事件写入器
+
+    事件按群体缓冲，攒满一块后编码写入临时文件，close()时写入头部并原子重命名为最终文件。
+    每次追加的事件不能早于该群体已追加的事件。
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        populations: Mapping[str, int],
+        dt: float,
+        task_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        block_events: int = DEFAULT_BLOCK_EVENTS
+    ):
+        """
+        初始化写入器
+
+        Args:
+            path: 目标文件路径
+            populations: 记录放电的群体名称及其神经元数
+            dt: 仿真步长，事件时间 = 步 × dt
+            task_id: 任务ID
+            metadata: 元数据
+            block_events: 每块的事件数
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.dt = float(dt)
+        self.task_id = task_id
+        self.metadata = metadata or {}
+        self.block_events = block_events
+        self.n_steps = 0  # 已仿真的步数，决定默认的时间范围
+        self.populations = {
+            name: {"size": int(size), "count": 0, "blocks": []}
+            for name, size in populations.items()
+        }
+        self._pending: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {name: [] for name in populations}
+        self._pending_count = {name: 0 for name in populations}
+        self._last_step = {name: 0 for name in populations}
+        self._tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(b"\0" * _PREAMBLE.size)
+        self._closed = False
+
+    def append(self, population: str, steps: np.ndarray, neurons: np.ndarray) -> None:
+        """
+        追加一批放电事件
+
+        Args:
+            population: 群体名称
+            steps: 每个事件的步序号
+            neurons: 每个事件的神经元序号
+
+        Raises:
+            ValueError: 群体未登记、数据无效或事件早于已追加的事件时
+        """
+        if self._closed:
+            raise ValueError("写入器已关闭")
+        if population not in self.populations:
+            raise ValueError(f"群体 {population} 未登记")
+        steps = np.asarray(steps, dtype=np.int64).reshape(-1)
+        neurons = np.asarray(neurons, dtype=np.int64).reshape(-1)
+        if steps.shape != neurons.shape:
+            raise ValueError("事件的步序号和神经元序号长度不一致")
+        if not steps.size:
+            return
+        if steps.min() < self._last_step[population]:
+            raise ValueError("放电事件必须按时间顺序追加")
+        if neurons.min() < 0 or neurons.max() >= self.populations[population]["size"]:
+            raise ValueError(f"神经元序号超出群体 {population} 的范围")
+
+        self._last_step[population] = int(steps.max())
+        self._pending[population].append((steps, neurons))
+        self._pending_count[population] += steps.size
+        if self._pending_count[population] >= self.block_events:
+            self._flush(population)
+
+    def _flush(self, population: str) -> None:
+        """把缓冲的事件编码为一块写入文件"""
+        batches = self._pending[population]
+        if not batches:
+            return
+        steps = np.concatenate([batch[0] for batch in batches])
+        neurons = np.concatenate([batch[1] for batch in batches])
+        batches.clear()
+        self._pending_count[population] = 0
+
+        order = np.lexsort((neurons, steps))
+        steps = steps[order]
+        neurons = neurons[order]
+        step_deltas = np.diff(steps, prepend=steps[0])
+        neuron_deltas = neurons.copy()
+        same_step = step_deltas[1:] == 0
+        neuron_deltas[1:][same_step] = np.diff(neurons)[same_step]
+
+        step_bytes, step_dtype = _encode(step_deltas)
+        neuron_bytes, neuron_dtype = _encode(neuron_deltas)
+        offset = self._file.tell()
+        self._file.write(step_bytes)
+        self._file.write(neuron_bytes)
+        entry = self.populations[population]
+        entry["count"] += int(steps.size)
+        entry["blocks"].append({
+            "offset": offset,
+            "count": int(steps.size),
+            "first_step": int(steps[0]),
+            "last_step": int(steps[-1]),
+            "steps": [len(step_bytes), step_dtype],
+            "neurons": [len(neuron_bytes), neuron_dtype]
+        })
+
+    def close(self) -> Path:
+        """
+        完成写入并生成最终文件
+
+        Returns:
+            Path: 放电事件文件路径
+        """
+        if self._closed:
+            return self.path
+        try:
+            for population in self.populations:
+                self._flush(population)
+            header = {
+                "format": "simsynai-spikes",
+                "version": FORMAT_VERSION,
+                "codec": "zlib",
+                "task_id": self.task_id,
+                "dt": self.dt,
+                "n_steps": int(max([self.n_steps] + list(self._last_step.values()))),
+                "metadata": self.metadata,
+                "populations": self.populations
+            }
+            header_bytes = json.dumps(header, ensure_ascii=False, default=str).encode("utf-8")
+            header_offset = self._file.tell()
+            self._file.write(header_bytes)
+            self._file.seek(0)
+            self._file.write(_PREAMBLE.pack(MAGIC, header_offset, len(header_bytes)))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+            self._closed = True
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        """放弃写入并删除临时文件"""
+        if not self._closed:
+            self._file.close()
+            self._closed = True
+        self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "SpikeEventWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class SpikeEventReader:
+    """放电事件读取器"""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        打开放电事件文件
+
+        Args:
+            path: 文件路径
+
+        Raises:
+            ValueError: 文件不是有效的放电事件文件时
+        """
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        preamble = self._file.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size or preamble[:len(MAGIC)] != MAGIC:
+            self._file.close()
+            raise ValueError(f"无效的放电事件文件: {path}")
+        _, header_offset, header_length = _PREAMBLE.unpack(preamble)
+        self._file.seek(header_offset)
+        self.header = json.loads(self._file.read(header_length).decode("utf-8"))
+        self.dt = float(self.header["dt"])
+        self.n_steps = int(self.header.get("n_steps", 0))
+        self.task_id = self.header.get("task_id")
+        self.metadata = self.header.get("metadata") or {}
+        self._populations = self.header["populations"]
+
+    @property
+    def populations(self) -> Dict[str, Dict[str, int]]:
+        """各群体的神经元数和放电事件数"""
+        return {
+            name: {"size": entry["size"], "count": entry["count"]}
+            for name, entry in self._populations.items()
+        }
+
+    @property
+    def duration(self) -> float:
+        return self.n_steps * self.dt
+
+    def _population(self, population: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+        if population is None:
+            if len(self._populations) != 1:
+                raise ValueError(f"结果中有多个群体的放电，需要指定群体: {', '.join(self._populations)}")
+            population = next(iter(self._populations))
+        if population not in self._populations:
+            raise ValueError(f"结果中不存在群体 {population} 的放电")
+        return population, self._populations[population]
+
+    def _window(self, time_range: TimeRange) -> Tuple[float, float]:
+        start, end = time_range or (None, None)
+        start = 0.0 if start is None else float(start)
+        end = self.duration if end is None else float(end)
+        if end < start:
+            raise ValueError("时间范围的结束时间不能早于开始时间")
+        return start, end
+
+    def events(
+        self,
+        population: Optional[str] = None,
+        time_range: TimeRange = None,
+        neuron_range: NeuronRange = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        读取放电事件
+
+        Args:
+            population: 群体名称，只有一个群体时可以省略
+            time_range: (开始时间, 结束时间)，两端都包含
+            neuron_range: [起始神经元序号, 结束神经元序号)
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 按(步, 神经元序号)排序的步序号和神经元序号
+
+        Raises:
+            ValueError: 群体不存在或范围无效时
+        """
+        _, entry = self._population(population)
+        start, end = self._window(time_range) if time_range else (None, None)
+        # 时间换算为步的区间，容忍浮点误差
+        first = None if start is None else int(np.ceil(start / self.dt - 1e-9))
+        last = None if end is None else int(np.floor(end / self.dt + 1e-9))
+
+        steps_parts, neuron_parts = [], []
+        for block in entry["blocks"]:
+            if (first is not None and block["last_step"] < first) or (last is not None and block["first_step"] > last):
+                continue
+            steps, neurons = self._read_block(block)
+            mask = np.ones(steps.shape[0], dtype=bool)
+            if first is not None:
+                mask &= steps >= first
+            if last is not None:
+                mask &= steps <= last
+            steps_parts.append(steps[mask])
+            neuron_parts.append(neurons[mask])
+        steps = np.concatenate(steps_parts) if steps_parts else np.zeros(0, dtype=np.int64)
+        neurons = np.concatenate(neuron_parts) if neuron_parts else np.zeros(0, dtype=np.int64)
+
+        if neuron_range is not None:
+            lo, hi = neuron_range
+            mask = np.ones(neurons.shape[0], dtype=bool)
+            if lo is not None:
+                mask &= neurons >= lo
+            if hi is not None:
+                mask &= neurons < hi
+            steps, neurons = steps[mask], neurons[mask]
+        return steps, neurons
+
+    def _read_block(self, block: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        step_length, step_dtype = block["steps"]
+        neuron_length, neuron_dtype = block["neurons"]
+        self._file.seek(block["offset"])
+        steps = np.cumsum(_decode(self._file.read(step_length), step_dtype)) + block["first_step"]
+        neuron_deltas = _decode(self._file.read(neuron_length), neuron_dtype)
+        # 换步处的神经元序号为原值，同一步内为差值：在每一步内分段累加
+        new_step = np.ones(steps.shape[0], dtype=bool)
+        new_step[1:] = steps[1:] != steps[:-1]
+        cumulative = np.cumsum(neuron_deltas)
+        step_start = np.maximum.accumulate(np.where(new_step, np.arange(steps.shape[0]), 0))
+        neurons = cumulative - cumulative[step_start] + neuron_deltas[step_start]
+        return steps, neurons
+
+    def raster(
+        self,
+        population: Optional[str] = None,
+        time_range: TimeRange = None,
+        neuron_range: NeuronRange = None,
+        max_events: int = 0
+    ) -> Dict[str, Any]:
+        """
+        栅格图数据
+
+        事件超过max_events时在步的边界截断，next_time为下一页的开始时间。
+
+        Args:
+            population: 群体名称
+            time_range: 时间范围
+            neuron_range: 神经元序号范围
+            max_events: 最多返回的事件数，0表示不限制
+
+        Returns:
+            Dict[str, Any]: 事件时间、神经元序号、事件总数、是否截断和下一页的开始时间
+        """
+        name, _ = self._population(population)
+        steps, neurons = self.events(name, time_range, neuron_range)
+        total = int(steps.shape[0])
+        next_time = None
+        if max_events and total > max_events:
+            cut = int(np.searchsorted(steps, steps[max_events], side="left"))
+            if cut == 0:
+                # 单步的放电超过max_events时整步返回
+                cut = int(np.searchsorted(steps, steps[0], side="right"))
+            if cut < total:
+                next_time = float(steps[cut] * self.dt)
+            steps, neurons = steps[:cut], neurons[:cut]
+        return {
+            "population": name,
+            "times": steps * self.dt,
+            "neurons": neurons,
+            "total_events": total,
+            "truncated": next_time is not None,
+            "next_time": next_time
+        }
+
+    def psth(
+        self,
+        population: Optional[str] = None,
+        bin_size: float = 1.0,
+        time_range: TimeRange = None,
+        neuron_range: NeuronRange = None,
+        smooth: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        放电时间直方图(PSTH)和群体放电率
+
+        Args:
+            population: 群体名称
+            bin_size: 桶宽(毫秒)
+            time_range: 时间范围，默认为整个仿真
+            neuron_range: 神经元序号范围
+            smooth: 高斯平滑的标准差(毫秒)，0表示不平滑
+
+        Returns:
+            Dict[str, Any]: 桶的起始时间、每桶放电数和放电率(Hz)
+
+        Raises:
+            ValueError: 桶宽无效或桶数过多时
+        """
+        name, entry = self._population(population)
+        if bin_size <= 0:
+            raise ValueError("桶宽必须为正数")
+        start, end = self._window(time_range)
+        n_bins = max(1, int(np.ceil((end - start) / bin_size - 1e-9)))
+        if n_bins > MAX_BINS:
+            raise ValueError(f"桶数({n_bins})超过上限{MAX_BINS}，请增大桶宽或缩小时间范围")
+
+        steps, _ = self.events(name, (start, end), neuron_range)
+        index = np.minimum(((steps * self.dt - start) / bin_size).astype(np.int64), n_bins - 1)
+        counts = np.bincount(index, minlength=n_bins)
+        lo, hi = self._neuron_bounds(entry, neuron_range)
+        neurons = max(hi - lo, 0)
+        rate = counts / (max(neurons, 1) * bin_size / 1000.0)
+        if smooth > 0:
+            sigma = smooth / bin_size
+            offsets = np.arange(-int(np.ceil(4 * sigma)), int(np.ceil(4 * sigma)) + 1)
+            kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+            rate = np.convolve(rate, kernel / kernel.sum(), mode="same")
+        return {
+            "population": name,
+            "bin_size": bin_size,
+            "neurons": neurons,
+            "time_points": start + np.arange(n_bins) * bin_size,
+            "counts": counts,
+            "rate": rate
+        }
+
+    def firing_rates(
+        self,
+        population: Optional[str] = None,
+        time_range: TimeRange = None,
+        neuron_range: NeuronRange = None
+    ) -> Dict[str, Any]:
+        """
+        每个神经元在时间范围内的平均放电率(Hz，时间单位为毫秒)
+
+        Returns:
+            Dict[str, Any]: 神经元序号范围的起点、每个神经元的放电率和统计量
+        """
+        name, entry = self._population(population)
+        start, end = self._window(time_range)
+        lo, hi = self._neuron_bounds(entry, neuron_range)
+        _, neurons = self.events(name, (start, end), (lo, hi))
+        counts = np.bincount(neurons - lo, minlength=max(hi - lo, 0))[:max(hi - lo, 0)]
+        duration = (end - start) / 1000.0
+        rates = counts / duration if duration > 0 else np.zeros(counts.shape[0])
+        return {
+            "population": name,
+            "first_neuron": lo,
+            "rates": rates,
+            "mean": float(rates.mean()) if rates.size else 0.0,
+            "std": float(rates.std()) if rates.size else 0.0,
+            "silent": int(np.count_nonzero(counts == 0))
+        }
+
+    @staticmethod
+    def _neuron_bounds(entry: Dict[str, Any], neuron_range: NeuronRange) -> Tuple[int, int]:
+        """神经元序号范围限制在群体之内"""
+        lo, hi = neuron_range or (None, None)
+        lo = 0 if lo is None else max(0, int(lo))
+        hi = entry["size"] if hi is None else min(entry["size"], int(hi))
+        return lo, hi
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "SpikeEventReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
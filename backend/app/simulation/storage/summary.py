@@ -0,0 +1,73 @@
+"""仿真结果摘要
+
+计算每个输出变量的最小值、最大值、均值和末值，用于在不读取完整结果的情况下
+比较多次运行(例如参数扫描的结果索引)。按块扫描内存映射的列，内存占用与结果大小无关。
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from .base import ResultReader
+from .factory import open_result
+
+
+DEFAULT_CHUNK_SAMPLES = 1 << 20
+
+
+def summarize_reader(reader: ResultReader, chunk_samples: int = DEFAULT_CHUNK_SAMPLES) -> Dict[str, Any]:
+    """
+    计算结果摘要
+
+    Args:
+        reader: 结果读取器
+        chunk_samples: 每块扫描的样本数
+
+    Returns:
+        Dict[str, Any]: {"samples": 样本数, "end_time": 最后时间点,
+            "variables": {变量: {"min", "max", "mean", "last"}}}，全为NaN的变量各项为None
+    """
+    n = len(reader)
+    times = reader.time_points
+    summary: Dict[str, Any] = {
+        "samples": n,
+        "end_time": float(times[-1]) if n else None,
+        "variables": {}
+    }
+    for var in reader.variables:
+        column = reader.column(var)
+        low, high, total, count = np.inf, -np.inf, 0.0, 0
+        for start in range(0, len(column), chunk_samples):
+            chunk = np.asarray(column[start:start + chunk_samples])
+            valid = chunk[~np.isnan(chunk)]
+            if valid.size:
+                low = min(low, float(valid.min()))
+                high = max(high, float(valid.max()))
+                total += float(valid.sum())
+                count += valid.size
+        last = float(column[-1]) if len(column) else None
+        summary["variables"][var] = {
+            "min": low if count else None,
+            "max": high if count else None,
+            "mean": total / count if count else None,
+            "last": None if last is None or np.isnan(last) else last
+        }
+    return summary
+
+
+def summarize_result(path: Union[str, Path], chunk_samples: int = DEFAULT_CHUNK_SAMPLES) -> Optional[Dict[str, Any]]:
+    """
+    计算结果文件的摘要
+
+    Args:
+        path: 结果文件路径
+        chunk_samples: 每块扫描的样本数
+
+    Returns:
+        Optional[Dict[str, Any]]: 结果摘要，文件不存在时返回None
+    """
+    if not Path(path).exists():
+        return None
+    with open_result(path) as reader:
+        return summarize_reader(reader, chunk_samples)
@@ -0,0 +1,148 @@
+"""参数扫描展开
+
+把批量仿真的扫描定义展开为每次运行的参数覆盖值：
+- grid: 各参数取值的笛卡尔积
+- random: 各参数独立均匀采样
+- lhs: 拉丁超立方采样，每个参数的取值范围等分为samples层，每层恰好采样一次
+
+参数范围可以是离散取值列表(values)，也可以是连续区间(low/high，可选对数刻度和取整)。
+参数名支持用"."访问嵌套参数，例如"control_params.gain"。
+"""
+
+import copy
+import itertools
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class SweepMode(str, Enum):
+    """参数扫描方式"""
+    GRID = "grid"
+    RANDOM = "random"
+    LHS = "lhs"
+
+
+def _grid_values(name: str, spec: Dict[str, Any]) -> List[Any]:
+    if spec.get("values") is not None:
+        return list(spec["values"])
+    num = spec.get("num")
+    if not num:
+        raise ValueError(f"网格扫描的参数{name}需要指定values或num")
+    if spec.get("log"):
+        values = np.geomspace(spec["low"], spec["high"], num)
+    else:
+        values = np.linspace(spec["low"], spec["high"], num)
+    return _convert(values, spec)
+
+
+def _convert(values: np.ndarray, spec: Dict[str, Any]) -> List[Any]:
+    """将采样值转换为Python数值，integer参数取整"""
+    if spec.get("integer"):
+        return [int(v) for v in np.rint(values)]
+    return [float(v) for v in values]
+
+
+def _scale(name: str, spec: Dict[str, Any], u: np.ndarray) -> List[Any]:
+    """把[0, 1)上的采样映射到参数范围"""
+    if spec.get("values") is not None:
+        values = list(spec["values"])
+        return [values[i] for i in np.minimum((u * len(values)).astype(int), len(values) - 1)]
+
+    low, high = spec["low"], spec["high"]
+    if spec.get("log"):
+        if low <= 0 or high <= 0:
+            raise ValueError(f"对数刻度的参数{name}范围必须为正数")
+        return _convert(np.exp(np.log(low) + u * (np.log(high) - np.log(low))), spec)
+    return _convert(low + u * (high - low), spec)
+
+
+def sweep_size(mode: SweepMode, parameters: Dict[str, Dict[str, Any]], samples: Optional[int] = None) -> int:
+    """
+    计算展开后的运行数，不实际展开
+
+    Raises:
+        ValueError: 扫描定义不完整时
+    """
+    mode = SweepMode(mode)
+    if mode == SweepMode.GRID:
+        size = 1
+        for name, spec in parameters.items():
+            size *= len(spec["values"]) if spec.get("values") is not None else (spec.get("num") or 0)
+            if size == 0:
+                raise ValueError(f"网格扫描的参数{name}需要指定values或num")
+        return size
+    if not samples:
+        raise ValueError(f"{mode.value}扫描需要指定samples")
+    return samples
+
+
+def expand_sweep(
+    mode: SweepMode,
+    parameters: Dict[str, Dict[str, Any]],
+    samples: Optional[int] = None,
+    seed: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    展开参数扫描
+
+    Args:
+        mode: 扫描方式
+        parameters: 参数名 -> 范围定义(values，或low/high及num/log/integer)
+        samples: random和lhs方式的采样数
+        seed: 随机种子，相同种子得到相同的采样
+
+    Returns:
+        List[Dict[str, Any]]: 每次运行的参数覆盖值
+
+    Raises:
+        ValueError: 扫描定义不完整或无效时
+    """
+    mode = SweepMode(mode)
+    if not parameters:
+        raise ValueError("参数扫描至少需要一个参数")
+    for name, spec in parameters.items():
+        if spec.get("values") is None and (spec.get("low") is None or spec.get("high") is None):
+            raise ValueError(f"参数{name}需要指定values或low/high")
+
+    names = list(parameters)
+    if mode == SweepMode.GRID:
+        axes = [_grid_values(name, parameters[name]) for name in names]
+        return [dict(zip(names, combo)) for combo in itertools.product(*axes)]
+
+    n = sweep_size(mode, parameters, samples)
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name in names:
+        if mode == SweepMode.RANDOM:
+            u = rng.random(n)
+        else:
+            # 每层[k/n, (k+1)/n)内采样一次，再打乱层的顺序
+            u = (rng.permutation(n) + rng.random(n)) / n
+        columns[name] = _scale(name, parameters[name], u)
+    return [{name: columns[name][i] for name in names} for i in range(n)]
+
+
+def apply_overrides(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将参数覆盖值合并到基础参数中
+
+    Args:
+        base: 基础参数(不会被修改)
+        overrides: 参数覆盖值，键可以是"a.b"形式的嵌套路径
+
+    Returns:
+        Dict[str, Any]: 合并后的参数
+    """
+    merged = copy.deepcopy(base)
+    for path, value in overrides.items():
+        target = merged
+        *parents, leaf = path.split(".")
+        for key in parents:
+            child = target.get(key)
+            if not isinstance(child, dict):
+                child = target[key] = {}
+            target = child
+        target[leaf] = value
+    return merged
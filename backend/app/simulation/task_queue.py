@@ -0,0 +1,459 @@
+"""持久化仿真任务队列
+
+API进程把任务放入队列，独立的worker进程(app.simulation.worker)取出并执行，
+仿真负载不再与API请求争用uvicorn进程。
+
+投递语义为至少一次(at-least-once)：
+- reserve取出任务时登记可见性超时(visibility timeout)，任务在超时前对其他worker不可见
+- worker运行期间定期续期，完成后ack删除任务
+- worker崩溃后不再续期，超时的任务由requeue_expired放回队列重新投递
+- 每次投递生成新的回执(receipt)，过期worker的ack/续期不会影响新的投递
+
+排队顺序与进程内调度器一致：先按优先级，同优先级下各用户的任务轮流取出。
+每个任务入队时分配所属用户的轮次(round)，即该用户上一个任务的轮次与当前
+已取出的最大轮次(clock)中较大者加一；同优先级按轮次、同轮次按入队顺序取出。
+队列为空时轮次归零。
+
+实现：
+- RedisTaskQueue: 基于Redis，多个API/worker进程共享，各操作用Lua脚本保证原子性
+- LocalTaskQueue: 进程内实现，语义相同，用于测试和单进程部署
+"""
+
+import json
+import time
+import uuid
+import heapq
+import itertools
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+class TaskQueueBackend(str, Enum):
+    """任务执行方式"""
+    SCHEDULER = "scheduler"  # API进程内的调度器
+    LOCAL = "local"  # 进程内队列 + 进程内worker
+    REDIS = "redis"  # Redis队列 + 独立worker进程
+
+
+class Delivery:
+    """一次任务投递"""
+
+    __slots__ = ("task_id", "message", "receipt", "deliveries")
+
+    def __init__(self, task_id: str, message: Dict[str, Any], receipt: str, deliveries: int):
+        self.task_id = task_id
+        self.message = message
+        self.receipt = receipt
+        self.deliveries = deliveries
+
+
+def _pending_score(priority: int, round_: int, seq: int) -> float:
+    """队列排序分数：优先级高的在前，同优先级按轮次，同轮次按入队顺序"""
+    return -priority * 1e13 + round_ * 1e6 + seq % 1000000
+
+
+class TaskQueue(ABC):
+    """任务队列接口"""
+
+    @abstractmethod
+    async def enqueue(self, task_id: str, user_id: str, priority: int = 0) -> bool:
+        """
+        任务入队
+
+        Args:
+            task_id: 任务ID
+            user_id: 提交任务的用户ID
+            priority: 优先级，数值越大越先运行
+
+        Returns:
+            bool: 入队成功返回True，任务已在队列中或正在执行时返回False
+        """
+
+    @abstractmethod
+    async def reserve(self, visibility_timeout: float) -> Optional[Delivery]:
+        """
+        取出下一个任务，visibility_timeout秒内未ack或续期则重新投递
+
+        Returns:
+            Optional[Delivery]: 任务投递，队列为空时返回None
+        """
+
+    @abstractmethod
+    async def ack(self, delivery: Delivery) -> bool:
+        """确认任务完成并删除，回执已失效时返回False"""
+
+    @abstractmethod
+    async def extend(self, delivery: Delivery, visibility_timeout: float) -> bool:
+        """延长任务的可见性超时，回执已失效时返回False"""
+
+    @abstractmethod
+    async def release(self, delivery: Delivery) -> bool:
+        """放弃任务并立即放回队列，回执已失效时返回False"""
+
+    @abstractmethod
+    async def requeue_expired(self) -> List[str]:
+        """将可见性超时的任务放回队列，返回这些任务的ID"""
+
+    @abstractmethod
+    async def remove(self, task_id: str) -> bool:
+        """从队列中删除尚未被取出的任务"""
+
+    @abstractmethod
+    async def position(self, task_id: str) -> Optional[int]:
+        """任务的排队位置(从1开始)，不在队列中时返回None"""
+
+    @abstractmethod
+    async def length(self) -> int:
+        """排队中的任务数"""
+
+    @abstractmethod
+    async def request_stop(self, task_id: str) -> bool:
+        """请求停止已被取出的任务，由执行该任务的worker处理，任务未被取出时返回False"""
+
+    @abstractmethod
+    async def stop_requested(self, task_id: str) -> bool:
+        """任务是否被请求停止"""
+
+    async def close(self) -> None:
+        """释放连接"""
+
+
+class LocalTaskQueue(TaskQueue):
+    """进程内任务队列"""
+
+    def __init__(self):
+        self._pending: List[Tuple[float, int, str]] = []
+        self._messages: Dict[str, Dict[str, Any]] = {}
+        self._deliveries: Dict[str, int] = {}
+        self._processing: Dict[str, Tuple[str, float]] = {}  # task_id -> (receipt, deadline)
+        self._stop: set = set()
+        self._seq = itertools.count()
+        self._rounds: Dict[str, int] = {}  # user_id -> 该用户最后入队任务的轮次
+        self._clock = 0  # 已取出任务的最大轮次
+
+    def _push(self, task_id: str) -> None:
+        message = self._messages[task_id]
+        score = _pending_score(message["priority"], message["round"], message["seq"])
+        heapq.heappush(self._pending, (score, message["seq"], task_id))
+
+    def _reset_rounds(self) -> None:
+        if not self._pending:
+            self._rounds.clear()
+            self._clock = 0
+
+    def _queued_ids(self) -> List[str]:
+        return [task_id for _, _, task_id in sorted(self._pending)]
+
+    async def enqueue(self, task_id: str, user_id: str, priority: int = 0) -> bool:
+        if task_id in self._messages:
+            return False
+        round_ = max(self._rounds.get(user_id, 0), self._clock) + 1
+        self._rounds[user_id] = round_
+        self._messages[task_id] = {
+            "task_id": task_id,
+            "user_id": user_id,
+            "priority": priority,
+            "enqueued_at": time.time(),
+            "round": round_,
+            "seq": next(self._seq)
+        }
+        self._stop.discard(task_id)
+        self._push(task_id)
+        return True
+
+    async def reserve(self, visibility_timeout: float) -> Optional[Delivery]:
+        if not self._pending:
+            return None
+        _, _, task_id = heapq.heappop(self._pending)
+        self._clock = max(self._clock, self._messages[task_id]["round"])
+        self._reset_rounds()
+        receipt = uuid.uuid4().hex
+        self._processing[task_id] = (receipt, time.time() + visibility_timeout)
+        self._deliveries[task_id] = self._deliveries.get(task_id, 0) + 1
+        return Delivery(task_id, dict(self._messages[task_id]), receipt, self._deliveries[task_id])
+
+    def _owns(self, delivery: Delivery) -> bool:
+        current = self._processing.get(delivery.task_id)
+        return current is not None and current[0] == delivery.receipt
+
+    async def ack(self, delivery: Delivery) -> bool:
+        if not self._owns(delivery):
+            return False
+        task_id = delivery.task_id
+        del self._processing[task_id]
+        self._messages.pop(task_id, None)
+        self._deliveries.pop(task_id, None)
+        self._stop.discard(task_id)
+        return True
+
+    async def extend(self, delivery: Delivery, visibility_timeout: float) -> bool:
+        if not self._owns(delivery):
+            return False
+        self._processing[delivery.task_id] = (delivery.receipt, time.time() + visibility_timeout)
+        return True
+
+    async def release(self, delivery: Delivery) -> bool:
+        if not self._owns(delivery):
+            return False
+        del self._processing[delivery.task_id]
+        self._push(delivery.task_id)
+        return True
+
+    async def requeue_expired(self) -> List[str]:
+        now = time.time()
+        expired = [task_id for task_id, (_, deadline) in self._processing.items() if deadline <= now]
+        for task_id in expired:
+            del self._processing[task_id]
+            self._push(task_id)
+        return expired
+
+    async def remove(self, task_id: str) -> bool:
+        if task_id in self._processing or task_id not in self._messages:
+            return False
+        self._pending = [item for item in self._pending if item[2] != task_id]
+        heapq.heapify(self._pending)
+        del self._messages[task_id]
+        self._deliveries.pop(task_id, None)
+        self._reset_rounds()
+        return True
+
+    async def position(self, task_id: str) -> Optional[int]:
+        queued = self._queued_ids()
+        return queued.index(task_id) + 1 if task_id in queued else None
+
+    async def length(self) -> int:
+        return len(self._pending)
+
+    async def request_stop(self, task_id: str) -> bool:
+        if task_id not in self._processing:
+            return False
+        self._stop.add(task_id)
+        return True
+
+    async def stop_requested(self, task_id: str) -> bool:
+        return task_id in self._stop
+
+
+# KEYS: pending, messages, processing, receipts, deliveries, stop, rounds, clock, seq
+# 与_pending_score相同；分数由消息中的优先级、轮次和序号计算，不保存在消息中，避免cjson编码大数时丢失精度
+_SCORE = """
+local function score(message)
+    return -message['priority'] * 1e13 + message['round'] * 1e6 + message['seq'] % 1000000
+end
+"""
+
+_ENQUEUE = """
+if redis.call('HEXISTS', KEYS[2], ARGV[1]) == 1 then return 0 end
+local message = cjson.decode(ARGV[2])
+local round = math.max(tonumber(redis.call('HGET', KEYS[7], message['user_id']) or 0),
+                       tonumber(redis.call('GET', KEYS[8]) or 0)) + 1
+redis.call('HSET', KEYS[7], message['user_id'], round)
+message['round'] = round
+message['seq'] = redis.call('INCR', KEYS[9])
+redis.call('HSET', KEYS[2], ARGV[1], cjson.encode(message))
+redis.call('ZADD', KEYS[1], string.format('%.17g', score(message)), ARGV[1])
+redis.call('SREM', KEYS[6], ARGV[1])
+return 1
+"""
+
+_RESERVE = """
+local item = redis.call('ZPOPMIN', KEYS[1])
+if #item == 0 then return false end
+local id = item[1]
+local round = cjson.decode(redis.call('HGET', KEYS[2], id))['round']
+if redis.call('ZCARD', KEYS[1]) == 0 then
+    redis.call('DEL', KEYS[7], KEYS[8])
+elseif round > tonumber(redis.call('GET', KEYS[8]) or 0) then
+    redis.call('SET', KEYS[8], round)
+end
+redis.call('ZADD', KEYS[3], ARGV[1], id)
+redis.call('HSET', KEYS[4], id, ARGV[2])
+local count = redis.call('HINCRBY', KEYS[5], id, 1)
+return {id, redis.call('HGET', KEYS[2], id), count}
+"""
+
+_ACK = """
+if redis.call('HGET', KEYS[4], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZREM', KEYS[3], ARGV[1])
+redis.call('HDEL', KEYS[4], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[5], ARGV[1])
+redis.call('SREM', KEYS[6], ARGV[1])
+return 1
+"""
+
+_EXTEND = """
+if redis.call('HGET', KEYS[4], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZADD', KEYS[3], 'XX', ARGV[3], ARGV[1])
+return 1
+"""
+
+_RELEASE = """
+if redis.call('HGET', KEYS[4], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZREM', KEYS[3], ARGV[1])
+redis.call('HDEL', KEYS[4], ARGV[1])
+local message = cjson.decode(redis.call('HGET', KEYS[2], ARGV[1]))
+redis.call('ZADD', KEYS[1], string.format('%.17g', score(message)), ARGV[1])
+return 1
+"""
+
+_REQUEUE_EXPIRED = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[1])
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[3], id)
+    redis.call('HDEL', KEYS[4], id)
+    local message = redis.call('HGET', KEYS[2], id)
+    if message then
+        redis.call('ZADD', KEYS[1], string.format('%.17g', score(cjson.decode(message))), id)
+    end
+end
+return ids
+"""
+
+_REMOVE = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then return 0 end
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[5], ARGV[1])
+if redis.call('ZCARD', KEYS[1]) == 0 then redis.call('DEL', KEYS[7], KEYS[8]) end
+return 1
+"""
+
+
+class RedisTaskQueue(TaskQueue):
+    """基于Redis的任务队列
+
+    键(均以prefix开头)：
+    - pending: 有序集合，排队中的任务，分数由优先级、轮次和入队顺序决定
+    - messages: 哈希，任务ID -> 任务消息(JSON)
+    - processing: 有序集合，已取出的任务，分数为可见性截止时间
+    - receipts: 哈希，任务ID -> 当前投递的回执
+    - deliveries: 哈希，任务ID -> 投递次数
+    - stop: 集合，被请求停止的任务
+    - rounds: 哈希，用户ID -> 该用户最后入队任务的轮次
+    - clock: 已取出任务的最大轮次
+    - seq: 入队计数
+    """
+
+    def __init__(self, client: Any = None, prefix: Optional[str] = None):
+        """
+        初始化Redis任务队列
+
+        Args:
+            client: redis.asyncio.Redis客户端，默认按REDIS_HOST/REDIS_PORT/REDIS_PASSWORD创建
+            prefix: 键前缀
+        """
+        if client is None:
+            try:
+                import redis.asyncio as aioredis
+            except ImportError as e:
+                raise RuntimeError("使用Redis任务队列需要安装redis包") from e
+            client = aioredis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                password=settings.REDIS_PASSWORD or None,
+                decode_responses=True
+            )
+        self.client = client
+        prefix = prefix or settings.TASK_QUEUE_PREFIX
+        self.keys = [f"{prefix}:{name}" for name in (
+            "pending", "messages", "processing", "receipts", "deliveries", "stop", "rounds", "clock", "seq"
+        )]
+        self._scripts = {
+            name: client.register_script(script)
+            for name, script in (
+                ("enqueue", _SCORE + _ENQUEUE),
+                ("reserve", _RESERVE),
+                ("ack", _ACK),
+                ("extend", _EXTEND),
+                ("release", _SCORE + _RELEASE),
+                ("requeue_expired", _SCORE + _REQUEUE_EXPIRED),
+                ("remove", _REMOVE)
+            )
+        }
+
+    async def _call(self, name: str, *args: Any) -> Any:
+        return await self._scripts[name](keys=self.keys, args=list(args))
+
+    async def enqueue(self, task_id: str, user_id: str, priority: int = 0) -> bool:
+        message = json.dumps({
+            "task_id": task_id,
+            "user_id": user_id,
+            "priority": priority,
+            "enqueued_at": time.time()
+        })
+        return bool(await self._call("enqueue", task_id, message))
+
+    async def reserve(self, visibility_timeout: float) -> Optional[Delivery]:
+        receipt = uuid.uuid4().hex
+        result = await self._call("reserve", time.time() + visibility_timeout, receipt)
+        if not result:
+            return None
+        task_id, message, count = result
+        return Delivery(task_id, json.loads(message), receipt, int(count))
+
+    async def ack(self, delivery: Delivery) -> bool:
+        return bool(await self._call("ack", delivery.task_id, delivery.receipt))
+
+    async def extend(self, delivery: Delivery, visibility_timeout: float) -> bool:
+        return bool(await self._call("extend", delivery.task_id, delivery.receipt, time.time() + visibility_timeout))
+
+    async def release(self, delivery: Delivery) -> bool:
+        return bool(await self._call("release", delivery.task_id, delivery.receipt))
+
+    async def requeue_expired(self) -> List[str]:
+        return list(await self._call("requeue_expired", time.time()))
+
+    async def remove(self, task_id: str) -> bool:
+        return bool(await self._call("remove", task_id))
+
+    async def position(self, task_id: str) -> Optional[int]:
+        rank = await self.client.zrank(self.keys[0], task_id)
+        return None if rank is None else rank + 1
+
+    async def length(self) -> int:
+        return await self.client.zcard(self.keys[0])
+
+    async def request_stop(self, task_id: str) -> bool:
+        if not await self.client.hexists(self.keys[3], task_id):
+            return False
+        await self.client.sadd(self.keys[5], task_id)
+        return True
+
+    async def stop_requested(self, task_id: str) -> bool:
+        return bool(await self.client.sismember(self.keys[5], task_id))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+_local_queue: Optional[LocalTaskQueue] = None
+_redis_queue: Optional[RedisTaskQueue] = None
+
+
+def get_task_queue(backend: Optional[str] = None) -> TaskQueue:
+    """
+    获取任务队列
+
+    Args:
+        backend: local或redis，默认使用settings.TASK_QUEUE_BACKEND
+
+    Returns:
+        TaskQueue: 进程内共享的队列实例
+
+    Raises:
+        ValueError: 未知或不使用队列的执行方式
+    """
+    global _local_queue, _redis_queue
+    backend = TaskQueueBackend(backend or settings.TASK_QUEUE_BACKEND)
+    if backend == TaskQueueBackend.LOCAL:
+        if _local_queue is None:
+            _local_queue = LocalTaskQueue()
+        return _local_queue
+    if backend == TaskQueueBackend.REDIS:
+        if _redis_queue is None:
+            _redis_queue = RedisTaskQueue()
+        return _redis_queue
+    raise ValueError(f"执行方式{backend.value}不使用任务队列")
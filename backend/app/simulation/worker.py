@@ -0,0 +1,230 @@
+"""仿真任务worker
+
+从任务队列取出任务并执行，并发数受concurrency限制：
+- 执行期间定期续期可见性超时，并每隔TASK_QUEUE_STOP_POLL_INTERVAL检查API进程发来的停止请求
+- 任务执行完成(包括仿真失败)后ack；worker被中断时先终止仿真进程再release，任务立即重新投递
+- 定期回收可见性超时的任务(其他worker崩溃后遗留的任务)
+- 投递次数超过上限的任务标记为失败，避免反复崩溃的任务无限重试
+
+独立运行(在backend目录下)：
+
+    python -m app.simulation.worker [--concurrency 4]
+"""
+
+import os
+import signal
+import socket
+import asyncio
+import argparse
+from datetime import datetime
+from typing import Any, Optional, Set
+
+from app.core.config import settings
+from app.core.logging import logger
+from .task_queue import Delivery, TaskQueue, get_task_queue
+from .scheduler import TaskRunner
+from .registry import process_registry
+from .pool import close_skyeye_pools
+
+
+FINAL_STATUSES = ("completed", "failed", "stopped")
+
+
+async def execute_queued_task(task_id: str) -> Any:
+    """
+    使用独立的数据库会话执行队列中的任务
+
+    至少一次投递意味着同一任务可能被投递多次，已结束的任务直接跳过。
+    """
+    from app.db.session import SessionLocal
+    from app.db.models.simulation import SimulationTask
+    from app.services.simulation import SimulationService
+
+    db = SessionLocal()
+    try:
+        task = db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
+        if task is None or task.status in FINAL_STATUSES:
+            logger.info(f"任务 {task_id} 不存在或已结束，跳过")
+            return None
+        return await SimulationService(db).execute_task(task_id)
+    finally:
+        db.close()
+
+
+def mark_task_failed(task_id: str, error_message: str) -> None:
+    """将任务标记为失败"""
+    from app.db.session import SessionLocal
+    from app.db.models.simulation import SimulationTask
+
+    db = SessionLocal()
+    try:
+        task = db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
+        if task is not None and task.status not in FINAL_STATUSES:
+            task.status = "failed"
+            task.error_message = error_message
+            task.completed_at = datetime.now()
+            db.commit()
+    finally:
+        db.close()
+
+
+class SimulationWorker:
+    """仿真任务worker"""
+
+    def __init__(
+        self,
+        queue: Optional[TaskQueue] = None,
+        concurrency: Optional[int] = None,
+        runner: Optional[TaskRunner] = None,
+        visibility_timeout: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        max_deliveries: Optional[int] = None,
+        stop_poll_interval: Optional[float] = None
+    ):
+        """
+        初始化worker
+
+        Args:
+            queue: 任务队列，默认使用settings.TASK_QUEUE_BACKEND对应的队列
+            concurrency: 同时执行的任务数，默认MAX_WORKERS
+            runner: 执行任务的协程函数
+            visibility_timeout: 可见性超时(秒)，执行期间每隔三分之一超时续期一次
+            poll_interval: 队列为空时的轮询间隔(秒)
+            max_deliveries: 最大投递次数
+            stop_poll_interval: 执行期间检查停止请求的间隔(秒)
+        """
+        self.queue = queue or get_task_queue()
+        self.concurrency = concurrency or settings.SIMULATION_MAX_WORKERS
+        self.runner = runner or execute_queued_task
+        self.visibility_timeout = visibility_timeout or settings.TASK_QUEUE_VISIBILITY_TIMEOUT
+        self.poll_interval = poll_interval or settings.TASK_QUEUE_POLL_INTERVAL
+        self.max_deliveries = max_deliveries or settings.TASK_QUEUE_MAX_DELIVERIES
+        self.stop_poll_interval = stop_poll_interval or settings.TASK_QUEUE_STOP_POLL_INTERVAL
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._active: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    async def run(self) -> None:
+        """持续处理任务，直到调用stop"""
+        logger.info(f"worker {self.worker_id} 启动，并发数 {self.concurrency}")
+        while not self._stopping.is_set():
+            try:
+                requeued = await self.queue.requeue_expired()
+                if requeued:
+                    logger.warning(f"重新投递超时的任务: {', '.join(requeued)}")
+
+                if len(self._active) >= self.concurrency:
+                    await asyncio.wait(self._active, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                delivery = await self.queue.reserve(self.visibility_timeout)
+            except Exception as e:
+                logger.exception(f"访问任务队列失败: {str(e)}")
+                delivery = None
+
+            if delivery is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._process(delivery))
+            self._active.add(task)
+            task.add_done_callback(self._active.discard)
+
+        await self._drain()
+        logger.info(f"worker {self.worker_id} 已停止")
+
+    def stop(self) -> None:
+        """停止取新任务，正在执行的任务被中断并放回队列"""
+        self._stopping.set()
+
+    async def _drain(self) -> None:
+        tasks = list(self._active)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _process(self, delivery: Delivery) -> None:
+        task_id = delivery.task_id
+        if delivery.deliveries > self.max_deliveries:
+            logger.error(f"任务 {task_id} 已投递 {delivery.deliveries} 次，标记为失败")
+            await asyncio.to_thread(mark_task_failed, task_id, f"任务执行中断次数过多(已投递{delivery.deliveries}次)")
+            await self.queue.ack(delivery)
+            return
+
+        logger.info(f"worker {self.worker_id} 开始执行任务 {task_id}(第{delivery.deliveries}次投递)")
+        heartbeat = asyncio.create_task(self._heartbeat(delivery))
+        try:
+            await self.runner(task_id)
+        except asyncio.CancelledError:
+            # 确认仿真进程已退出后再放回队列，避免重新投递的运行与旧进程同时写入结果和检查点
+            await asyncio.shield(self._release_after_exit(delivery))
+            raise
+        except Exception as e:
+            # 意外异常：放回队列重试，直到达到最大投递次数
+            logger.exception(f"任务 {task_id} 执行异常: {str(e)}")
+            await self.queue.release(delivery)
+        else:
+            if not await self.queue.ack(delivery):
+                logger.warning(f"任务 {task_id} 的回执已失效，可能已被重新投递")
+        finally:
+            heartbeat.cancel()
+
+    async def _release_after_exit(self, delivery: Delivery) -> None:
+        """等待任务的仿真进程退出(未退出时终止)，然后放回队列"""
+        handle = process_registry.get(delivery.task_id)
+        if handle is not None and handle.finished_at is None and not handle.in_process:
+            await process_registry.stop(delivery.task_id)
+        await self.queue.release(delivery)
+
+    async def _heartbeat(self, delivery: Delivery) -> None:
+        """续期可见性超时，并处理停止请求
+
+        停止请求每隔stop_poll_interval检查一次，续期仍每隔三分之一可见性超时进行。
+        """
+        extend_interval = self.visibility_timeout / 3
+        interval = min(self.stop_poll_interval, extend_interval)
+        loop = asyncio.get_running_loop()
+        extended_at = loop.time()
+        stopping = False
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if loop.time() - extended_at >= extend_interval:
+                    extended_at = loop.time()
+                    if not await self.queue.extend(delivery, self.visibility_timeout):
+                        logger.warning(f"任务 {delivery.task_id} 续期失败，回执已失效")
+                if not stopping and await self.queue.stop_requested(delivery.task_id):
+                    stopping = True
+                    # 仿真进程运行在本worker进程中，直接通过进程注册表终止；进程尚未启动时在登记时终止
+                    if process_registry.running(delivery.task_id):
+                        await process_registry.stop(delivery.task_id)
+                    else:
+                        process_registry.defer_stop(delivery.task_id)
+            except Exception as e:
+                logger.warning(f"任务 {delivery.task_id} 心跳失败: {str(e)}")
+
+
+async def _main(concurrency: Optional[int]) -> None:
+    worker = SimulationWorker(concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await worker.queue.close()
+        await close_skyeye_pools()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SimSynAI仿真任务worker")
+    parser.add_argument("--concurrency", type=int, default=None, help="同时执行的任务数，默认MAX_WORKERS")
+    args = parser.parse_args()
+    asyncio.run(_main(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
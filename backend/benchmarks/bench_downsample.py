@@ -0,0 +1,67 @@
+"""降采样性能基准
+
+对1000万样本的模拟膜电位曲线测量LTTB和minmax降采样耗时，
+并检查尖峰是否保留：每个尖峰在一个桶宽范围内都应有一个保留下来的尖峰样本
+(同一桶内的多个尖峰在屏幕上本来就只占一个像素列)。
+
+运行方式(在backend目录下)：
+
+    python -m benchmarks.bench_downsample [--samples 10000000] [--max-points 2000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.simulation.downsample import DownsampleMode, downsample
+
+
+def make_trace(n: int, n_spikes: int = 200, seed: int = 0):
+    """生成带尖峰的膜电位曲线"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n, dtype=np.float64) * 0.01
+    v = -65.0 + rng.normal(0.0, 0.5, n)
+    spikes = np.sort(rng.choice(n, n_spikes, replace=False))
+    v[spikes] = 30.0
+    return t, v, spikes
+
+
+def covered_spikes(t: np.ndarray, spikes: np.ndarray, kept_times: np.ndarray, tolerance: float) -> int:
+    """统计在容差范围内有对应保留样本的尖峰数"""
+    if len(kept_times) == 0:
+        return 0
+    pos = np.clip(np.searchsorted(kept_times, t[spikes]), 1, len(kept_times) - 1)
+    nearest = np.minimum(np.abs(kept_times[pos] - t[spikes]), np.abs(kept_times[pos - 1] - t[spikes]))
+    return int(np.count_nonzero(nearest <= tolerance))
+
+
+def run(n: int, max_points: int, repeat: int) -> None:
+    t, v, spikes = make_trace(n)
+    print(f"样本数: {n:,}  max_points: {max_points}  尖峰数: {len(spikes)}")
+
+    for mode in DownsampleMode:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            t_out, data = downsample(t, {"v": v}, max_points, mode)
+            timings.append(time.perf_counter() - start)
+        kept = covered_spikes(t, spikes, t_out[data["v"] >= 30.0], t[-1] / max_points * 2)
+        print(
+            f"  {mode.value:<7} 最快 {min(timings) * 1000:8.1f} ms  "
+            f"中位数 {np.median(timings) * 1000:8.1f} ms  "
+            f"输出 {len(t_out):6d} 点  保留尖峰 {kept}/{len(spikes)}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="降采样性能基准")
+    parser.add_argument("--samples", type=int, default=10_000_000)
+    parser.add_argument("--max-points", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.samples, args.max_points, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
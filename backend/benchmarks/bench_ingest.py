@@ -0,0 +1,92 @@
+"""CSV结果导入性能基准
+
+比较两种导入SkyEye结果CSV的方式的耗时和峰值内存(RSS)：
+- legacy: pandas.read_csv 整表读取 + tolist() + json.dump(旧实现)
+- stream: ingest_csv 分块写入列式结果文件
+
+每种方式在独立子进程中运行，以便分别统计峰值内存。
+
+运行方式(在backend目录下)：
+
+    python -m benchmarks.bench_ingest [--rows 2000000] [--columns 20] [--variables 4]
+"""
+
+import os
+import json
+import argparse
+import resource
+import tempfile
+import time
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.simulation.storage import ingest_csv
+
+
+def write_csv(path: Path, rows: int, columns: int) -> None:
+    """生成测试用的CSV结果文件"""
+    rng = np.random.default_rng(0)
+    chunk = 200_000
+    names = ["time"] + [f"v{i}" for i in range(columns)]
+    with open(path, "w") as f:
+        f.write(",".join(names) + "\n")
+        for start in range(0, rows, chunk):
+            n = min(chunk, rows - start)
+            block = np.column_stack([np.arange(start, start + n) * 0.01, rng.normal(size=(n, columns))])
+            np.savetxt(f, block, delimiter=",", fmt="%.6f")
+
+
+def legacy(csv_path: Path, out_dir: Path, variables) -> None:
+    df = pd.read_csv(csv_path)
+    data = {var: df[var].tolist() for var in variables if var in df.columns}
+    with open(out_dir / "legacy.json", "w") as f:
+        json.dump({"data": data, "time_points": df["time"].tolist()}, f)
+
+
+def stream(csv_path: Path, out_dir: Path, variables) -> None:
+    ingest_csv(csv_path, out_dir / "stream.col", variables)
+
+
+def _measure(method, csv_path, out_dir, variables, queue) -> None:
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    method(csv_path, out_dir, variables)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, (peak - baseline) / 1024))
+
+
+def measure(method, csv_path: Path, out_dir: Path, variables):
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(method, csv_path, out_dir, variables, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CSV结果导入性能基准")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--variables", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        csv_path = tmp / "results.csv"
+        write_csv(csv_path, args.rows, args.columns)
+        variables = [f"v{i}" for i in range(args.variables)]
+        print(f"CSV: {args.rows:,} 行 x {args.columns + 1} 列 ({os.path.getsize(csv_path) / 2 ** 20:.0f} MiB)，导入 {len(variables)} 个变量")
+
+        for name, method in (("legacy", legacy), ("stream", stream)):
+            elapsed, peak = measure(method, csv_path, tmp, variables)
+            print(f"  {name:<7} 耗时 {elapsed:6.2f} s  峰值内存增量 {peak:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
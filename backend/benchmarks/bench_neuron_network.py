@@ -0,0 +1,120 @@
+"""进程内神经元网络引擎规模基准
+
+在不同网络规模(默认1万、10万、100万个神经元)下报告：
+- 构建网络的耗时、突触数和突触表占用的内存
+- 仿真速度(步/秒)和每步的放电数
+- 构建和仿真期间的内存峰值(tracemalloc统计的NumPy和Python分配)
+- 放电传递的耗时：事件驱动(CSR出边 + 延迟缓冲) vs 每步稀疏矩阵乘法(只在较小规模下比较)
+
+网络为80%兴奋性、20%抑制性的LIF神经元，固定出度连接，外部输入带噪声。
+
+运行方式(在backend目录下)：
+
+    python -m benchmarks.bench_neuron_network [--sizes 10000 100000 1000000] [--degree 100] [--steps 200]
+"""
+
+import gc
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from app.simulation.neuron import Network, NetworkSimulator, get_integrator
+
+
+def make_spec(n: int, degree: int) -> dict:
+    n_exc = n * 4 // 5
+    return {
+        "populations": [
+            {"name": "exc", "model": "lif", "size": n_exc, "input_mean": 15.5, "input_std": 6.0},
+            {"name": "inh", "model": "lif", "size": n - n_exc, "input_mean": 15.5, "input_std": 6.0}
+        ],
+        "projections": [
+            {"source": "exc", "target": "exc", "out_degree": degree * 4 // 5, "weight": 0.2, "delay": 1.5},
+            {"source": "exc", "target": "inh", "out_degree": degree // 5, "weight": 0.2, "delay": 1.5},
+            {"source": "inh", "target": "exc", "out_degree": degree * 4 // 5, "weight": -0.8, "delay": 0.8, "delay_max": 2.0},
+            {"source": "inh", "target": "inh", "out_degree": degree // 5, "weight": -0.8, "delay": 0.8}
+        ]
+    }
+
+
+def propagation_cost(simulator: NetworkSimulator, steps: int) -> tuple:
+    """比较事件驱动传递和矩阵乘法传递的耗时(微秒/步)，使用仿真中记录的真实放电"""
+    rng = np.random.default_rng(0)
+    rate = simulator.spike_counts.sum() / max(simulator.steps, 1) / simulator.network.n_neurons
+    spikes = [[rng.random(p.size) < rate for p in simulator.network.populations] for _ in range(steps)]
+
+    start = time.perf_counter()
+    for spiked in spikes:
+        for source, target, synapses, delay_steps in simulator._projections:
+            sources = np.flatnonzero(spiked[source])
+            positions = synapses.outgoing(sources)
+            simulator.buffers[target].schedule(
+                synapses.targets[positions],
+                synapses.weights[positions],
+                delay_steps if np.isscalar(delay_steps) else delay_steps[positions]
+            )
+    event = (time.perf_counter() - start) / steps * 1e6
+
+    matrices = [(p_source, p_target, synapses.to_csr()) for p_source, p_target, synapses, _ in simulator._projections]
+    i_syn = [np.zeros(p.size) for p in simulator.network.populations]
+    start = time.perf_counter()
+    for spiked in spikes:
+        for source, target, matrix in matrices:
+            i_syn[target] += matrix @ spiked[source].astype(np.float64)
+    matrix_product = (time.perf_counter() - start) / steps * 1e6
+    return event, matrix_product
+
+
+def run(n: int, degree: int, steps: int, integrator: str, compare_limit: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    network = Network.from_spec(make_spec(n, degree), seed=0)
+    simulator = NetworkSimulator(network, get_integrator(integrator), 0.1, seed=0)
+    build = time.perf_counter() - start
+    # 膜电位随机初始化，避免全部神经元同步放电
+    rng = np.random.default_rng(0)
+    for i, population in enumerate(network.populations):
+        simulator.view(i)[0] = rng.uniform(population.params["v_reset"], population.params["v_th"], population.size)
+    synapse_bytes = sum(p.synapses.nbytes for p in network.projections)
+
+    simulator.run(min(20, steps), {})
+    start = time.perf_counter()
+    spikes_before = simulator.spike_counts.sum()
+    simulator.run(steps, {})
+    elapsed = time.perf_counter() - start
+    spikes_per_step = (simulator.spike_counts.sum() - spikes_before) / steps
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"  N={n:>9,}  突触 {network.n_synapses:>12,}  构建 {build:6.2f} s  "
+        f"突触表 {synapse_bytes / 2 ** 20:8.1f} MiB  峰值 {peak / 2 ** 20:8.1f} MiB  "
+        f"{steps / elapsed:8.1f} 步/s  {spikes_per_step:8.1f} 放电/步"
+    )
+    if n <= compare_limit:
+        event, matrix_product = propagation_cost(simulator, min(steps, 100))
+        print(f"    放电传递: 事件驱动 {event:9.1f} us/步   矩阵乘法 {matrix_product:9.1f} us/步")
+
+    del simulator, network
+    gc.collect()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="进程内神经元网络引擎规模基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--degree", type=int, default=100, help="每个神经元的出度")
+    parser.add_argument("--steps", type=int, default=200, help="计时的仿真步数(步长0.1ms)")
+    parser.add_argument("--integrator", default="euler")
+    parser.add_argument("--compare-limit", type=int, default=100_000, help="不超过该规模时比较矩阵乘法传递")
+    args = parser.parse_args()
+
+    print(f"出度 {args.degree}，积分器 {args.integrator}，{args.steps} 步")
+    for n in args.sizes:
+        run(n, args.degree, args.steps, args.integrator, args.compare_limit)
+
+
+if __name__ == "__main__":
+    main()
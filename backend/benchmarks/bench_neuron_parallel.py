@@ -0,0 +1,75 @@
+"""进程内神经元网络引擎多进程并行的扩展效率基准
+
+同一个网络分别用单进程仿真器和1到N个工作进程的并行仿真器推进相同步数，报告：
+- 仿真速度(步/秒)
+- 相对单进程仿真器的加速比和并行效率(加速比 / 工作进程数)
+- 同步间隔(最小突触延迟步数)
+
+网络为80%兴奋性、20%抑制性的LIF神经元，固定出度连接，外部输入带噪声。
+并行效率受CPU核数限制，工作进程数超过核数时效率下降是正常的。
+
+运行方式(在backend目录下)：
+
+    python -m benchmarks.bench_neuron_parallel [--size 200000] [--degree 100] [--steps 500] [--workers 1 2 4]
+"""
+
+import os
+import time
+import argparse
+
+import numpy as np
+
+from app.simulation.neuron import Network, NetworkSimulator, ParallelNetworkSimulator, get_integrator
+from benchmarks.bench_neuron_network import make_spec
+
+
+def randomize(simulator: NetworkSimulator) -> None:
+    """膜电位随机初始化，避免全部神经元同步放电"""
+    rng = np.random.default_rng(0)
+    state = simulator.state_dict()
+    for i, population in enumerate(simulator.network.populations):
+        simulator.view(i)[0] = rng.uniform(population.params["v_reset"], population.params["v_th"], population.size)
+    state["y"] = simulator.y.copy()
+    simulator.load_state(state)
+
+
+def measure(simulator: NetworkSimulator, steps: int) -> float:
+    """推进steps步，返回步/秒"""
+    simulator.run(min(20, steps), {})
+    start = time.perf_counter()
+    simulator.run(steps, {})
+    return steps / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="进程内神经元网络引擎多进程并行的扩展效率基准")
+    parser.add_argument("--size", type=int, default=200_000, help="神经元数")
+    parser.add_argument("--degree", type=int, default=100, help="每个神经元的出度")
+    parser.add_argument("--steps", type=int, default=500, help="计时的仿真步数(步长0.1ms)")
+    parser.add_argument("--integrator", default="euler")
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="工作进程数，默认为1到CPU核数的2的幂")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    workers = args.workers or [1 << k for k in range(cpus.bit_length()) if 1 << k <= cpus]
+    network = Network.from_spec(make_spec(args.size, args.degree), seed=0)
+    print(f"N={args.size:,}  突触 {network.n_synapses:,}  积分器 {args.integrator}  {args.steps} 步  CPU核数 {cpus}")
+
+    serial = NetworkSimulator(network, get_integrator(args.integrator), 0.1, seed=0)
+    randomize(serial)
+    baseline = measure(serial, args.steps)
+    print(f"  单进程        {baseline:8.1f} 步/s")
+
+    for n in workers:
+        with ParallelNetworkSimulator(network, get_integrator(args.integrator), 0.1, n, seed=0) as simulator:
+            randomize(simulator)
+            rate = measure(simulator, args.steps)
+            speedup = rate / baseline
+            print(
+                f"  {n:>2} 个工作进程  {rate:8.1f} 步/s  加速比 {speedup:5.2f}  "
+                f"效率 {speedup / n:6.1%}  同步间隔 {simulator.interval} 步"
+            )
+
+
+if __name__ == "__main__":
+    main()
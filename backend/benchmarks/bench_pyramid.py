@@ -0,0 +1,80 @@
+"""结果金字塔性能基准
+
+报告金字塔的构建耗时，并比较不同缩放级别下的读取延迟：
+- raw: 在原始数据上切片后用minmax降采样
+- lod: 从金字塔选择层级读取包络后再用minmax降采样(与可视化接口的读取路径相同)
+
+运行方式(在backend目录下)：
+
+    python -m benchmarks.bench_pyramid [--samples 10000000] [--max-points 2000]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.simulation.downsample import DownsampleMode, downsample
+from app.simulation.storage import ColumnarResultStore, ResultPyramid, build_pyramid
+
+
+def timed(func, repeat: int) -> float:
+    """返回多次运行的最短耗时(毫秒)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(n: int, max_points: int, factor: int, repeat: int) -> None:
+    rng = np.random.default_rng(0)
+    t = np.arange(n, dtype=np.float64) * 0.01
+    data = {"v": -65.0 + rng.normal(0.0, 0.5, n), "w": np.sin(t)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ColumnarResultStore(tmp)
+        path = store.write(store.path_for("bench"), t, data)
+
+        stats = build_pyramid(path, factor=factor)
+        print(f"样本数: {n:,}  变量数: {len(data)}  层数: {stats['levels']}  各层桶数: {stats['bins']}")
+        print(f"构建耗时: {stats['build_seconds'] * 1000:.1f} ms")
+
+        reader = store.open(path)
+        pyramid = ResultPyramid(path)
+        duration = t[-1]
+        max_bins = max_points * factor // 2
+        for fraction in (1.0, 0.1, 0.01):
+            time_range = (duration * 0.3, duration * 0.3 + duration * fraction)
+
+            def read_raw():
+                times, values = reader.read(["v"], time_range)
+                downsample(times, values, max_points, DownsampleMode.MINMAX)
+
+            def read_lod():
+                times, values = pyramid.read(["v"], time_range, max_bins).envelope()
+                downsample(times, values, max_points, DownsampleMode.MINMAX)
+
+            print(
+                f"  窗口 {fraction:>5.0%}: raw {timed(read_raw, repeat):8.2f} ms  "
+                f"lod {timed(read_lod, repeat):8.3f} ms  "
+                f"(层级 {pyramid.select_level(time_range, max_bins)})"
+            )
+        pyramid.close()
+        reader.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="结果金字塔性能基准")
+    parser.add_argument("--samples", type=int, default=10_000_000)
+    parser.add_argument("--max-points", type=int, default=2000)
+    parser.add_argument("--factor", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.samples, args.max_points, args.factor, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
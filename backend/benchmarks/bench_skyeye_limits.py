@@ -0,0 +1,105 @@
+"""SkyEye资源隔离性能基准
+
+在混合负载下比较不施加资源上限和施加上限(内存上限、nice值)时：
+- 仿真吞吐量：短仿真和CPU密集的长仿真混合运行的总耗时
+- API响应：仿真运行期间事件循环中周期性的小段计算(模拟处理请求)的延迟
+
+默认使用测试用的SkyEye替身程序，spin参数模拟CPU密集的仿真。
+
+运行方式(在backend目录下)：
+
+    python -m benchmarks.bench_skyeye_limits [--runs 40] [--heavy 4] [--concurrency 4]
+"""
+
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from app.core.config import settings
+from app.simulation.engine import SimulationConfig
+from app.simulation.skyeye import SkyEyeAdapter
+
+
+FAKE_SKYEYE = Path(__file__).resolve().parent.parent / "tests" / "simulation" / "fake_skyeye.py"
+
+
+def make_config(steps: int, spin: float) -> SimulationConfig:
+    return SimulationConfig(
+        parameters={"spin": spin} if spin else {},
+        model_path="bench.mdl",
+        duration=steps * 0.001,
+        step_size=0.001,
+        output_variables=["v"]
+    )
+
+
+async def probe(latencies: List[float], done: asyncio.Event, work: float = 0.002, interval: float = 0.02) -> None:
+    """每隔interval秒在事件循环中做一小段计算，记录从计划时间到计算完成的延迟"""
+    while not done.is_set():
+        planned = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        until = time.perf_counter() + work
+        while time.perf_counter() < until:
+            pass
+        latencies.append(time.perf_counter() - planned)
+
+
+async def run_mixed(adapter: SkyEyeAdapter, args) -> None:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    configs = [make_config(args.steps, args.spin if i < args.heavy else 0.0) for i in range(args.runs)]
+
+    async def one(i: int, config: SimulationConfig) -> None:
+        async with semaphore:
+            result = await adapter.run_simulation(config, f"bench-{i}")
+            assert result.status == "completed", result.error_message
+
+    latencies: List[float] = []
+    done = asyncio.Event()
+    prober = asyncio.ensure_future(probe(latencies, done))
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i, config) for i, config in enumerate(configs)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+
+    lag = np.array(latencies) * 1000
+    print(
+        f"  吞吐量 {args.runs / elapsed:6.2f} 次/s (总耗时 {elapsed:6.2f} s)  "
+        f"API延迟 p50 {np.percentile(lag, 50):6.1f} ms  p99 {np.percentile(lag, 99):7.1f} ms  max {lag.max():7.1f} ms"
+    )
+
+
+async def bench(args) -> None:
+    for name, nice, memory in (("无上限", 0, 0), ("有上限", args.nice, args.memory_mb * 1024 * 1024)):
+        settings.SKYEYE_NICE = nice
+        settings.SKYEYE_MEMORY_LIMIT = memory
+        with tempfile.TemporaryDirectory() as tmp:
+            adapter = SkyEyeAdapter(skyeye_path=args.skyeye, mode="process")
+            adapter.results_dir = Path(tmp)
+            print(f"{name} (nice {nice}, 内存上限 {memory // (1024 * 1024)} MB)")
+            await run_mixed(adapter, args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SkyEye资源隔离性能基准")
+    parser.add_argument("--skyeye", default=str(FAKE_SKYEYE))
+    parser.add_argument("--runs", type=int, default=40)
+    parser.add_argument("--heavy", type=int, default=4, help="其中CPU密集的运行数")
+    parser.add_argument("--spin", type=float, default=1.0, help="CPU密集的运行空转的CPU秒数")
+    parser.add_argument("--steps", type=int, default=1000, help="每次运行的仿真步数")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--nice", type=int, default=5)
+    parser.add_argument("--memory-mb", type=int, default=512)
+    args = parser.parse_args()
+
+    print(f"SkyEye: {args.skyeye}，并发 {args.concurrency}")
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
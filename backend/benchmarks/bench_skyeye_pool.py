@@ -0,0 +1,78 @@
+"""SkyEye运行方式性能基准
+
+比较大量短仿真在两种运行方式下的总耗时：
+- process: 每次运行启动新的SkyEye进程并加载模型
+- daemon: 常驻工作进程池，模型只在每个工作进程中加载一次
+
+默认使用测试用的SkyEye替身程序，FAKE_SKYEYE_LOAD_DELAY模拟模型解析耗时。
+
+运行方式(在backend目录下)：
+
+    python -m benchmarks.bench_skyeye_pool [--runs 200] [--concurrency 4] [--load-delay 0.05]
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+from app.simulation.engine import SimulationConfig
+from app.simulation.pool import SkyEyePool
+from app.simulation.skyeye import SkyEyeAdapter
+
+
+FAKE_SKYEYE = Path(__file__).resolve().parent.parent / "tests" / "simulation" / "fake_skyeye.py"
+
+
+async def run_batch(adapter: SkyEyeAdapter, runs: int, concurrency: int, steps: int) -> float:
+    config = SimulationConfig(
+        parameters={},
+        model_path="bench.mdl",
+        duration=steps * 0.001,
+        step_size=0.001,
+        output_variables=["v"]
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            result = await adapter.run_simulation(config, f"bench-{i}")
+            assert result.status == "completed", result.error_message
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(runs)))
+    return time.perf_counter() - start
+
+
+async def bench(args) -> None:
+    os.environ["FAKE_SKYEYE_LOAD_DELAY"] = str(args.load_delay)
+    for mode in ("process", "daemon"):
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = SkyEyePool(args.skyeye, size=args.concurrency) if mode == "daemon" else None
+            adapter = SkyEyeAdapter(skyeye_path=args.skyeye, mode=mode, pool=pool)
+            adapter.results_dir = Path(tmp)
+            try:
+                elapsed = await run_batch(adapter, args.runs, args.concurrency, args.steps)
+            finally:
+                if pool is not None:
+                    await pool.close()
+            print(f"  {mode:<8} {args.runs} 次运行 耗时 {elapsed:6.2f} s  平均 {elapsed / args.runs * 1000:7.1f} ms/次")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SkyEye运行方式性能基准")
+    parser.add_argument("--skyeye", default=str(FAKE_SKYEYE))
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--steps", type=int, default=100, help="每次运行的仿真步数")
+    parser.add_argument("--load-delay", type=float, default=0.05, help="替身程序加载模型的耗时(秒)")
+    args = parser.parse_args()
+
+    print(f"SkyEye: {args.skyeye}，并发 {args.concurrency}")
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@
 使用Mock对象模拟仿真引擎，避免实际执行耗时的仿真计算。
 """
 
+import time
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from typing import Dict, Any, List
@@ -129,6 +130,26 @@ def test_create_simulation_task(client: TestClient, token_headers):
     assert "id" in data
 
 
+def test_create_task_rejects_spike_train_for_skyeye(client: TestClient, token_headers, monkeypatch):
+    """测试SkyEye引擎不接受放电事件输出，神经元网络引擎接受"""
+    task_data = {
+        "name": "放电任务",
+        "model_path": "test/model.skyeye",
+        "duration": 1.0,
+        "step_size": 0.1,
+        "output_variables": ["exc.v", "exc.spike_train"]
+    }
+    
+    monkeypatch.setattr(settings, "SIMULATION_ENGINE", "skyeye")
+    response = client.post(f"{settings.API_V1_STR}/simulation/task", headers=token_headers, json=task_data)
+    assert response.status_code == 400
+    assert "exc.spike_train" in response.json()["detail"]
+    
+    monkeypatch.setattr(settings, "SIMULATION_ENGINE", "neuron")
+    response = client.post(f"{settings.API_V1_STR}/simulation/task", headers=token_headers, json=task_data)
+    assert response.status_code == 200
+
+
 def test_get_simulation_task(client: TestClient, token_headers, mock_simulation_engine):
     """测试获取仿真任务"""
     # 先创建一个任务
@@ -268,4 +289,129 @@ def test_get_model_parameters(client: TestClient, token_headers, mock_simulation
     data = response.json()
     assert "parameters" in data
     assert "param1" in data["parameters"]
-    assert data["parameters"]["param1"]["default"] == 1.0
\ No newline at end of file
+    assert data["parameters"]["param1"]["default"] == 1.0
+
+def test_stream_simulation_result(client: TestClient, token_headers, db: Session, monkeypatch):
+    """测试实时结果流：未运行的任务直接返回end事件，排队中的任务等待结果流出现"""
+    task_data = {
+        "name": "测试任务",
+        "model_path": "test/model.skyeye",
+        "duration": 10.0,
+        "step_size": 0.1,
+        "output_variables": ["position"]
+    }
+    
+    create_response = client.post(
+        f"{settings.API_V1_STR}/simulation/task",
+        headers=token_headers,
+        json=task_data
+    )
+    task_id = create_response.json()["id"]
+    
+    response = client.get(
+        f"{settings.API_V1_STR}/simulation/{task_id}/stream",
+        headers=token_headers
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: end" in response.text
+    assert '"status": "pending"' in response.text
+    
+    # 排队中的任务还没有结果流，等待到超时后才返回end事件
+    from app.db.models.simulation import SimulationTask
+    monkeypatch.setattr(settings, "LIVE_STREAM_WAIT_SECONDS", 0.3)
+    monkeypatch.setattr(settings, "LIVE_TAIL_INTERVAL", 0.05)
+    db.query(SimulationTask).filter(SimulationTask.id == task_id).update({"status": "queued"})
+    db.commit()
+    started = time.monotonic()
+    response = client.get(
+        f"{settings.API_V1_STR}/simulation/{task_id}/stream",
+        headers=token_headers
+    )
+    assert time.monotonic() - started >= 0.3
+    assert "event: end" in response.text
+    assert '"status": "queued"' in response.text
+
+
+def test_get_simulation_logs(client: TestClient, token_headers, tmp_path, monkeypatch):
+    """测试按偏移量分页读取任务的输出日志"""
+    monkeypatch.setattr(settings, "SIMULATION_RESULTS_DIR", str(tmp_path))
+    task_data = {
+        "name": "测试任务",
+        "model_path": "test/model.skyeye",
+        "duration": 10.0,
+        "step_size": 0.1,
+        "output_variables": ["position"]
+    }
+    
+    create_response = client.post(
+        f"{settings.API_V1_STR}/simulation/task",
+        headers=token_headers,
+        json=task_data
+    )
+    task_id = create_response.json()["id"]
+    
+    response = client.get(f"{settings.API_V1_STR}/simulation/{task_id}/logs", headers=token_headers)
+    assert response.status_code == 200
+    assert response.json()["size"] == 0
+    
+    (tmp_path / task_id).mkdir()
+    (tmp_path / task_id / "stderr.log").write_text("first line\nsecond line\n")
+    response = client.get(
+        f"{settings.API_V1_STR}/simulation/{task_id}/logs",
+        headers=token_headers,
+        params={"stream": "stderr", "offset": 0, "limit": 15}
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert page["data"] == "first line\n"
+    assert page["next_offset"] == 11 and not page["eof"]
+    
+    response = client.get(
+        f"{settings.API_V1_STR}/simulation/{task_id}/logs",
+        headers=token_headers,
+        params={"stream": "console"}
+    )
+    assert response.status_code == 422
+
+
+def test_admission_control(client: TestClient, token_headers, monkeypatch):
+    """测试按预计代价拒绝任务并给出抽取输出的建议"""
+    monkeypatch.setattr(settings, "SIMULATION_MAX_OUTPUT_BYTES", 1024 ** 3)
+    task_data = {
+        "name": "超大任务",
+        "model_path": "test/model.skyeye",
+        "duration": 1e6,
+        "step_size": 1e-3,
+        "output_variables": ["position", "velocity"]
+    }
+    
+    response = client.post(f"{settings.API_V1_STR}/simulation/estimate", headers=token_headers, json=task_data)
+    assert response.status_code == 200
+    estimate = response.json()
+    assert estimate["steps"] == 10 ** 9
+    assert estimate["output_bytes"] == (10 ** 9 + 1) * 3 * 8
+    assert estimate["decision"] == "reject"
+    assert estimate["suggestion"]["output_stride"] == 23
+    assert estimate["suggestion"]["output_bytes"] <= 1024 ** 3
+    
+    response = client.post(f"{settings.API_V1_STR}/simulation/task", headers=token_headers, json=task_data)
+    assert response.status_code == 400
+    assert response.json()["detail"]["estimate"]["decision"] == "reject"
+    
+    task_data["duration"] = 10.0
+    response = client.post(f"{settings.API_V1_STR}/simulation/task", headers=token_headers, json=task_data)
+    assert response.status_code == 200
+    task_id = response.json()["id"]
+    
+    # 上限在创建后降低时，运行前再次检查
+    monkeypatch.setattr(settings, "SIMULATION_MAX_STEPS", 1000)
+    response = client.post(f"{settings.API_V1_STR}/simulation/{task_id}/run", headers=token_headers)
+    assert response.status_code == 400
+    assert "步数" in response.json()["detail"]["message"]
+    assert client.get(f"{settings.API_V1_STR}/simulation/{task_id}", headers=token_headers).json()["status"] == "pending"
+    
+    task_data["step_size"] = 0.0
+    response = client.post(f"{settings.API_V1_STR}/simulation/estimate", headers=token_headers, json=task_data)
+    assert response.status_code == 400
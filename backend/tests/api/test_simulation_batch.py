@@ -0,0 +1,148 @@
+"""批量仿真API测试模块
+
+测试参数扫描批量仿真，包括：
+- 展开为子任务并一次性插入
+- 子任务提交到调度器
+- 结果索引汇总各次运行的摘要
+- 参数校验和权限
+
+子任务的提交被替换为记录，执行时使用模拟的仿真引擎。
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db.models.simulation import SimulationTask
+from app.services.simulation import SimulationService
+from app.simulation.engine import SimulationEngine, SimulationConfig, SimulationResult
+
+
+BATCH_URL = f"{settings.API_V1_STR}/simulation/batch"
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """记录提交到调度器的任务"""
+    tasks = []
+    
+    async def fake_enqueue(self, task_id: str, user_id: str, priority: int = 0):
+        tasks.append((task_id, priority))
+        return len(tasks)
+    
+    monkeypatch.setattr(SimulationService, "enqueue_task", fake_enqueue)
+    return tasks
+
+
+def batch_payload(**sweep) -> dict:
+    return {
+        "name": "扫描",
+        "model_path": "test/model.skyeye",
+        "parameters": {"control_params": {"gain": 1.0, "bias": 0.0}},
+        "duration": 1.0,
+        "step_size": 0.1,
+        "output_variables": ["position"],
+        "sweep": sweep,
+        "priority": 2
+    }
+
+
+def fake_engine() -> MagicMock:
+    engine = MagicMock(spec=SimulationEngine)
+    
+    async def run_simulation(config: SimulationConfig, task_id: str) -> SimulationResult:
+        gain = config.parameters["control_params"]["gain"]
+        return SimulationResult(
+            task_id=task_id,
+            status="completed",
+            data={"position": [0.0, gain, 2 * gain]},
+            time_points=[0.0, 0.1, 0.2],
+            metadata={}
+        )
+    
+    engine.run_simulation.side_effect = run_simulation
+    return engine
+
+
+def test_create_batch_and_index(client: TestClient, token_headers, db, submitted, tmp_path, monkeypatch):
+    """测试创建批量仿真并生成结果索引"""
+    monkeypatch.setenv("SIMULATION_RESULTS_DIR", str(tmp_path))
+    payload = batch_payload(mode="grid", parameters={"control_params.gain": {"values": [1.0, 2.0, 3.0]}})
+    response = client.post(BATCH_URL, headers=token_headers, json=payload)
+    
+    assert response.status_code == 200
+    batch = response.json()
+    assert batch["task_count"] == 3
+    assert batch["status"] == "queued"
+    assert batch["status_counts"] == {"queued": 3}
+    assert [priority for _, priority in submitted] == [2, 2, 2]
+    
+    tasks = db.query(SimulationTask).filter(SimulationTask.batch_id == batch["id"]).order_by(SimulationTask.batch_index).all()
+    assert [task.id for task in tasks] == [task_id for task_id, _ in submitted]
+    assert [task.parameters["control_params"] for task in tasks] == [
+        {"gain": 1.0, "bias": 0.0}, {"gain": 2.0, "bias": 0.0}, {"gain": 3.0, "bias": 0.0}
+    ]
+    
+    # 执行前两个子任务
+    service = SimulationService(db, simulation_engine=fake_engine())
+    for task in tasks[:2]:
+        asyncio.run(service.execute_task(task.id))
+    
+    response = client.get(f"{BATCH_URL}/{batch['id']}/index", headers=token_headers)
+    assert response.status_code == 200
+    index = response.json()
+    assert index["swept_parameters"] == ["control_params.gain"]
+    assert index["status_counts"] == {"completed": 2, "queued": 1}
+    runs = index["runs"]
+    assert [run["sweep_values"] for run in runs] == [{"control_params.gain": g} for g in (1.0, 2.0, 3.0)]
+    assert runs[1]["summary"]["variables"]["position"] == {"min": 0.0, "max": 4.0, "mean": 2.0, "last": 4.0}
+    assert runs[2]["summary"] is None
+    
+    response = client.get(f"{BATCH_URL}/{batch['id']}", headers=token_headers)
+    assert response.json()["status"] == "queued"
+
+
+def test_create_batch_lhs(client: TestClient, token_headers, submitted):
+    """测试拉丁超立方采样的批量仿真"""
+    payload = batch_payload(mode="lhs", samples=8, seed=3, parameters={
+        "control_params.gain": {"low": 0.5, "high": 1.5},
+        "control_params.bias": {"values": [-1, 0, 1]}
+    })
+    response = client.post(BATCH_URL, headers=token_headers, json=payload)
+    
+    assert response.status_code == 200
+    assert response.json()["task_count"] == 8
+    assert len(submitted) == 8
+
+
+def test_create_batch_invalid(client: TestClient, token_headers, submitted, monkeypatch):
+    """测试无效的扫描定义"""
+    # 随机采样缺少samples
+    payload = batch_payload(mode="random", parameters={"control_params.gain": {"low": 0.0, "high": 1.0}})
+    assert client.post(BATCH_URL, headers=token_headers, json=payload).status_code == 400
+    
+    # 参数范围不完整
+    payload = batch_payload(mode="grid", parameters={"control_params.gain": {"low": 0.0}})
+    assert client.post(BATCH_URL, headers=token_headers, json=payload).status_code == 422
+    
+    # 超过运行数上限
+    monkeypatch.setattr(settings, "SIMULATION_BATCH_MAX_RUNS", 4)
+    payload = batch_payload(mode="grid", parameters={
+        "a": {"values": [1, 2, 3]},
+        "b": {"values": [1, 2]}
+    })
+    assert client.post(BATCH_URL, headers=token_headers, json=payload).status_code == 400
+    assert submitted == []
+
+
+def test_batch_permissions(client: TestClient, token_headers, superuser_token_headers, submitted):
+    """测试批量仿真的访问权限"""
+    payload = batch_payload(mode="grid", parameters={"control_params.gain": {"values": [1.0]}})
+    batch_id = client.post(BATCH_URL, headers=superuser_token_headers, json=payload).json()["id"]
+    
+    assert client.get(f"{BATCH_URL}/{batch_id}", headers=token_headers).status_code == 403
+    assert client.get(f"{BATCH_URL}/{batch_id}", headers=superuser_token_headers).status_code == 200
+    assert client.get(f"{BATCH_URL}/missing", headers=token_headers).status_code == 404
@@ -1,10 +1,13 @@
+import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.db.models.simulation import SimulationTask
 from app.simulation.engine import SimulationResult
+from app.simulation.storage import ColumnarResultStore, SpikeEventWriter, spike_events_path
 
 
 @pytest.fixture
@@ -85,4 +88,198 @@ def test_get_visualization_templates(client: TestClient, token_headers):
     scatter_chart = next((t for t in templates if t["id"] == "scatter_chart"), None)
     assert scatter_chart is not None
     assert scatter_chart["name"] == "散点图"
-    assert scatter_chart["chart_type"] == "scatter" 
\ No newline at end of file
+    assert scatter_chart["chart_type"] == "scatter" 
+
+def test_get_visualization_data_invalid_time_range(client: TestClient, token_headers):
+    """测试无效的时间范围参数"""
+    task_data = {
+        "name": "测试任务",
+        "model_path": "test/model.skyeye",
+        "duration": 10.0,
+        "step_size": 0.1,
+        "output_variables": ["position"]
+    }
+    
+    create_response = client.post(
+        f"{settings.API_V1_STR}/simulation/task",
+        headers=token_headers,
+        json=task_data
+    )
+    task_id = create_response.json()["id"]
+    
+    response = client.get(
+        f"{settings.API_V1_STR}/visualization/data/{task_id}",
+        headers=token_headers,
+        params={"time_range": [5.0, 1.0]}
+    )
+    
+    assert response.status_code == 400
+
+
+def test_get_spike_raster(client: TestClient, token_headers, tmp_path, db: Session, monkeypatch):
+    """测试栅格图接口读取任务的放电事件文件并分页"""
+    # 只有神经元引擎记录放电事件
+    monkeypatch.setattr(settings, "SIMULATION_ENGINE", "neuron")
+    task_data = {
+        "name": "放电任务",
+        "model_path": "network.json",
+        "duration": 10.0,
+        "step_size": 0.1,
+        "output_variables": ["exc.spike_train"]
+    }
+    create_response = client.post(
+        f"{settings.API_V1_STR}/simulation/task",
+        headers=token_headers,
+        json=task_data
+    )
+    task_id = create_response.json()["id"]
+    
+    response = client.get(f"{settings.API_V1_STR}/visualization/spikes/{task_id}/raster", headers=token_headers)
+    assert response.status_code == 400
+    
+    result_path = tmp_path / "results.col"
+    with SpikeEventWriter(spike_events_path(result_path), {"exc": 4}, 0.1) as writer:
+        writer.append("exc", np.array([1, 1, 2, 5, 5, 5]), np.array([0, 3, 2, 0, 1, 2]))
+        writer.n_steps = 100
+    task = db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
+    task.result_path = str(result_path)
+    db.commit()
+    
+    response = client.get(
+        f"{settings.API_V1_STR}/visualization/spikes/{task_id}/raster",
+        headers=token_headers,
+        params={"max_events": 4}
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert page["neurons"] == [0, 3, 2]
+    assert page["total_events"] == 6
+    assert page["truncated"] and page["next_time"] == 0.5
+    
+    response = client.get(
+        f"{settings.API_V1_STR}/visualization/spikes/{task_id}/psth",
+        headers=token_headers,
+        params={"bin_size": 5.0}
+    )
+    assert response.status_code == 200
+    assert response.json()["counts"] == [6, 0]
+    
+    response = client.get(
+        f"{settings.API_V1_STR}/visualization/spikes/{task_id}/rates",
+        headers=token_headers,
+        params={"neuron_range": [3, 1]}
+    )
+    assert response.status_code == 400
+    
+    response = client.get(f"{settings.API_V1_STR}/visualization/spikes/missing-task", headers=token_headers)
+    assert response.status_code == 404
+
+
+def test_get_analysis(client: TestClient, token_headers, tmp_path, db: Session):
+    """测试分析接口计算统计量并命中缓存"""
+    task_data = {
+        "name": "分析任务",
+        "model_path": "test/model.skyeye",
+        "duration": 10.0,
+        "step_size": 0.01,
+        "output_variables": ["position", "velocity"]
+    }
+    create_response = client.post(
+        f"{settings.API_V1_STR}/simulation/task",
+        headers=token_headers,
+        json=task_data
+    )
+    task_id = create_response.json()["id"]
+    
+    response = client.get(f"{settings.API_V1_STR}/visualization/analysis/{task_id}", headers=token_headers)
+    assert response.status_code == 400
+    
+    t = np.arange(0, 10.0, 0.01)
+    result_path = ColumnarResultStore(tmp_path).write(
+        tmp_path / "analysis.col", t, {"position": np.sin(2 * np.pi * 5 * t), "velocity": t, "extra": t}
+    )
+    task = db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
+    task.result_path = str(result_path)
+    db.commit()
+    
+    params = {"op": "stats", "time_range": [0.0, 5.0], "percentiles": [50]}
+    response = client.get(f"{settings.API_V1_STR}/visualization/analysis/{task_id}", headers=token_headers, params=params)
+    assert response.status_code == 200
+    analysis = response.json()
+    assert set(analysis["results"]) == {"position", "velocity"}
+    assert analysis["results"]["velocity"]["max"] == 5.0
+    assert analysis["results"]["velocity"]["percentiles"]["50"] == 2.5
+    
+    response = client.get(f"{settings.API_V1_STR}/visualization/analysis/{task_id}", headers=token_headers, params=params)
+    assert response.json()["cache_hits"] == 2
+    
+    response = client.get(
+        f"{settings.API_V1_STR}/visualization/analysis/{task_id}",
+        headers=token_headers,
+        params={"op": "spectrum", "variables": ["position"], "segment": 256}
+    )
+    assert response.status_code == 200
+    assert abs(response.json()["results"]["position"]["peak_frequency"] - 5.0) < 0.5
+    
+    response = client.get(
+        f"{settings.API_V1_STR}/visualization/analysis/{task_id}",
+        headers=token_headers,
+        params={"op": "xcorr", "variables": ["position"]}
+    )
+    assert response.status_code == 400
+
+
+def test_compare_results(client: TestClient, token_headers, tmp_path, db: Session):
+    """测试多任务比较接口对齐时间轴并计算差值"""
+    task_data = {
+        "name": "比较任务",
+        "model_path": "test/model.skyeye",
+        "duration": 10.0,
+        "step_size": 0.1,
+        "output_variables": ["position"]
+    }
+    store = ColumnarResultStore(tmp_path)
+    task_ids = []
+    for i, step in enumerate((0.1, 0.2, 0.5)):
+        task_id = client.post(f"{settings.API_V1_STR}/simulation/task", headers=token_headers, json=task_data).json()["id"]
+        t = np.arange(0.0, 10.0 + step / 2, step)
+        task = db.query(SimulationTask).filter(SimulationTask.id == task_id).first()
+        task.result_path = str(store.write(tmp_path / f"{task_id}.col", t, {"position": t + i}))
+        task_ids.append(task_id)
+    missing_result = client.post(f"{settings.API_V1_STR}/simulation/task", headers=token_headers, json=task_data).json()["id"]
+    db.commit()
+    
+    response = client.post(
+        f"{settings.API_V1_STR}/visualization/compare",
+        headers=token_headers,
+        json={"task_ids": task_ids + [missing_result], "variable": "position", "mode": "diff", "points": 11}
+    )
+    assert response.status_code == 200
+    comparison = response.json()
+    assert comparison["baseline"] == task_ids[0]
+    assert comparison["time_points"] == [float(i) for i in range(11)]
+    assert comparison["series"][task_ids[2]] == [2.0] * 11
+    assert comparison["statistics"][task_ids[1]]["rms"] == 1.0
+    assert list(comparison["errors"]) == [missing_result]
+    
+    response = client.post(
+        f"{settings.API_V1_STR}/visualization/compare",
+        headers=token_headers,
+        json={"task_ids": task_ids, "variable": "position", "time_range": [2.0, 4.0], "points": 3}
+    )
+    assert response.status_code == 200
+    assert response.json()["series"][task_ids[1]] == [3.0, 4.0, 5.0]
+    
+    response = client.post(
+        f"{settings.API_V1_STR}/visualization/compare",
+        headers=token_headers,
+        json={"task_ids": task_ids, "variable": "position", "mode": "diff", "baseline": missing_result}
+    )
+    assert response.status_code == 400
+    
+    response = client.post(
+        f"{settings.API_V1_STR}/visualization/compare",
+        headers=token_headers,
+        json={"task_ids": ["missing-task"], "variable": "position"}
+    )
+    assert response.status_code == 404
@@ -0,0 +1,3 @@
+"""
+仿真模块测试
+"""
@@ -0,0 +1,18 @@
+"""仿真模块测试固件"""
+
+from pathlib import Path
+
+import pytest
+
+from app.simulation.skyeye import SkyEyeAdapter
+
+
+FAKE_SKYEYE = Path(__file__).parent / "fake_skyeye.py"
+
+
+@pytest.fixture
+def fake_skyeye(tmp_path, monkeypatch) -> SkyEyeAdapter:
+    """使用SkyEye替身程序、结果写入临时目录的适配器"""
+    adapter = SkyEyeAdapter(skyeye_path=str(FAKE_SKYEYE))
+    adapter.results_dir = tmp_path
+    return adapter
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""测试用的SkyEye替身程序
+
+支持与SkyEye相同的命令行参数，按步长逐行写出结果CSV，用于在没有SkyEye的环境下测试适配器。
+以下仿真参数用于控制替身行为：
+- delay: 每写出一批行后暂停的秒数
+- batch: 每批写出的行数
+- fail: 非0时以该值作为退出码退出
+- chatter: 每批写到stdout的日志行数
+- tau: 状态变量x的时间常数，x以一阶惯性趋近gain，输出变量x即为该状态
+- crash_at/crash_marker: 仿真时间达到crash_at时异常退出，marker文件存在时不再退出(模拟一次崩溃)
+- allocate: 开始仿真前分配的内存(MB)，用于测试内存上限
+- spin: 开始仿真前空转的CPU秒数，用于测试CPU时间上限
+- ignore_sigxcpu: 非0时忽略SIGXCPU，超过CPU时间的硬上限时由内核以SIGKILL终止
+
+--output-interval为输出间隔，第i步输出当且仅当i是输出步数的整数倍；
+--output-var-interval var=间隔为变量的记录间隔，未记录的行该变量留空。
+
+检查点写入--checkpoint-dir，内容为步数、时间和状态x，--restore从检查点继续并追加结果，
+--initial-state只取状态x、时间从0开始。
+
+--serve以守护模式运行：逐行读取JSON请求并在进程内执行，已加载的模型不再重复加载，
+运行期间的输出逐条以{"id", "stream", "data"}发送。
+环境变量FAKE_SKYEYE_LOAD_DELAY为加载一个模型的耗时(秒)，响应中的model_loads为本进程加载模型的次数。
+"""
+
+import io
+import os
+import sys
+import json
+import math
+import time
+import signal
+import argparse
+import contextlib
+
+
+LOADED_MODELS = set()
+MODEL_LOADS = 0
+
+
+def load_model(path: str, keep: bool) -> None:
+    global MODEL_LOADS
+    if path in LOADED_MODELS:
+        return
+    time.sleep(float(os.environ.get("FAKE_SKYEYE_LOAD_DELAY", "0")))
+    MODEL_LOADS += 1
+    if keep:
+        LOADED_MODELS.add(path)
+
+
+def write_state(path: str, step: int, t: float, x: float) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"step": step, "time": t, "x": x}, f)
+    os.replace(tmp, path)
+
+
+def main(argv=None, keep_models: bool = False) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--info")
+    parser.add_argument("--model")
+    parser.add_argument("--duration", type=float)
+    parser.add_argument("--step", type=float)
+    parser.add_argument("--output")
+    parser.add_argument("--param", action="append", default=[])
+    parser.add_argument("--output-var", action="append", default=[])
+    parser.add_argument("--checkpoint-dir")
+    parser.add_argument("--checkpoint-interval", type=float)
+    parser.add_argument("--restore")
+    parser.add_argument("--append", action="store_true")
+    parser.add_argument("--initial-state")
+    parser.add_argument("--output-interval", type=float)
+    parser.add_argument("--output-var-interval", action="append", default=[])
+    parser.add_argument("--serve", action="store_true")
+    args, _ = parser.parse_known_args(argv)
+
+    if args.serve:
+        return serve()
+
+    load_model(args.info or args.model, keep_models)
+    if args.info:
+        print(json.dumps({"name": args.info, "parameters": {"gain": {"type": "float", "default": 1.0}}, "outputs": ["v", "u"]}))
+        return 0
+
+    params = dict(p.split("=", 1) for p in args.param)
+    delay = float(params.get("delay", 0))
+    batch = int(params.get("batch", 100))
+    chatter = int(params.get("chatter", 0))
+    gain = float(params.get("gain", 1.0))
+    tau = float(params.get("tau", 1.0))
+    crash_at = float(params.get("crash_at", -1))
+    crash_marker = params.get("crash_marker")
+
+    ballast = bytearray(int(float(params.get("allocate", 0)) * 1024 * 1024))
+    if int(params.get("ignore_sigxcpu", 0)):
+        signal.signal(signal.SIGXCPU, signal.SIG_IGN)
+    spin_until = time.process_time() + float(params.get("spin", 0))
+    while time.process_time() < spin_until:
+        pass
+
+    steps = int(round(args.duration / args.step))
+    variables = args.output_var or ["v"]
+    first, x = 0, 0.0
+    if args.restore:
+        with open(args.restore) as f:
+            state = json.load(f)
+        first, x = state["step"] + 1, state["x"]
+    elif args.initial_state:
+        with open(args.initial_state) as f:
+            x = json.load(f)["x"]
+    every = max(1, int(round(args.checkpoint_interval / args.step))) if args.checkpoint_interval else 0
+    output_every = max(1, int(round(args.output_interval / args.step))) if args.output_interval else 1
+    var_every = {var: 1 for var in variables}
+    for item in args.output_var_interval:
+        var, interval = item.split("=", 1)
+        var_every[var] = max(1, int(round(float(interval) / args.step)))
+
+    with open(args.output, "a" if args.append else "w") as f:
+        if not args.append:
+            f.write(",".join(["time"] + variables) + "\n")
+        for i in range(first, steps + 1):
+            t = i * args.step
+            if i > 0:
+                x += args.step * (gain - x) / tau
+            if i % output_every == 0:
+                row = [repr(t)] + [
+                    repr(x if var == "x" else gain * math.sin(t + k)) if i % var_every[var] == 0 else ""
+                    for k, var in enumerate(variables)
+                ]
+                f.write(",".join(row) + "\n")
+            if args.checkpoint_dir and every and i % every == 0 and i < steps:
+                f.flush()
+                write_state(os.path.join(args.checkpoint_dir, f"checkpoint_{i:012d}.state"), i, t, x)
+            if 0 <= crash_at <= t and not (crash_marker and os.path.exists(crash_marker)):
+                if crash_marker:
+                    open(crash_marker, "w").close()
+                f.flush()
+                print("simulated crash", file=sys.stderr)
+                os._exit(3)
+            if (i + 1) % batch == 0:
+                f.flush()
+                for _ in range(chatter):
+                    print(f"step {i} t={t}")
+                sys.stdout.flush()
+                if delay:
+                    time.sleep(delay)
+
+    fail = int(params.get("fail", 0))
+    if args.checkpoint_dir and not fail:
+        write_state(os.path.join(args.checkpoint_dir, "final.state"), steps, steps * args.step, x)
+    if fail:
+        print("simulated failure", file=sys.stderr)
+    return fail
+
+
+class OutputStream(io.TextIOBase):
+    """把运行期间的输出逐条发送给进程池"""
+
+    def __init__(self, protocol, request_id: int, name: str):
+        self.protocol = protocol
+        self.request_id = request_id
+        self.name = name
+
+    def write(self, data: str) -> int:
+        if data:
+            self.protocol.write(json.dumps({"id": self.request_id, "stream": self.name, "data": data}) + "\n")
+            self.protocol.flush()
+        return len(data)
+
+
+def serve() -> int:
+    protocol = sys.stdout
+    for line in sys.stdin:
+        request = json.loads(line)
+        stdout = OutputStream(protocol, request["id"], "stdout")
+        stderr = OutputStream(protocol, request["id"], "stderr")
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            returncode = main(request["args"], keep_models=True)
+        protocol.write(json.dumps({"id": request["id"], "returncode": returncode, "model_loads": MODEL_LOADS}) + "\n")
+        protocol.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
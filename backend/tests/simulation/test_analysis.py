@@ -0,0 +1,124 @@
+"""仿真结果分析测试模块
+
+测试服务端分析，包括：
+- 分块合并的描述统计与NumPy一致，忽略NaN
+- 功率谱峰值位于信号频率，按时间单位换算为Hz
+- 互相关的峰值滞后等于信号的平移
+- 按阈值上穿和按事件数计算的事件率
+- 分析结果按样本窗口缓存，结果文件变化后不再命中
+"""
+
+import numpy as np
+import pytest
+
+from app.simulation.analysis import (
+    AnalysisCache,
+    AnalysisOperation,
+    analyze,
+    cross_correlation,
+    describe,
+    event_rate,
+    power_spectrum
+)
+from app.simulation.storage import ColumnarResultStore, open_result
+
+
+def test_describe_matches_numpy():
+    """测试分块合并的均值和标准差"""
+    rng = np.random.default_rng(0)
+    values = rng.normal(1e6, 3.0, 10_001)
+    values[[5, 700]] = np.nan
+    valid = values[~np.isnan(values)]
+
+    stats = describe(values, percentiles=[50, 99.5], chunk_samples=1000)
+    assert stats["count"] == 9999 and stats["nan"] == 2
+    assert stats["mean"] == pytest.approx(valid.mean(), rel=1e-12)
+    assert stats["std"] == pytest.approx(valid.std(), rel=1e-9)
+    assert stats["min"] == valid.min() and stats["max"] == valid.max()
+    assert stats["percentiles"]["50"] == pytest.approx(np.median(valid))
+    assert set(stats["percentiles"]) == {"50", "99.5"}
+
+    empty = describe(np.full(3, np.nan))
+    assert empty["count"] == 0 and empty["mean"] is None
+
+
+def test_power_spectrum_peak():
+    """测试40Hz正弦信号的功率谱峰值，时间单位为毫秒"""
+    t = np.arange(0, 2000, 0.5)
+    values = np.sin(2 * np.pi * 0.04 * t) + 0.1 * np.random.default_rng(1).standard_normal(t.shape[0])
+
+    spectrum = power_spectrum(t, values, time_scale=1e-3, segment=1024)
+    assert spectrum["segment_length"] == 1024
+    assert spectrum["segments"] == 6
+    assert spectrum["resolution"] == pytest.approx(2000 / 1024)
+    assert spectrum["peak_frequency"] == pytest.approx(40.0, abs=spectrum["resolution"])
+    # 帕塞瓦尔定理：功率谱积分约等于方差
+    assert np.sum(spectrum["power"]) * spectrum["resolution"] == pytest.approx(values.var(), rel=0.1)
+
+    with pytest.raises(ValueError):
+        power_spectrum(t[:3], values[:3])
+
+
+def test_cross_correlation_lag():
+    """测试平移信号的互相关峰值滞后，包括不等间隔的时间轴"""
+    rng = np.random.default_rng(2)
+    signal = np.convolve(rng.standard_normal(3000), np.ones(5) / 5, mode="same")
+    t = np.arange(2000) * 0.1
+    reference, delayed = signal[100:2100], signal[70:2070]
+
+    result = cross_correlation(t, delayed, reference, max_lag=5.0)
+    assert len(result["lags"]) == 101
+    assert result["peak_lag"] == pytest.approx(3.0)
+    assert result["peak_correlation"] == pytest.approx(1.0, abs=0.05)
+    assert cross_correlation(t, reference, reference)["peak_correlation"] == pytest.approx(1.0)
+
+    jittered = t + np.r_[0.0, rng.uniform(-0.01, 0.01, 1998), 0.0]
+    assert cross_correlation(jittered, delayed, reference, max_lag=5.0)["peak_lag"] == pytest.approx(3.0, abs=0.05)
+
+
+def test_event_rate():
+    """测试按阈值上穿和按每个样本的事件数计算事件率"""
+    t = np.arange(0, 1000.0, 1.0)
+    v = np.full(t.shape[0], -65.0)
+    v[[100, 101, 300, 500, 700]] = 20.0
+
+    crossings = event_rate(t, v, time_scale=1e-3, threshold=0.0)
+    assert crossings["events"] == 4
+    assert crossings["rate"] == pytest.approx(4 / 0.999)
+    assert crossings["mean_interval"] == pytest.approx(0.2)
+    assert crossings["cv_interval"] == pytest.approx(0.0)
+
+    counts = np.zeros(t.shape[0])
+    counts[[0, 10, 20]] = [5, 2, 3]
+    assert event_rate(t, counts, time_scale=1e-3)["events"] == 5
+
+
+def test_analyze_cache(tmp_path):
+    """测试分析结果按样本窗口缓存，键包含结果文件版本"""
+    store = ColumnarResultStore(tmp_path)
+    t = np.arange(0, 100.0, 0.1)
+    path = store.write(tmp_path / "a.col", t, {"x": np.sin(t), "y": np.cos(t)}, metadata={"time_unit": "ms"})
+    cache = AnalysisCache(max_entries=3)
+
+    with open_result(path) as reader:
+        first = analyze(reader, "stats", ["x", "y"], (10.0, 20.0), cache=cache, cache_prefix=("a", 1))
+        assert first["cache_hits"] == 0
+        assert first["samples"] == 101 and first["time_unit"] == "ms"
+        # 落在同一组样本上的时间范围命中缓存
+        again = analyze(reader, "stats", ["x"], (9.99, 20.01), cache=cache, cache_prefix=("a", 1))
+        assert again["cache_hits"] == 1
+        assert again["results"]["x"] == first["results"]["x"]
+        assert analyze(reader, "stats", ["x"], (9.99, 20.01), cache=cache, cache_prefix=("a", 2))["cache_hits"] == 0
+        assert analyze(reader, "stats", ["x"], (10.0, 20.0), {"percentiles": [50]}, cache, ("a", 1))["cache_hits"] == 0
+
+        xcorr = analyze(reader, AnalysisOperation.XCORR, ["x"], options={"reference": "y", "max_lag": 1.0})
+        assert len(xcorr["results"]["x"]["lags"]) == 21
+        with pytest.raises(ValueError):
+            analyze(reader, "xcorr", ["x"])
+        with pytest.raises(ValueError):
+            analyze(reader, "stats", ["missing"])
+        with pytest.raises(ValueError):
+            analyze(reader, "stats", time_range=(200.0, 300.0))
+
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["hits"] == 1
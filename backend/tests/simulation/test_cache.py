@@ -0,0 +1,218 @@
+"""仿真结果缓存测试模块
+
+测试内容寻址的结果缓存，包括：
+- 缓存键只取决于模型内容和规范化的配置
+- 输出变量为子集时命中
+- 按大小的LRU淘汰和命中统计
+- 仿真服务命中缓存时不运行仿真，结果的金字塔一并复用
+- 仿真服务在线程中访问缓存，不阻塞事件循环
+"""
+
+import asyncio
+import threading
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.db.models.simulation import SimulationTask, SimulationResult as ResultRecord
+from app.services.simulation import SimulationService
+from app.simulation.cache import ResultCache
+from app.simulation.engine import SimulationConfig, SimulationEngine, SimulationResult
+from app.simulation.storage import ColumnarResultStore, ResultPyramid
+from app.simulation.storage.pyramid import pyramid_dir
+
+
+def make_config(model_path: str, **parameters) -> SimulationConfig:
+    return SimulationConfig(
+        parameters=parameters or {"gain": 1.0, "nested": {"a": 1, "b": 2}},
+        model_path=model_path,
+        duration=1.0,
+        step_size=0.1,
+        output_variables=["position"]
+    )
+
+
+def write_result(path, variables, samples: int = 10):
+    time_points = [i * 0.1 for i in range(samples)]
+    data = {var: [float(i) for i in range(samples)] for var in variables}
+    return ColumnarResultStore(path.parent).write(path, time_points, data)
+
+
+@pytest.fixture
+def model(tmp_path):
+    path = tmp_path / "model.skyeye"
+    path.write_text("neuron lif\n")
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / "cache", max_bytes=1 << 30, models_dir=tmp_path)
+
+
+def test_cache_key(cache, model):
+    """测试缓存键由模型内容和规范化配置决定"""
+    key = cache.key_for(make_config(str(model)))
+    
+    # 参数顺序、整数值的浮点数和输出变量不影响缓存键
+    reordered = make_config("model.skyeye", nested={"b": 2.0, "a": 1}, gain=1)
+    reordered.output_variables = ["velocity"]
+    assert cache.key_for(reordered) == key
+    
+    assert cache.key_for(make_config(str(model), gain=2.0, nested={"a": 1, "b": 2})) != key
+    assert cache.key_for(make_config(str(model)), engine="other") != key
+    assert cache.key_for(make_config("missing.skyeye")) is None
+    
+    model.write_text("neuron izhikevich\n")
+    assert cache.key_for(make_config(str(model))) != key
+
+
+def test_lookup_subset(cache, tmp_path):
+    """测试请求变量为缓存结果的子集时命中"""
+    path = write_result(tmp_path / "run" / "a.col", ["position", "velocity"])
+    assert cache.store("key", path, ["position", "velocity"], task_id="a")
+    
+    entry = cache.lookup("key", ["velocity"])
+    assert entry is not None and entry["task_id"] == "a"
+    assert cache.lookup("key", ["position", "force"]) is None
+    assert cache.lookup("other", ["position"]) is None
+    
+    target = cache.link(entry, tmp_path / "b.col")
+    assert target.read_bytes() == path.read_bytes()
+    
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_lru_eviction(tmp_path):
+    """测试超过大小上限时淘汰最久未访问的条目"""
+    paths = [write_result(tmp_path / "run" / f"{i}.col", ["x"], samples=1000) for i in range(3)]
+    size = paths[0].stat().st_size
+    cache = ResultCache(tmp_path / "cache", max_bytes=2 * size)
+    
+    cache.store("k0", paths[0], ["x"])
+    cache.store("k1", paths[1], ["x"])
+    assert cache.lookup("k0", ["x"]) is not None
+    cache.store("k2", paths[2], ["x"])
+    
+    assert cache.lookup("k1", ["x"]) is None
+    assert cache.lookup("k0", ["x"]) is not None
+    assert cache.lookup("k2", ["x"]) is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["size_bytes"] <= 2 * size
+    
+    # 淘汰缓存条目不影响已有的结果文件
+    assert all(path.exists() for path in paths)
+
+
+def counting_engine(samples: int = 3):
+    calls = []
+    engine = MagicMock(spec=SimulationEngine)
+    
+    async def run_simulation(config: SimulationConfig, task_id: str) -> SimulationResult:
+        calls.append(task_id)
+        return SimulationResult(
+            task_id=task_id,
+            status="completed",
+            data={"position": [float(i) for i in range(samples)], "velocity": [1.0] * samples},
+            time_points=[i * 0.1 for i in range(samples)],
+            metadata={}
+        )
+    
+    engine.run_simulation.side_effect = run_simulation
+    return engine, calls
+
+
+def create_task(db, user, model, output_variables):
+    task = SimulationTask(
+        id=str(uuid.uuid4()),
+        user_id=user.id,
+        name="缓存",
+        model_path=str(model),
+        parameters={"gain": 1.0},
+        duration=1.0,
+        step_size=0.1,
+        output_variables=output_variables,
+        status="queued"
+    )
+    db.add(task)
+    db.commit()
+    return task.id
+
+
+def test_service_cache_hit(db, test_user, model, tmp_path, monkeypatch):
+    """测试相同模型和配置的任务直接复用已有结果"""
+    monkeypatch.setenv("SIMULATION_RESULTS_DIR", str(tmp_path / "results"))
+    engine, calls = counting_engine()
+    service = SimulationService(db, simulation_engine=engine)
+    
+    first = asyncio.run(service.execute_task(create_task(db, test_user, model, ["position", "velocity"])))
+    second = asyncio.run(service.execute_task(create_task(db, test_user, model, ["position"])))
+    
+    assert calls == [first.id]
+    assert second.status == "completed"
+    assert second.result_path != first.result_path
+    
+    result = asyncio.run(service.get_task_result(second.id))
+    assert list(result.data) == ["position"]
+    assert result.data["position"] == [0.0, 1.0, 2.0]
+    
+    stats = service.result_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def result_metadata(db, task_id):
+    return db.query(ResultRecord).filter(ResultRecord.task_id == task_id).one().result_metadata
+
+
+def test_service_cache_hit_reuses_pyramid(db, test_user, model, tmp_path, monkeypatch):
+    """测试命中缓存的任务复用金字塔，缓存条目没有金字塔时重新构建"""
+    monkeypatch.setenv("SIMULATION_RESULTS_DIR", str(tmp_path / "results"))
+    engine, calls = counting_engine(samples=5000)
+    service = SimulationService(db, simulation_engine=engine)
+    
+    first = asyncio.run(service.execute_task(create_task(db, test_user, model, ["position", "velocity"])))
+    second = asyncio.run(service.execute_task(create_task(db, test_user, model, ["position"])))
+    assert len(calls) == 1
+    assert ResultPyramid.exists(first.result_path) and ResultPyramid.exists(second.result_path)
+    assert "lod" not in result_metadata(db, second.id)
+    
+    for lod in service.result_cache.cache_dir.glob("*.lod"):
+        for level in lod.iterdir():
+            level.unlink()
+        lod.rmdir()
+    third = asyncio.run(service.execute_task(create_task(db, test_user, model, ["position"])))
+    assert len(calls) == 1
+    assert pyramid_dir(third.result_path).is_dir()
+    assert result_metadata(db, third.id)["lod"]["levels"] >= 1
+
+
+def test_service_cache_off_event_loop(db, test_user, model, tmp_path, monkeypatch):
+    """测试缓存的查找、链接和写入不在事件循环线程中执行"""
+    monkeypatch.setenv("SIMULATION_RESULTS_DIR", str(tmp_path / "results"))
+    engine, calls = counting_engine()
+    service = SimulationService(db, simulation_engine=engine)
+    
+    threads = {}
+    for name in ("key_for", "lookup", "link", "store"):
+        method = getattr(service.result_cache, name)
+        
+        def recorded(*args, _name=name, _method=method, **kwargs):
+            threads.setdefault(_name, set()).add(threading.get_ident())
+            return _method(*args, **kwargs)
+        
+        monkeypatch.setattr(service.result_cache, name, recorded)
+    
+    async def run():
+        loop_thread = threading.get_ident()
+        await service.execute_task(create_task(db, test_user, model, ["position"]))
+        await service.execute_task(create_task(db, test_user, model, ["position"]))
+        return loop_thread
+    
+    loop_thread = asyncio.run(run())
+    assert len(calls) == 1
+    assert set(threads) == {"key_for", "lookup", "link", "store"}
+    assert all(loop_thread not in idents for idents in threads.values())
@@ -0,0 +1,111 @@
+"""模型目录测试模块
+
+测试内存中的模型目录，包括：
+- 增量刷新新增、修改和删除的模型文件
+- 模型信息按(路径, 修改时间, 大小)缓存，并发请求只解析一次
+- 适配器通过模型目录获取模型列表和参数
+"""
+
+import os
+import asyncio
+
+from app.simulation.catalog import ModelCatalog
+from app.simulation.skyeye import SkyEyeAdapter
+from tests.simulation.conftest import FAKE_SKYEYE
+
+
+def touch(path, content: str = "model", mtime_ns: int = None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_refresh_is_incremental(tmp_path):
+    """测试刷新只报告变化的模型文件"""
+    touch(tmp_path / "a.mdl", mtime_ns=10 ** 18)
+    touch(tmp_path / "sub" / "b.mdl", mtime_ns=10 ** 18)
+    touch(tmp_path / "notes.txt")
+    catalog = ModelCatalog(tmp_path)
+    
+    changes = catalog.refresh()
+    assert sorted(changes["added"]) == [str(tmp_path / "a.mdl"), str(tmp_path / "sub" / "b.mdl")]
+    assert [model["name"] for model in catalog.list()] == ["a", "b"]
+    assert catalog.refresh() == {"added": [], "changed": [], "removed": []}
+    
+    touch(tmp_path / "a.mdl", "model v2", mtime_ns=2 * 10 ** 18)
+    (tmp_path / "sub" / "b.mdl").unlink()
+    touch(tmp_path / "c.mdl")
+    assert catalog.refresh() == {
+        "added": [str(tmp_path / "c.mdl")],
+        "changed": [str(tmp_path / "a.mdl")],
+        "removed": [str(tmp_path / "sub" / "b.mdl")]
+    }
+
+
+def test_info_cached_until_file_changes(tmp_path):
+    """测试模型信息在文件变化前只解析一次"""
+    touch(tmp_path / "a.mdl", mtime_ns=10 ** 18)
+    catalog = ModelCatalog(tmp_path)
+    calls = []
+    
+    async def loader(path):
+        calls.append(path)
+        await asyncio.sleep(0.01)
+        return {"status": "success", "info": {"version": len(calls)}}
+    
+    async def run():
+        concurrent = await asyncio.gather(*(catalog.info("a.mdl", loader) for _ in range(5)))
+        cached = await catalog.info(str(tmp_path / "a.mdl"), loader)
+        touch(tmp_path / "a.mdl", "model v2", mtime_ns=2 * 10 ** 18)
+        catalog.refresh()
+        changed = await catalog.info("a.mdl", loader)
+        missing = await catalog.info("missing.mdl", loader)
+        return concurrent, cached, changed, missing
+    
+    concurrent, cached, changed, missing = asyncio.run(run())
+    
+    assert all(info["info"]["version"] == 1 for info in concurrent)
+    assert cached["info"]["version"] == 1
+    assert changed["info"]["version"] == 2
+    assert missing is None
+    assert calls == [str(tmp_path / "a.mdl")] * 2
+
+
+def test_errors_not_cached(tmp_path):
+    """测试解析失败的结果不缓存"""
+    touch(tmp_path / "a.mdl")
+    catalog = ModelCatalog(tmp_path)
+    results = [{"status": "error", "message": "skyeye not found"}, {"status": "success", "info": {}}]
+    
+    async def loader(path):
+        return results.pop(0)
+    
+    async def run():
+        return [await catalog.info("a.mdl", loader) for _ in range(3)]
+    
+    statuses = [info["status"] for info in asyncio.run(run())]
+    assert statuses == ["error", "success", "success"]
+
+
+def test_adapter_uses_catalog(tmp_path):
+    """测试适配器通过模型目录获取模型列表和参数"""
+    touch(tmp_path / "models" / "a.mdl")
+    catalog = ModelCatalog(tmp_path / "models")
+    adapter = SkyEyeAdapter(skyeye_path=str(FAKE_SKYEYE), catalog=catalog)
+    
+    async def run():
+        await catalog.start(loader=adapter.load_model_info, interval=0)
+        await catalog._poller
+        warmed = catalog.cached_info("a.mdl")
+        parameters = await adapter.get_model_parameters("a.mdl")
+        models = await adapter.get_available_models()
+        await catalog.stop()
+        return warmed, parameters, models
+    
+    warmed, parameters, models = asyncio.run(run())
+    
+    assert warmed["status"] == "success"
+    assert parameters["parameters"]["gain"]["default"] == 1.0
+    assert parameters["outputs"] == ["v", "u"]
+    assert [model["name"] for model in models] == ["a"]
@@ -0,0 +1,138 @@
+"""仿真检查点测试模块
+
+测试SkyEye适配器的检查点，包括：
+- 截断结果CSV到检查点时间
+- 异常退出和停止后从最近的检查点继续
+- 从其他任务的终止状态预热启动
+"""
+
+import asyncio
+
+import numpy as np
+
+from app.simulation import checkpoint
+from app.simulation.checkpoint import CHECKPOINT_DIR, FINAL_STATE, truncate_csv
+from app.simulation.engine import SimulationConfig
+from app.simulation.storage import open_result
+
+
+def make_config(output_variables=("v",), **parameters) -> SimulationConfig:
+    return SimulationConfig(
+        parameters=parameters,
+        model_path="model.mdl",
+        duration=2.0,
+        step_size=0.01,
+        output_variables=list(output_variables)
+    )
+
+
+def read(path):
+    with open_result(path) as reader:
+        time_points, data = reader.read()
+    return time_points, data
+
+
+def test_truncate_csv(tmp_path, monkeypatch):
+    """测试从文件末尾向前截断结果CSV"""
+    monkeypatch.setattr(checkpoint, "_SCAN_BLOCK", 16)
+    path = tmp_path / "results.csv"
+    rows = "".join(f"{i * 0.1!r},{i}\n" for i in range(50))
+    
+    path.write_text("time,v\n" + rows + "5.0,5")
+    size = truncate_csv(path, 0.55)
+    assert path.read_text() == "time,v\n" + "".join(f"{i * 0.1!r},{i}\n" for i in range(6))
+    assert size == path.stat().st_size
+    
+    path.write_text("time,v\n" + rows)
+    truncate_csv(path, 100.0)
+    assert path.read_text() == "time,v\n" + rows
+    
+    truncate_csv(path, -1.0)
+    assert path.read_text() == "time,v\n"
+
+
+def test_resume_after_crash(fake_skyeye, tmp_path):
+    """测试异常退出后从最近的检查点继续"""
+    config = make_config(crash_at=1.05, crash_marker=str(tmp_path / "crashed"))
+    
+    crashed = asyncio.run(fake_skyeye.run_simulation(config, "crash-task"))
+    assert crashed.status == "failed"
+    assert crashed.metadata["checkpoint_time"] == 1.0
+    
+    resumed = asyncio.run(fake_skyeye.run_simulation(config, "crash-task"))
+    assert resumed.status == "completed"
+    assert resumed.metadata["resumed_from"] == 1.0
+    
+    fresh = asyncio.run(fake_skyeye.run_simulation(config, "fresh-task"))
+    assert "resumed_from" not in fresh.metadata
+    
+    time_points, data = read(resumed.result_path)
+    expected_time, expected = read(fresh.result_path)
+    assert len(time_points) == 201
+    np.testing.assert_array_equal(time_points, expected_time)
+    np.testing.assert_array_equal(data["v"], expected["v"])
+    
+    # 完成后只保留终止状态
+    checkpoint_dir = fake_skyeye.results_dir / "crash-task" / CHECKPOINT_DIR
+    assert sorted(path.name for path in checkpoint_dir.glob("*.state")) == [FINAL_STATE]
+
+
+def test_resume_after_stop(fake_skyeye):
+    """测试停止后再次运行从检查点继续"""
+    config = make_config(delay=0.05, batch=10)
+    
+    async def stop_midway():
+        task = asyncio.ensure_future(fake_skyeye.run_simulation(config, "pause-task"))
+        while (await fake_skyeye.get_status("pause-task")).get("progress", 0) < 20:
+            await asyncio.sleep(0.02)
+        await fake_skyeye.stop_simulation("pause-task")
+        return await asyncio.wait_for(task, 5)
+    
+    stopped = asyncio.run(stop_midway())
+    assert stopped.status == "stopped"
+    assert stopped.metadata["checkpoint_time"] > 0
+    
+    resumed = asyncio.run(fake_skyeye.run_simulation(config, "pause-task"))
+    assert resumed.status == "completed"
+    assert resumed.metadata["resumed_from"] == stopped.metadata["checkpoint_time"]
+    time_points, _ = read(resumed.result_path)
+    np.testing.assert_allclose(time_points, np.arange(201) * 0.01)
+    
+    # 已完成的任务再次运行时从头开始
+    rerun = asyncio.run(fake_skyeye.run_simulation(config, "pause-task"))
+    assert "resumed_from" not in rerun.metadata
+
+
+def test_clear_checkpoints(fake_skyeye, tmp_path):
+    """测试清除检查点后从头运行"""
+    config = make_config(crash_at=0.5, crash_marker=str(tmp_path / "crashed"))
+    asyncio.run(fake_skyeye.run_simulation(config, "restart-task"))
+    
+    assert asyncio.run(fake_skyeye.clear_checkpoints("restart-task"))
+    result = asyncio.run(fake_skyeye.run_simulation(config, "restart-task"))
+    assert result.status == "completed"
+    assert "resumed_from" not in result.metadata
+    assert not asyncio.run(fake_skyeye.clear_checkpoints("no-such-task"))
+
+
+def test_warm_start(fake_skyeye):
+    """测试从其他任务的终止状态开始仿真"""
+    source = asyncio.run(fake_skyeye.run_simulation(make_config(["x"], gain=2.0, tau=0.2), "settle-task"))
+    assert source.status == "completed"
+    _, settled = read(source.result_path)
+    assert settled["x"][0] == 0.0
+    assert abs(settled["x"][-1] - 2.0) < 1e-3
+    
+    config = make_config(["x"], gain=2.0, tau=0.2)
+    config.warm_start_task_id = "settle-task"
+    warm = asyncio.run(fake_skyeye.run_simulation(config, "warm-task"))
+    assert warm.status == "completed"
+    assert warm.metadata["warm_start"] == {"task_id": "settle-task"}
+    time_points, data = read(warm.result_path)
+    assert time_points[0] == 0.0
+    assert data["x"][0] == settled["x"][-1]
+    
+    config.warm_start_task_id = "no-such-task"
+    missing = asyncio.run(fake_skyeye.run_simulation(config, "cold-task"))
+    assert missing.status == "failed"
+    assert "no-such-task" in missing.error_message
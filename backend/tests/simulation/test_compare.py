@@ -0,0 +1,73 @@
+"""多任务结果比较测试模块
+
+测试把多个结果对齐到公共时间网格，包括：
+- 线性插值与np.interp一致，网格点落在样本上时返回样本值
+- 公共网格取时间范围的交集，点数不超过最密集结果的样本数
+- 堆叠和差值两种比较模式
+"""
+
+import numpy as np
+import pytest
+
+from app.simulation.compare import CompareMode, combine, common_grid, resample_result, time_span
+from app.simulation.storage import ColumnarResultStore
+
+
+@pytest.fixture
+def results(tmp_path):
+    """三个时间轴不同的结果"""
+    store = ColumnarResultStore(tmp_path)
+    paths = {}
+    for name, (start, end, step) in {"a": (0.0, 10.0, 0.1), "b": (2.0, 12.0, 0.25), "c": (0.0, 8.0, 0.05)}.items():
+        t = np.arange(start, end + step / 2, step)
+        paths[name] = store.write(tmp_path / f"{name}.col", t, {"x": np.sin(t), "y": t})
+    return paths
+
+
+def test_resample_matches_interp(results):
+    """测试插值结果与np.interp一致"""
+    grid = np.array([-1.0, 0.0, 0.05, 3.33, 9.95, 10.0, 11.0])
+    t = np.arange(0.0, 10.05, 0.1)
+
+    values = resample_result(results["a"], "x", grid)
+    np.testing.assert_allclose(values, np.interp(grid, t, np.sin(t)), atol=1e-12)
+    assert values[1] == 0.0 and values[-1] == np.sin(t[-1])
+
+
+def test_common_grid(results):
+    """测试公共网格取交集并限制点数"""
+    spans = [time_span(path, "x") for path in results.values()]
+    grid = common_grid(spans, None, 10_000)
+    assert grid[0] == 2.0 and grid[-1] == pytest.approx(8.0)
+    # c在[2, 8]内约有121个样本
+    assert grid.shape[0] == 121
+
+    assert common_grid(spans, (3.0, 4.0), 5).tolist() == [3.0, 3.25, 3.5, 3.75, 4.0]
+    with pytest.raises(ValueError):
+        common_grid(spans, (9.0, None), 100)
+    with pytest.raises(ValueError):
+        time_span(results["a"], "missing")
+
+
+def test_combine_modes(results):
+    """测试堆叠和差值模式"""
+    grid = np.linspace(2.0, 8.0, 61)
+    series = {name: resample_result(path, "y", grid) for name, path in results.items()}
+    series["nan"] = np.full(grid.shape[0], np.nan)
+
+    stacked = combine(grid, series, CompareMode.STACKED)
+    assert list(stacked["series"]) == ["a", "b", "c", "nan"]
+    assert stacked["series"]["nan"][0] is None
+    np.testing.assert_allclose(stacked["statistics"]["mean"], grid)
+    np.testing.assert_allclose(stacked["statistics"]["std"], 0.0, atol=1e-12)
+
+    del series["nan"]
+    series["b"] = series["b"] + 1.0
+    diff = combine(grid, series, CompareMode.DIFF, baseline="c")
+    assert diff["baseline"] == "c"
+    assert list(diff["series"]) == ["a", "b"]
+    assert diff["statistics"]["b"]["rms"] == pytest.approx(1.0)
+    assert diff["statistics"]["a"]["max_abs"] == pytest.approx(0.0, abs=1e-12)
+    assert combine(grid, series, "diff")["baseline"] == "a"
+    with pytest.raises(ValueError):
+        combine(grid, series, CompareMode.DIFF, baseline="missing")
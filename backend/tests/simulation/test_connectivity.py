@@ -0,0 +1,118 @@
+"""稀疏突触连接测试模块
+
+测试CSR突触表和事件驱动的放电传递，包括：
+- 放电神经元出边的定位与稀疏矩阵一致
+- 随机连接的出度和自连接排除
+- 延迟环形缓冲按延迟步数传递输入
+- 事件驱动传递与矩阵乘法结果一致
+"""
+
+import numpy as np
+
+from app.simulation.neuron import Network, NetworkSimulator, get_integrator
+from app.simulation.neuron.connectivity import DelayRingBuffer, SynapseTable, pairs_connectivity, random_connectivity
+
+
+def test_outgoing_matches_matrix():
+    """测试放电神经元出边的定位"""
+    rng = np.random.default_rng(0)
+    indptr, targets = random_connectivity(300, 200, rng, probability=0.05)
+    table = SynapseTable(300, 200, indptr, targets, rng.standard_normal(targets.shape[0]))
+    matrix = table.to_csr()
+    
+    spikes = np.zeros(300)
+    sources = np.sort(rng.choice(300, 40, replace=False))
+    spikes[sources] = 1.0
+    positions = table.outgoing(sources)
+    delivered = np.zeros(200)
+    np.add.at(delivered, table.targets[positions], table.weights[positions])
+    
+    np.testing.assert_allclose(delivered, matrix @ spikes, rtol=1e-6)
+    assert table.outgoing(np.array([], dtype=np.int64)).size == 0
+
+
+def test_random_connectivity_degree():
+    """测试固定出度和排除自连接"""
+    rng = np.random.default_rng(1)
+    indptr, targets = random_connectivity(1000, 1000, rng, out_degree=50, exclude_self=True)
+    sources = np.repeat(np.arange(1000), np.diff(indptr))
+    
+    assert np.all(np.diff(indptr) == 50)
+    assert targets.dtype == np.int32
+    assert not np.any(targets == sources)
+    assert targets.min() >= 0 and targets.max() < 1000
+    
+    indptr, targets = pairs_connectivity(np.array([2, 0, 2]), np.array([1, 3, 0]), 3, 4)
+    assert indptr.tolist() == [0, 1, 1, 3]
+    assert targets.tolist() == [3, 1, 0]
+
+
+def test_ring_buffer_delays():
+    """测试延迟为d步的输入在d步之后到达"""
+    buffer = DelayRingBuffer(3, 4)
+    buffer.schedule(np.array([0, 0]), np.array([1.0, 2.0]), 1)
+    buffer.schedule(np.array([1, 2]), np.array([5.0, 7.0]), np.array([3, 4], dtype=np.uint16))
+    
+    arrivals = []
+    for _ in range(6):
+        out = np.zeros(3)
+        buffer.drain_into(out)
+        arrivals.append(out.tolist())
+    assert arrivals == [[0, 0, 0], [3.0, 0, 0], [0, 0, 0], [0, 5.0, 0], [0, 0, 7.0], [0, 0, 0]]
+    
+    buffer.schedule(np.array([1]), np.array([1.0]), 4)
+    state = buffer.pending()
+    restored = DelayRingBuffer(3, 4)
+    restored.load(state)
+    out = np.zeros(3)
+    for _ in range(4):
+        restored.drain_into(out)
+    assert out.tolist() == [0, 0, 0]
+    restored.drain_into(out)
+    assert out.tolist() == [0, 1.0, 0]
+
+
+def test_delay_in_network():
+    """测试网络中的突触延迟"""
+    spec = {
+        "populations": [
+            {"name": "src", "model": "lif", "size": 1, "input_mean": 40.0},
+            {"name": "dst", "model": "lif", "size": 1, "tau_syn": 1e9}
+        ],
+        "projections": [{"source": "src", "target": "dst", "pairs": [[0, 0]], "weight": 1.0, "delay": 2.0}]
+    }
+    simulator = NetworkSimulator(Network.from_spec(spec), get_integrator("euler"), 0.1)
+    while not simulator.spiked[0].any():
+        simulator.step()
+    spike_step = simulator.steps
+    
+    while simulator.i_syn[1][0] == 0:
+        simulator.step()
+    assert simulator.steps - spike_step == 20
+
+
+def test_event_driven_matches_matrix_product():
+    """测试事件驱动传递与每步矩阵乘法的结果一致(最小延迟，上一步的放电在本步到达)"""
+    spec = {
+        "populations": [
+            {"name": "exc", "model": "izhikevich", "size": 400, "input_mean": 5.0, "input_std": 3.0},
+            {"name": "inh", "model": "lif", "size": 100, "input_mean": 16.0}
+        ],
+        "projections": [
+            {"source": "exc", "target": "exc", "probability": 0.05, "weight": 0.5},
+            {"source": "exc", "target": "inh", "out_degree": 10, "weight": 1.0},
+            {"source": "inh", "target": "exc", "probability": 0.1, "weight": -2.0}
+        ]
+    }
+    network = Network.from_spec(spec, seed=2)
+    simulator = NetworkSimulator(network, get_integrator("euler"), 0.1, seed=2)
+    matrices = [(simulator.index[p.source], simulator.index[p.target], p.weights) for p in network.projections]
+    
+    for _ in range(300):
+        expected = [i_syn * decay for i_syn, decay in zip(simulator.i_syn, simulator._decay)]
+        for source, target, matrix in matrices:
+            expected[target] += matrix @ simulator.spiked[source].astype(np.float64)
+        simulator.step()
+        for i_syn, reference in zip(simulator.i_syn, expected):
+            np.testing.assert_allclose(i_syn, reference, rtol=1e-5, atol=1e-9)
+    assert simulator.spike_counts.sum() > 0
@@ -0,0 +1,97 @@
+"""降采样测试模块
+
+测试LTTB和minmax降采样，包括：
+- 输出点数限制
+- 首尾点和尖峰保留
+- 多变量共享时间轴
+"""
+
+import numpy as np
+import pytest
+
+from app.simulation.downsample import DownsampleMode, downsample, lttb_indices, minmax_indices
+
+
+@pytest.fixture
+def spiking_trace():
+    """带尖峰的膜电位曲线"""
+    rng = np.random.default_rng(42)
+    t = np.arange(100_000, dtype=np.float64) * 0.01
+    v = -65.0 + rng.normal(0.0, 0.1, t.shape[0])
+    spikes = np.array([1234, 40_000, 77_777, 99_000])
+    v[spikes] = 30.0
+    return t, v, spikes
+
+
+@pytest.mark.parametrize("mode", list(DownsampleMode))
+def test_downsample_keeps_spikes(spiking_trace, mode):
+    """测试降采样保留所有尖峰"""
+    t, v, spikes = spiking_trace
+    
+    t_out, data = downsample(t, {"v": v}, 500, mode)
+    
+    assert len(t_out) <= 500
+    assert t_out[0] == t[0] and t_out[-1] == t[-1]
+    assert np.all(np.diff(t_out) > 0)
+    assert set(t[spikes]) <= set(t_out[data["v"] == 30.0])
+
+
+def test_lttb_indices_count():
+    """测试LTTB输出点数"""
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 10)
+    
+    indices = lttb_indices(x, y, 100)
+    
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+    # 点数上限小于3时只保留首尾样本
+    assert lttb_indices(x, y, 2).tolist() == [0, 999]
+    assert lttb_indices(x, y, 1).tolist() == [0]
+
+
+def test_minmax_indices_extremes():
+    """测试minmax保留全局极值"""
+    y = np.sin(np.arange(10_001) / 50.0)
+    y[5000] = 10.0
+    y[7000] = -10.0
+    
+    indices = minmax_indices(y, 64)
+    
+    assert len(indices) <= 64
+    assert 5000 in indices and 7000 in indices
+    
+    # 点数上限很小时不超过上限，优先保留全局极值
+    assert minmax_indices(y, 3).tolist() == [0, 5000, 7000]
+    assert minmax_indices(y, 2).tolist() == [5000, 7000]
+    y[7000] = -20.0
+    assert minmax_indices(y, 1).tolist() == [7000]
+
+
+def test_downsample_multiple_variables():
+    """测试多变量降采样共享时间轴"""
+    t = np.arange(10_000, dtype=np.float64)
+    data = {"a": np.sin(t / 100), "b": np.cos(t / 7)}
+    
+    for mode in DownsampleMode:
+        t_out, out = downsample(t, data, 200, mode)
+        
+        # max_points是每个变量的上限，变量共享时间轴
+        assert len(t_out) <= 200
+        assert all(len(values) == len(t_out) for values in out.values())
+        np.testing.assert_array_equal(out["a"], np.sin(t_out / 100))
+    
+    many = {f"v{i}": np.sin(t / (i + 1)) for i in range(8)}
+    t_out, out = downsample(t, many, 5, DownsampleMode.MINMAX)
+    assert len(t_out) <= 5
+
+
+def test_downsample_short_series_unchanged():
+    """测试短序列不降采样"""
+    t = np.arange(10, dtype=np.float64)
+    t_out, out = downsample(t, {"a": t}, 100)
+    np.testing.assert_array_equal(t_out, t)
+    
+    t_out, out = downsample(t, {"a": t}, 0)
+    assert len(t_out) == 10
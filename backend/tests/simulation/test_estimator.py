@@ -0,0 +1,99 @@
+"""仿真任务代价估计测试模块
+
+测试启动进程前的代价估计和准入控制，包括：
+- 步数和输出字节数与列式结果存储一致
+- 按历史运行的每步耗时中位数估计运行时间
+- 超过上限时拒绝并建议抽取输出，运行时间较长的任务放入低优先级队列
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.simulation.engine import SimulationConfig
+from app.simulation.estimator import (
+    AdmissionDecision,
+    admit,
+    estimate_cost,
+    run_cost,
+    step_count,
+    suggest_decimation
+)
+from app.simulation.storage import ColumnarResultStore
+
+
+def test_estimate_matches_result_store(tmp_path):
+    """测试估计的输出点数和字节数与实际写入的结果一致"""
+    estimate = estimate_cost(1.0, 0.1, ["x", "y"])
+    assert estimate["steps"] == 10 and estimate["output_points"] == 11
+    assert estimate["runtime"] is None and estimate["history_runs"] == 0
+
+    t = np.linspace(0.0, 1.0, 11)
+    path = ColumnarResultStore(tmp_path).write(tmp_path / "a.col", t, {"x": t, "y": t})
+    # 文件大小为对齐的头部和各列数据，数据部分与估计一致
+    assert path.stat().st_size >= estimate["output_bytes"]
+    assert estimate["output_bytes"] == 11 * 3 * 8
+
+    assert step_count(10.0, 3.0) == 4
+    with pytest.raises(ValueError):
+        step_count(1.0, 0.0)
+    with pytest.raises(ValueError):
+        estimate_cost(-1.0, 0.1, ["x"])
+
+
+def test_runtime_from_history():
+    """测试按历史运行的每步耗时中位数估计运行时间"""
+    history = [run_cost(10.0, 100.0, 0.1), run_cost(30.0, 100.0, 0.1), run_cost(1000.0, 100.0, 0.1)]
+    # 从检查点继续的运行只计算实际运行的步数
+    history.append(run_cost(5.0, 100.0, 0.1, resumed_from=50.0))
+    assert history[-1]["steps"] == 500
+
+    estimate = estimate_cost(200.0, 0.1, ["x"], history + [None, {"wall_time": 1.0, "steps": 0}])
+    assert estimate["history_runs"] == 5
+    assert estimate["seconds_per_step"] == pytest.approx(0.02)
+    assert estimate["runtime"] == pytest.approx(40.0)
+
+
+def test_admission_decisions():
+    """测试拒绝、低优先级和接受三种决定"""
+    estimate = estimate_cost(1000.0, 0.001, ["x"], [run_cost(100.0, 1000.0, 0.01)])
+    assert estimate["runtime"] == pytest.approx(1000.0)
+
+    assert admit(estimate, 1, 0.001)["decision"] == AdmissionDecision.ACCEPT
+    assert admit(estimate, 1, 0.001, low_priority_runtime=600)["decision"] == AdmissionDecision.LOW_PRIORITY
+
+    rejected = admit(estimate, 1, 0.001, max_output_bytes=2 * 1024 ** 2, low_priority_runtime=600)
+    assert rejected["decision"] == AdmissionDecision.REJECT and len(rejected["reasons"]) == 1
+    suggestion = rejected["suggestion"]
+    assert suggestion["output_bytes"] <= 2 * 1024 ** 2
+    assert suggestion["output_interval"] == pytest.approx(0.001 * suggestion["output_stride"])
+    # 取最小的抽取倍数
+    smaller = suggestion["output_stride"] - 1
+    assert (-(-estimate["steps"] // smaller) + 1) * 16 > 2 * 1024 ** 2
+
+    disk = admit(estimate, 1, 0.001, max_output_bytes=10 ** 12, free_bytes=1000)
+    assert "磁盘剩余空间" in disk["reasons"][0]
+    assert suggest_decimation(estimate, 1, 0.001, 16) is None
+
+    slow = admit(estimate, 1, 0.001, max_steps=10 ** 5, max_runtime=10.0)
+    assert len(slow["reasons"]) == 2 and slow["suggestion"] is None
+
+
+def test_skyeye_validate_config(fake_skyeye, monkeypatch):
+    """测试SkyEye适配器按步数上限验证配置"""
+    monkeypatch.setattr("app.core.config.settings.SIMULATION_MAX_STEPS", 1000)
+
+    def make_config(duration, step_size):
+        return SimulationConfig(
+            model_path="test/model.skyeye",
+            parameters={},
+            duration=duration,
+            step_size=step_size,
+            output_variables=["v"]
+        )
+
+    assert asyncio.run(fake_skyeye.validate_config(make_config(10.0, 0.01)))["valid"]
+    invalid = asyncio.run(fake_skyeye.validate_config(make_config(100.0, 0.01)))
+    assert not invalid["valid"] and invalid["estimate"]["steps"] == 10000
+    assert not asyncio.run(fake_skyeye.validate_config(make_config(10.0, -1.0)))["valid"]
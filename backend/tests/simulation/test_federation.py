@@ -0,0 +1,294 @@
+"""SkyEye代理联邦测试模块
+
+在本机启动多个SkyEye代理(使用SkyEye替身程序)，测试远程模式，包括：
+- 在代理上运行，结果、输出和终止状态传回本地
+- 按空闲核数、运行数和可用内存放置，失联的代理不参与放置
+- 代理失联时从传回的检查点在其他代理上继续
+- 停止远程运行的任务，运行期间的资源使用由代理上报
+- 代理拒绝无效的令牌和任务ID，没有令牌时只能监听本机地址
+- 配置TLS时通过TLS连接代理，明文连接和无法校验的证书被拒绝
+"""
+
+import asyncio
+import datetime
+import ipaddress
+
+import numpy as np
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from app.simulation.agent import (
+    FrameKind, SkyEyeAgent, client_ssl_context, decode_message, encode_message, read_frame, server_ssl_context, write_frame
+)
+from app.simulation.checkpoint import CHECKPOINT_DIR, FINAL_STATE
+from app.simulation.engine import SimulationConfig
+from app.simulation.federation import AgentFederation
+from app.simulation.logs import read_log
+from app.simulation.skyeye import SkyEyeAdapter
+from app.simulation.storage import open_result
+
+from .conftest import FAKE_SKYEYE
+
+
+class CrashableAgent(SkyEyeAgent):
+    """记录连接的代理，crash()模拟主机宕机：停止监听并断开全部连接"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.server = None
+        self.writers = set()
+
+    async def handle(self, reader, writer):
+        self.writers.add(writer)
+        try:
+            await super().handle(reader, writer)
+        finally:
+            self.writers.discard(writer)
+
+    def crash(self):
+        self.server.close()
+        for writer in self.writers:
+            writer.transport.abort()
+
+
+async def start_agents(tmp_path, count):
+    agents, addresses = [], []
+    for i in range(count):
+        agent = CrashableAgent(
+            skyeye_path=str(FAKE_SKYEYE),
+            work_dir=str(tmp_path / f"agent-{i}"),
+            slots=2,
+            agent_id=f"agent-{i}"
+        )
+        agent.server = await agent.serve("127.0.0.1", 0)
+        agents.append(agent)
+        addresses.append(f"127.0.0.1:{agent.server.sockets[0].getsockname()[1]}")
+    return agents, addresses
+
+
+def remote_adapter(tmp_path, addresses, **kwargs):
+    adapter = SkyEyeAdapter(
+        skyeye_path=str(FAKE_SKYEYE),
+        mode="remote",
+        federation=AgentFederation(addresses, token="", heartbeat=0, **kwargs)
+    )
+    adapter.results_dir = tmp_path / "results"
+    return adapter
+
+
+def make_config(**parameters) -> SimulationConfig:
+    return SimulationConfig(
+        parameters=parameters,
+        model_path="model.mdl",
+        duration=2.0,
+        step_size=0.01,
+        output_variables=["x", "v"]
+    )
+
+
+def read(path):
+    with open_result(path) as reader:
+        return reader.read()
+
+
+def test_remote_run(tmp_path):
+    """测试在代理上运行，结果、输出和终止状态传回本地"""
+    async def scenario():
+        agents, addresses = await start_agents(tmp_path, 2)
+        adapter = remote_adapter(tmp_path, addresses)
+        result = await adapter.run_simulation(make_config(batch=50, chatter=2), "remote-task")
+        for agent in agents:
+            agent.server.close()
+        return adapter, addresses, agents, result
+
+    adapter, addresses, agents, result = asyncio.run(scenario())
+    assert result.status == "completed", result.error_message
+    assert result.metadata["agent"]["agent"] in addresses
+    assert result.metadata["agent"]["attempts"] == 1
+
+    time_points, data = read(result.result_path)
+    assert len(time_points) == 201
+    assert data["x"][-1] == pytest.approx(1 - 0.99 ** 200)
+    assert read_log(adapter.log_path("remote-task", "stdout"))["data"].count("\n") == 8
+    assert (adapter.results_dir / "remote-task" / CHECKPOINT_DIR / FINAL_STATE).exists()
+    # 代理在运行结束后删除运行目录
+    assert all(not any(agent.work_dir.iterdir()) for agent in agents)
+
+
+def test_placement():
+    """测试按空闲核数、运行数和可用内存放置"""
+    federation = AgentFederation(["a:1", "b:2", "c:3"])
+    a, b, c = federation.agents
+    a.alive = b.alive = True
+    a.status = {"cores": 4, "free_cores": 1.5, "running": 2, "slots": 4, "memory_available": 8 << 30}
+    b.status = {"cores": 4, "free_cores": 3.0, "running": 1, "slots": 2, "memory_available": 1 << 30}
+    c.status = {"cores": 64, "free_cores": 64.0, "running": 0, "slots": 64, "memory_available": 64 << 30}
+
+    # c失联；b空闲核数最多，放置一次后运行数达到slots
+    assert federation.place() is b
+    assert federation.place() is a
+    assert federation.place() is a
+    assert (a.pending, b.pending) == (2, 1)
+    # 两个代理都没有空闲的运行数时仍按空闲核数放置
+    assert federation.place() is b
+    # 可用内存不足的代理不参与放置
+    assert federation.place(memory_required=2 << 30) is a
+
+    a.mark_down("lost")
+    b.mark_down("lost")
+    with pytest.raises(RuntimeError):
+        federation.place()
+    assert federation.stats()["alive"] == 0
+
+
+def test_failover_resumes_from_checkpoint(tmp_path):
+    """测试代理失联时从传回的检查点在其他代理上继续"""
+    async def scenario():
+        agents, addresses = await start_agents(tmp_path, 2)
+        adapter = remote_adapter(tmp_path, addresses, timeout=5)
+        task = asyncio.ensure_future(adapter.run_simulation(make_config(batch=10, delay=0.03), "failover-task"))
+        # 等代理传回至少两个检查点后模拟所在主机宕机
+        checkpoint_dir = adapter.results_dir / "failover-task" / CHECKPOINT_DIR
+        while len(list(checkpoint_dir.glob("checkpoint_*.state"))) < 2:
+            await asyncio.sleep(0.02)
+        running = next(agent for agent in agents if agent.running)
+        running.crash()
+        result = await asyncio.wait_for(task, 30)
+        for agent in agents:
+            agent.server.close()
+        return adapter, result, addresses[agents.index(running)]
+
+    adapter, result, crashed = asyncio.run(scenario())
+    assert result.status == "completed", result.error_message
+    report = result.metadata["agent"]
+    assert report["attempts"] == 2 and report["agent"] != crashed
+    assert report["failover_from"] >= 0.4
+    assert adapter.federation.failovers == 1
+
+    # 续跑的结果与一次运行完全相同
+    time_points, data = read(result.result_path)
+    np.testing.assert_allclose(time_points, np.arange(201) * 0.01)
+    np.testing.assert_allclose(data["x"], 1 - 0.99 ** np.arange(201))
+
+
+def test_remote_stop(tmp_path):
+    """测试停止远程运行的任务，已传回的部分结果被保存"""
+    async def scenario():
+        agents, addresses = await start_agents(tmp_path, 1)
+        adapter = remote_adapter(tmp_path, addresses)
+        task = asyncio.ensure_future(adapter.run_simulation(make_config(batch=10, delay=0.1), "remote-stop-task"))
+        while (await adapter.get_status("remote-stop-task")).get("progress", 0) < 20:
+            await asyncio.sleep(0.02)
+        status = await adapter.get_status("remote-stop-task")
+        assert await adapter.stop_simulation("remote-stop-task")
+        result = await asyncio.wait_for(task, 10)
+        agents[0].server.close()
+        return result, status
+
+    result, status = asyncio.run(scenario())
+    assert result.status == "stopped"
+    # 资源使用为代理上报的SkyEye进程，而不是API进程
+    assert status["pid"] is None
+    assert status["rss_bytes"] > 0 and status["cpu_time"] is not None
+    time_points, _ = read(result.result_path)
+    assert 20 <= len(time_points) < 201
+    assert result.metadata["checkpoint_time"] > 0
+
+
+def test_agent_rejects_unsafe_requests(tmp_path):
+    """测试代理拒绝无效的令牌和可能逃出工作目录的任务ID"""
+    async def request(port, message):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        write_frame(writer, FrameKind.JSON, encode_message(message))
+        await writer.drain()
+        kind, payload = await read_frame(reader)
+        writer.close()
+        return decode_message(payload)
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await SkyEyeAgent(skyeye_path=str(FAKE_SKYEYE), work_dir=str(tmp_path / "open"), token="").serve("0.0.0.0", 0)
+
+        agent = SkyEyeAgent(skyeye_path=str(FAKE_SKYEYE), work_dir=str(tmp_path / "work"), token="secret")
+        server = await agent.serve("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        replies = [
+            await request(port, {"op": "status", "token": "wrong"}),
+            await request(port, {"op": "run", "token": "secret", "task_id": "../../escape"}),
+            await request(port, {"op": "run", "token": "secret", "task_id": "/tmp/escape"}),
+            await request(port, {"op": "status", "token": "secret"})
+        ]
+        server.close()
+        return replies
+
+    wrong_token, relative, absolute, status = asyncio.run(scenario())
+    assert wrong_token["op"] == "error"
+    assert relative["op"] == "error" and absolute["op"] == "error"
+    assert status["op"] == "status"
+    assert not any(tmp_path.glob("escape*")) and not any((tmp_path / "work").iterdir())
+
+
+def self_signed_cert(directory, name):
+    """生成127.0.0.1的自签名证书，返回(证书, 私钥)路径"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, name)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = directory / f"{name}.pem", directory / f"{name}.key"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    return str(cert_path), str(key_path)
+
+
+def test_remote_run_over_tls(tmp_path):
+    """测试通过TLS在代理上运行，明文连接和不受信任的证书被拒绝"""
+    cert, key = self_signed_cert(tmp_path, "agent")
+    other_cert, _ = self_signed_cert(tmp_path, "other")
+    
+    async def scenario():
+        agent = SkyEyeAgent(
+            skyeye_path=str(FAKE_SKYEYE),
+            work_dir=str(tmp_path / "agent"),
+            token="secret",
+            ssl_context=server_ssl_context(cert, key)
+        )
+        server = await agent.serve("127.0.0.1", 0)
+        address = f"127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        
+        adapter = SkyEyeAdapter(
+            skyeye_path=str(FAKE_SKYEYE),
+            mode="remote",
+            federation=AgentFederation([address], token="secret", heartbeat=0, ssl_context=client_ssl_context(cert))
+        )
+        adapter.results_dir = tmp_path / "results"
+        result = await adapter.run_simulation(make_config(batch=50), "tls-task")
+        
+        plain = AgentFederation([address], token="secret", heartbeat=0, timeout=2)
+        untrusted = AgentFederation([address], token="secret", heartbeat=0, timeout=2, ssl_context=client_ssl_context(other_cert))
+        await plain.refresh()
+        await untrusted.refresh()
+        server.close()
+        return result, plain.agents[0], untrusted.agents[0]
+    
+    result, plain, untrusted = asyncio.run(scenario())
+    assert result.status == "completed", result.error_message
+    time_points, data = read(result.result_path)
+    assert len(time_points) == 201
+    assert not plain.alive and not untrusted.alive
+    assert "CERTIFICATE_VERIFY_FAILED" in untrusted.error
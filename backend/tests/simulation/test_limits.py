@@ -0,0 +1,122 @@
+"""仿真进程资源隔离测试模块
+
+测试SkyEye进程的资源上限和看门狗，包括：
+- 超过内存上限或CPU时间上限的进程被终止，错误信息注明原因
+- 忽略SIGXCPU的进程被硬上限的SIGKILL终止时同样注明CPU时间上限，其他SIGKILL不归因于CPU时间
+- 运行时间超过看门狗上限的任务被终止并按失败处理，保存已输出的部分结果
+- cgroup的上限文件、OOM事件和清理
+- 进程以较低的调度优先级运行
+"""
+
+import os
+import asyncio
+import subprocess
+
+from app.simulation.engine import SimulationConfig
+from app.simulation.estimator import watchdog_limit
+from app.simulation.limits import ResourceLimits
+from app.simulation.registry import process_registry
+from app.simulation.storage import open_result
+
+
+def make_config(time_limit=None, **parameters):
+    return SimulationConfig(
+        model_path="test/model.skyeye",
+        parameters={"batch": 10, **parameters},
+        duration=1.0,
+        step_size=0.01,
+        output_variables=["v"],
+        time_limit=time_limit
+    )
+
+
+def test_memory_and_cpu_limits(fake_skyeye, monkeypatch):
+    """测试超过内存和CPU时间上限的进程被终止"""
+    monkeypatch.setattr("app.core.config.settings.SKYEYE_MEMORY_LIMIT", 256 * 1024 * 1024)
+    result = asyncio.run(fake_skyeye.run_simulation(make_config(allocate=512), "limit-memory-task"))
+    assert result.status == "failed"
+    assert result.error_message.startswith("内存超过上限268435456字节")
+    assert "MemoryError" in result.error_message
+
+    # 上限以内的运行不受影响
+    result = asyncio.run(fake_skyeye.run_simulation(make_config(allocate=16), "limit-memory-ok-task"))
+    assert result.status == "completed"
+
+    monkeypatch.setattr("app.core.config.settings.SKYEYE_MEMORY_LIMIT", 0)
+    monkeypatch.setattr("app.core.config.settings.SKYEYE_CPU_TIME_LIMIT", 1)
+    result = asyncio.run(fake_skyeye.run_simulation(make_config(spin=30), "limit-cpu-task"))
+    assert result.status == "failed"
+    assert result.error_message == "CPU时间超过上限1秒，进程已被终止"
+    assert result.metadata["limit_exceeded"] == result.error_message
+
+
+def test_cpu_hard_limit_kill(fake_skyeye, monkeypatch):
+    """测试忽略SIGXCPU的进程在超过硬上限时被SIGKILL终止，仍注明CPU时间上限"""
+    monkeypatch.setattr("app.simulation.limits._CPU_TIME_GRACE", 1)
+    monkeypatch.setattr("app.core.config.settings.SKYEYE_CPU_TIME_LIMIT", 1)
+    result = asyncio.run(fake_skyeye.run_simulation(make_config(spin=30, ignore_sigxcpu=1), "limit-cpu-kill-task"))
+    assert result.status == "failed"
+    assert result.error_message == "CPU时间超过上限1秒，进程已被终止"
+    
+    # CPU时间未达到上限时，SIGKILL不归因于CPU时间上限
+    limits = ResourceLimits(memory_bytes=0, cpu_time=5, cpu_cores=0, nice=0, cgroup_root="")
+    process = subprocess.Popen(["sleep", "10"])
+    limits.apply(process.pid)
+    process.kill()
+    process.wait()
+    assert limits.cpu_used() < 5
+    assert limits.exceeded(-9) is None
+
+
+def test_watchdog_kills_slow_run(fake_skyeye):
+    """测试看门狗终止超时的运行并记录原因"""
+    result = asyncio.run(fake_skyeye.run_simulation(make_config(time_limit=0.5, delay=0.1), "watchdog-task"))
+    assert result.status == "failed"
+    assert result.error_message == "运行时间超过看门狗上限0.5秒，任务已被终止"
+    # 已输出的部分结果被保存
+    with open_result(result.result_path) as reader:
+        assert 0 < len(reader) < 101
+    snapshot = process_registry.get("watchdog-task").snapshot()
+    assert snapshot["status"] == "failed" and snapshot["time_limit"] == 0.5
+
+    result = asyncio.run(fake_skyeye.run_simulation(make_config(time_limit=30), "watchdog-ok-task"))
+    assert result.status == "completed" and result.error_message is None
+
+    assert watchdog_limit(10.0, 3.0, 60.0) == 60.0
+    assert watchdog_limit(100.0, 3.0, 60.0, 200.0) == 200.0
+    assert watchdog_limit(None, 3.0, 60.0) is None
+    assert watchdog_limit(None, 3.0, 60.0, 500.0) == 500.0
+    assert watchdog_limit(100.0, 0, 60.0) is None
+
+
+def test_cgroup_and_nice(tmp_path):
+    """测试cgroup上限文件、OOM事件、清理和nice值"""
+    limits = ResourceLimits(memory_bytes=1 << 30, cpu_time=0, cpu_cores=0.5, nice=3, cgroup_root=str(tmp_path))
+    limits.prepare("task")
+    cgroup = limits.cgroup
+    assert cgroup.parent == tmp_path
+    assert (cgroup / "memory.max").read_text() == str(1 << 30)
+    assert (cgroup / "cpu.max").read_text() == "50000 100000"
+
+    process = subprocess.Popen(["sleep", "10"])
+    try:
+        base = os.getpriority(os.PRIO_PROCESS, process.pid)
+        limits.apply(process.pid)
+        assert (cgroup / "cgroup.procs").read_text() == str(process.pid)
+        assert os.getpriority(os.PRIO_PROCESS, process.pid) == min(19, base + 3)
+    finally:
+        process.kill()
+        process.wait()
+
+    assert limits.exceeded(-9) is None
+    (cgroup / "memory.events").write_text("low 0\nhigh 0\nmax 3\noom 1\noom_kill 1\n")
+    assert limits.exceeded(-9) == "内存超过上限1073741824字节，进程已被终止"
+    assert limits.exceeded(0) is None
+
+    limits.release()
+    assert not cgroup.exists() and limits.cgroup is None
+
+    # cgroup目录不可用时退回rlimit
+    fallback = ResourceLimits(memory_bytes=1 << 30, cgroup_root=str(tmp_path / "missing"))
+    fallback.prepare("task")
+    assert fallback.cgroup is None
@@ -0,0 +1,114 @@
+"""实时结果推送测试模块
+
+测试仿真运行期间的增量推送，包括：
+- 环形缓冲区的覆盖和按序号读取
+- CSV增量读取时忽略未写完的行，每次读取的字节数有上限
+- SkyEye适配器运行期间发布样本
+"""
+
+import asyncio
+
+import numpy as np
+
+from app.simulation.engine import SimulationConfig
+from app.simulation.live import RingBuffer, CsvTailer, live_hub
+
+
+def test_ring_buffer_wraps():
+    """测试环形缓冲区覆盖最早的样本"""
+    buffer = RingBuffer(["v"], capacity=5)
+    buffer.append(np.arange(3.0), {"v": np.arange(3.0) * 10})
+    buffer.append(np.arange(3.0, 7.0), {"v": np.arange(3.0, 7.0) * 10})
+    
+    assert buffer.total == 7
+    assert buffer.first_seq == 2
+    
+    start, times, data = buffer.since(0)
+    assert start == 2
+    assert times.tolist() == [2.0, 3.0, 4.0, 5.0, 6.0]
+    assert data["v"].tolist() == [20.0, 30.0, 40.0, 50.0, 60.0]
+    
+    start, times, _ = buffer.since(5, limit=1)
+    assert (start, times.tolist()) == (5, [5.0])
+    
+    start, times, _ = buffer.since(7)
+    assert start == 7 and len(times) == 0
+    
+    # 单次追加超过容量时只保留最新的样本
+    buffer.append(np.arange(100.0), {})
+    assert buffer.total == 107
+    _, times, data = buffer.since(0)
+    assert times.tolist() == [95.0, 96.0, 97.0, 98.0, 99.0]
+    assert np.isnan(data["v"]).all()
+
+
+def test_csv_tailer_partial_lines(tmp_path):
+    """测试CSV增量读取"""
+    path = tmp_path / "results.csv"
+    tailer = CsvTailer(path, ["v", "missing"])
+    assert tailer.poll() is None
+    
+    path.write_text("time,v,u\n0.0,1.0,5\n0.1,2.")
+    times, data = tailer.poll()
+    assert times.tolist() == [0.0]
+    assert list(data) == ["v"] and data["v"].tolist() == [1.0]
+    assert tailer.poll() is None
+    
+    with open(path, "a") as f:
+        f.write("0,5\n0.2,3.0,5\n")
+    times, data = tailer.poll()
+    assert times.tolist() == [0.1, 0.2]
+    assert data["v"].tolist() == [2.0, 3.0]
+
+
+def test_csv_tailer_bounded_reads(tmp_path):
+    """测试积压较多时每次只读取有限的字节数"""
+    path = tmp_path / "results.csv"
+    path.write_text("time,v\n" + "".join(f"{i}.0,{i}.5\n" for i in range(100)))
+    tailer = CsvTailer(path, ["v"], max_bytes=64)
+
+    chunks = []
+    while True:
+        chunk = tailer.poll()
+        if chunk is not None:
+            chunks.append(chunk[0])
+        if not tailer.pending:
+            break
+    assert len(chunks) > 10
+    assert np.concatenate(chunks).tolist() == [float(i) for i in range(100)]
+    assert tailer.offset == path.stat().st_size
+
+    # 单行超过上限时读到该行结束
+    with open(path, "a") as f:
+        f.write("100.0," + "1" * 100 + "\n")
+    times, data = tailer.poll()
+    assert times.tolist() == [100.0] and not tailer.pending
+
+
+def test_skyeye_publishes_live_samples(fake_skyeye):
+    """测试仿真运行期间实时发布样本"""
+    config = SimulationConfig(
+        parameters={"delay": 0.05, "batch": 10},
+        model_path="model.mdl",
+        duration=1.0,
+        step_size=0.01,
+        output_variables=["v"]
+    )
+    
+    async def run():
+        task = asyncio.ensure_future(fake_skyeye.run_simulation(config, "live-task"))
+        seen = []
+        while not task.done():
+            stream = live_hub.get("live-task")
+            if stream is not None and stream.buffer.total:
+                seen.append(stream.buffer.total)
+            await asyncio.sleep(0.02)
+        return await task, seen
+    
+    result, seen = asyncio.run(run())
+    
+    assert result.status == "completed"
+    # 进程结束前已经收到部分样本
+    assert seen and min(seen) < 101
+    stream = live_hub.get("live-task")
+    assert stream.finished and stream.buffer.total == 101
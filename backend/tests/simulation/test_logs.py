@@ -0,0 +1,92 @@
+"""仿真进程输出日志测试模块
+
+测试轮转日志和分页读取，包括：
+- 超过大小上限后轮转，偏移量在轮转后保持不变，最旧的文件被删除
+- 按偏移量分页读取时页尾在换行处截断，跨文件读取连续
+- 内存中只保留最近的输出
+- 适配器边运行边写入日志，失败时错误信息取错误输出的末尾
+"""
+
+import asyncio
+
+from app.simulation.engine import SimulationConfig
+from app.simulation.logs import RotatingLogWriter, read_log
+
+
+def write_lines(writer, first, count):
+    for i in range(first, first + count):
+        writer.write(f"line {i:04d}\n".encode())
+
+
+def test_rotation_keeps_offsets(tmp_path):
+    """测试轮转后按绝对偏移量读取"""
+    path = tmp_path / "stdout.log"
+    with RotatingLogWriter(path, max_bytes=100, backups=2, tail_bytes=20) as writer:
+        write_lines(writer, 0, 50)
+        assert writer.offset == 500
+        assert writer.tail == b"line 0048\nline 0049\n"
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["stdout.log", "stdout.log.1", "stdout.log.2", "stdout.log.offsets"]
+    page = read_log(path, 0, limit=35)
+    # 只保留最近的两个轮转文件和当前文件
+    assert page["first_offset"] == 300 and page["offset"] == 300
+    assert page["data"] == "line 0030\nline 0031\nline 0032\n"
+    assert page["next_offset"] == 330 and not page["eof"]
+
+    data, offset = "", page["first_offset"]
+    while True:
+        page = read_log(path, offset, limit=64)
+        data += page["data"]
+        offset = page["next_offset"]
+        if page["eof"]:
+            break
+    assert data == "".join(f"line {i:04d}\n" for i in range(30, 50))
+
+    tail = read_log(path, limit=25)
+    assert tail["offset"] == 475 and tail["size"] == 500 and tail["eof"]
+    assert tail["data"].endswith("line 0049\n")
+
+
+def test_writer_appends_to_existing_log(tmp_path):
+    """测试再次打开时追加并延续偏移量"""
+    path = tmp_path / "stderr.log"
+    with RotatingLogWriter(path, max_bytes=100, backups=1) as writer:
+        write_lines(writer, 0, 15)
+    with RotatingLogWriter(path, max_bytes=100, backups=1) as writer:
+        assert writer.offset == 150
+        write_lines(writer, 15, 5)
+        assert writer.tail == b"".join(f"line {i:04d}\n".encode() for i in range(15, 20))
+
+    page = read_log(path, 190, limit=100)
+    assert page["data"] == "line 0019\n" and page["eof"]
+    assert read_log(tmp_path / "missing.log") == {
+        "offset": 0, "next_offset": 0, "first_offset": 0, "size": 0, "eof": True, "data": ""
+    }
+
+
+def test_skyeye_streams_output(fake_skyeye, monkeypatch):
+    """测试适配器把输出写入轮转日志，失败时错误信息取错误输出的末尾"""
+    monkeypatch.setattr("app.core.config.settings.SKYEYE_LOG_MAX_BYTES", 4096)
+    monkeypatch.setattr("app.core.config.settings.SKYEYE_LOG_TAIL_BYTES", 64)
+
+    def make_config(**parameters):
+        return SimulationConfig(
+            model_path="test/model.skyeye",
+            parameters={"batch": 10, "chatter": 20, **parameters},
+            duration=10.0,
+            step_size=0.01,
+            output_variables=["v"]
+        )
+
+    completed = asyncio.run(fake_skyeye.run_simulation(make_config(), "log-task"))
+    assert completed.status == "completed"
+    stdout = fake_skyeye.log_path("log-task", "stdout")
+    assert (stdout.parent / "stdout.log.1").exists()
+    page = read_log(stdout)
+    assert page["size"] > 4096 * 2
+    assert page["data"].splitlines()[-1].startswith("step 999 ")
+
+    failed = asyncio.run(fake_skyeye.run_simulation(make_config(fail=2), "log-failed-task"))
+    assert failed.status == "failed"
+    assert failed.error_message.strip() == "simulated failure"
+    assert read_log(fake_skyeye.log_path("log-failed-task", "stderr"))["data"] == "simulated failure\n"
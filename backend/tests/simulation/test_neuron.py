@@ -0,0 +1,175 @@
+"""进程内神经元网络引擎测试模块
+
+测试NumPy神经元网络引擎，包括：
+- LIF放电频率与解析解一致，Izhikevich和Hodgkin-Huxley在恒定输入下周期放电
+- 自适应积分器与细步长RK4结果一致
+- 稀疏投射把放电传递到目标群体
+- 引擎写入列式结果、停止和从终止状态预热启动
+"""
+
+import json
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.simulation.engine import SimulationConfig
+from app.simulation.neuron import NeuronEngine, Network, NetworkSimulator, get_integrator, build_recorders
+from app.simulation.storage import open_result
+
+
+def single(model: str, size: int = 1, **population) -> dict:
+    return {"populations": [dict(name="pop", model=model, size=size, **population)]}
+
+
+def simulate(spec, duration, dt, variables=("pop.v",), integrator="rk4", **options):
+    network = Network.from_spec(spec, seed=1)
+    simulator = NetworkSimulator(network, get_integrator(integrator, **options), dt, seed=1)
+    time_points, data = simulator.run(int(round(duration / dt)), build_recorders(network, list(variables)))
+    return simulator, time_points, data
+
+
+def test_lif_rate_matches_theory():
+    """测试LIF在恒定输入下的放电频率"""
+    params = {"tau_m": 10.0, "v_rest": -65.0, "v_reset": -65.0, "v_th": -50.0, "t_ref": 2.0}
+    simulator, _, _ = simulate(single("lif", params=params, input_mean=20.0), 500.0, 0.02)
+    
+    period = params["t_ref"] + params["tau_m"] * np.log(20.0 / (20.0 - 15.0))
+    assert abs(simulator.spike_counts[0] - 500.0 / period) <= 1
+
+
+def test_izhikevich_and_hh_spike():
+    """测试Izhikevich和Hodgkin-Huxley在恒定输入下周期放电"""
+    izhikevich, _, _ = simulate(single("izhikevich", input_mean=10.0), 500.0, 0.1)
+    hh, _, data = simulate(single("hh", input_mean=10.0), 60.0, 0.025)
+    
+    assert 5 <= izhikevich.spike_counts[0] <= 30
+    assert 3 <= hh.spike_counts[0] <= 6
+    assert data["pop.v"].max() > 20.0
+
+
+def test_adaptive_matches_fine_rk4():
+    """测试自适应积分器在较大记录步长下与细步长RK4一致"""
+    spec = single("hh", input_mean=10.0)
+    reference, _, fine = simulate(spec, 30.0, 0.01)
+    adaptive, _, coarse = simulate(spec, 30.0, 0.5, integrator="rk45", rtol=1e-6, atol=1e-8)
+    
+    assert adaptive.spike_counts[0] == reference.spike_counts[0]
+    np.testing.assert_allclose(coarse["pop.v"], fine["pop.v"][49::50], atol=0.5)
+    assert adaptive.integrator.stats()["evaluations"] < reference.integrator.evaluations
+
+
+def test_projection_drives_target():
+    """测试投射把源群体的放电传递给目标群体"""
+    spec = {
+        "populations": [
+            {"name": "src", "model": "lif", "size": 10, "input_mean": 20.0},
+            {"name": "dst", "model": "lif", "size": 10}
+        ],
+        "projections": [{"source": "src", "target": "dst", "pairs": [[i, i] for i in range(5)], "weight": 200.0}]
+    }
+    simulator, _, data = simulate(spec, 200.0, 0.1, variables=["src.rate", "dst.spikes", "dst.v[9]"])
+    
+    assert simulator.network.n_synapses == 5
+    assert simulator.spike_counts[1] > 0
+    assert data["dst.v[9]"].max() == -65.0
+    assert data["src.rate"].max() == 10 / 10 / 0.1 * 1000
+
+
+def test_random_connectivity():
+    """测试按概率生成的稀疏连接"""
+    spec = {
+        "populations": [{"name": "exc", "model": "izhikevich", "size": 400}],
+        "projections": [{"source": "exc", "target": "exc", "probability": 0.05, "weight": 0.5}]
+    }
+    weights = Network.from_spec(spec, seed=3).projections[0].weights
+    
+    assert weights.shape == (400, 400)
+    assert abs(weights.nnz - 0.05 * 400 * 400) < 0.1 * 0.05 * 400 * 400
+    assert weights.diagonal().sum() == 0
+    
+    with pytest.raises(ValueError):
+        Network.from_spec(spec, {"exc.unknown": 1})
+
+
+def make_config(spec, duration=100.0, **parameters) -> SimulationConfig:
+    return SimulationConfig(
+        parameters={"network": spec, **parameters},
+        duration=duration,
+        step_size=0.1,
+        output_variables=["exc.v", "exc.rate"]
+    )
+
+
+EXC = {"populations": [{"name": "exc", "model": "izhikevich", "size": 50, "input_mean": 10.0, "input_std": 2.0}]}
+
+
+@pytest.fixture
+def engine(tmp_path) -> NeuronEngine:
+    engine = NeuronEngine(models_dir=str(tmp_path / "models"))
+    engine.results_dir = tmp_path / "results"
+    return engine
+
+
+def test_engine_run(engine, tmp_path):
+    """测试引擎写入列式结果，并且可以从模型文件读取网络描述"""
+    (tmp_path / "models").mkdir()
+    (tmp_path / "models" / "exc.json").write_text(json.dumps(EXC))
+    config = make_config(EXC, seed=7)
+    
+    result = asyncio.run(engine.run_simulation(config, "neuron-run"))
+    assert result.status == "completed"
+    assert result.metadata["neurons"] == 50
+    assert result.metadata["spikes"]["exc"] > 0
+    with open_result(result.result_path) as reader:
+        assert len(reader) == 1001
+        np.testing.assert_allclose(reader.time_points[-1], 100.0)
+        assert reader.variables == ["exc.v", "exc.rate"]
+    
+    config = SimulationConfig(parameters={"seed": 7}, model_path="exc.json", duration=100.0, step_size=0.1, output_variables=["exc.v", "exc.rate"])
+    from_file = asyncio.run(engine.run_simulation(config, "neuron-file"))
+    with open_result(result.result_path) as inline, open_result(from_file.result_path) as reader:
+        np.testing.assert_array_equal(reader.column("exc.v"), inline.column("exc.v"))
+    
+    parameters = asyncio.run(engine.get_model_parameters("exc.json"))
+    assert parameters["parameters"]["exc.a"]["default"] == 0.02
+    assert "exc.rate" in parameters["outputs"]
+    assert [model["name"] for model in asyncio.run(engine.get_available_models())] == ["exc"]
+
+
+def test_engine_invalid_config(engine):
+    """测试无效配置返回失败结果"""
+    config = make_config(EXC)
+    config.output_variables = ["inh.v"]
+    assert not asyncio.run(engine.validate_config(config))["valid"]
+    
+    result = asyncio.run(engine.run_simulation(config, "neuron-invalid"))
+    assert result.status == "failed"
+    assert "inh" in result.error_message
+
+
+def test_engine_stop_and_warm_start(engine, monkeypatch):
+    """测试停止保存部分结果，以及从终止状态预热启动"""
+    monkeypatch.setattr("app.core.config.settings.NEURON_CHUNK_STEPS", 10)
+    
+    async def stop_midway():
+        task = asyncio.ensure_future(engine.run_simulation(make_config(EXC, duration=1e6), "neuron-stop"))
+        while (await engine.get_status("neuron-stop")).get("simulated_time", 0) < 5:
+            await asyncio.sleep(0.01)
+        assert await engine.stop_simulation("neuron-stop")
+        return await task
+    
+    stopped = asyncio.run(stop_midway())
+    assert stopped.status == "stopped"
+    with open_result(stopped.result_path) as reader:
+        assert 50 < len(reader) < 1e7
+    
+    source = asyncio.run(engine.run_simulation(make_config(EXC, seed=1), "neuron-source"))
+    config = make_config(EXC, seed=1)
+    config.warm_start_task_id = "neuron-source"
+    warm = asyncio.run(engine.run_simulation(config, "neuron-warm"))
+    with open_result(source.result_path) as reader, open_result(warm.result_path) as warm_reader:
+        assert warm_reader.column("exc.v")[0] == reader.column("exc.v")[-1]
+    
+    config.warm_start_task_id = "neuron-stop"
+    assert asyncio.run(engine.run_simulation(config, "neuron-cold")).status == "failed"
@@ -0,0 +1,128 @@
+"""神经元网络并行仿真测试模块
+
+测试按神经元分区的多进程并行仿真，包括：
+- 共享内存数组在不同映射之间共享数据
+- 突触表按终点分区拆分
+- 没有噪声输入时并行仿真与单进程仿真的输出和终止状态一致
+- 引擎按workers参数并行运行
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.simulation.engine import SimulationConfig
+from app.simulation.neuron import (
+    NeuronEngine,
+    Network,
+    NetworkSimulator,
+    ParallelNetworkSimulator,
+    SharedArrays,
+    get_integrator,
+    build_recorders
+)
+from app.simulation.neuron.parallel import partition_bounds, split_synapses
+from app.simulation.storage import open_result
+
+
+SPEC = {
+    "populations": [
+        {"name": "exc", "model": "izhikevich", "size": 203, "input_mean": 8.0},
+        {"name": "inh", "model": "lif", "size": 50, "input_mean": 16.0, "tau_syn": 3.0}
+    ],
+    "projections": [
+        {"source": "exc", "target": "exc", "out_degree": 20, "weight": 0.8, "weight_std": 0.2, "delay": 1.0},
+        {"source": "exc", "target": "inh", "probability": 0.2, "weight": 1.0, "delay": 0.6, "delay_max": 2.5},
+        {"source": "inh", "target": "exc", "out_degree": 30, "weight": -2.0, "delay": 0.8}
+    ]
+}
+VARIABLES = ["exc.v", "exc.v[150]", "exc.i_syn", "exc.spikes", "inh.rate", "inh.v[3]"]
+
+
+def test_shared_arrays():
+    """测试共享内存数组在不同映射之间共享数据"""
+    shared = SharedArrays.from_arrays({"a": np.arange(5.0), "flags": np.zeros((2, 3), dtype=bool)})
+    try:
+        attached = SharedArrays.attach(shared.descriptor)
+        attached["a"][2] = 10.0
+        attached["flags"][1, 2] = True
+
+        assert shared["a"].tolist() == [0.0, 1.0, 10.0, 3.0, 4.0]
+        assert shared["flags"].sum() == 1
+        attached.close()
+    finally:
+        shared.close()
+
+
+def test_split_synapses():
+    """测试突触表按终点所在的分区拆分"""
+    network = Network.from_spec(SPEC, seed=0)
+    synapses = network.projections[1].synapses
+    bounds = partition_bounds(synapses.n_post, 3)
+
+    parts = [split_synapses(synapses, bounds[w], bounds[w + 1]) for w in range(3)]
+    assert sum(part["targets"].shape[0] for part in parts) == synapses.n_synapses
+    for w, part in enumerate(parts):
+        assert part["targets"].max() < bounds[w + 1] - bounds[w]
+        assert part["delays"].shape == part["targets"].shape
+        for source in range(synapses.n_pre):
+            row = slice(synapses.indptr[source], synapses.indptr[source + 1])
+            inside = (synapses.targets[row] >= bounds[w]) & (synapses.targets[row] < bounds[w + 1])
+            local = slice(part["indptr"][source], part["indptr"][source + 1])
+            assert part["targets"][local].tolist() == (synapses.targets[row][inside] - bounds[w]).tolist()
+
+
+def test_parallel_matches_serial():
+    """测试没有噪声输入时并行仿真与单进程仿真一致，包括载入状态和不足一个同步间隔的推进"""
+    network = Network.from_spec(SPEC, seed=3)
+    recorders = build_recorders(network, VARIABLES)
+    serial = NetworkSimulator(network, get_integrator("euler"), 0.1)
+    rng = np.random.default_rng(3)
+    serial.view(0)[0] = rng.uniform(-70.0, -50.0, 203)
+    serial.view(1)[0] = rng.uniform(-65.0, -50.0, 50)
+
+    with ParallelNetworkSimulator(network, get_integrator("euler"), 0.1, workers=3) as parallel:
+        assert parallel.interval == 6
+        parallel.load_state(serial.state_dict())
+        assert parallel.sample(recorders) == serial.sample(recorders)
+
+        for n_steps in (130, 4, 200):
+            expected_time, expected = serial.run(n_steps, recorders)
+            time_points, data = parallel.run(n_steps, recorders)
+            np.testing.assert_allclose(time_points, expected_time)
+            for name in VARIABLES:
+                np.testing.assert_allclose(data[name], expected[name], rtol=1e-9, atol=1e-9, err_msg=name)
+
+        assert serial.spike_counts.min() > 0
+        assert parallel.spike_counts.tolist() == serial.spike_counts.tolist()
+        assert parallel.stats()["evaluations"] == 3 * serial.stats()["evaluations"]
+        state = parallel.state_dict()
+
+    for key, value in serial.state_dict().items():
+        np.testing.assert_allclose(state[key], value, rtol=1e-9, atol=1e-9, err_msg=key)
+    with pytest.raises(RuntimeError):
+        parallel.run(1, {})
+
+
+def test_engine_parallel(tmp_path):
+    """测试引擎按workers参数并行运行"""
+    engine = NeuronEngine(models_dir=str(tmp_path / "models"))
+    engine.results_dir = tmp_path / "results"
+    config = SimulationConfig(
+        parameters={"network": SPEC, "seed": 2, "workers": 2, "integrator": "rk4"},
+        duration=50.0,
+        step_size=0.1,
+        output_variables=["exc.v", "inh.rate"]
+    )
+
+    result = asyncio.run(engine.run_simulation(config, "neuron-parallel"))
+    assert result.status == "completed"
+    assert result.metadata["workers"] == 2
+    assert result.metadata["integration"]["workers"] == 2
+    with open_result(result.result_path) as reader:
+        assert len(reader) == 501
+        assert reader.column("inh.rate").sum() > 0
+
+    config.parameters["workers"] = 0
+    assert not asyncio.run(engine.validate_config(config))["valid"]
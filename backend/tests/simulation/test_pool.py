@@ -0,0 +1,155 @@
+"""SkyEye工作进程池测试模块
+
+使用SkyEye替身程序的守护模式测试，包括：
+- 多次运行复用同一工作进程，模型只加载一次
+- 优先分配已加载同一模型的工作进程
+- 停止和崩溃后补充新的工作进程
+- 守护模式获取模型信息
+- 守护模式的输出在运行期间写入日志
+"""
+
+import json
+import asyncio
+
+import numpy as np
+
+from app.simulation.engine import SimulationConfig
+from app.simulation.logs import read_log
+from app.simulation.pool import SkyEyePool
+from app.simulation.skyeye import SkyEyeAdapter, SkyEyeMode
+from app.simulation.storage import open_result
+from tests.simulation.conftest import FAKE_SKYEYE
+
+
+def make_config(model_path: str = "a.mdl", **parameters) -> SimulationConfig:
+    return SimulationConfig(
+        parameters=parameters,
+        model_path=model_path,
+        duration=1.0,
+        step_size=0.01,
+        output_variables=["v"]
+    )
+
+
+def daemon_adapter(tmp_path, pool: SkyEyePool) -> SkyEyeAdapter:
+    adapter = SkyEyeAdapter(skyeye_path=str(FAKE_SKYEYE), mode="daemon", pool=pool)
+    adapter.results_dir = tmp_path
+    return adapter
+
+
+def test_daemon_reuses_worker(tmp_path, fake_skyeye):
+    """测试守护模式的结果与命令行模式相同，且多次运行复用工作进程"""
+    async def run():
+        pool = SkyEyePool(str(FAKE_SKYEYE), size=1)
+        adapter = daemon_adapter(tmp_path / "daemon", pool)
+        try:
+            results = [await adapter.run_simulation(make_config(), f"daemon-{i}") for i in range(3)]
+            pids = {worker.pid for worker in pool.workers}
+            return results, pids, pool.stats()
+        finally:
+            await pool.close()
+    
+    results, pids, stats = asyncio.run(run())
+    expected = asyncio.run(fake_skyeye.run_simulation(make_config(), "process"))
+    
+    assert fake_skyeye.mode == SkyEyeMode.PROCESS
+    assert all(result.status == "completed" for result in results)
+    assert len(pids) == 1
+    assert stats["model_hits"] == 2
+    with open_result(results[-1].result_path) as reader, open_result(expected.result_path) as expected_reader:
+        np.testing.assert_array_equal(reader.column("v"), expected_reader.column("v"))
+
+
+def test_pool_prefers_loaded_model(tmp_path):
+    """测试优先分配已加载同一模型的空闲工作进程"""
+    async def run():
+        pool = SkyEyePool(str(FAKE_SKYEYE), size=2)
+        try:
+            first = await pool.acquire("a.mdl")
+            second = await pool.acquire("b.mdl")
+            for worker, model in ((first, "a.mdl"), (second, "b.mdl")):
+                assert (await worker.run(["--info", model], model))[0] == 0
+                await pool.release(worker)
+            
+            chosen = await pool.acquire("b.mdl")
+            response = await chosen.run(["--info", "b.mdl"], "b.mdl")
+            await pool.release(chosen)
+            return first, second, chosen, response
+        finally:
+            await pool.close()
+    
+    first, second, chosen, (returncode, stdout, _) = asyncio.run(run())
+    
+    assert first is not second
+    assert chosen is second
+    assert returncode == 0
+    assert json.loads(stdout)["name"] == "b.mdl"
+
+
+def test_daemon_stop_and_crash(tmp_path):
+    """测试停止或崩溃的工作进程被替换"""
+    async def run():
+        pool = SkyEyePool(str(FAKE_SKYEYE), size=1)
+        adapter = daemon_adapter(tmp_path, pool)
+        try:
+            task = asyncio.ensure_future(adapter.run_simulation(make_config(delay=0.05, batch=5), "daemon-stop-task"))
+            while (await adapter.get_status("daemon-stop-task")).get("progress", 0) <= 0:
+                await asyncio.sleep(0.02)
+            stopped_pid = pool.workers[0].pid
+            assert await adapter.stop_simulation("daemon-stop-task")
+            stopped = await task
+            
+            crashed = await adapter.run_simulation(make_config(crash_at=0.5), "daemon-crash-task")
+            failed = await adapter.run_simulation(make_config(fail=2), "daemon-fail-task")
+            completed = await adapter.run_simulation(make_config(), "daemon-next-task")
+            return stopped, stopped_pid, crashed, failed, completed, pool.workers[0].pid
+        finally:
+            await pool.close()
+    
+    stopped, stopped_pid, crashed, failed, completed, pid = asyncio.run(run())
+    
+    assert stopped.status == "stopped"
+    with open_result(stopped.result_path) as reader:
+        assert 0 < len(reader) < 101
+    assert crashed.status == "failed"
+    assert "3" in crashed.error_message
+    assert failed.status == "failed"
+    assert "simulated failure" in failed.error_message
+    assert completed.status == "completed"
+    assert pid != stopped_pid
+
+
+def test_daemon_model_info(tmp_path):
+    """测试守护模式获取模型信息"""
+    async def run():
+        pool = SkyEyePool(str(FAKE_SKYEYE), size=1)
+        adapter = daemon_adapter(tmp_path, pool)
+        try:
+            return await adapter.get_model_info("a.mdl")
+        finally:
+            await pool.close()
+    
+    info = asyncio.run(run())
+    assert info["status"] == "success"
+    assert info["info"]["outputs"] == ["v", "u"]
+
+
+def test_daemon_streams_output_to_log(tmp_path):
+    """测试守护模式的输出在运行期间写入日志，而不是运行结束后一次写入"""
+    async def run():
+        pool = SkyEyePool(str(FAKE_SKYEYE), size=1)
+        adapter = daemon_adapter(tmp_path, pool)
+        try:
+            task = asyncio.ensure_future(adapter.run_simulation(make_config(delay=0.05, batch=5, chatter=100), "daemon-log-task"))
+            log_path = adapter.log_path("daemon-log-task", "stdout")
+            while not task.done() and (not log_path.exists() or log_path.stat().st_size == 0):
+                await asyncio.sleep(0.02)
+            running = not task.done()
+            return running, await task, log_path
+        finally:
+            await pool.close()
+    
+    running, result, log_path = asyncio.run(run())
+    assert running
+    assert result.status == "completed"
+    assert read_log(log_path)["data"].count("\n") == 20 * 100
@@ -0,0 +1,92 @@
+"""结果金字塔测试模块
+
+测试多分辨率金字塔的构建和查询，包括：
+- 各层min/max/mean与原始数据一致
+- 按窗口选择层级
+- 包络中保留尖峰
+- 结果被重新写入时删除旧的金字塔，与结果不一致的金字塔不被使用
+"""
+
+import shutil
+
+import numpy as np
+import pytest
+
+from app.services.simulation import SimulationService
+from app.simulation.storage import ColumnarResultStore, ResultPyramid, build_pyramid, open_result
+from app.simulation.storage.pyramid import pyramid_dir
+
+
+@pytest.fixture
+def result_path(tmp_path):
+    """带尖峰的结果文件"""
+    n = 100_003
+    t = np.arange(n, dtype=np.float64) * 0.01
+    v = np.sin(t)
+    v[54_321] = 50.0
+    store = ColumnarResultStore(tmp_path)
+    return store.write(store.path_for("task"), t, {"v": v, "u": t}, task_id="task")
+
+
+def test_build_pyramid_levels(result_path):
+    """测试金字塔层级和聚合值"""
+    stats = build_pyramid(result_path, factor=8, min_bins=100, chunk_bins=1000)
+    
+    assert stats["levels"] == 4
+    assert stats["bins"] == [12501, 1563, 196, 25]
+    assert stats["build_seconds"] >= 0
+    
+    with ResultPyramid(result_path) as pyramid:
+        lod = pyramid.read(["u"], None, max_bins=10 ** 9, level=2)
+        # 第2层每个桶覆盖64个样本
+        assert lod.bin_size == 64
+        assert lod.counts[0] == 64
+        assert lod.counts.sum() == 100_003
+        u = np.arange(100_003, dtype=np.float64) * 0.01
+        np.testing.assert_allclose(lod.data["u"]["min"][:3], u[[0, 64, 128]])
+        np.testing.assert_allclose(lod.data["u"]["max"][:3], u[[63, 127, 191]])
+        np.testing.assert_allclose(lod.data["u"]["mean"][0], u[:64].mean())
+        np.testing.assert_allclose(lod.data["u"]["mean"][-1], u[-(100_003 % 64):].mean())
+
+
+def test_pyramid_select_level_and_envelope(result_path):
+    """测试按窗口选择层级并保留尖峰"""
+    build_pyramid(result_path, factor=8, min_bins=100)
+    
+    with ResultPyramid(result_path) as pyramid:
+        assert pyramid.select_level(None, 200) == 3
+        assert pyramid.select_level((500.0, 600.0), 200) == 2
+        assert pyramid.select_level((543.0, 544.0), 200) == 1
+        
+        lod = pyramid.read(["v"], (500.0, 600.0), max_bins=200)
+        times, data = lod.envelope()
+        assert len(times) <= 2 * (200 + 1)
+        assert times[0] <= 500.0 and times[-2] <= 600.0
+        assert data["v"].max() == 50.0
+
+
+def test_pyramid_missing(tmp_path):
+    """测试金字塔不存在时"""
+    assert not ResultPyramid.exists(tmp_path / "missing.col")
+    with pytest.raises(FileNotFoundError):
+        ResultPyramid(tmp_path / "missing.col")
+
+
+def test_rewrite_discards_pyramid(result_path, tmp_path):
+    """测试重新写入结果时删除金字塔，样本数不一致的金字塔被忽略"""
+    build_pyramid(result_path, factor=8, min_bins=100)
+    stale = tmp_path / "stale.lod"
+    shutil.copytree(pyramid_dir(result_path), stale)
+    
+    t = np.arange(20_000, dtype=np.float64) * 0.01
+    store = ColumnarResultStore(tmp_path)
+    store.write(result_path, t, {"v": np.cos(t), "u": t}, task_id="task")
+    assert not ResultPyramid.exists(result_path)
+    
+    # 残留的旧金字塔(例如中途失败的写入)与结果文件的样本数不一致时按原始数据读取
+    shutil.copytree(stale, pyramid_dir(result_path))
+    with ResultPyramid(result_path) as pyramid:
+        assert pyramid.source_samples == 100_003
+    service = SimulationService.__new__(SimulationService)
+    with open_result(result_path) as reader:
+        assert service._read_from_pyramid(str(result_path), reader, ["v"], None, 100, "minmax") is None
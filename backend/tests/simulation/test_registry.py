@@ -0,0 +1,116 @@
+"""仿真进程注册表测试模块
+
+测试SkyEye适配器的状态查询和停止，包括：
+- 运行期间报告进度和资源使用
+- 停止任务时终止进程并保存部分结果
+- 运行中的任务被取消时终止进程组
+- 进程登记前的停止请求在登记时立即生效
+- 未知任务的状态
+"""
+
+import os
+import asyncio
+
+import pytest
+
+from app.simulation.engine import SimulationConfig
+from app.simulation.registry import process_registry, read_proc_stats
+from app.simulation.storage import open_result
+
+
+def make_config(**parameters) -> SimulationConfig:
+    return SimulationConfig(
+        parameters={"delay": 0.05, "batch": 10, **parameters},
+        model_path="model.mdl",
+        duration=2.0,
+        step_size=0.01,
+        output_variables=["v"]
+    )
+
+
+def test_read_proc_stats():
+    """测试读取当前进程的资源使用"""
+    stats = read_proc_stats(os.getpid())
+    assert stats["cpu_time"] > 0
+    assert stats["rss_bytes"] > 0
+    
+    assert read_proc_stats(2 ** 22 + 12345) is None
+
+
+def test_status_reports_progress(fake_skyeye):
+    """测试运行期间的进度和资源使用"""
+    async def run():
+        task = asyncio.ensure_future(fake_skyeye.run_simulation(make_config(), "status-task"))
+        snapshots = []
+        while not task.done():
+            status = await fake_skyeye.get_status("status-task")
+            if status["status"] == "running":
+                snapshots.append(status)
+            await asyncio.sleep(0.05)
+        return await task, snapshots, await fake_skyeye.get_status("status-task")
+    
+    result, snapshots, final = asyncio.run(run())
+    
+    assert result.status == "completed"
+    assert snapshots
+    progress = [s["progress"] for s in snapshots]
+    assert progress == sorted(progress)
+    assert 0 < max(progress) < 100
+    assert snapshots[-1]["rss_bytes"] > 0
+    assert snapshots[-1]["cpu_time"] is not None
+    assert snapshots[-1]["duration"] == 2.0
+    
+    assert final["status"] == "completed"
+    assert final["progress"] == 100.0
+
+
+def test_stop_keeps_partial_results(fake_skyeye):
+    """测试停止任务"""
+    async def run():
+        task = asyncio.ensure_future(fake_skyeye.run_simulation(make_config(), "stop-task"))
+        while (await fake_skyeye.get_status("stop-task")).get("progress", 0) < 10:
+            await asyncio.sleep(0.05)
+        stopped = await fake_skyeye.stop_simulation("stop-task")
+        return stopped, await asyncio.wait_for(task, 5)
+    
+    stopped, result = asyncio.run(run())
+    
+    assert stopped
+    assert result.status == "stopped"
+    with open_result(result.result_path) as reader:
+        assert 0 < len(reader) < 201
+
+
+def test_cancel_kills_process_group(fake_skyeye):
+    """测试取消运行中的任务时终止SkyEye进程组并等待其退出"""
+    async def run():
+        task = asyncio.ensure_future(fake_skyeye.run_simulation(make_config(), "cancel-task"))
+        while (status := await fake_skyeye.get_status("cancel-task")).get("progress", 0) <= 0:
+            await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return status["pid"], await fake_skyeye.get_status("cancel-task")
+    
+    pid, final = asyncio.run(run())
+    
+    assert final["status"] == "stopped"
+    with pytest.raises(ProcessLookupError):
+        os.killpg(pid, 0)
+
+
+def test_deferred_stop_applies_on_register(fake_skyeye):
+    """测试进程登记前请求的停止在SkyEye启动后立即生效"""
+    process_registry.defer_stop("deferred-stop-task")
+    result = asyncio.run(asyncio.wait_for(fake_skyeye.run_simulation(make_config(), "deferred-stop-task"), 10))
+    
+    assert result.status == "stopped"
+    assert result.error_message == "任务已被停止"
+    assert not process_registry.pop_deferred_stop("deferred-stop-task")
+
+
+def test_status_unknown_task(fake_skyeye):
+    """测试查询未运行的任务"""
+    status = asyncio.run(fake_skyeye.get_status("no-such-task"))
+    assert status == {"task_id": "no-such-task", "status": "unknown"}
+    assert not asyncio.run(fake_skyeye.stop_simulation("no-such-task"))
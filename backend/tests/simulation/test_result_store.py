@@ -0,0 +1,170 @@
+"""结果存储测试模块
+
+测试列式结果存储的功能，包括：
+- 一次性写入与内存映射读取
+- 分块写入
+- 旧版JSON结果迁移
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from app.simulation.storage import (
+    ColumnarResultStore,
+    ColumnarResultReader,
+    JsonResultStore,
+    get_result_store,
+    open_result,
+    is_columnar_file,
+    migrate_json_result,
+    ingest_csv,
+)
+from app.simulation.skyeye import SkyEyeAdapter
+
+
+@pytest.fixture
+def store(tmp_path) -> ColumnarResultStore:
+    """列式结果存储固件"""
+    return ColumnarResultStore(tmp_path)
+
+
+def test_write_and_read_columns(store):
+    """测试写入后读取的数据一致且为内存映射视图"""
+    time_points = np.linspace(0.0, 1.0, 1001)
+    data = {"v": np.sin(time_points), "u": np.cos(time_points)}
+    
+    path = store.write(store.path_for("task-1"), time_points, data, task_id="task-1", metadata={"model": "m.mdl"})
+    
+    assert is_columnar_file(path)
+    with open_result(path) as reader:
+        assert isinstance(reader, ColumnarResultReader)
+        assert reader.task_id == "task-1"
+        assert reader.metadata == {"model": "m.mdl"}
+        assert reader.variables == ["v", "u"]
+        assert len(reader) == 1001
+        np.testing.assert_array_equal(reader.time_points, time_points)
+        np.testing.assert_array_equal(reader.column("v"), data["v"])
+        # 读取结果是只读的零复制视图
+        assert not reader.column("u").flags.owndata
+        assert not reader.column("u").flags.writeable
+        
+        with pytest.raises(KeyError):
+            reader.column("missing")
+
+
+def test_chunked_writer(store):
+    """测试分块写入与一次性写入结果相同"""
+    path = store.path_for("task-2")
+    with store.writer(path, ["v", "w"], task_id="task-2") as writer:
+        for start in range(0, 100, 30):
+            t = np.arange(start, min(start + 30, 100), dtype=np.float64)
+            writer.append(t, {"v": t * 2})
+    
+    with store.open(path) as reader:
+        np.testing.assert_array_equal(reader.time_points, np.arange(100.0))
+        np.testing.assert_array_equal(reader.column("v"), np.arange(100.0) * 2)
+        assert np.isnan(reader.column("w")).all()
+    
+    # 失败时不应留下结果文件
+    failed = store.path_for("task-3")
+    with pytest.raises(RuntimeError):
+        with store.writer(failed, ["v"]) as writer:
+            writer.append([0.0], {"v": [1.0]})
+            raise RuntimeError("boom")
+    assert not failed.exists()
+
+
+def test_empty_result(store):
+    """测试空结果"""
+    path = store.write(store.path_for("empty"), [], {}, status="failed", error_message="error")
+    with store.open(path) as reader:
+        assert len(reader) == 0
+        assert reader.variables == []
+        assert reader.status == "failed"
+        assert reader.error_message == "error"
+
+
+def test_migrate_json_result(tmp_path):
+    """测试旧版JSON结果迁移"""
+    json_path = JsonResultStore(tmp_path).write(
+        tmp_path / "task-4.json",
+        [0.0, 0.1, 0.2],
+        {"position": [0.1, 0.2, 0.3]},
+        task_id="task-4",
+        metadata={"model": "test/model.skyeye"}
+    )
+    
+    target = migrate_json_result(json_path, remove_source=True)
+    
+    assert target.suffix == ".col"
+    assert not json_path.exists()
+    with open_result(target) as reader:
+        assert reader.task_id == "task-4"
+        assert reader.column("position").tolist() == [0.1, 0.2, 0.3]
+        assert reader.time_points.tolist() == [0.0, 0.1, 0.2]
+
+
+def test_store_skyeye_csv(tmp_path):
+    """测试SkyEye CSV输出转换为列式结果"""
+    csv_path = tmp_path / "results.csv"
+    csv_path.write_text("time,v,extra\n0.0,1.0,9\n0.1,2.0,9\n")
+    
+    adapter = SkyEyeAdapter(skyeye_path="skyeye")
+    path = adapter.store_csv_results(csv_path, tmp_path, ["v", "missing"], "task-5", {"model": "m.mdl"})
+    
+    with open_result(path) as reader:
+        assert reader.variables == ["v"]
+        assert reader.column("v").tolist() == [1.0, 2.0]
+        assert reader.time_points.tolist() == [0.0, 0.1]
+        assert reader.metadata["missing_variables"] == ["missing"]
+
+
+def test_ingest_csv_in_chunks(tmp_path):
+    """测试CSV分块导入跨块边界的数据完整"""
+    csv_path = tmp_path / "results.csv"
+    rows = ["time, a, b, c"] + [f"{i * 0.1}, {i}, {2 * i}, {3 * i}" for i in range(10)]
+    csv_path.write_text("\n".join(rows) + "\n")
+    
+    path = ingest_csv(csv_path, tmp_path / "results.col", ["c", "a"], task_id="task-7", chunk_rows=3)
+    
+    with open_result(path) as reader:
+        assert reader.variables == ["c", "a"]
+        assert len(reader) == 10
+        assert reader.column("a").tolist() == [float(i) for i in range(10)]
+        assert reader.column("c").tolist() == [float(3 * i) for i in range(10)]
+    
+    # 缺少time列时报错
+    bad = tmp_path / "bad.csv"
+    bad.write_text("t,a\n0,1\n")
+    with pytest.raises(ValueError):
+        ingest_csv(bad, tmp_path / "bad.col", ["a"])
+
+
+def test_get_result_store(tmp_path):
+    """测试存储工厂"""
+    assert isinstance(get_result_store("columnar", tmp_path), ColumnarResultStore)
+    assert isinstance(get_result_store("json", tmp_path), JsonResultStore)
+    with pytest.raises(ValueError):
+        get_result_store("parquet", tmp_path)
+
+
+def test_read_time_window(store):
+    """测试按时间范围和变量读取"""
+    time_points = np.arange(0.0, 10.0, 0.5)
+    path = store.write(store.path_for("task-6"), time_points, {"v": time_points * 10, "u": -time_points})
+    
+    with store.open(path) as reader:
+        assert reader.time_window(2.0, 3.0) == slice(4, 7)
+        assert reader.time_window(None, None) == slice(0, 20)
+        assert reader.time_window(100.0, 200.0) == slice(20, 20)
+        
+        times, data = reader.read(["v"], (2.0, 3.0))
+        assert times.tolist() == [2.0, 2.5, 3.0]
+        assert list(data.keys()) == ["v"]
+        assert data["v"].tolist() == [20.0, 25.0, 30.0]
+        
+        times, data = reader.read()
+        assert len(times) == 20
+        assert set(data.keys()) == {"v", "u"}
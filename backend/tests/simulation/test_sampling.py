@@ -0,0 +1,116 @@
+"""仿真输出采样测试模块
+
+测试输出抽取和各变量的记录间隔，包括：
+- 采样设置的校验和换算
+- 列式结果按变量的记录间隔存储，读取时对齐到时间轴
+- SkyEye按输出间隔和记录间隔输出，从检查点继续的结果与一次运行相同
+- 代价估计按抽取后的输出计算
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.simulation.engine import SimulationConfig
+from app.simulation.estimator import estimate_cost
+from app.simulation.sampling import resolve_sampling
+from app.simulation.storage import ColumnarResultStore, open_result
+
+
+def make_config(**kwargs) -> SimulationConfig:
+    return SimulationConfig(
+        parameters=kwargs.pop("parameters", {}),
+        model_path="model.mdl",
+        duration=2.0,
+        step_size=0.01,
+        output_variables=["x", "v"],
+        **kwargs
+    )
+
+
+def test_resolve_sampling():
+    """测试间隔换算为步数和无效设置"""
+    sampling = resolve_sampling(0.01, ["x", "v"], output_interval=0.05, variable_intervals={"x": 0.1})
+    assert sampling.stride == 5 and sampling.variable_strides == {"x": 2}
+    assert sampling.rows(200) == 41 and sampling.samples("x", 200) == 21
+    assert sampling.describe()["variable_intervals"]["x"] == pytest.approx(0.1)
+
+    # 没有输出间隔时取全部变量记录间隔的最大公约数
+    sampling = resolve_sampling(0.01, ["x", "v"], variable_intervals={"x": 0.1, "v": 0.04})
+    assert sampling.stride == 2 and sampling.variable_strides == {"x": 5, "v": 2}
+    assert resolve_sampling(0.01, ["x", "v"], variable_intervals={"x": 0.1}).stride == 1
+    assert not resolve_sampling(0.01, ["x"]).decimated
+    assert resolve_sampling(0.01, ["x"], output_stride=4, output_interval=0.04).stride == 4
+
+    with pytest.raises(ValueError):
+        resolve_sampling(0.01, ["x"], output_interval=0.015)
+    with pytest.raises(ValueError):
+        resolve_sampling(0.01, ["x"], output_stride=4, output_interval=0.05)
+    with pytest.raises(ValueError):
+        resolve_sampling(0.01, ["x"], output_interval=0.04, variable_intervals={"x": 0.1})
+    with pytest.raises(ValueError):
+        resolve_sampling(0.01, ["x"], variable_intervals={"y": 0.1})
+
+
+def test_strided_columns(tmp_path):
+    """测试分块写入按记录间隔存储的列，读取时零阶保持对齐到时间轴"""
+    t = np.arange(10) * 0.1
+    writer = ColumnarResultStore(tmp_path).writer(tmp_path / "a.col", ["u", "w"], strides={"w": 3})
+    # 块的边界不必与记录间隔对齐；变量也可以只给出本块中记录的样本
+    writer.append(t[:4], {"u": t[:4], "w": t[:4]})
+    writer.append(t[4:], {"u": t[4:], "w": t[6::3]})
+    path = writer.close()
+
+    with open_result(path) as reader:
+        assert reader.stride("u") == 1 and reader.stride("w") == 3
+        np.testing.assert_array_equal(reader.column("w"), t[::3])
+        np.testing.assert_array_equal(reader.column_time("w"), t[::3])
+        time_points, data = reader.read()
+        np.testing.assert_array_equal(time_points, t)
+        np.testing.assert_array_equal(data["w"], np.repeat(t[::3], 3)[:10])
+        # 只读取抽取的变量时按其记录间隔读取
+        time_points, data = reader.read(variables=["w"], time_range=(0.25, None))
+        np.testing.assert_array_equal(time_points, t[3::3])
+        np.testing.assert_array_equal(data["w"], t[3::3])
+
+
+def test_skyeye_decimated_output(fake_skyeye):
+    """测试SkyEye按输出间隔和变量的记录间隔输出"""
+    config = make_config(output_interval=0.05, variable_intervals={"x": 0.1})
+    result = asyncio.run(fake_skyeye.run_simulation(config, "sampled-task"))
+    assert result.status == "completed", result.error_message
+    assert result.metadata["sampling"]["output_stride"] == 5
+
+    with open_result(result.result_path) as reader:
+        assert len(reader) == 41 and reader.stride("x") == 2
+        np.testing.assert_allclose(reader.column("x"), 1 - 0.99 ** (10 * np.arange(21)))
+        time_points, data = reader.read()
+    np.testing.assert_allclose(time_points, np.arange(41) * 0.05)
+    np.testing.assert_allclose(data["v"], np.sin(time_points + 1))
+
+
+def test_decimated_resume(fake_skyeye, tmp_path):
+    """测试抽取输出时从检查点继续的结果与一次运行相同"""
+    parameters = {"crash_at": 1.05, "crash_marker": str(tmp_path / "crashed")}
+    config = make_config(parameters=parameters, output_stride=4, variable_intervals={"x": 0.2})
+    assert asyncio.run(fake_skyeye.run_simulation(config, "crash-task")).status == "failed"
+    resumed = asyncio.run(fake_skyeye.run_simulation(config, "crash-task"))
+    fresh = asyncio.run(fake_skyeye.run_simulation(config, "fresh-task"))
+    assert resumed.metadata["resumed_from"] == 1.0
+
+    with open_result(resumed.result_path) as a, open_result(fresh.result_path) as b:
+        assert len(a) == 51
+        np.testing.assert_array_equal(a.time_points, b.time_points)
+        for name in ("x", "v"):
+            np.testing.assert_array_equal(a.column(name), b.column(name))
+
+
+def test_estimate_decimated():
+    """测试代价估计按抽取后的行数和样本数计算"""
+    full = estimate_cost(2.0, 0.01, ["x", "v"])
+    sampling = make_config(output_interval=0.05, variable_intervals={"x": 0.1}).sampling()
+    decimated = estimate_cost(2.0, 0.01, ["x", "v"], sampling=sampling)
+    assert decimated["steps"] == full["steps"] == 200
+    assert decimated["output_points"] == 41
+    assert decimated["output_bytes"] == (41 * 2 + 21) * 8
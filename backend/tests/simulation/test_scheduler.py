@@ -0,0 +1,219 @@
+"""仿真任务调度器测试模块
+
+测试调度器的以下行为：
+- 并发数不超过max_workers
+- 高优先级任务先运行
+- 同优先级下各用户公平分配
+- 排队位置和取消
+- 已出队、进程尚未启动的任务可以停止，不再运行仿真
+- 关闭时被中断的任务标记为stopped，不会停留在queued/running
+"""
+
+import asyncio
+
+import uuid
+from unittest.mock import MagicMock
+
+from app.db.models.simulation import SimulationTask
+from app.services.simulation import SimulationService
+from app.simulation.engine import SimulationEngine
+from app.simulation import scheduler as scheduler_module
+from app.simulation.scheduler import INTERRUPTED_MESSAGE, SimulationScheduler, mark_tasks_interrupted
+from tests.conftest import TestingSessionLocal
+
+
+class RecordingRunner:
+    """记录运行顺序和最大并发数的任务执行器"""
+    
+    def __init__(self):
+        self.started = []
+        self.active = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+    
+    async def __call__(self, task_id: str):
+        self.started.append(task_id)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await self.release.wait()
+        self.active -= 1
+
+
+async def drain(scheduler: SimulationScheduler):
+    while scheduler.running_count or scheduler.queued_count:
+        await asyncio.sleep(0.01)
+
+
+def test_bounded_concurrency():
+    """测试同时运行的任务数不超过上限"""
+    async def run():
+        runner = RecordingRunner()
+        scheduler = SimulationScheduler(max_workers=2, max_per_user=0, runner=runner)
+        positions = [scheduler.submit(f"t{i}", "alice") for i in range(5)]
+        await asyncio.sleep(0.01)
+        assert runner.active == 2
+        assert scheduler.queued_count == 3
+        runner.release.set()
+        await drain(scheduler)
+        return runner, positions
+    
+    runner, positions = asyncio.run(run())
+    assert positions == [None, None, 1, 2, 3]
+    assert runner.peak == 2
+    assert runner.started == ["t0", "t1", "t2", "t3", "t4"]
+
+
+def test_priority_and_fair_share():
+    """测试优先级和按用户轮流调度"""
+    async def run():
+        runner = RecordingRunner()
+        scheduler = SimulationScheduler(max_workers=1, max_per_user=0, runner=runner)
+        scheduler.submit("blocker", "carol")
+        for i in range(3):
+            scheduler.submit(f"a{i}", "alice")
+        scheduler.submit("b0", "bob")
+        scheduler.submit("b1", "bob")
+        scheduler.submit("urgent", "bob", priority=5)
+        
+        order = [entry["task_id"] for entry in scheduler.snapshot()["queued"]]
+        runner.release.set()
+        await drain(scheduler)
+        return runner.started, order
+    
+    started, order = asyncio.run(run())
+    # alice提交得早，但bob的任务与她的交替运行
+    assert order == ["urgent", "a0", "b0", "a1", "b1", "a2"]
+    assert started == ["blocker"] + order
+
+
+def test_per_user_limit():
+    """测试每个用户的并发上限"""
+    async def run():
+        runner = RecordingRunner()
+        scheduler = SimulationScheduler(max_workers=3, max_per_user=1, runner=runner)
+        scheduler.submit("a0", "alice")
+        scheduler.submit("a1", "alice")
+        scheduler.submit("b0", "bob")
+        await asyncio.sleep(0.01)
+        running = sorted(runner.started)
+        runner.release.set()
+        await drain(scheduler)
+        return running, runner.started
+    
+    running, started = asyncio.run(run())
+    assert running == ["a0", "b0"]
+    assert started[-1] == "a1"
+
+
+def test_cancel_and_position():
+    """测试取消排队中的任务"""
+    async def run():
+        runner = RecordingRunner()
+        scheduler = SimulationScheduler(max_workers=1, max_per_user=0, runner=runner)
+        scheduler.submit("t0", "alice")
+        scheduler.submit("t1", "alice")
+        scheduler.submit("t2", "alice")
+        assert scheduler.queue_position("t2") == 2
+        assert scheduler.cancel("t1")
+        assert not scheduler.cancel("t0")
+        assert scheduler.queue_position("t2") == 1
+        assert scheduler.queue_position("t1") is None
+        runner.release.set()
+        await drain(scheduler)
+        return runner.started
+    
+    assert asyncio.run(run()) == ["t0", "t2"]
+
+
+def test_runner_errors_do_not_block_queue():
+    """测试任务异常后继续调度"""
+    async def run():
+        started = []
+        
+        async def runner(task_id: str):
+            started.append(task_id)
+            raise RuntimeError("boom")
+        
+        scheduler = SimulationScheduler(max_workers=1, max_per_user=0, runner=runner)
+        scheduler.submit("t0", "alice")
+        scheduler.submit("t1", "alice")
+        await drain(scheduler)
+        return started
+    
+    assert asyncio.run(run()) == ["t0", "t1"]
+
+
+def test_shutdown_marks_interrupted_tasks():
+    """测试关闭时排队和运行中的任务都交给on_interrupted"""
+    async def run():
+        runner = RecordingRunner()
+        interrupted = []
+        scheduler = SimulationScheduler(max_workers=1, max_per_user=0, runner=runner, on_interrupted=interrupted.extend)
+        scheduler.submit("running", "alice")
+        scheduler.submit("queued", "alice")
+        await asyncio.sleep(0.01)
+        await scheduler.shutdown()
+        return scheduler, interrupted
+    
+    scheduler, interrupted = asyncio.run(run())
+    assert sorted(interrupted) == ["queued", "running"]
+    assert scheduler.running_count == 0 and scheduler.queued_count == 0
+
+
+def test_mark_tasks_interrupted(db, test_user):
+    """测试遗留的queued/running任务标记为stopped，已结束的任务不变"""
+    ids = {}
+    for status in ("queued", "running", "completed"):
+        task = SimulationTask(
+            id=str(uuid.uuid4()),
+            user_id=test_user.id,
+            name=status,
+            model_path="model.mdl",
+            parameters={},
+            duration=1.0,
+            step_size=0.1,
+            output_variables=["v"],
+            status=status
+        )
+        db.add(task)
+        ids[status] = task.id
+    db.commit()
+    
+    assert mark_tasks_interrupted([ids["queued"]], session_factory=TestingSessionLocal) == [ids["queued"]]
+    assert mark_tasks_interrupted(session_factory=TestingSessionLocal) == [ids["running"]]
+    db.expire_all()
+    statuses = {task.name: (task.status, task.error_message) for task in db.query(SimulationTask)}
+    assert statuses["queued"] == ("stopped", INTERRUPTED_MESSAGE)
+    assert statuses["running"] == ("stopped", INTERRUPTED_MESSAGE)
+    assert statuses["completed"] == ("completed", None)
+
+
+def test_stop_dispatched_task(db, test_user, monkeypatch):
+    """测试停止调度器已取出、进程尚未启动的任务：不返回未运行，任务不再运行仿真"""
+    task = SimulationTask(
+        id=str(uuid.uuid4()),
+        user_id=test_user.id,
+        name="dispatched",
+        model_path="model.mdl",
+        parameters={},
+        duration=1.0,
+        step_size=0.1,
+        output_variables=["v"],
+        status="queued"
+    )
+    db.add(task)
+    db.commit()
+    
+    scheduler = scheduler_module.simulation_scheduler
+    monkeypatch.setattr(scheduler, "is_scheduled", lambda task_id: task_id == task.id)
+    engine = MagicMock(spec=SimulationEngine)
+    service = SimulationService(db, simulation_engine=engine)
+    
+    assert asyncio.run(service.stop_task(task.id))
+    result = asyncio.run(service.execute_task(task.id))
+    assert result.status == "stopped"
+    engine.run_simulation.assert_not_called()
+    
+    # 没有在执行的任务仍然无法停止
+    monkeypatch.setattr(scheduler, "is_scheduled", lambda task_id: False)
+    assert not asyncio.run(service.stop_task(task.id))
@@ -0,0 +1,163 @@
+"""放电事件存储测试模块
+
+测试稀疏放电事件文件，包括：
+- 差值编码和压缩后按块读取的事件与写入一致
+- 栅格图在步的边界分页
+- PSTH和每个神经元放电率的服务端分桶
+- 引擎把spike_train输出写入放电事件文件(单进程和并行)
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.simulation.engine import SimulationConfig
+from app.simulation.neuron import NeuronEngine
+from app.simulation.storage import SpikeEventReader, SpikeEventWriter, open_result, spike_events_path
+
+
+def random_events(rng, n_steps, size, rate):
+    """每步以概率rate放电的随机事件，按(步, 神经元序号)排序"""
+    spiked = rng.random((n_steps, size)) < rate
+    steps, neurons = np.nonzero(spiked)
+    return steps + 1, neurons
+
+
+def test_round_trip(tmp_path):
+    """测试分多次写入、跨多个块的事件读回一致，且远小于稠密存储"""
+    rng = np.random.default_rng(0)
+    steps, neurons = random_events(rng, 2000, 500, 0.01)
+    other_steps, other_neurons = random_events(rng, 2000, 3, 0.2)
+    path = tmp_path / "results.spikes"
+
+    with SpikeEventWriter(path, {"exc": 500, "inh": 3}, 0.1, task_id="t", block_events=1000) as writer:
+        for lo, hi in ((0, 3000), (3000, 3001), (3001, steps.shape[0])):
+            writer.append("exc", steps[lo:hi], neurons[lo:hi])
+        writer.append("inh", other_steps, other_neurons)
+        writer.n_steps = 2000
+
+    assert path.stat().st_size < steps.shape[0] * 2
+    with SpikeEventReader(path) as reader:
+        assert reader.populations == {
+            "exc": {"size": 500, "count": int(steps.shape[0])},
+            "inh": {"size": 3, "count": int(other_steps.shape[0])}
+        }
+        assert reader.duration == pytest.approx(200.0)
+        read_steps, read_neurons = reader.events("exc")
+        assert read_steps.tolist() == steps.tolist()
+        assert read_neurons.tolist() == neurons.tolist()
+
+        window_steps, window_neurons = reader.events("inh", (50.0, 60.0), (1, 3))
+        mask = (other_steps >= 500) & (other_steps <= 600) & (other_neurons >= 1)
+        assert window_steps.tolist() == other_steps[mask].tolist()
+        assert window_neurons.tolist() == other_neurons[mask].tolist()
+
+        with pytest.raises(ValueError):
+            reader.events()
+        with pytest.raises(ValueError):
+            reader.events("missing")
+
+
+def test_writer_rejects_unordered_events(tmp_path):
+    """测试事件必须按时间顺序写入，中止时不留下文件"""
+    path = tmp_path / "results.spikes"
+    writer = SpikeEventWriter(path, {"exc": 10}, 0.1)
+    writer.append("exc", np.array([5, 5]), np.array([3, 1]))
+    with pytest.raises(ValueError):
+        writer.append("exc", np.array([4]), np.array([0]))
+    writer.abort()
+    assert not path.exists()
+
+
+def test_raster_paging(tmp_path):
+    """测试栅格图在步的边界截断，按next_time翻页能取回全部事件"""
+    rng = np.random.default_rng(1)
+    steps, neurons = random_events(rng, 300, 100, 0.05)
+    path = tmp_path / "results.spikes"
+    with SpikeEventWriter(path, {"exc": 100}, 0.1, block_events=256) as writer:
+        writer.append("exc", steps, neurons)
+        writer.n_steps = 300
+
+    times, ids = [], []
+    with SpikeEventReader(path) as reader:
+        start = None
+        while True:
+            page = reader.raster(time_range=(start, None), max_events=100)
+            assert page["times"].shape[0] <= 100
+            times.extend(page["times"].tolist())
+            ids.extend(page["neurons"].tolist())
+            if not page["truncated"]:
+                break
+            # 截断处不拆分同一步的放电
+            assert page["times"][-1] < page["next_time"]
+            start = page["next_time"]
+
+    np.testing.assert_allclose(times, steps * 0.1)
+    assert ids == neurons.tolist()
+
+
+def test_psth_and_rates(tmp_path):
+    """测试PSTH分桶计数、放电率换算和每个神经元的放电率"""
+    path = tmp_path / "results.spikes"
+    # 神经元0每1ms放电一次，神经元1在前10ms每步放电，神经元2静息；最后一个桶包含结束时间
+    steps = np.concatenate([np.arange(10, 201, 10), np.arange(1, 101)])
+    neurons = np.concatenate([np.zeros(20, dtype=int), np.ones(100, dtype=int)])
+    order = np.lexsort((neurons, steps))
+    with SpikeEventWriter(path, {"exc": 3}, 0.1) as writer:
+        writer.append("exc", steps[order], neurons[order])
+        writer.n_steps = 200
+
+    with SpikeEventReader(path) as reader:
+        psth = reader.psth(bin_size=5.0)
+        assert psth["time_points"].tolist() == [0.0, 5.0, 10.0, 15.0]
+        assert psth["counts"].tolist() == [53, 55, 6, 6]
+        np.testing.assert_allclose(psth["rate"], psth["counts"] / (3 * 0.005))
+        smoothed = reader.psth(bin_size=1.0, smooth=2.0)
+        assert smoothed["rate"].sum() == pytest.approx(reader.psth(bin_size=1.0)["rate"].sum(), rel=0.2)
+
+        rates = reader.firing_rates()
+        np.testing.assert_allclose(rates["rates"], [1000.0, 5000.0, 0.0])
+        assert rates["silent"] == 1
+        partial = reader.firing_rates(time_range=(0.0, 10.0), neuron_range=(1, 3))
+        assert partial["first_neuron"] == 1
+        np.testing.assert_allclose(partial["rates"], [10000.0, 0.0])
+
+        with pytest.raises(ValueError):
+            reader.psth(bin_size=1e-9)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_engine_spike_trains(tmp_path, workers):
+    """测试引擎把spike_train输出写入放电事件文件，事件数与放电计数一致"""
+    engine = NeuronEngine(models_dir=str(tmp_path / "models"))
+    engine.results_dir = tmp_path / "results"
+    spec = {
+        "populations": [
+            {"name": "exc", "model": "lif", "size": 80, "input_mean": 18.0, "input_std": 4.0},
+            {"name": "inh", "model": "lif", "size": 20, "input_mean": 16.0}
+        ],
+        "projections": [{"source": "exc", "target": "inh", "out_degree": 5, "weight": 0.5, "delay": 1.0}]
+    }
+    config = SimulationConfig(
+        parameters={"network": spec, "seed": 4, "workers": workers, "integrator": "euler"},
+        duration=120.0,
+        step_size=0.1,
+        output_variables=["exc.rate", "exc.spike_train", "inh.spike_train"]
+    )
+
+    result = asyncio.run(engine.run_simulation(config, f"neuron-spike-train-{workers}"))
+    assert result.status == "completed"
+    assert result.metadata["spike_trains"] == {"exc.spike_train": "exc", "inh.spike_train": "inh"}
+    with open_result(result.result_path) as reader:
+        assert reader.variables == ["exc.rate"]
+
+    with SpikeEventReader(spike_events_path(result.result_path)) as reader:
+        assert reader.n_steps == 1200
+        for name in ("exc", "inh"):
+            assert reader.populations[name]["count"] == result.metadata["spikes"][name]
+        steps, neurons = reader.events("exc")
+        assert steps.shape[0] > 0
+        assert steps.min() >= 1 and steps.max() <= 1200
+        assert np.all(np.diff(steps) >= 0)
+        assert neurons.max() < 80
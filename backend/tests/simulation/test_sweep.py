@@ -0,0 +1,71 @@
+"""参数扫描展开测试模块
+
+测试网格、随机和拉丁超立方扫描的展开，以及嵌套参数的覆盖。
+"""
+
+import numpy as np
+import pytest
+
+from app.simulation.sweep import SweepMode, expand_sweep, sweep_size, apply_overrides
+
+
+def test_grid_product():
+    """测试网格扫描为笛卡尔积"""
+    parameters = {
+        "gain": {"values": [1, 2]},
+        "tau": {"low": 0.0, "high": 1.0, "num": 3}
+    }
+    runs = expand_sweep(SweepMode.GRID, parameters)
+    
+    assert sweep_size(SweepMode.GRID, parameters) == len(runs) == 6
+    assert runs[0] == {"gain": 1, "tau": 0.0}
+    assert runs[-1] == {"gain": 2, "tau": 1.0}
+    assert {run["tau"] for run in runs} == {0.0, 0.5, 1.0}
+
+
+def test_grid_log_and_integer():
+    """测试对数刻度和取整"""
+    runs = expand_sweep(SweepMode.GRID, {"n": {"low": 1, "high": 1000, "num": 4, "log": True, "integer": True}})
+    assert [run["n"] for run in runs] == [1, 10, 100, 1000]
+
+
+def test_lhs_stratified():
+    """测试拉丁超立方采样每层恰好一个样本"""
+    n = 50
+    runs = expand_sweep(SweepMode.LHS, {"a": {"low": 0.0, "high": 10.0}, "b": {"low": -1.0, "high": 1.0}}, samples=n, seed=1)
+    
+    assert len(runs) == n
+    a = np.array([run["a"] for run in runs])
+    b = np.array([run["b"] for run in runs])
+    assert sorted(np.floor(a / 10.0 * n).astype(int)) == list(range(n))
+    assert sorted(np.floor((b + 1.0) / 2.0 * n).astype(int)) == list(range(n))
+
+
+def test_random_reproducible():
+    """测试相同种子得到相同的随机采样"""
+    parameters = {"a": {"low": 0.0, "high": 1.0}, "mode": {"values": ["x", "y", "z"]}}
+    first = expand_sweep(SweepMode.RANDOM, parameters, samples=20, seed=7)
+    second = expand_sweep(SweepMode.RANDOM, parameters, samples=20, seed=7)
+    
+    assert first == second
+    assert all(0.0 <= run["a"] < 1.0 for run in first)
+    assert {run["mode"] for run in first} <= {"x", "y", "z"}
+
+
+def test_invalid_sweeps():
+    """测试不完整的扫描定义"""
+    with pytest.raises(ValueError):
+        expand_sweep(SweepMode.GRID, {"a": {"low": 0.0, "high": 1.0}})
+    with pytest.raises(ValueError):
+        expand_sweep(SweepMode.LHS, {"a": {"low": 0.0, "high": 1.0}})
+    with pytest.raises(ValueError):
+        expand_sweep(SweepMode.RANDOM, {"a": {"low": 0.0}}, samples=3)
+
+
+def test_apply_overrides_nested():
+    """测试嵌套参数覆盖且不修改基础参数"""
+    base = {"control_params": {"gain": 1.0, "bias": 0.5}, "seed": 1}
+    merged = apply_overrides(base, {"control_params.gain": 2.0, "new.value": 3})
+    
+    assert merged == {"control_params": {"gain": 2.0, "bias": 0.5}, "seed": 1, "new": {"value": 3}}
+    assert base["control_params"]["gain"] == 1.0
@@ -0,0 +1,286 @@
+"""任务队列和worker测试模块
+
+测试至少一次投递语义，包括：
+- 优先级排序和排队位置
+- 同优先级下各用户的任务轮流取出
+- 可见性超时后重新投递，过期回执失效
+- worker崩溃后遗留任务被其他worker接管
+- 停止请求和最大投递次数
+- worker停止时先终止仿真进程再放回队列，重新投递时只有一个SkyEye进程
+
+Redis实现使用fakeredis测试，未安装时跳过。
+"""
+
+import os
+import asyncio
+
+import pytest
+
+from app.simulation import worker as worker_module
+from app.simulation.engine import SimulationConfig
+from app.simulation.task_queue import LocalTaskQueue, RedisTaskQueue
+from app.simulation.worker import SimulationWorker
+
+
+@pytest.fixture(params=["local", "redis"])
+def make_queue(request):
+    """创建空队列的工厂"""
+    if request.param == "local":
+        return LocalTaskQueue
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    
+    def factory():
+        return RedisTaskQueue(client=fakeredis.FakeAsyncRedis(decode_responses=True), prefix=f"test:{id(object())}")
+    return factory
+
+
+def test_queue_order_and_position(make_queue):
+    """测试优先级和排队位置"""
+    async def run():
+        queue = make_queue()
+        assert await queue.enqueue("a", "alice")
+        assert await queue.enqueue("b", "bob")
+        assert await queue.enqueue("urgent", "bob", priority=5)
+        assert not await queue.enqueue("a", "alice")
+        
+        positions = [await queue.position(task_id) for task_id in ("urgent", "a", "b", "missing")]
+        order = []
+        while (delivery := await queue.reserve(10)) is not None:
+            order.append(delivery.task_id)
+            assert await queue.ack(delivery)
+        return positions, order, await queue.length()
+    
+    positions, order, length = asyncio.run(run())
+    assert positions == [1, 2, 3, None]
+    assert order == ["urgent", "a", "b"]
+    assert length == 0
+
+
+def test_queue_fair_share(make_queue):
+    """测试同优先级下各用户轮流取出，队列清空后轮次归零"""
+    async def run():
+        queue = make_queue()
+        for task_id in ("a1", "a2", "a3", "a4"):
+            await queue.enqueue(task_id, "alice")
+        await queue.enqueue("b1", "bob")
+        await queue.enqueue("b2", "bob", priority=1)
+        
+        positions = [await queue.position(task_id) for task_id in ("b2", "a1", "b1", "a2", "a3", "a4")]
+        order = []
+        while (delivery := await queue.reserve(10)) is not None:
+            order.append(delivery.task_id)
+            # 新用户从当前轮次开始，不排在其他用户积压的全部任务之后
+            if delivery.task_id == "a2":
+                await queue.enqueue("c1", "carol")
+        
+        # 队列清空后重新开始计轮次
+        await queue.enqueue("a5", "alice")
+        await queue.enqueue("b3", "bob")
+        while (delivery := await queue.reserve(10)) is not None:
+            order.append(delivery.task_id)
+        return positions, order
+    
+    positions, order = asyncio.run(run())
+    assert positions == [1, 2, 3, 4, 5, 6]
+    assert order == ["b2", "a1", "b1", "a2", "a3", "c1", "a4", "a5", "b3"]
+
+
+def test_visibility_timeout_redelivers(make_queue):
+    """测试未ack的任务超时后重新投递"""
+    async def run():
+        queue = make_queue()
+        await queue.enqueue("t", "alice")
+        first = await queue.reserve(0.05)
+        assert await queue.reserve(0.05) is None
+        assert await queue.requeue_expired() == []
+        
+        await asyncio.sleep(0.1)
+        assert await queue.requeue_expired() == ["t"]
+        second = await queue.reserve(10)
+        
+        # 过期的回执不能确认或续期新的投递
+        assert not await queue.ack(first)
+        assert not await queue.extend(first, 10)
+        assert await queue.extend(second, 10)
+        assert await queue.ack(second)
+        return first, second, await queue.length()
+    
+    first, second, length = asyncio.run(run())
+    assert (first.deliveries, second.deliveries) == (1, 2)
+    assert length == 0
+
+
+def test_release_and_remove(make_queue):
+    """测试放回队列和删除排队中的任务"""
+    async def run():
+        queue = make_queue()
+        await queue.enqueue("a", "alice")
+        await queue.enqueue("b", "alice")
+        delivery = await queue.reserve(10)
+        assert not await queue.remove("a")
+        assert await queue.release(delivery)
+        assert await queue.position("a") == 1
+        assert await queue.remove("b")
+        assert not await queue.remove("b")
+        return await queue.length()
+    
+    assert asyncio.run(run()) == 1
+
+
+def test_worker_recovers_orphaned_task():
+    """测试worker接管崩溃worker遗留的任务"""
+    async def run():
+        queue = LocalTaskQueue()
+        await queue.enqueue("orphan", "alice")
+        await queue.enqueue("next", "alice")
+        # 模拟取出任务后崩溃的worker：既不ack也不续期
+        await queue.reserve(0.1)
+        
+        done = []
+        
+        async def runner(task_id: str):
+            done.append(task_id)
+        
+        worker = SimulationWorker(queue, concurrency=1, runner=runner, visibility_timeout=5, poll_interval=0.02)
+        worker_task = asyncio.create_task(worker.run())
+        while len(done) < 2:
+            await asyncio.sleep(0.02)
+        worker.stop()
+        await worker_task
+        return done, await queue.length()
+    
+    done, length = asyncio.run(run())
+    assert done == ["next", "orphan"]
+    assert length == 0
+
+
+def test_worker_heartbeat_and_interrupt():
+    """测试执行期间续期，worker停止时任务放回队列"""
+    async def run():
+        queue = LocalTaskQueue()
+        await queue.enqueue("long", "alice")
+        started = asyncio.Event()
+        
+        async def runner(task_id: str):
+            started.set()
+            await asyncio.sleep(10)
+        
+        worker = SimulationWorker(queue, concurrency=1, runner=runner, visibility_timeout=0.15, poll_interval=0.02)
+        worker_task = asyncio.create_task(worker.run())
+        await started.wait()
+        await asyncio.sleep(0.4)
+        # 心跳续期，任务没有被重新投递
+        requeued = await queue.requeue_expired()
+        worker.stop()
+        await worker_task
+        return requeued, await queue.position("long")
+    
+    requeued, position = asyncio.run(run())
+    assert requeued == []
+    assert position == 1
+
+
+def test_worker_stop_request(monkeypatch):
+    """测试停止请求按stop_poll_interval检查，不必等待续期"""
+    async def run():
+        queue = LocalTaskQueue()
+        await queue.enqueue("long", "alice")
+        started = asyncio.Event()
+        stopped = asyncio.Event()
+        
+        async def stop(task_id: str):
+            stopped.set()
+            return True
+        monkeypatch.setattr(worker_module.process_registry, "stop", stop)
+        monkeypatch.setattr(worker_module.process_registry, "running", lambda task_id: True)
+        
+        async def runner(task_id: str):
+            started.set()
+            await stopped.wait()
+        
+        worker = SimulationWorker(
+            queue, concurrency=1, runner=runner, visibility_timeout=60, poll_interval=0.02, stop_poll_interval=0.02
+        )
+        worker_task = asyncio.create_task(worker.run())
+        await started.wait()
+        await queue.request_stop("long")
+        await asyncio.wait_for(stopped.wait(), 1)
+        while await queue.stop_requested("long"):
+            await asyncio.sleep(0.02)
+        worker.stop()
+        await worker_task
+        return await queue.length()
+    
+    assert asyncio.run(run()) == 0
+
+
+def test_worker_drain_kills_before_redelivery(fake_skyeye):
+    """测试worker停止时SkyEye进程退出后才放回队列，重新投递的运行是唯一的进程"""
+    config = SimulationConfig(
+        parameters={"delay": 0.05, "batch": 10},
+        model_path="model.mdl",
+        duration=2.0,
+        step_size=0.01,
+        output_variables=["v"]
+    )
+    
+    async def runner(task_id: str):
+        return await fake_skyeye.run_simulation(config, task_id)
+    
+    async def running_pid():
+        while True:
+            status = await fake_skyeye.get_status("drained")
+            if status["status"] == "running" and status["progress"] > 0:
+                return status["pid"]
+            await asyncio.sleep(0.02)
+    
+    async def run():
+        queue = LocalTaskQueue()
+        await queue.enqueue("drained", "alice")
+        first = SimulationWorker(queue, concurrency=1, runner=runner, visibility_timeout=30, poll_interval=0.02)
+        first_task = asyncio.create_task(first.run())
+        first_pid = await running_pid()
+        first.stop()
+        await first_task
+        assert await queue.position("drained") == 1
+        with pytest.raises(ProcessLookupError):
+            os.killpg(first_pid, 0)
+        
+        second = SimulationWorker(queue, concurrency=1, runner=runner, visibility_timeout=30, poll_interval=0.02)
+        second_task = asyncio.create_task(second.run())
+        second_pid = await running_pid()
+        second.stop()
+        await second_task
+        return first_pid, second_pid
+    
+    first_pid, second_pid = asyncio.run(run())
+    assert first_pid != second_pid
+
+
+def test_worker_gives_up_after_max_deliveries(monkeypatch):
+    """测试超过最大投递次数的任务被标记为失败"""
+    failed = []
+    monkeypatch.setattr("app.simulation.worker.mark_task_failed", lambda task_id, message: failed.append(task_id))
+    
+    async def run():
+        queue = LocalTaskQueue()
+        await queue.enqueue("crashy", "alice")
+        attempts = []
+        
+        async def runner(task_id: str):
+            attempts.append(task_id)
+            raise RuntimeError("boom")
+        
+        worker = SimulationWorker(queue, concurrency=1, runner=runner, poll_interval=0.02, max_deliveries=2)
+        worker_task = asyncio.create_task(worker.run())
+        while not failed:
+            await asyncio.sleep(0.02)
+        worker.stop()
+        await worker_task
+        return attempts, await queue.length()
+    
+    attempts, length = asyncio.run(run())
+    assert attempts == ["crashy", "crashy"]
+    assert failed == ["crashy"]
+    assert length == 0
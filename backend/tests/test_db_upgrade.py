@@ -0,0 +1,70 @@
+"""数据库结构升级测试模块
+
+测试在旧版本创建的数据库上启动，包括：
+- 给已有的表补上新增的列和索引，已有的行可以继续查询
+- 重复执行没有影响
+"""
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models.simulation import SimulationTask
+from app.db.upgrade import ADDED_COLUMNS, upgrade_schema
+
+
+# 增加批量仿真等功能之前的simulation_tasks表
+BASELINE_SIMULATION_TASKS = """
+CREATE TABLE simulation_tasks (
+    id VARCHAR NOT NULL PRIMARY KEY,
+    user_id VARCHAR NOT NULL REFERENCES users (id),
+    name VARCHAR NOT NULL,
+    description TEXT,
+    status VARCHAR,
+    parameters JSON NOT NULL,
+    model_path VARCHAR NOT NULL,
+    duration FLOAT NOT NULL,
+    step_size FLOAT NOT NULL,
+    output_variables JSON NOT NULL,
+    result_path VARCHAR,
+    error_message TEXT,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    updated_at DATETIME,
+    completed_at DATETIME
+)
+"""
+
+
+def test_upgrade_baseline_schema(tmp_path):
+    """测试旧数据库补上新增的列后可以读写任务"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(BASELINE_SIMULATION_TASKS)
+        conn.exec_driver_sql(
+            "INSERT INTO simulation_tasks (id, user_id, name, status, parameters, model_path, duration, step_size, output_variables) "
+            "VALUES ('old-task', 'user', 'old', 'completed', '{}', 'model.mdl', 1.0, 0.1, '[\"x\"]')"
+        )
+
+    Base.metadata.create_all(bind=engine)
+    applied = upgrade_schema(engine)
+    assert applied == [f"{table}.{column}" for table, column in ADDED_COLUMNS] + [
+        "simulation_tasks.ix_simulation_tasks_batch_status"
+    ]
+    columns = {column["name"] for column in inspect(engine).get_columns("simulation_tasks")}
+    assert {column for _, column in ADDED_COLUMNS} <= columns
+
+    session = sessionmaker(bind=engine)()
+    try:
+        task = session.query(SimulationTask).filter(SimulationTask.id == "old-task").one()
+        assert task.status == "completed"
+        assert task.batch_id is None and task.warm_start_task_id is None and task.output_interval is None
+        task.batch_index = 3
+        task.variable_intervals = {"x": 0.2}
+        session.commit()
+        assert session.query(SimulationTask).filter(SimulationTask.batch_index == 3).one().variable_intervals == {"x": 0.2}
+    finally:
+        session.close()
+
+    # 已经是最新结构时不做任何修改
+    assert upgrade_schema(engine) == []
+    engine.dispose()
@@ -1,16 +1,35 @@
-import React, { useState, useEffect } from 'react';
-import { Card, Table, Button, Modal, Form, Input, Select, Tag, Space, message, Progress, Tooltip } from 'antd';
-import { PlayCircleOutlined, PlusOutlined, DeleteOutlined, EyeOutlined, ReloadOutlined, ExperimentOutlined } from '@ant-design/icons';
+import React, { useState, useEffect, useRef } from 'react';
+import { Card, Table, Button, Modal, Form, Input, Select, Tag, Space, message, Progress, Tooltip, Descriptions } from 'antd';
+import { PlayCircleOutlined, PlusOutlined, DeleteOutlined, EyeOutlined, ReloadOutlined, ExperimentOutlined, LineChartOutlined } from '@ant-design/icons';
 import type { ColumnsType } from 'antd/es/table';
+import * as echarts from 'echarts';
+import { subscribeSimulationStream } from '../utils/liveStream';
 
 const { Option } = Select;
 const { TextArea } = Input;
 
+interface LiveSnapshot {
+  taskId: string;
+  samples: number;
+  time?: number;
+  values: Record<string, number>;
+  status: string;
+}
+
+// 实时曲线缓存的样本数，超出后丢弃最早的样本
+const LIVE_MAX_POINTS = 5000;
+
+interface LiveSeries {
+  time: number[];
+  data: Record<string, number[]>;
+}
+
 interface SimulationTask {
   id: string;
   name: string;
   description: string;
-  status: 'pending' | 'running' | 'completed' | 'failed';
+  status: 'pending' | 'queued' | 'running' | 'completed' | 'failed' | 'stopped';
+  queue_position?: number | null;
   progress: number;
   createdAt: string;
   updatedAt: string;
@@ -23,6 +42,34 @@ const Simulation: React.FC = () => {
   const [loading, setLoading] = useState(false);
   const [modalVisible, setModalVisible] = useState(false);
   const [form] = Form.useForm();
+  const [live, setLive] = useState<LiveSnapshot | null>(null);
+  const unsubscribeRef = useRef<(() => void) | null>(null);
+  const liveSeriesRef = useRef<LiveSeries>({ time: [], data: {} });
+  const liveChartRef = useRef<HTMLDivElement>(null);
+  const liveChartInstanceRef = useRef<echarts.ECharts | null>(null);
+
+  // 组件卸载时取消实时订阅
+  useEffect(() => () => unsubscribeRef.current?.(), []);
+
+  // 打开实时数据窗口时创建曲线图，关闭时销毁
+  useEffect(() => {
+    if (!live || !liveChartRef.current) return;
+    const chart = echarts.init(liveChartRef.current);
+    chart.setOption({
+      tooltip: { trigger: 'axis' },
+      legend: { top: 'bottom' },
+      grid: { left: '3%', right: '4%', bottom: '12%', containLabel: true },
+      xAxis: { type: 'value', name: '仿真时间' },
+      yAxis: { type: 'value', scale: true },
+      series: []
+    });
+    liveChartInstanceRef.current = chart;
+    renderLiveChart();
+    return () => {
+      chart.dispose();
+      liveChartInstanceRef.current = null;
+    };
+  }, [live?.taskId]);
 
   // 模拟数据
   useEffect(() => {
@@ -62,9 +109,11 @@ const Simulation: React.FC = () => {
 
   const statusConfig = {
     pending: { color: 'default', text: '等待中' },
+    queued: { color: 'warning', text: '排队中' },
     running: { color: 'processing', text: '运行中' },
     completed: { color: 'success', text: '已完成' },
-    failed: { color: 'error', text: '失败' }
+    failed: { color: 'error', text: '失败' },
+    stopped: { color: 'default', text: '已停止' }
   };
 
   const columns: ColumnsType<SimulationTask> = [
@@ -89,9 +138,10 @@ const Simulation: React.FC = () => {
       title: '状态',
       dataIndex: 'status',
       key: 'status',
-      render: (status) => (
+      render: (status, record) => (
         <Tag color={statusConfig[status].color}>
           {statusConfig[status].text}
+          {status === 'queued' && record.queue_position ? ` #${record.queue_position}` : ''}
         </Tag>
       )
     },
@@ -127,6 +177,15 @@ const Simulation: React.FC = () => {
               onClick={() => viewTask(record)}
             />
           </Tooltip>
+          {record.status === 'running' && (
+            <Tooltip title="实时数据">
+              <Button 
+                type="text" 
+                icon={<LineChartOutlined />}
+                onClick={() => openLiveView(record.id)}
+              />
+            </Tooltip>
+          )}
           {record.status === 'pending' && (
             <Tooltip title="执行任务">
               <Button 
@@ -240,6 +299,64 @@ const Simulation: React.FC = () => {
     });
   };
 
+  const renderLiveChart = () => {
+    const chart = liveChartInstanceRef.current;
+    if (!chart) return;
+    const { time, data } = liveSeriesRef.current;
+    chart.setOption({
+      series: Object.entries(data).map(([name, values]) => ({
+        name,
+        type: 'line',
+        showSymbol: false,
+        data: values.map((value, i) => [time[i], value])
+      }))
+    });
+  };
+
+  const openLiveView = (taskId: string) => {
+    unsubscribeRef.current?.();
+    liveSeriesRef.current = { time: [], data: {} };
+    setLive({ taskId, samples: 0, values: {}, status: 'running' });
+
+    unsubscribeRef.current = subscribeSimulationStream(taskId, {
+      onDelta: (delta) => {
+        // 追加到曲线缓存，超出上限时丢弃最早的样本
+        const series = liveSeriesRef.current;
+        series.time.push(...delta.time_points);
+        Object.entries(delta.data).forEach(([name, values]) => {
+          if (!series.data[name]) series.data[name] = [];
+          series.data[name].push(...values);
+        });
+        const excess = series.time.length - LIVE_MAX_POINTS;
+        if (excess > 0) {
+          series.time.splice(0, excess);
+          Object.values(series.data).forEach(values => values.splice(0, excess));
+        }
+        renderLiveChart();
+
+        const last = delta.time_points.length - 1;
+        setLive(prev => prev && prev.taskId === taskId ? {
+          ...prev,
+          samples: delta.next_seq,
+          time: delta.time_points[last],
+          values: Object.fromEntries(
+            Object.entries(delta.data).map(([name, values]) => [name, values[last]])
+          )
+        } : prev);
+      },
+      onEnd: (end) => {
+        setLive(prev => prev && prev.taskId === taskId ? { ...prev, status: end.status } : prev);
+      },
+      onError: () => message.error('获取实时数据失败')
+    });
+  };
+
+  const closeLiveView = () => {
+    unsubscribeRef.current?.();
+    unsubscribeRef.current = null;
+    setLive(null);
+  };
+
   const viewTask = (task: SimulationTask) => {
     Modal.info({
       title: '任务详情',
@@ -293,6 +410,29 @@ const Simulation: React.FC = () => {
         />
       </Card>
 
+      {/* 实时数据模态框 */}
+      <Modal
+        title="实时数据"
+        open={live !== null}
+        onCancel={closeLiveView}
+        footer={null}
+        width={800}
+      >
+        {live && (
+          <>
+            <div ref={liveChartRef} style={{ width: '100%', height: 320, marginBottom: 16 }} />
+            <Descriptions column={1} size="small" bordered>
+              <Descriptions.Item label="状态">{live.status}</Descriptions.Item>
+              <Descriptions.Item label="已接收样本">{live.samples}</Descriptions.Item>
+              <Descriptions.Item label="仿真时间">{live.time ?? '-'}</Descriptions.Item>
+              {Object.entries(live.values).map(([name, value]) => (
+                <Descriptions.Item key={name} label={name}>{value}</Descriptions.Item>
+              ))}
+            </Descriptions>
+          </>
+        )}
+      </Modal>
+
       {/* 创建任务模态框 */}
       <Modal
         title="创建仿真任务"
@@ -0,0 +1,89 @@
+/**
+ * 仿真结果实时流客户端
+ *
+ * 订阅后端 /simulation/{taskId}/stream 的 Server-Sent Events。
+ * 浏览器自带的 EventSource 不能携带 Authorization 头，因此这里用 fetch 读取流并自行解析事件。
+ */
+
+export interface LiveDelta {
+  seq: number;
+  next_seq: number;
+  time_points: number[];
+  data: Record<string, number[]>;
+}
+
+export interface LiveEnd {
+  status: string;
+  error_message?: string | null;
+  next_seq: number;
+}
+
+export interface LiveStreamHandlers {
+  onDelta: (delta: LiveDelta) => void;
+  onEnd?: (end: LiveEnd) => void;
+  onError?: (error: unknown) => void;
+}
+
+/**
+ * 订阅任务的实时结果，返回取消订阅的函数
+ */
+export function subscribeSimulationStream(
+  taskId: string,
+  handlers: LiveStreamHandlers,
+  since = 0
+): () => void {
+  const controller = new AbortController();
+
+  const run = async () => {
+    const response = await fetch(`/api/v1/simulation/${taskId}/stream?since=${since}`, {
+      headers: {
+        'Accept': 'text/event-stream',
+        'Authorization': `Bearer ${localStorage.getItem('token')}`
+      },
+      signal: controller.signal
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`订阅实时数据失败: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary >= 0) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        let event = 'message';
+        let data = '';
+        for (const line of block.split('\n')) {
+          if (line.startsWith('event:')) event = line.slice(6).trim();
+          else if (line.startsWith('data:')) data += line.slice(5).trim();
+        }
+        if (!data) continue;
+
+        if (event === 'delta') {
+          handlers.onDelta(JSON.parse(data));
+        } else if (event === 'end') {
+          handlers.onEnd?.(JSON.parse(data));
+          return;
+        }
+      }
+    }
+  };
+
+  run().catch((error) => {
+    if (!controller.signal.aborted) {
+      handlers.onError?.(error);
+    }
+  });
+
+  return () => controller.abort();
+}